@@ -0,0 +1,49 @@
+"""add contextual rag summary cache
+
+Revision ID: a6b7c8d9e0f1
+Revises: f5a6b7c8d9e0
+Create Date: 2026-03-02 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a6b7c8d9e0f1"
+down_revision = "f5a6b7c8d9e0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "contextual_rag_summary_cache",
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("model_key", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column(
+            "time_updated",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("document_id", "fingerprint"),
+    )
+    op.create_index(
+        "ix_contextual_rag_summary_cache_doc_model",
+        "contextual_rag_summary_cache",
+        ["document_id", "model_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_contextual_rag_summary_cache_doc_model",
+        table_name="contextual_rag_summary_cache",
+    )
+    op.drop_table("contextual_rag_summary_cache")
@@ -0,0 +1,54 @@
+"""add chunk embedding cache
+
+Revision ID: c7d8e9f0a1b2
+Revises: d1e2f3a4b5c6
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d8e9f0a1b2"
+down_revision = "d1e2f3a4b5c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chunk_embedding_cache",
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("model_key", sa.String(), nullable=False),
+        sa.Column("embeddings", sa.LargeBinary(), nullable=False),
+        sa.Column("num_embeddings", sa.Integer(), nullable=False),
+        sa.Column(
+            "time_updated",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["document_id"],
+            ["document.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("document_id", "fingerprint"),
+    )
+    op.create_index(
+        "ix_chunk_embedding_cache_doc_model",
+        "chunk_embedding_cache",
+        ["document_id", "model_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_chunk_embedding_cache_doc_model", table_name="chunk_embedding_cache"
+    )
+    op.drop_table("chunk_embedding_cache")
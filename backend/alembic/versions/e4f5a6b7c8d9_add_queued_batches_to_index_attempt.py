@@ -0,0 +1,29 @@
+"""add queued_batches to index_attempt
+
+Revision ID: e4f5a6b7c8d9
+Revises: c7d8e9f0a1b2
+Create Date: 2026-02-18 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e4f5a6b7c8d9"
+down_revision = "c7d8e9f0a1b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "index_attempt",
+        sa.Column("queued_batches", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("index_attempt", "queued_batches")
@@ -0,0 +1,35 @@
+"""add tokenizer token counts to chat_message and tool_call
+
+Revision ID: f5a6b7c8d9e0
+Revises: e4f5a6b7c8d9
+Create Date: 2026-02-24 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f5a6b7c8d9e0"
+down_revision = "e4f5a6b7c8d9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chat_message",
+        sa.Column("token_counts", postgresql.JSONB(), nullable=True),
+    )
+    op.add_column(
+        "tool_call",
+        sa.Column("tool_call_response_token_counts", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tool_call", "tool_call_response_token_counts")
+    op.drop_column("chat_message", "token_counts")
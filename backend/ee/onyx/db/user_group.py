@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from ee.onyx.server.user_group.models import SetCuratorRequest
 from ee.onyx.server.user_group.models import UserGroupCreate
 from ee.onyx.server.user_group.models import UserGroupUpdate
+from onyx.access.acl_cache import bump_user_acl_version
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.enums import AccessType
 from onyx.db.enums import ConnectorCredentialPairStatus
@@ -421,6 +422,7 @@ def insert_user_group(db_session: Session, user_group: UserGroupCreate) -> UserG
     )
 
     db_session.commit()
+    bump_user_acl_version()
     return db_user_group
 
 
@@ -595,6 +597,7 @@ def update_user_curator_relationship(
 
     _validate_curator_status__no_commit(db_session, [target_user])
     db_session.commit()
+    bump_user_acl_version()
 
 
 def add_users_to_user_group(
@@ -728,6 +731,8 @@ def update_user_group(
     db_user_group.time_last_modified_by_user = func.now()
 
     db_session.commit()
+    if added_user_ids or removed_user_ids:
+        bump_user_acl_version()
     return db_user_group
 
 
@@ -770,6 +775,7 @@ def prepare_user_group_for_deletion(db_session: Session, user_group_id: int) ->
     db_user_group.is_up_to_date = False
     db_user_group.is_up_for_deletion = True
     db_session.commit()
+    bump_user_acl_version()
 
 
 def delete_user_group(db_session: Session, user_group: UserGroup) -> None:
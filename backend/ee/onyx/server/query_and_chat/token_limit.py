@@ -22,9 +22,10 @@ from onyx.db.models import User
 from onyx.db.models import User__UserGroup
 from onyx.db.models import UserGroup
 from onyx.db.token_limit import fetch_all_user_token_rate_limits
-from onyx.server.query_and_chat.token_limit import _get_cutoff_time
 from onyx.server.query_and_chat.token_limit import _is_rate_limited
 from onyx.server.query_and_chat.token_limit import _user_is_rate_limited_by_global
+from onyx.server.query_and_chat.token_limit import fetch_token_usage
+from onyx.server.query_and_chat.token_limit import GLOBAL_TOKEN_USAGE_SCOPE
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 
@@ -47,6 +48,40 @@ def _check_token_rate_limits(user: User | None) -> None:
         )
 
 
+def _get_token_usage_scopes(user_id: UUID | None, db_session: Session) -> list[str]:
+    if user_id is None:
+        return [GLOBAL_TOKEN_USAGE_SCOPE]
+
+    # counting against every group would also be correct, but only groups with rate
+    # limits are ever checked
+    user_group_ids = db_session.scalars(
+        select(User__UserGroup.user_group_id)
+        .join(
+            TokenRateLimit__UserGroup,
+            TokenRateLimit__UserGroup.user_group_id == User__UserGroup.user_group_id,
+        )
+        .where(User__UserGroup.user_id == user_id)
+        .distinct()
+    ).all()
+
+    return [
+        GLOBAL_TOKEN_USAGE_SCOPE,
+        _get_user_token_usage_scope(user_id),
+        *(
+            _get_user_group_token_usage_scope(user_group_id)
+            for user_group_id in user_group_ids
+        ),
+    ]
+
+
+def _get_user_token_usage_scope(user_id: UUID) -> str:
+    return f"user:{user_id}"
+
+
+def _get_user_group_token_usage_scope(user_group_id: int) -> str:
+    return f"user_group:{user_group_id}"
+
+
 """
 User rate limits
 """
@@ -59,8 +94,11 @@ def _user_is_rate_limited(user_id: UUID) -> None:
         )
 
         if user_rate_limits:
-            user_cutoff_time = _get_cutoff_time(user_rate_limits)
-            user_usage = _fetch_user_usage(user_id, user_cutoff_time, db_session)
+            user_usage = fetch_token_usage(
+                _get_user_token_usage_scope(user_id),
+                user_rate_limits,
+                lambda cutoff_time: _fetch_user_usage(user_id, cutoff_time, db_session),
+            )
 
             if _is_rate_limited(user_rate_limits, user_usage):
                 raise HTTPException(
@@ -98,21 +136,16 @@ def _user_is_rate_limited_by_group(user_id: UUID) -> None:
         group_rate_limits = _fetch_all_user_group_rate_limits(user_id, db_session)
 
         if group_rate_limits:
-            # Group cutoff time is the same for all groups.
-            # This could be optimized to only fetch the maximum cutoff time for
-            # a specific group, but seems unnecessary for now.
-            group_cutoff_time = _get_cutoff_time(
-                [e for sublist in group_rate_limits.values() for e in sublist]
-            )
-
-            user_group_ids = list(group_rate_limits.keys())
-            group_usage = _fetch_user_group_usage(
-                user_group_ids, group_cutoff_time, db_session
-            )
-
             has_at_least_one_untriggered_limit = False
             for user_group_id, rate_limits in group_rate_limits.items():
-                usage = group_usage.get(user_group_id, [])
+                usage = fetch_token_usage(
+                    _get_user_group_token_usage_scope(user_group_id),
+                    rate_limits,
+                    # called right away, so binding the loop variable late is fine
+                    lambda cutoff_time: _fetch_user_group_usage(
+                        [user_group_id], cutoff_time, db_session
+                    ).get(user_group_id, []),
+                )
 
                 if not _is_rate_limited(rate_limits, usage):
                     has_at_least_one_untriggered_limit = True
@@ -0,0 +1,153 @@
+import asyncio
+from collections import deque
+from collections.abc import Callable
+
+import numpy as np
+from pydantic import BaseModel
+from pydantic import ConfigDict
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+# Takes (texts, max_context_length, normalize_embeddings) and returns a 2D array with
+# one embedding per text. Always called from a worker thread, never concurrently for
+# one batcher.
+EncodeFunction = Callable[[list[str], int, bool], np.ndarray]
+
+
+class _PendingEmbedRequest(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    texts: list[str]
+    max_context_length: int
+    normalize_embeddings: bool
+    future: asyncio.Future
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests for a single model into one encode call.
+
+    Requests are queued on the event loop. A single worker task drains the queue,
+    waiting up to `max_wait_seconds` for more requests to arrive (or until
+    `max_batch_size` texts are pending), then runs one encode call in a thread for
+    the whole batch and scatters the results back to the callers. Since the worker
+    only ever runs one encode at a time, the model is never used concurrently.
+
+    Requests are never split, so a single request larger than `max_batch_size` is
+    encoded on its own. Only requests with the same context length and normalization
+    settings are merged together.
+    """
+
+    def __init__(
+        self,
+        encode_fn: EncodeFunction,
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ) -> None:
+        self._encode_fn = encode_fn
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+
+        self._pending: deque[_PendingEmbedRequest] = deque()
+        self._num_pending_texts = 0
+        self._batch_full: asyncio.Future | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def embed(
+        self,
+        texts: list[str],
+        max_context_length: int,
+        normalize_embeddings: bool,
+    ) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        request = _PendingEmbedRequest(
+            texts=texts,
+            max_context_length=max_context_length,
+            normalize_embeddings=normalize_embeddings,
+            future=loop.create_future(),
+        )
+        self._pending.append(request)
+        self._num_pending_texts += len(texts)
+
+        if (
+            self._num_pending_texts >= self._max_batch_size
+            and self._batch_full is not None
+            and not self._batch_full.done()
+        ):
+            self._batch_full.set_result(None)
+
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._process_pending())
+
+        return await request.future
+
+    def _take_batch(self) -> list[_PendingEmbedRequest]:
+        """Pops the next group of compatible requests off the queue, oldest first."""
+        first = self._pending[0]
+        batch: list[_PendingEmbedRequest] = []
+        batch_size = 0
+        remaining: deque[_PendingEmbedRequest] = deque()
+
+        while self._pending:
+            request = self._pending.popleft()
+            compatible = (
+                request.max_context_length == first.max_context_length
+                and request.normalize_embeddings == first.normalize_embeddings
+            )
+            fits = not batch or batch_size + len(request.texts) <= self._max_batch_size
+            if compatible and fits:
+                batch.append(request)
+                batch_size += len(request.texts)
+            else:
+                remaining.append(request)
+
+        self._pending = remaining
+        self._num_pending_texts -= batch_size
+        return batch
+
+    async def _encode_batch(self, batch: list[_PendingEmbedRequest]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                None,
+                self._encode_fn,
+                texts,
+                batch[0].max_context_length,
+                batch[0].normalize_embeddings,
+            )
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Expected {len(texts)} embeddings from the model, "
+                    f"got {len(embeddings)}"
+                )
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            num_texts = len(request.texts)
+            if not request.future.done():
+                request.future.set_result(embeddings[offset : offset + num_texts])
+            offset += num_texts
+
+    async def _process_pending(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            # give concurrent requests a brief window to join this batch
+            if self._num_pending_texts < self._max_batch_size:
+                self._batch_full = loop.create_future()
+                await asyncio.wait({self._batch_full}, timeout=self._max_wait_seconds)
+                self._batch_full = None
+
+            batch = self._take_batch()
+            logger.debug(
+                f"Encoding coalesced batch: requests={len(batch)} "
+                f"texts={sum(len(request.texts) for request in batch)}"
+            )
+            await self._encode_batch(batch)
@@ -1,18 +1,26 @@
-import asyncio
 import time
-from typing import Any
+from functools import partial
 from typing import TYPE_CHECKING
 
+import numpy as np
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 
+from model_server.embedding_batcher import EmbeddingBatcher
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
+from shared_configs.configs import MODEL_SERVER_EMBED_MAX_BATCH_SIZE
+from shared_configs.configs import MODEL_SERVER_EMBED_MAX_BATCH_WAIT_MS
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
+from shared_configs.model_server_models import EMBEDDINGS_BINARY_CONTENT_TYPE
+from shared_configs.model_server_models import EMBEDDINGS_COUNT_HEADER
+from shared_configs.model_server_models import EMBEDDINGS_DIM_HEADER
 from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
+from shared_configs.utils import embeddings_to_bytes
 
 if TYPE_CHECKING:
     from sentence_transformers import SentenceTransformer
@@ -78,36 +86,45 @@ def get_embedding_model(
     return _GLOBAL_MODELS_DICT[model_name]
 
 
-ENCODING_RETRIES = 3
-ENCODING_RETRY_DELAY = 0.1
+_GLOBAL_EMBEDDING_BATCHERS: dict[str, EmbeddingBatcher] = {}
 
 
-def _concurrent_embedding(
-    texts: list[str], model: "SentenceTransformer", normalize_embeddings: bool
-) -> Any:
-    """Synchronous wrapper for concurrent_embedding to use with run_in_executor."""
-    for _ in range(ENCODING_RETRIES):
-        try:
-            return model.encode(texts, normalize_embeddings=normalize_embeddings)
-        except RuntimeError as e:
-            # There is a concurrency bug in the SentenceTransformer library that causes
-            # the model to fail to encode texts. It's pretty rare and we want to allow
-            # concurrent embedding, hence we retry (the specific error is
-            # "RuntimeError: Already borrowed" and occurs in the transformers library)
-            logger.warning(f"Error encoding texts, retrying: {e}")
-            time.sleep(ENCODING_RETRY_DELAY)
-    return model.encode(texts, normalize_embeddings=normalize_embeddings)
+def _encode_texts(
+    model_name: str,
+    texts: list[str],
+    max_context_length: int,
+    normalize_embeddings: bool,
+) -> np.ndarray:
+    """Blocking encode call, run by the model's batcher in a worker thread."""
+    model = get_embedding_model(
+        model_name=model_name, max_context_length=max_context_length
+    )
+    return np.asarray(model.encode(texts, normalize_embeddings=normalize_embeddings))
+
+
+def get_embedding_batcher(model_name: str) -> EmbeddingBatcher:
+    """
+    One batcher per model, so concurrent requests for a model share encode calls and
+    the (not thread-safe) tokenizer is never used from two threads at once.
+    """
+    if model_name not in _GLOBAL_EMBEDDING_BATCHERS:
+        _GLOBAL_EMBEDDING_BATCHERS[model_name] = EmbeddingBatcher(
+            encode_fn=partial(_encode_texts, model_name),
+            max_batch_size=MODEL_SERVER_EMBED_MAX_BATCH_SIZE,
+            max_wait_seconds=MODEL_SERVER_EMBED_MAX_BATCH_WAIT_MS / 1000,
+        )
+    return _GLOBAL_EMBEDDING_BATCHERS[model_name]
 
 
 @simple_log_function_time()
-async def embed_text(
+async def embed_text_as_array(
     texts: list[str],
     model_name: str | None,
     max_context_length: int,
     normalize_embeddings: bool,
     prefix: str | None,
     gpu_type: str = "UNKNOWN",
-) -> list[Embedding]:
+) -> np.ndarray:
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -132,20 +149,12 @@ async def embed_text(
 
         prefixed_texts = [f"{prefix}{text}" for text in texts] if prefix else texts
 
-        local_model = get_embedding_model(
-            model_name=model_name, max_context_length=max_context_length
+        # Concurrent requests for this model are merged into one encode call
+        embeddings = await get_embedding_batcher(model_name).embed(
+            texts=prefixed_texts,
+            max_context_length=max_context_length,
+            normalize_embeddings=normalize_embeddings,
         )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: _concurrent_embedding(
-                prefixed_texts, local_model, normalize_embeddings
-            ),
-        )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -167,17 +176,29 @@ async def embed_text(
     return embeddings
 
 
-@router.post("/bi-encoder-embed")
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
-    return await process_embed_request(embed_request, request.app.state.gpu_type)
+) -> EmbedResponse | Response:
+    return await process_embed_request(
+        embed_request,
+        request.app.state.gpu_type,
+        binary_response=EMBEDDINGS_BINARY_CONTENT_TYPE
+        in request.headers.get("accept", ""),
+    )
 
 
 async def process_embed_request(
-    embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
-) -> EmbedResponse:
+    embed_request: EmbedRequest,
+    gpu_type: str = "UNKNOWN",
+    binary_response: bool = False,
+) -> EmbedResponse | Response:
+    """
+    If `binary_response` is set, the embeddings are returned as a raw float32 buffer
+    (see EMBEDDINGS_BINARY_CONTENT_TYPE) rather than JSON, which is much cheaper to
+    serialize and parse for large batches.
+    """
     from litellm.exceptions import RateLimitError
 
     # Only local models should use this endpoint - API providers should make direct API calls
@@ -201,7 +222,7 @@ async def process_embed_request(
         else:
             prefix = None
 
-        embeddings = await embed_text(
+        embeddings = await embed_text_as_array(
             texts=embed_request.texts,
             model_name=embed_request.model_name,
             max_context_length=embed_request.max_context_length,
@@ -209,7 +230,17 @@ async def process_embed_request(
             prefix=prefix,
             gpu_type=gpu_type,
         )
-        return EmbedResponse(embeddings=embeddings)
+        if binary_response:
+            count, dim = embeddings.shape
+            return Response(
+                content=embeddings_to_bytes(embeddings),
+                media_type=EMBEDDINGS_BINARY_CONTENT_TYPE,
+                headers={
+                    EMBEDDINGS_COUNT_HEADER: str(count),
+                    EMBEDDINGS_DIM_HEADER: str(dim),
+                },
+            )
+        return EmbedResponse(embeddings=embeddings.tolist())
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
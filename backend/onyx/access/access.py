@@ -4,6 +4,7 @@ from typing import cast
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import Session
 
+from onyx.access.acl_cache import get_cached_acl_for_user
 from onyx.access.models import DocumentAccess
 from onyx.access.utils import prefix_user_email
 from onyx.configs.constants import DocumentSource
@@ -111,7 +112,10 @@ def get_acl_for_user(user: User | None, db_session: Session | None = None) -> se
     versioned_acl_for_user_fn = fetch_versioned_implementation(
         "onyx.access.access", "_get_acl_for_user"
     )
-    return versioned_acl_for_user_fn(user, db_session)
+    # group lookups hit Postgres, and a single chat turn can run many searches
+    return get_cached_acl_for_user(
+        user, lambda: versioned_acl_for_user_fn(user, db_session)
+    )
 
 
 def source_should_fetch_permissions_during_indexing(source: DocumentSource) -> bool:
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import cast
+
+from onyx.configs.app_configs import USER_ACL_CACHE_TTL_SECONDS
+from onyx.configs.constants import OnyxRedisConstants
+from onyx.db.models import User
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+_MAX_CACHED_USERS = 10_000
+_ANONYMOUS_USER_KEY = "__anonymous__"
+
+# (tenant_id, user_id) -> (acl version, expiry as monotonic time, acl)
+_user_acl_cache: OrderedDict[tuple[str, str], tuple[int, float, frozenset[str]]] = (
+    OrderedDict()
+)
+_user_acl_cache_lock = threading.Lock()
+
+
+def get_user_acl_version() -> int | None:
+    """Returns the current tenant's ACL version, or None if it can't be read in which
+    case ACLs should not be served from the cache."""
+    try:
+        version = cast(
+            bytes | None, get_redis_client().get(OnyxRedisConstants.USER_ACL_VERSION)
+        )
+    except Exception:
+        logger.exception("Failed to read the user ACL version from Redis")
+        return None
+
+    return int(version) if version is not None else 0
+
+
+def bump_user_acl_version() -> None:
+    """Invalidates every cached user ACL for the current tenant. Call this after
+    committing any change to user group or external group membership."""
+    try:
+        get_redis_client().incr(OnyxRedisConstants.USER_ACL_VERSION)
+    except Exception:
+        # cached ACLs will still expire after USER_ACL_CACHE_TTL_SECONDS
+        logger.exception("Failed to bump the user ACL version in Redis")
+
+
+def get_cached_acl_for_user(
+    user: User | None, compute_acl: Callable[[], set[str]]
+) -> set[str]:
+    """Returns the user's ACL from the in-process cache if it is still current,
+    otherwise computes it with `compute_acl` and caches the result."""
+    if USER_ACL_CACHE_TTL_SECONDS <= 0:
+        return compute_acl()
+
+    version = get_user_acl_version()
+    if version is None:
+        return compute_acl()
+
+    key = (get_current_tenant_id(), str(user.id) if user else _ANONYMOUS_USER_KEY)
+    now = time.monotonic()
+    with _user_acl_cache_lock:
+        entry = _user_acl_cache.get(key)
+        if entry is not None:
+            cached_version, expires_at, cached_acl = entry
+            if cached_version == version and expires_at > now:
+                _user_acl_cache.move_to_end(key)
+                return set(cached_acl)
+
+    acl = compute_acl()
+    with _user_acl_cache_lock:
+        _user_acl_cache[key] = (
+            version,
+            now + USER_ACL_CACHE_TTL_SECONDS,
+            frozenset(acl),
+        )
+        _user_acl_cache.move_to_end(key)
+        while len(_user_acl_cache) > _MAX_CACHED_USERS:
+            _user_acl_cache.popitem(last=False)
+
+    return acl
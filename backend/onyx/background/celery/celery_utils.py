@@ -38,18 +38,17 @@ def document_batch_to_ids(
         yield {doc.id for doc in doc_list}
 
 
-def extract_ids_from_runnable_connector(
+def iterate_ids_from_runnable_connector(
     runnable_connector: BaseConnector,
     callback: IndexingHeartbeatInterface | None = None,
-) -> set[str]:
+) -> Generator[set[str], None, None]:
     """
-    If the given connector is neither a SlimConnector nor a SlimConnectorWithPermSync, just pull
+    Yields the IDs of all docs in the connector, one batch at a time. If the given
+    connector is neither a SlimConnector nor a SlimConnectorWithPermSync, just pull
     all docs using the load_from_state and grab out the IDs.
 
     Optionally, a callback can be passed to handle the length of each document batch.
     """
-    all_connector_doc_ids: set[str] = set()
-
     doc_batch_id_generator = None
     if isinstance(runnable_connector, SlimConnector):
         doc_batch_id_generator = document_batch_to_ids(
@@ -96,15 +95,13 @@ def extract_ids_from_runnable_connector(
         if callback:
             if callback.should_stop():
                 raise RuntimeError(
-                    "extract_ids_from_runnable_connector: Stop signal detected"
+                    "iterate_ids_from_runnable_connector: Stop signal detected"
                 )
 
-        all_connector_doc_ids.update(doc_batch_processing_func(doc_batch_ids))
+        yield doc_batch_processing_func(doc_batch_ids)
 
         if callback:
-            callback.progress("extract_ids_from_runnable_connector", len(doc_batch_ids))
-
-    return all_connector_doc_ids
+            callback.progress("iterate_ids_from_runnable_connector", len(doc_batch_ids))
 
 
 def celery_is_listening_to_queue(worker: Any, name: str) -> bool:
@@ -42,6 +42,7 @@ from onyx.background.indexing.checkpointing_utils import (
 from onyx.background.indexing.index_attempt_utils import cleanup_index_attempts
 from onyx.background.indexing.index_attempt_utils import get_old_index_attempts
 from onyx.configs.app_configs import AUTH_TYPE
+from onyx.configs.app_configs import ENABLE_CHUNK_EMBEDDING_REUSE
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
@@ -329,6 +330,7 @@ def monitor_indexing_attempt_progress(
             f"search_settings={attempt.search_settings_id} "
             f"completed_batches={coordination_status.completed_batches} "
             f"total_batches={coordination_status.total_batches or '?'} "
+            f"in_flight_batches={coordination_status.in_flight_batches} "
             f"total_docs={coordination_status.total_docs} "
             f"total_failures={coordination_status.total_failures}"
             f"elapsed={(current_db_time - attempt.time_created).seconds}"
@@ -1434,6 +1436,7 @@ def _docprocessing_task(
             embedding_model = DefaultIndexingEmbedder.from_db_search_settings(
                 search_settings=index_attempt.search_settings,
                 callback=callback,
+                reuse_cached_embeddings=ENABLE_CHUNK_EMBEDDING_REUSE,
             )
 
             document_index = get_default_document_index(
@@ -1557,6 +1560,7 @@ def _docprocessing_task(
                 "source": index_attempt.connector_credential_pair.connector.source.value,
                 "completed_batches": coordination_status.completed_batches,
                 "total_batches": coordination_status.total_batches,
+                "in_flight_batches": coordination_status.in_flight_batches,
             },
             tenant_id=tenant_id,
         )
@@ -20,7 +20,7 @@ from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_queue_length
 from onyx.background.celery.celery_redis import celery_get_queued_task_ids
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
-from onyx.background.celery.celery_utils import extract_ids_from_runnable_connector
+from onyx.background.celery.celery_utils import iterate_ids_from_runnable_connector
 from onyx.background.celery.tasks.beat_schedule import CLOUD_BEAT_MULTIPLIER_DEFAULT
 from onyx.background.celery.tasks.docprocessing.utils import IndexingCallbackBase
 from onyx.configs.app_configs import ALLOW_SIMULTANEOUS_PRUNING
@@ -41,7 +41,13 @@ from onyx.db.connector import mark_ccpair_as_pruned
 from onyx.db.connector_credential_pair import get_connector_credential_pair
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
-from onyx.db.document import get_documents_for_connector_credential_pair
+from onyx.db.document import create_source_document_id_staging_table__no_commit
+from onyx.db.document import drop_source_document_id_staging_table__no_commit
+from onyx.db.document import get_document_ids_missing_from_source
+from onyx.db.document import stage_source_document_ids__no_commit
+from onyx.db.engine.sql_engine import (
+    get_connection_bound_session_with_current_tenant,
+)
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.enums import ConnectorCredentialPairStatus
 from onyx.db.enums import SyncStatus
@@ -525,23 +531,39 @@ def connector_pruning_generator_task(
                 r,
             )
 
-            # a list of docs in the source
-            all_connector_doc_ids: set[str] = extract_ids_from_runnable_connector(
-                runnable_connector, callback
-            )
-
-            # a list of docs in our local index
-            all_indexed_document_ids = {
-                doc.id
-                for doc in get_documents_for_connector_credential_pair(
-                    db_session=db_session,
-                    connector_id=connector_id,
-                    credential_id=credential_id,
+            # Stage the ids of the docs in the source in a temp table as they are
+            # retrieved, then find the indexed docs that are no longer in the source
+            # with a single anti-join. Each batch is committed as it is staged so no
+            # transaction stays open while the connector runs; the temp table is
+            # kept on the staging session's connection in between.
+            # db_session's snapshot must not be held while the connector runs either
+            db_session.commit()
+            with get_connection_bound_session_with_current_tenant() as staging_session:
+                staging_table = create_source_document_id_staging_table__no_commit(
+                    staging_session
                 )
-            }
-
-            # generate list of docs to remove (no longer in the source)
-            doc_ids_to_remove = list(all_indexed_document_ids - all_connector_doc_ids)
+                staging_session.commit()
+                try:
+                    for doc_batch_ids in iterate_ids_from_runnable_connector(
+                        runnable_connector, callback
+                    ):
+                        stage_source_document_ids__no_commit(
+                            staging_session, staging_table, doc_batch_ids
+                        )
+                        staging_session.commit()
+
+                    doc_ids_to_remove = get_document_ids_missing_from_source(
+                        db_session=staging_session,
+                        connector_id=connector_id,
+                        credential_id=credential_id,
+                        staging_table=staging_table,
+                    )
+                finally:
+                    staging_session.rollback()
+                    drop_source_document_id_staging_table__no_commit(
+                        staging_session, staging_table
+                    )
+                    staging_session.commit()
 
             task_logger.info(
                 "Pruning set collected: "
@@ -554,7 +576,7 @@ def connector_pruning_generator_task(
                 f"RedisConnector.prune.generate_tasks starting. cc_pair={cc_pair_id}"
             )
             tasks_generated = redis_connector.prune.generate_tasks(
-                set(doc_ids_to_remove), self.app, db_session, None
+                doc_ids_to_remove, self.app, db_session, None
             )
             if tasks_generated is None:
                 return None
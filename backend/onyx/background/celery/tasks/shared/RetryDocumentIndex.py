@@ -4,6 +4,7 @@ from tenacity import retry_if_exception_type
 from tenacity import stop_after_delay
 from tenacity import wait_random_exponential
 
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.document_index.interfaces import VespaDocumentUserFields
@@ -42,6 +43,19 @@ class RetryDocumentIndex:
             chunk_count=chunk_count,
         )
 
+    @retry(
+        retry=retry_if_exception_type(httpx.ReadTimeout),
+        wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
+        stop=stop_after_delay(STOP_AFTER),
+    )
+    def delete(
+        self,
+        doc_ids: list[str],
+        *,
+        tenant_id: str,
+    ) -> int:
+        return self.index.delete(doc_ids, tenant_id=tenant_id)
+
     @retry(
         retry=retry_if_exception_type(httpx.ReadTimeout),
         wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
@@ -63,3 +77,16 @@ class RetryDocumentIndex:
             fields=fields,
             user_fields=user_fields,
         )
+
+    @retry(
+        retry=retry_if_exception_type(httpx.ReadTimeout),
+        wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
+        stop=stop_after_delay(STOP_AFTER),
+    )
+    def update_batch(
+        self,
+        updates: list[DocumentFieldsUpdate],
+        *,
+        tenant_id: str,
+    ) -> dict[str, Exception]:
+        return self.index.update_batch(updates, tenant_id=tenant_id)
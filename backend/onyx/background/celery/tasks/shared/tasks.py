@@ -10,22 +10,31 @@ from redis import Redis
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
+from onyx.access.access import get_null_document_access
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.configs.constants import ONYX_CELERY_BEAT_HEARTBEAT_KEY
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.db.document import delete_document_by_connector_credential_pair__no_commit
+from onyx.db.document import delete_documents_by_connector_credential_pair__no_commit
 from onyx.db.document import delete_documents_complete__no_commit
 from onyx.db.document import fetch_chunk_count_for_document
 from onyx.db.document import get_document
 from onyx.db.document import get_document_connector_count
+from onyx.db.document import get_document_connector_counts
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_modified
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
+from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.relationships import delete_document_references_from_kg
 from onyx.db.search_settings import get_active_search_settings
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
 from onyx.redis.redis_pool import get_redis_client
@@ -38,6 +47,10 @@ DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES = 3
 LIGHT_SOFT_TIME_LIMIT = 105
 LIGHT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT + 15
 
+# A batch task cleans up many documents, so it gets more time than a light task
+CLEANUP_BATCH_SOFT_TIME_LIMIT = 300
+CLEANUP_BATCH_TIME_LIMIT = CLEANUP_BATCH_SOFT_TIME_LIMIT + 15
+
 
 class OnyxCeleryTaskCompletionStatus(str, Enum):
     """The different statuses the watchdog can finish with.
@@ -266,6 +279,228 @@ def document_by_cc_pair_cleanup_task(
     return True
 
 
+def unwrap_retry_error(ex: Exception) -> Exception:
+    if isinstance(ex, RetryError):
+        # only use the inner exception if it is of type Exception
+        inner = ex.last_attempt.exception()
+        if isinstance(inner, Exception):
+            return inner
+    return ex
+
+
+@shared_task(
+    name=OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+    soft_time_limit=CLEANUP_BATCH_SOFT_TIME_LIMIT,
+    time_limit=CLEANUP_BATCH_TIME_LIMIT,
+    max_retries=DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES,
+    bind=True,
+)
+def document_by_cc_pair_cleanup_batch_task(
+    self: Task,
+    document_ids: list[str],
+    connector_id: int,
+    credential_id: int,
+    tenant_id: str,
+) -> bool:
+    """Cleans up the document to cc pair relationships of a batch of documents, like
+    document_by_cc_pair_cleanup_task. Created by connection deletion and connector
+    pruning parent tasks.
+
+    Documents only referenced by this cc_pair are deleted from the document index
+    with a single delete for the whole batch, which selects their chunks by document
+    id, and then from postgres together. The other documents are updated in the index
+    with one batched update and lose their reference to the cc_pair. Documents that
+    failed with a retryable error are retried in a new attempt of this task."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    num_deleted = 0
+    num_updated = 0
+    num_non_retryable_failures = 0
+    # documents to clean up in the next attempt of this task, and why
+    retry_doc_ids: list[str] = []
+    retry_exception: Exception | None = None
+
+    cc_pair_identifier = ConnectorCredentialPairIdentifier(
+        connector_id=connector_id,
+        credential_id=credential_id,
+    )
+
+    def _handle_failure(doc_ids: list[str], error: Exception) -> None:
+        nonlocal num_non_retryable_failures, retry_exception
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code == HTTPStatus.BAD_REQUEST:
+                task_logger.error(
+                    f"Non-retryable HTTPStatusError: "
+                    f"docs={doc_ids} "
+                    f"status={error.response.status_code}"
+                )
+            num_non_retryable_failures += len(doc_ids)
+            return
+
+        task_logger.error(
+            f"document_by_cc_pair_cleanup_batch_task failed: docs={doc_ids} "
+            f"error={error!r}"
+        )
+        retry_doc_ids.extend(doc_ids)
+        retry_exception = error
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                active_search_settings.primary,
+                active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            doc_id_to_count = dict(
+                get_document_connector_counts(db_session, document_ids)
+            )
+            # count == 1 means this is the only remaining cc_pair reference to the doc
+            doc_ids_to_delete = [
+                doc_id for doc_id in document_ids if doc_id_to_count.get(doc_id) == 1
+            ]
+            # count > 1 means the document still has cc_pair references
+            doc_ids_to_update = [
+                doc_id for doc_id in document_ids if doc_id_to_count.get(doc_id, 0) > 1
+            ]
+
+            if doc_ids_to_delete:
+                try:
+                    retry_index.delete(doc_ids_to_delete, tenant_id=tenant_id)
+                except Exception as ex:
+                    _handle_failure(doc_ids_to_delete, unwrap_retry_error(ex))
+                else:
+                    delete_documents_complete__no_commit(
+                        db_session=db_session,
+                        document_ids=doc_ids_to_delete,
+                    )
+                    db_session.commit()
+                    num_deleted = len(doc_ids_to_delete)
+
+            if doc_ids_to_update:
+                # the below functions do not include cc_pairs being deleted.
+                # i.e. they will correctly omit access for the current cc_pair
+                docs = get_documents_by_ids(db_session, doc_ids_to_update)
+                found_doc_ids = [doc.id for doc in docs]
+                doc_id_to_doc_sets = dict(
+                    fetch_document_sets_for_documents(found_doc_ids, db_session)
+                )
+                # docs without a source are omitted; they fall back to no access
+                doc_id_to_access = get_access_for_documents(found_doc_ids, db_session)
+
+                # OK if a doc doesn't exist in the index
+                failures = retry_index.update_batch(
+                    [
+                        DocumentFieldsUpdate(
+                            doc_id=doc.id,
+                            chunk_count=doc.chunk_count,
+                            fields=VespaDocumentFields(
+                                document_sets=set(doc_id_to_doc_sets.get(doc.id, [])),
+                                access=doc_id_to_access.get(
+                                    doc.id, get_null_document_access()
+                                ),
+                                boost=doc.boost,
+                                hidden=doc.hidden,
+                            ),
+                        )
+                        for doc in docs
+                    ],
+                    tenant_id=tenant_id,
+                )
+                for doc_id, error in failures.items():
+                    _handle_failure([doc_id], error)
+
+                # there are still other cc_pair references to these docs, so just
+                # remove the reference to this cc_pair
+                updated_doc_ids = [
+                    doc_id for doc_id in found_doc_ids if doc_id not in failures
+                ]
+                delete_documents_by_connector_credential_pair__no_commit(
+                    db_session=db_session,
+                    document_ids=updated_doc_ids,
+                    connector_credential_pair_identifier=cc_pair_identifier,
+                )
+                mark_documents_as_synced(updated_doc_ids, db_session)
+                num_updated = len(updated_doc_ids)
+
+        if retry_exception is not None:
+            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        elif num_non_retryable_failures > 0:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        else:
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(
+            f"SoftTimeLimitExceeded exception. num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        task_logger.exception(
+            f"document_by_cc_pair_cleanup_batch_task exceptioned: "
+            f"num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        retry_doc_ids = document_ids
+        retry_exception = unwrap_retry_error(ex)
+
+    if (
+        retry_exception is not None
+        and self.max_retries is not None
+        and self.request.retries >= self.max_retries
+    ):
+        # This is the last attempt! mark the documents as dirty in the db so that they
+        # eventually get fixed out of band via stale document reconciliation
+        task_logger.warning(
+            f"Max celery task retries reached. "
+            f"Marking docs as dirty for reconciliation: num_docs={len(retry_doc_ids)}"
+        )
+        with get_session_with_current_tenant() as db_session:
+            # delete the cc pair relationship now and let reconciliation clean it up
+            # in vespa
+            delete_documents_by_connector_credential_pair__no_commit(
+                db_session=db_session,
+                document_ids=retry_doc_ids,
+                connector_credential_pair_identifier=cc_pair_identifier,
+            )
+            update_docs_last_modified__no_commit(retry_doc_ids, db_session)
+            db_session.commit()
+        completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        retry_exception = None
+
+    elapsed = time.monotonic() - start
+    task_logger.info(
+        f"document_by_cc_pair_cleanup_batch_task completed: "
+        f"status={completion_status.value} "
+        f"num_docs={len(document_ids)} "
+        f"num_deleted={num_deleted} "
+        f"num_updated={num_updated} "
+        f"num_to_retry={len(retry_doc_ids)} "
+        f"elapsed={elapsed:.2f}"
+    )
+
+    if retry_exception is not None:
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        countdown = 2 ** (self.request.retries + 4)
+        # only the documents that failed are cleaned up again.
+        # this will raise a celery exception
+        self.retry(
+            kwargs=dict(
+                document_ids=retry_doc_ids,
+                connector_id=connector_id,
+                credential_id=credential_id,
+                tenant_id=tenant_id,
+            ),
+            exc=retry_exception,
+            countdown=countdown,
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
 @shared_task(name=OnyxCeleryTask.CELERY_BEAT_HEARTBEAT, ignore_result=True, bind=True)
 def celery_beat_heartbeat(self: Task, *, tenant_id: str) -> None:
     """When this task runs, it writes a key to Redis with a TTL.
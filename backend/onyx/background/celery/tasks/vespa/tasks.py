@@ -1,5 +1,7 @@
 import time
 from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
 from http import HTTPStatus
 from typing import Any
 from typing import cast
@@ -15,11 +17,14 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
+from onyx.access.access import get_null_document_access
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import LIGHT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import OnyxCeleryTaskCompletionStatus
+from onyx.background.celery.tasks.shared.tasks import unwrap_retry_error
 from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_FENCE_KEY
 from onyx.background.celery.tasks.vespa.document_sync import get_document_sync_payload
 from onyx.background.celery.tasks.vespa.document_sync import get_document_sync_remaining
@@ -34,10 +39,13 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -50,6 +58,7 @@ from onyx.db.sync_record import cleanup_sync_records
 from onyx.db.sync_record import insert_sync_record
 from onyx.db.sync_record import update_sync_record_status
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
 from onyx.redis.redis_document_set import RedisDocumentSet
@@ -67,6 +76,11 @@ from onyx.utils.variable_functionality import noop_fallback
 
 logger = setup_logger()
 
+# A batch task updates many documents, so it gets more time than a light task.
+# RetryDocumentIndex may still take up to its STOP_AFTER on any single document.
+VESPA_SYNC_BATCH_SOFT_TIME_LIMIT = 300
+VESPA_SYNC_BATCH_TIME_LIMIT = VESPA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
 
 # celery auto associates tasks created inside another task,
 # which bloats the result metadata considerably. trail=False prevents this.
@@ -458,6 +472,9 @@ def monitor_document_set_taskset(
     max_retries=3,
 )
 def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) -> bool:
+    """Syncs a single document. Sync tasks are now generated in batches, see
+    vespa_metadata_sync_batch_task; this is kept so that already queued tasks
+    still run."""
     start = time.monotonic()
 
     completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
@@ -571,3 +588,145 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         )
 
     return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Syncs the document sets, access and boost of a batch of documents to the
+    document index.
+
+    Document sets and access are fetched with one query each for the whole batch,
+    the chunks of all the documents are updated with one batched update of the index
+    and the synced documents are marked with a single UPDATE. Documents that failed
+    with a retryable error are retried in a new attempt of this task."""
+    start = time.monotonic()
+    # Anything modified after this point must be synced again
+    sync_start = datetime.now(timezone.utc)
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    num_synced = 0
+    num_non_retryable_failures = 0
+    # documents to sync in the next attempt of this task, and why
+    retry_doc_ids: list[str] = []
+    retry_exception: Exception | None = None
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                search_settings=active_search_settings.primary,
+                secondary_search_settings=active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            # documents that no longer exist are skipped
+            docs = get_documents_by_ids(db_session, document_ids)
+            found_doc_ids = [doc.id for doc in docs]
+            doc_id_to_doc_sets = dict(
+                fetch_document_sets_for_documents(found_doc_ids, db_session)
+            )
+            # docs without a source are omitted; they fall back to no access
+            doc_id_to_access = get_access_for_documents(found_doc_ids, db_session)
+
+            # OK if a doc doesn't exist in the index
+            failures = retry_index.update_batch(
+                [
+                    DocumentFieldsUpdate(
+                        doc_id=doc.id,
+                        chunk_count=doc.chunk_count,
+                        fields=VespaDocumentFields(
+                            document_sets=set(doc_id_to_doc_sets.get(doc.id, [])),
+                            access=doc_id_to_access.get(
+                                doc.id, get_null_document_access()
+                            ),
+                            boost=doc.boost,
+                            hidden=doc.hidden,
+                        ),
+                    )
+                    for doc in docs
+                ],
+                tenant_id=tenant_id,
+            )
+
+            synced_doc_ids: list[str] = []
+            for doc_id in found_doc_ids:
+                error = failures.get(doc_id)
+                if error is None:
+                    synced_doc_ids.append(doc_id)
+                elif isinstance(error, httpx.HTTPStatusError):
+                    task_logger.error(
+                        f"Non-retryable HTTPStatusError: "
+                        f"doc={doc_id} "
+                        f"status={error.response.status_code}"
+                    )
+                    num_non_retryable_failures += 1
+                else:
+                    task_logger.error(
+                        f"vespa_metadata_sync_batch_task failed to sync doc={doc_id}: {error!r}"
+                    )
+                    retry_doc_ids.append(doc_id)
+                    retry_exception = error
+
+            # update db last. Worst case = we crash right before this and
+            # the sync might repeat again later
+            mark_documents_as_synced(synced_doc_ids, db_session, synced_at=sync_start)
+            num_synced = len(synced_doc_ids)
+
+        if retry_exception is not None:
+            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        elif num_non_retryable_failures > 0:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        else:
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(
+            f"SoftTimeLimitExceeded exception. num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        task_logger.exception(
+            f"vespa_metadata_sync_batch_task exceptioned: num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        retry_doc_ids = document_ids
+        retry_exception = unwrap_retry_error(ex)
+    finally:
+        if (
+            retry_exception is not None
+            and self.max_retries is not None
+            and self.request.retries >= self.max_retries
+        ):
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+
+        elapsed = time.monotonic() - start
+        task_logger.info(
+            f"vespa_metadata_sync_batch_task completed: "
+            f"status={completion_status.value} "
+            f"num_docs={len(document_ids)} "
+            f"num_synced={num_synced} "
+            f"num_to_retry={len(retry_doc_ids)} "
+            f"elapsed={elapsed:.2f}"
+        )
+
+    if retry_exception is not None:
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        countdown = 2 ** (self.request.retries + 4)
+        # only the documents that failed are synced again.
+        # this will raise a celery exception
+        self.retry(
+            kwargs=dict(document_ids=retry_doc_ids, tenant_id=tenant_id),
+            exc=retry_exception,
+            countdown=countdown,
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
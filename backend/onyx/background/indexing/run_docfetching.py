@@ -19,6 +19,7 @@ from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
 from onyx.configs.app_configs import INTEGRATION_TESTS_MODE
 from onyx.configs.app_configs import LEAVE_CONNECTOR_ACTIVE_ON_INITIALIZATION_FAILURE
 from onyx.configs.app_configs import MAX_FILE_SIZE_BYTES
+from onyx.configs.app_configs import MAX_IN_FLIGHT_DOCPROCESSING_BATCHES
 from onyx.configs.app_configs import POLL_CONNECTOR_OFFSET
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
@@ -62,6 +63,9 @@ logger = setup_logger(propagate=False)
 
 INDEXING_TRACER_NUM_PRINT_ENTRIES = 5
 
+# how often to check whether docprocessing has caught up while docfetching is paused
+DOCPROCESSING_BACKPRESSURE_POLL_INTERVAL = 5
+
 
 def _get_connector_runner(
     db_session: Session,
@@ -218,6 +222,63 @@ def _check_connector_and_attempt_status(
         raise RuntimeError(f"Index attempt {index_attempt_id} has no celery task id")
 
 
+def _wait_for_docprocessing_capacity(
+    cc_pair_id: int,
+    search_settings_status: IndexModelStatus,
+    index_attempt_id: int,
+    queued_batches: int,
+    callback: IndexingHeartbeatInterface | None,
+) -> None:
+    """
+    Records the number of batches queued for docprocessing, then blocks while
+    MAX_IN_FLIGHT_DOCPROCESSING_BATCHES or more of them are still unprocessed.
+    Raises if the connector or index attempt is stopped while waiting.
+    """
+    wait_start: float | None = None
+    while True:
+        with get_session_with_current_tenant() as db_session_temp:
+            in_flight_batches = IndexingCoordination.update_queued_batches(
+                db_session_temp, index_attempt_id, queued_batches
+            )
+            if (
+                MAX_IN_FLIGHT_DOCPROCESSING_BATCHES <= 0
+                or in_flight_batches < MAX_IN_FLIGHT_DOCPROCESSING_BATCHES
+            ):
+                if wait_start is not None:
+                    logger.info(
+                        f"Docprocessing caught up, resuming docfetching: "
+                        f"attempt={index_attempt_id} "
+                        f"in_flight_batches={in_flight_batches} "
+                        f"waited={time.monotonic() - wait_start:.2f}s"
+                    )
+                return
+
+            _check_connector_and_attempt_status(
+                db_session_temp,
+                cc_pair_id,
+                search_settings_status,
+                index_attempt_id,
+            )
+
+        if wait_start is None:
+            wait_start = time.monotonic()
+            logger.info(
+                f"Too many batches waiting for docprocessing, pausing docfetching: "
+                f"attempt={index_attempt_id} "
+                f"in_flight_batches={in_flight_batches} "
+                f"max={MAX_IN_FLIGHT_DOCPROCESSING_BATCHES}"
+            )
+
+        if callback:
+            if callback.should_stop():
+                raise ConnectorStopSignal("Connector stop signal detected")
+
+            # keep-alive while paused
+            callback.progress("_wait_for_docprocessing_capacity", 0)
+
+        time.sleep(DOCPROCESSING_BACKPRESSURE_POLL_INTERVAL)
+
+
 # TODO: delete from here if ends up unused
 def _check_failure_threshold(
     total_failures: int,
@@ -507,6 +568,7 @@ def connector_document_extraction(
                 )
                 last_batch_num = reissued_batch_count + completed_batches
                 index_attempt.completed_batches = completed_batches
+                index_attempt.queued_batches = last_batch_num
                 db_session.commit()
             else:
                 logger.info(
@@ -629,6 +691,15 @@ def connector_document_extraction(
                     f"attempt={index_attempt_id}"
                 )
 
+                # pause until docprocessing catches up if too many batches are queued
+                _wait_for_docprocessing_capacity(
+                    cc_pair_id,
+                    index_attempt.search_settings.status,
+                    index_attempt_id,
+                    batch_num,
+                    callback,
+                )
+
             # Check checkpoint size periodically
             CHECKPOINT_SIZE_CHECK_INTERVAL = 100
             if batch_num % CHECKPOINT_SIZE_CHECK_INTERVAL == 0:
@@ -1,19 +1,59 @@
+import asyncio
+import contextvars
 import threading
 import time
+import weakref
+from collections.abc import AsyncGenerator
 from collections.abc import Callable
 from collections.abc import Generator
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from queue import Empty
 from typing import Any
+from typing import TypeVar
+from uuid import UUID
 
 from onyx.chat.citation_processor import CitationMapping
 from onyx.chat.emitter import Emitter
+from onyx.chat.stop_signal_checker import get_tenant_fence_key
+from onyx.chat.stop_signal_checker import StopSignalPoller
+from onyx.configs.chat_configs import CHAT_STREAM_MAX_WORKER_THREADS
 from onyx.server.query_and_chat.placement import Placement
 from onyx.server.query_and_chat.streaming_models import OverallStop
 from onyx.server.query_and_chat.streaming_models import Packet
 from onyx.server.query_and_chat.streaming_models import PacketException
 from onyx.tools.models import ToolCallInfo
+from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_in_background
 from onyx.utils.threadpool_concurrency import wait_on_background
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# How often the stop signal is checked while a chat loop is streaming
+CHAT_STREAM_CANCEL_CHECK_INTERVAL = 0.3
+
+# Runs the chat streams of stream_chat_async, streams beyond the limit wait for a
+# free thread
+_CHAT_STREAM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=CHAT_STREAM_MAX_WORKER_THREADS, thread_name_prefix="chat_stream"
+)
+
+# One stop signal poller per event loop, shared by all streams on it
+_STOP_SIGNAL_POLLERS: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, StopSignalPoller
+] = weakref.WeakKeyDictionary()
+
+
+def _get_stop_signal_poller() -> StopSignalPoller:
+    loop = asyncio.get_running_loop()
+    poller = _STOP_SIGNAL_POLLERS.get(loop)
+    if poller is None:
+        poller = StopSignalPoller(CHAT_STREAM_CANCEL_CHECK_INTERVAL)
+        _STOP_SIGNAL_POLLERS[loop] = poller
+    return poller
 
 
 class ChatStateContainer:
@@ -92,6 +132,190 @@ class ChatStateContainer:
             return self.is_clarification
 
 
+class ChatStreamClosedError(Exception):
+    """Raised on the producing thread to end the chat loop of a chat stream once
+    the user stopped the generation."""
+
+
+class _StreamFailure:
+    def __init__(self, exception: Exception) -> None:
+        self.exception = exception
+
+
+_STREAM_DONE = object()
+
+
+class _AsyncChatStreamBridge:
+    """Hands items produced on a worker thread to an asyncio consumer, so the
+    consumer neither blocks a thread nor polls while waiting for the next item.
+
+    Once the consumer is gone, items are dropped so the stream still runs to
+    completion, same as when a client disconnects from the thread based path.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        serialize_packet: Callable[[Packet], Any],
+    ) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue[Any] = asyncio.Queue()
+        self._disconnected = threading.Event()
+        self._stopped = threading.Event()
+        self.serialize_packet = serialize_packet
+        # Set while a chat loop without a stop signal to watch is running, used by
+        # the consumer to check for stops
+        self.is_connected: Callable[[], bool] | None = None
+        self.last_turn_index = 0
+        # Only accessed from the event loop
+        self._watched_fence_key: str | None = None
+        self._stop_signal: asyncio.Event | None = None
+
+    @property
+    def disconnected(self) -> bool:
+        return self._disconnected.is_set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def put(self, item: Any) -> None:
+        if self._disconnected.is_set():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # the event loop has been closed
+            self._disconnected.set()
+
+    def put_packet(self, packet: Packet) -> None:
+        if packet.placement and packet.placement.turn_index > self.last_turn_index:
+            self.last_turn_index = packet.placement.turn_index
+        self.put(self.serialize_packet(packet))
+
+    async def get(self, timeout: float) -> Any:
+        return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+
+    def stop(self) -> None:
+        """The user stopped the generation, the chat loop ends at its next packet."""
+        self._stopped.set()
+
+    def disconnect(self) -> None:
+        """The consumer is gone, anything produced from now on is dropped."""
+        self._disconnected.set()
+
+    def watch_stop_signal(self, fence_key: str | None) -> None:
+        """Has the shared poller watch the stop signal of the running chat loop, or
+        stops watching if fence_key is None."""
+        try:
+            self._loop.call_soon_threadsafe(self._set_watched_fence_key, fence_key)
+        except RuntimeError:
+            # the event loop has been closed
+            self._disconnected.set()
+
+    def unwatch_stop_signal(self) -> None:
+        """Must be called from the event loop."""
+        self._set_watched_fence_key(None)
+
+    def _set_watched_fence_key(self, fence_key: str | None) -> None:
+        if self._watched_fence_key is not None and self._stop_signal is not None:
+            _get_stop_signal_poller().unwatch(
+                self._watched_fence_key, self._stop_signal
+            )
+            self._watched_fence_key = None
+            self._stop_signal = None
+        # nothing is left to stop once the consumer is gone
+        if fence_key is not None and not self._disconnected.is_set():
+            self._stop_signal = _get_stop_signal_poller().watch(fence_key)
+            self._watched_fence_key = fence_key
+
+    @property
+    def stop_signal_set(self) -> bool:
+        return self._stop_signal is not None and self._stop_signal.is_set()
+
+
+# Set on the thread producing a chat stream for stream_chat_async
+_ASYNC_CHAT_STREAM_BRIDGE: contextvars.ContextVar[_AsyncChatStreamBridge | None] = (
+    contextvars.ContextVar("async_chat_stream_bridge", default=None)
+)
+
+
+def _run_chat_loop_for_async_consumer(
+    bridge: _AsyncChatStreamBridge,
+    func: Callable[..., None],
+    completion_callback: Callable[[ChatStateContainer], None],
+    is_connected: Callable[[], bool],
+    stop_signal_fence_key: str | None,
+    emitter: Emitter,
+    state_container: ChatStateContainer,
+    *args: Any,
+    **kwargs: Any,
+) -> None:
+    """
+    Runs the chat loop on the current thread with its packets going straight to
+    the async consumer, which takes care of checking for the stop signal, through
+    the shared poller if there is a fence key to watch. Only a stop signal ends the
+    loop early: emitting the next packet then raises ChatStreamClosedError. If the
+    consumer disconnects instead, the loop runs to completion with its packets
+    dropped, checking for the stop signal itself. Mirrors
+    run_chat_loop_with_state_containers, nothing is forwarded after an OverallStop
+    and packet exceptions are re-raised.
+    """
+    packet_exception: Exception | None = None
+    stopped = False
+    last_cancel_check = time.monotonic()
+
+    def _stop_requested() -> bool:
+        nonlocal last_cancel_check
+        if bridge.stopped:
+            return True
+        if not bridge.disconnected:
+            # the consumer checks for the stop signal while it is connected
+            return False
+        current_time = time.monotonic()
+        if current_time - last_cancel_check < CHAT_STREAM_CANCEL_CHECK_INTERVAL:
+            return False
+        last_cancel_check = current_time
+        return not is_connected()
+
+    def _sink(packet: Packet) -> None:
+        nonlocal packet_exception, stopped
+        if _stop_requested():
+            raise ChatStreamClosedError()
+        if stopped or packet_exception is not None:
+            return
+        if isinstance(packet.obj, PacketException):
+            packet_exception = packet.obj.exception
+            return
+        if isinstance(packet.obj, OverallStop):
+            stopped = True
+        bridge.put_packet(packet)
+
+    if stop_signal_fence_key is None:
+        bridge.is_connected = is_connected
+    else:
+        bridge.watch_stop_signal(stop_signal_fence_key)
+    emitter.redirect(_sink)
+    try:
+        kwargs_with_state = {**kwargs, "state_container": state_container}
+        func(emitter, *args, **kwargs_with_state)
+    except ChatStreamClosedError:
+        logger.debug("Chat loop stopped by the user")
+    finally:
+        emitter.redirect(None)
+        if stop_signal_fence_key is None:
+            bridge.is_connected = None
+        else:
+            bridge.watch_stop_signal(None)
+        try:
+            completion_callback(state_container)
+        except Exception:
+            logger.exception("Chat loop completion callback failed")
+
+    if packet_exception is not None:
+        raise packet_exception
+
+
 def run_chat_loop_with_state_containers(
     func: Callable[..., None],
     completion_callback: Callable[[ChatStateContainer], None],
@@ -99,6 +323,7 @@ def run_chat_loop_with_state_containers(
     emitter: Emitter,
     state_container: ChatStateContainer,
     *args: Any,
+    stop_signal_chat_session_id: UUID | None = None,
     **kwargs: Any,
 ) -> Generator[Packet, None]:
     """
@@ -114,6 +339,8 @@ def run_chat_loop_with_state_containers(
         state_container: ChatStateContainer instance for accumulating state
         is_connected: Callable that returns False when stop signal is set
         *args: Additional positional arguments for func
+        stop_signal_chat_session_id: Chat session whose stop signal is_connected
+            checks, lets stream_chat_async check it through its shared poller
         **kwargs: Additional keyword arguments for func
 
     Usage:
@@ -129,6 +356,28 @@ def run_chat_loop_with_state_containers(
             pass
     """
 
+    bridge = _ASYNC_CHAT_STREAM_BRIDGE.get()
+    if bridge is not None:
+        # Driven by stream_chat_async, no extra thread or polling needed
+        _run_chat_loop_for_async_consumer(
+            bridge,
+            func,
+            completion_callback,
+            is_connected,
+            (
+                get_tenant_fence_key(
+                    stop_signal_chat_session_id, get_current_tenant_id()
+                )
+                if stop_signal_chat_session_id is not None
+                else None
+            ),
+            emitter,
+            state_container,
+            *args,
+            **kwargs,
+        )
+        return
+
     def run_with_exception_capture() -> None:
         try:
             # Ensure state_container is passed explicitly, removing it from kwargs if present
@@ -206,3 +455,81 @@ def run_chat_loop_with_state_containers(
                     obj=PacketException(type="error", exception=e),
                 )
             )
+
+
+async def stream_chat_async(
+    create_stream: Callable[[], Iterator[T]],
+    serialize_packet: Callable[[Packet], T],
+) -> AsyncGenerator[T, None]:
+    """
+    Async counterpart of iterating a chat stream, for streaming endpoints.
+
+    create_stream is run on a worker thread from a pool bounded by
+    CHAT_STREAM_MAX_WORKER_THREADS. The chat loop started by
+    run_chat_loop_with_state_containers runs on that same thread and hands its
+    packets (passed through serialize_packet) straight to this generator. Waiting
+    for items therefore does not hold a thread, and the stop signal is checked by a
+    poller shared by all streams on the event loop. If this generator is closed
+    early, e.g. because the client
+    disconnected, the stream keeps running to completion so the full answer is
+    still saved. Sync callers keep using the thread based path by iterating the
+    stream directly.
+    """
+    bridge = _AsyncChatStreamBridge(asyncio.get_running_loop(), serialize_packet)
+
+    def produce() -> None:
+        # runs in a copy of the caller's context, the bridge only applies here
+        _ASYNC_CHAT_STREAM_BRIDGE.set(bridge)
+        try:
+            for item in create_stream():
+                bridge.put(item)
+        except Exception as e:
+            bridge.put(_StreamFailure(e))
+        finally:
+            bridge.put(_STREAM_DONE)
+
+    _CHAT_STREAM_EXECUTOR.submit(contextvars.copy_context().run, produce)
+
+    last_cancel_check = time.monotonic()
+    try:
+        while True:
+            item: Any = None
+            try:
+                item = await bridge.get(timeout=CHAT_STREAM_CANCEL_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, _StreamFailure):
+                raise item.exception
+            if item is not None:
+                yield item
+
+            # Check for cancellation while the chat loop runs, whether or not
+            # packets are flowing
+            stop_requested = bridge.stop_signal_set
+            is_connected = bridge.is_connected
+            current_time = time.monotonic()
+            if (
+                not stop_requested
+                and is_connected is not None
+                and current_time - last_cancel_check
+                >= CHAT_STREAM_CANCEL_CHECK_INTERVAL
+            ):
+                # no stop signal for the shared poller to watch
+                last_cancel_check = current_time
+                stop_requested = not await asyncio.to_thread(is_connected)
+
+            if stop_requested:
+                bridge.stop()
+                yield serialize_packet(
+                    Packet(
+                        placement=Placement(turn_index=bridge.last_turn_index + 1),
+                        obj=OverallStop(type="stop", stop_reason="user_cancelled"),
+                    )
+                )
+                break
+    finally:
+        bridge.disconnect()
+        bridge.unwatch_stop_signal()
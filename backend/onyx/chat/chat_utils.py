@@ -6,6 +6,7 @@ from uuid import UUID
 
 from fastapi import HTTPException
 from fastapi.datastructures import Headers
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
 from onyx.auth.users import is_user_admin
@@ -23,6 +24,8 @@ from onyx.configs.constants import MessageType
 from onyx.configs.constants import TMP_DRALPHA_PERSONA_NAME
 from onyx.context.search.enums import RecencyBiasSetting
 from onyx.db.chat import create_chat_session
+from onyx.db.chat import get_chat_message_history_token_counts
+from onyx.db.chat import get_chat_messages_by_ids
 from onyx.db.chat import get_chat_messages_by_session
 from onyx.db.chat import get_or_create_root_message
 from onyx.db.kg_config import get_kg_config_settings
@@ -104,8 +107,25 @@ def create_chat_history_chain(
     prefetch_top_two_level_tool_calls: bool = True,
     # Optional id at which we finish processing
     stop_at_message_id: int | None = None,
+    # If set, only the end of the chain that can fit in this many tokens of the
+    # tokenizer is loaded, see `_get_history_suffix_message_ids`
+    token_budget: int | None = None,
+    tokenizer_key: str | None = None,
 ) -> list[ChatMessage]:
     """Build the linear chain of messages without including the root message"""
+    if token_budget is not None and tokenizer_key is not None:
+        return get_chat_messages_by_ids(
+            chat_message_ids=_get_history_suffix_message_ids(
+                chat_session_id=chat_session_id,
+                db_session=db_session,
+                stop_at_message_id=stop_at_message_id,
+                token_budget=token_budget,
+                tokenizer_key=tokenizer_key,
+            ),
+            db_session=db_session,
+            prefetch_top_two_level_tool_calls=prefetch_top_two_level_tool_calls,
+        )
+
     mainline_messages: list[ChatMessage] = []
 
     all_chat_messages = get_chat_messages_by_session(
@@ -159,6 +179,73 @@ def create_chat_history_chain(
     return mainline_messages
 
 
+def _get_history_suffix_message_ids(
+    chat_session_id: UUID,
+    db_session: Session,
+    stop_at_message_id: int | None,
+    token_budget: int,
+    tokenizer_key: str,
+) -> list[int]:
+    """Walks the message chain using only the stored token counts and returns the ids
+    of the messages that can still make it into a context of `token_budget` tokens.
+    Everything from the last user message on is always kept, as is the first message
+    that crosses the budget since the history is later trimmed at a finer granularity
+    than whole messages."""
+    message_rows = get_chat_message_history_token_counts(
+        chat_session_id=chat_session_id,
+        tokenizer_key=tokenizer_key,
+        db_session=db_session,
+    )
+    if not message_rows:
+        return []
+
+    root_message = message_rows[0]
+    if root_message.parent_message_id is not None:
+        raise RuntimeError(
+            "Invalid root message, unable to fetch valid chat message sequence"
+        )
+
+    rows_by_id = {row.id: row for row in message_rows}
+    mainline_rows: list[Row[tuple[int, int | None, int | None, MessageType, int]]] = []
+    current_row = root_message
+    previous_message_type: MessageType | None = None
+    while (
+        current_row.latest_child_message_id is not None
+        and current_row.latest_child_message_id in rows_by_id
+        and not (stop_at_message_id and current_row.id == stop_at_message_id)
+    ):
+        current_row = rows_by_id[current_row.latest_child_message_id]
+        if (
+            current_row.message_type == MessageType.ASSISTANT
+            and previous_message_type == MessageType.ASSISTANT
+            and mainline_rows
+        ):
+            raise RuntimeError(
+                "Invalid message chain, cannot have two assistant messages in a row"
+            )
+        mainline_rows.append(current_row)
+        previous_message_type = current_row.message_type
+
+    last_user_message_idx = max(
+        (
+            idx
+            for idx, row in enumerate(mainline_rows)
+            if row.message_type == MessageType.USER
+        ),
+        default=len(mainline_rows),
+    )
+
+    start_idx = len(mainline_rows)
+    used_tokens = 0
+    while start_idx > 0 and (
+        start_idx > last_user_message_idx or used_tokens <= token_budget
+    ):
+        start_idx -= 1
+        used_tokens += mainline_rows[start_idx].history_token_count
+
+    return [row.id for row in mainline_rows[start_idx:]]
+
+
 def reorganize_citations(
     answer: str, citations: list[CitationInfo]
 ) -> tuple[str, list[CitationInfo]]:
@@ -541,11 +628,15 @@ def convert_chat_history(
     additional_context: str | None,
     token_counter: Callable[[str], int],
     tool_id_to_name_map: dict[int, str],
+    tokenizer_key: str | None = None,
 ) -> list[ChatMessageSimple]:
     """Convert ChatMessage history to ChatMessageSimple format.
 
     For user messages: includes attached files (images attached to message, text files as separate messages)
     For assistant messages: includes tool calls followed by the assistant response
+
+    Token counts stored for `tokenizer_key` are used where available, only content
+    saved without them is counted with `token_counter`.
     """
     simple_messages: list[ChatMessageSimple] = []
 
@@ -621,7 +712,8 @@ def convert_chat_history(
             simple_messages.append(
                 ChatMessageSimple(
                     message=chat_message.message,
-                    token_count=chat_message.token_count + image_token_count,
+                    token_count=_get_stored_token_count(chat_message, tokenizer_key)
+                    + image_token_count,
                     message_type=MessageType.USER,
                     image_files=image_files if image_files else None,
                 )
@@ -667,7 +759,12 @@ def convert_chat_history(
 
                         # Use actual tool response if available, otherwise use placeholder
                         tool_response = tool_call.tool_call_response
-                        if tool_response:
+                        stored_response_token_count = (
+                            tool_call.tool_call_response_token_counts or {}
+                        ).get(tokenizer_key or "")
+                        if tool_response and stored_response_token_count is not None:
+                            response_token_count = stored_response_token_count
+                        elif tool_response:
                             # Count tokens in the response
                             response_token_count = token_counter(tool_response)
                         else:
@@ -689,7 +786,7 @@ def convert_chat_history(
             simple_messages.append(
                 ChatMessageSimple(
                     message=chat_message.message,
-                    token_count=chat_message.token_count,
+                    token_count=_get_stored_token_count(chat_message, tokenizer_key),
                     message_type=MessageType.ASSISTANT,
                     image_files=None,
                 )
@@ -702,6 +799,14 @@ def convert_chat_history(
     return simple_messages
 
 
+def _get_stored_token_count(
+    chat_message: ChatMessage, tokenizer_key: str | None
+) -> int:
+    if tokenizer_key and chat_message.token_counts:
+        return chat_message.token_counts.get(tokenizer_key, chat_message.token_count)
+    return chat_message.token_count
+
+
 def get_custom_agent_prompt(persona: Persona, chat_session: ChatSession) -> str | None:
     """Get the custom agent prompt from persona or project instructions.
 
@@ -17,7 +17,6 @@ from typing import TypeAlias
 
 from onyx.configs.chat_configs import STOP_STREAM_PAT
 from onyx.context.search.models import SearchDoc
-from onyx.prompts.constants import TRIPLE_BACKTICK
 from onyx.server.query_and_chat.streaming_models import CitationInfo
 from onyx.utils.logger import setup_logger
 
@@ -50,17 +49,6 @@ class CitationMode(Enum):
 CitationMapping: TypeAlias = dict[int, SearchDoc]
 
 
-# ============================================================================
-# Utility functions
-# ============================================================================
-
-
-def in_code_block(llm_text: str) -> bool:
-    """Check if we're currently inside a code block by counting triple backticks."""
-    count = llm_text.count(TRIPLE_BACKTICK)
-    return count % 2 != 0
-
-
 # ============================================================================
 # Main Citation Processor with Dynamic Mapping
 # ============================================================================
@@ -172,7 +160,6 @@ class DynamicCitationProcessor:
         self.seen_citations: CitationMapping = {}  # citation num -> SearchDoc
 
         # Token processing state
-        self.llm_out = ""  # entire output so far
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
         self.stop_stream = stop_stream
@@ -188,6 +175,11 @@ class DynamicCitationProcessor:
         )  # recently cited (for deduplication)
         self.non_citation_count = 0
 
+        # Code fence state, tracked incrementally so each token costs work
+        # proportional to its own length rather than to the whole output
+        self._completed_fence_count = 0  # fences in finished runs of backticks
+        self._trailing_backtick_run = 0  # backticks at the very end of the output
+
         # Citation patterns
         # Matches potential incomplete citations: '[', '[[', '[1', '[[1', '[1,', '[1, ', etc.
         # Also matches unicode bracket variants: 【, ［
@@ -200,6 +192,30 @@ class DynamicCitationProcessor:
             r"([\[【［]{2}\d+[\]】］]{2})|([\[【［]\d+(?:, ?\d+)*[\]】］])"
         )
 
+    def _track_code_fences(self, token: str) -> None:
+        """Update the code fence state with a token appended to the output.
+
+        Triple backticks never span two runs of backticks, so counting
+        len(run) // 3 per run matches counting them over the whole output."""
+        if "`" not in token:
+            if token:
+                self._completed_fence_count += self._trailing_backtick_run // 3
+                self._trailing_backtick_run = 0
+            return
+
+        for char in token:
+            if char == "`":
+                self._trailing_backtick_run += 1
+            else:
+                self._completed_fence_count += self._trailing_backtick_run // 3
+                self._trailing_backtick_run = 0
+
+    def _in_code_block(self) -> bool:
+        """Whether the output so far ends inside a code block, i.e. it contains an
+        odd number of ``` fences."""
+        fence_count = self._completed_fence_count + self._trailing_backtick_run // 3
+        return fence_count % 2 != 0
+
     def update_citation_mapping(
         self,
         citation_mapping: CitationMapping,
@@ -293,7 +309,7 @@ class DynamicCitationProcessor:
                 self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self._track_code_fences(token)
 
         # Handle code blocks without language tags
         # If we see ``` followed by \n, add "plaintext" language specifier
@@ -304,7 +320,7 @@ class DynamicCitationProcessor:
                 parts = self.curr_segment.split("```")
                 if len(parts) > 1 and len(parts[1]) > 0:
                     piece_that_comes_after = parts[1][0]
-                    if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                    if piece_that_comes_after == "\n" and self._in_code_block():
                         self.curr_segment = self.curr_segment.replace(
                             "```", "```plaintext"
                         )
@@ -316,7 +332,7 @@ class DynamicCitationProcessor:
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not self._in_code_block():
             match_idx = 0
             for match in citation_matches:
                 match_span = match.span()
@@ -326,24 +342,13 @@ class DynamicCitationProcessor:
                 self.non_citation_count += len(intermatch_str)
                 match_idx = match_span[1]
 
-                # Check if there is already a space before this citation
+                # Check if there is already a space before this citation. With no
+                # text before it (consecutive citations, or a citation held over at
+                # the start of the segment) no space is added.
                 if intermatch_str:
                     has_leading_space = intermatch_str[-1].isspace()
                 else:
-                    # No text between citations (consecutive citations)
-                    # If match_idx > 0, we've already processed a citation, so don't add space
-                    if match_idx > 0:
-                        # Consecutive citations - don't add space between them
-                        has_leading_space = True
-                    else:
-                        # Citation at start of segment - check if previous output has space
-                        segment_start_idx = len(self.llm_out) - len(self.curr_segment)
-                        if segment_start_idx > 0:
-                            has_leading_space = self.llm_out[
-                                segment_start_idx - 1
-                            ].isspace()
-                        else:
-                            has_leading_space = False
+                    has_leading_space = True
 
                 # Reset recent citations if no citations found for a while
                 if self.non_citation_count > 5:
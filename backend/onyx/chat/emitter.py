@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from queue import Queue
 
 from onyx.server.query_and_chat.streaming_models import Packet
@@ -8,10 +9,19 @@ class Emitter:
 
     def __init__(self, bus: Queue):
         self.bus = bus
+        self._sink: Callable[[Packet], None] | None = None
 
     def emit(self, packet: Packet) -> None:
+        if self._sink is not None:
+            self._sink(packet)
+            return
+
         self.bus.put(packet)  # Thread-safe
 
+    def redirect(self, sink: Callable[[Packet], None] | None) -> None:
+        """Deliver packets to sink instead of the bus, None restores the bus."""
+        self._sink = sink
+
 
 def get_default_emitter() -> Emitter:
     bus: Queue[Packet] = Queue()
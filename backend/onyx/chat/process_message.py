@@ -62,6 +62,7 @@ from onyx.file_store.utils import load_in_memory_chat_files
 from onyx.file_store.utils import verify_user_files
 from onyx.llm.factory import get_llm_for_persona
 from onyx.llm.factory import get_llm_token_counter
+from onyx.llm.factory import get_llm_tokenizer_key
 from onyx.llm.interfaces import LLM
 from onyx.llm.interfaces import LLMUserIdentity
 from onyx.llm.utils import litellm_exception_to_error_msg
@@ -75,6 +76,7 @@ from onyx.server.query_and_chat.streaming_models import AgentResponseDelta
 from onyx.server.query_and_chat.streaming_models import AgentResponseStart
 from onyx.server.query_and_chat.streaming_models import CitationInfo
 from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.token_limit import record_token_usage
 from onyx.server.usage_limits import check_llm_cost_limit_for_provider
 from onyx.tools.constants import SEARCH_TOOL_ID
 from onyx.tools.interface import Tool
@@ -388,6 +390,7 @@ def handle_stream_message_objects(
             long_term_logger=long_term_logger,
         )
         token_counter = get_llm_token_counter(llm)
+        tokenizer_key = get_llm_tokenizer_key(llm)
 
         # Check LLM cost limits before using the LLM (only for Onyx-managed keys)
 
@@ -405,9 +408,18 @@ def handle_stream_message_objects(
             project_id=chat_session.project_id,
         )
 
-        # re-create linear history of messages
+        # re-create linear history of messages, messages that could never fit in the
+        # context window are not loaded
         chat_history = create_chat_history_chain(
-            chat_session_id=chat_session.id, db_session=db_session
+            chat_session_id=chat_session.id,
+            db_session=db_session,
+            stop_at_message_id=(
+                new_msg_req.parent_message_id
+                if new_msg_req.parent_message_id != AUTO_PLACE_AFTER_LATEST_MESSAGE
+                else None
+            ),
+            token_budget=llm.config.max_input_tokens,
+            tokenizer_key=tokenizer_key,
         )
 
         # Determine the parent message based on the request:
@@ -448,16 +460,19 @@ def handle_stream_message_objects(
         if parent_message.message_type == MessageType.USER:
             user_message = parent_message
         else:
+            user_message_token_count = token_counter(message_text)
             user_message = create_new_chat_message(
                 chat_session_id=chat_session.id,
                 parent_message=parent_message,
                 message=message_text,
-                token_count=token_counter(message_text),
+                token_count=user_message_token_count,
+                token_counts={tokenizer_key: user_message_token_count},
                 message_type=MessageType.USER,
                 files=new_msg_req.file_descriptors,
                 db_session=db_session,
                 commit=True,
             )
+            record_token_usage(user_id, user_message.token_count, db_session)
 
             chat_history.append(user_message)
 
@@ -572,6 +587,7 @@ def handle_stream_message_objects(
             additional_context=additional_context,
             token_counter=token_counter,
             tool_id_to_name_map=tool_id_to_name_map,
+            tokenizer_key=tokenizer_key,
         )
 
         redis_client = get_redis_client()
@@ -603,6 +619,9 @@ def handle_stream_message_objects(
                 chat_session_id=str(chat_session.id),
                 is_connected=check_is_connected,
                 assistant_message=assistant_response,
+                user_id=user_id,
+                token_counter=token_counter,
+                tokenizer_key=tokenizer_key,
             )
 
         # Run the LLM loop with explicit wrapper for stop signal handling
@@ -633,6 +652,7 @@ def handle_stream_message_objects(
                 skip_clarification=skip_clarification,
                 user_identity=user_identity,
                 chat_session_id=str(chat_session.id),
+                stop_signal_chat_session_id=chat_session.id,
             )
         else:
             yield from run_chat_loop_with_state_containers(
@@ -654,6 +674,7 @@ def handle_stream_message_objects(
                 user_identity=user_identity,
                 chat_session_id=str(chat_session.id),
                 include_citations=new_msg_req.include_citations,
+                stop_signal_chat_session_id=chat_session.id,
             )
 
     except ValueError as e:
@@ -723,6 +744,9 @@ def llm_loop_completion_handle(
     db_session: Session,
     chat_session_id: str,
     assistant_message: ChatMessage,
+    user_id: UUID | None,
+    token_counter: Callable[[str], int] | None = None,
+    tokenizer_key: str | None = None,
 ) -> None:
     # Determine if stopped by user
     completed_normally = is_connected()
@@ -765,7 +789,10 @@ def llm_loop_completion_handle(
         db_session=db_session,
         assistant_message=assistant_message,
         is_clarification=state_container.is_clarification,
+        token_counter=token_counter,
+        tokenizer_key=tokenizer_key,
     )
+    record_token_usage(user_id, assistant_message.token_count, db_session)
 
 
 def stream_chat_message_objects(
@@ -1,4 +1,5 @@
 import json
+from collections.abc import Callable
 
 from sqlalchemy.orm import Session
 
@@ -41,6 +42,7 @@ def _create_and_link_tool_calls(
     db_session: Session,
     default_tokenizer: BaseTokenizer,
     tool_call_to_search_doc_ids: dict[str, list[int]],
+    llm_token_counts: Callable[[str], dict[str, int] | None],
 ) -> None:
     """
     Create ToolCall entries and link parent references and SearchDocs.
@@ -58,6 +60,7 @@ def _create_and_link_tool_calls(
         db_session: Database session
         default_tokenizer: Tokenizer for calculating token counts
         tool_call_to_search_doc_ids: Mapping from tool_call_id to list of search_doc IDs
+        llm_token_counts: Counts tool responses keyed by the LLM tokenizer
     """
     # Create all ToolCall objects first (without parent_tool_call_id set)
     # We'll update parent references after flushing to get IDs
@@ -104,6 +107,12 @@ def _create_and_link_tool_calls(
             ),
             tab_index=tool_call_info.tab_index,
             add_only=True,
+            tool_call_response_token_counts=(
+                llm_token_counts(tool_call_info.tool_call_response)
+                if isinstance(tool_call_info.tool_call_response, str)
+                and tool_call_info.tool_call_response
+                else None
+            ),
         )
 
         # Flush to get all of the IDs
@@ -158,6 +167,8 @@ def save_chat_turn(
     db_session: Session,
     assistant_message: ChatMessage,
     is_clarification: bool = False,
+    token_counter: Callable[[str], int] | None = None,
+    tokenizer_key: str | None = None,
 ) -> None:
     """
     Save a chat turn by populating the assistant_message and creating related entities.
@@ -186,6 +197,9 @@ def save_chat_turn(
         db_session: Database session for persistence
         assistant_message: The ChatMessage object to populate (should already exist in DB)
         is_clarification: Whether this assistant message is a clarification question (deep research flow)
+        token_counter: Token counter of the LLM, used to store the token counts that
+            later turns budget the chat history with
+        tokenizer_key: Key of the LLM tokenizer the token counts are stored under
     """
     # 1. Update ChatMessage with message content, reasoning tokens, and token count
     assistant_message.message = message_text
@@ -200,6 +214,13 @@ def save_chat_turn(
     else:
         assistant_message.token_count = 0
 
+    def llm_token_counts(text: str) -> dict[str, int] | None:
+        if token_counter is None or tokenizer_key is None:
+            return None
+        return {tokenizer_key: token_counter(text)}
+
+    assistant_message.token_counts = llm_token_counts(message_text or "")
+
     # 2. Create SearchDoc entries from tool_calls
     # Build mapping from SearchDoc to DB SearchDoc ID
     # Use (document_id, chunk_ind, match_highlights) as key to avoid duplicates
@@ -304,6 +325,7 @@ def save_chat_turn(
         db_session=db_session,
         default_tokenizer=default_tokenizer,
         tool_call_to_search_doc_ids=tool_call_to_search_doc_ids,
+        llm_token_counts=llm_token_counts,
     )
 
     # 7. Build citations mapping from citation_docs_info
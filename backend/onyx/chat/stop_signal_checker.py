@@ -1,7 +1,13 @@
+import asyncio
 from uuid import UUID
 
 from redis.client import Redis
 
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
 # Redis key prefixes for chat session stop signals
 PREFIX = "chatsessionstop"
 FENCE_PREFIX = f"{PREFIX}_fence"
@@ -63,3 +69,60 @@ def reset_cancel_status(chat_session_id: UUID, redis_client: Redis) -> None:
     """
     fence_key = _get_fence_key(chat_session_id)
     redis_client.delete(fence_key)
+
+
+def get_tenant_fence_key(chat_session_id: UUID, tenant_id: str) -> str:
+    """
+    The stop signal fence key as stored by the tenant-aware Redis client, for
+    clients that don't prefix keys themselves (e.g. the async Redis connection).
+    """
+    return f"{tenant_id}:{_get_fence_key(chat_session_id)}"
+
+
+class StopSignalPoller:
+    """
+    Checks the stop signals of all chat sessions streamed by this process with one
+    Redis round trip per interval, instead of one check per stream. Belongs to the
+    event loop it is first used on and only polls while sessions are watched.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        # fence key -> events of the streams watching it
+        self._watchers: dict[str, set[asyncio.Event]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def watch(self, fence_key: str) -> asyncio.Event:
+        """Returns an event that is set once the stop signal for the key is set.
+        Must be called from the event loop."""
+        event = asyncio.Event()
+        self._watchers.setdefault(fence_key, set()).add(event)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return event
+
+    def unwatch(self, fence_key: str, event: asyncio.Event) -> None:
+        events = self._watchers.get(fence_key)
+        if events is None:
+            return
+        events.discard(event)
+        if not events:
+            del self._watchers[fence_key]
+
+    async def _poll(self) -> None:
+        while self._watchers:
+            await asyncio.sleep(self._interval)
+            fence_keys = list(self._watchers)
+            if not fence_keys:
+                break
+            try:
+                redis_client = await get_async_redis_connection()
+                values = await redis_client.mget(fence_keys)
+            except Exception:
+                logger.exception("Failed to check chat stop signals")
+                continue
+
+            for fence_key, value in zip(fence_keys, values):
+                if value is not None:
+                    for event in self._watchers.get(fence_key, ()):
+                        event.set()
@@ -207,6 +207,15 @@ OPENSEARCH_HOST = os.environ.get("OPENSEARCH_HOST") or "localhost"
 OPENSEARCH_REST_API_PORT = int(os.environ.get("OPENSEARCH_REST_API_PORT") or 9200)
 OPENSEARCH_ADMIN_USERNAME = os.environ.get("OPENSEARCH_ADMIN_USERNAME", "admin")
 OPENSEARCH_ADMIN_PASSWORD = os.environ.get("OPENSEARCH_ADMIN_PASSWORD", "")
+# Upper bound on the size of a single _bulk request body. OpenSearch rejects
+# requests over http.max_content_length (100MB by default) and recommends
+# 5-15MB per request for throughput.
+OPENSEARCH_BULK_MAX_BYTES = int(
+    os.environ.get("OPENSEARCH_BULK_MAX_BYTES") or 10 * 1024 * 1024
+)
+# Number of times items rejected with a retryable status (e.g. 429 when the
+# write thread pool queue is full) are resent.
+OPENSEARCH_BULK_MAX_RETRIES = int(os.environ.get("OPENSEARCH_BULK_MAX_RETRIES") or 3)
 
 ENABLE_OPENSEARCH_FOR_ONYX = (
     os.environ.get("ENABLE_OPENSEARCH_FOR_ONYX", "").lower() == "true"
@@ -229,6 +238,13 @@ VESPA_CLOUD_KEY_PATH = os.environ.get("VESPA_CLOUD_KEY_PATH")
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE") or 16)
 
+# Max number of batches per index attempt that docfetching may have queued for
+# docprocessing without them being processed yet. Docfetching pauses when this is
+# reached so stored batches and queued tasks stay bounded. 0 disables the limit.
+MAX_IN_FLIGHT_DOCPROCESSING_BATCHES = int(
+    os.environ.get("MAX_IN_FLIGHT_DOCPROCESSING_BATCHES") or 100
+)
+
 MAX_DRIVE_WORKERS = int(os.environ.get("MAX_DRIVE_WORKERS", 4))
 
 # Below are intended to match the env variables names used by the official postgres docker image
@@ -426,6 +442,14 @@ CELERY_WORKER_USER_FILE_PROCESSING_CONCURRENCY = int(
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 8192
 
+# The number of documents synced to the document index by a single sync task
+VESPA_SYNC_BATCH_SIZE = int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 200)
+
+# The number of documents cleaned up by a single connector deletion or pruning task
+CONNECTOR_CLEANUP_BATCH_SIZE = int(
+    os.environ.get("CONNECTOR_CLEANUP_BATCH_SIZE") or 200
+)
+
 DB_YIELD_PER_DEFAULT = 64
 
 #####
@@ -688,6 +712,43 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 8
 )
 
+# Max keep-alive connections held open to the model server by each process. Should be at
+# least INDEXING_EMBEDDING_MODEL_NUM_THREADS, otherwise extra connections get discarded
+MODEL_SERVER_HTTP_POOL_SIZE = int(os.environ.get("MODEL_SERVER_HTTP_POOL_SIZE") or 32)
+
+# Overlap the chunk -> embed -> write stages of the indexing pipeline. Each batch is split
+# into sub-batches of documents which are passed between the stages via bounded queues,
+# so the model server and the document index are kept busy at the same time.
+INDEXING_PIPELINE_STREAMING_ENABLED = (
+    os.environ.get("INDEXING_PIPELINE_STREAMING_ENABLED", "").lower() == "true"
+)
+# Number of documents per sub-batch, batches this size or smaller are not streamed
+INDEXING_PIPELINE_SUB_BATCH_SIZE = max(
+    int(os.environ.get("INDEXING_PIPELINE_SUB_BATCH_SIZE") or 4), 1
+)
+# Max number of sub-batches waiting between two stages before upstream stages block
+INDEXING_PIPELINE_QUEUE_SIZE = max(
+    int(os.environ.get("INDEXING_PIPELINE_QUEUE_SIZE") or 2), 1
+)
+INDEXING_PIPELINE_EMBED_WORKERS = max(
+    int(os.environ.get("INDEXING_PIPELINE_EMBED_WORKERS") or 1), 1
+)
+INDEXING_PIPELINE_WRITE_WORKERS = max(
+    int(os.environ.get("INDEXING_PIPELINE_WRITE_WORKERS") or 1), 1
+)
+
+# Store chunk embeddings in Postgres keyed by a fingerprint of the embedded text + embedding
+# model, so that re-indexing a document only sends new or changed chunks to the embedding model.
+# Costs roughly (model dim * 4 bytes) of Postgres storage per chunk / mini chunk.
+ENABLE_CHUNK_EMBEDDING_REUSE = (
+    os.environ.get("ENABLE_CHUNK_EMBEDDING_REUSE", "").lower() == "true"
+)
+
+# How long a user's resolved ACL is reused across searches. Group membership changes
+# invalidate it right away via a version counter in Redis, this is just an upper bound.
+# Set to 0 to always resolve ACLs from Postgres
+USER_ACL_CACHE_TTL_SECONDS = int(os.environ.get("USER_ACL_CACHE_TTL_SECONDS") or 300)
+
 # Maximum file size in a document to be indexed
 MAX_DOCUMENT_CHARS = int(os.environ.get("MAX_DOCUMENT_CHARS") or 5_000_000)
 MAX_FILE_SIZE_BYTES = int(
@@ -698,6 +759,11 @@ MAX_FILE_SIZE_BYTES = int(
 USE_DOCUMENT_SUMMARY = os.environ.get("USE_DOCUMENT_SUMMARY", "true").lower() == "true"
 # Use chunk summary for contextual rag
 USE_CHUNK_SUMMARY = os.environ.get("USE_CHUNK_SUMMARY", "true").lower() == "true"
+# Store contextual rag summaries in Postgres keyed by a fingerprint of the prompt, LLM and
+# content, so that re-indexing unchanged documents / chunks does not call the LLM again
+ENABLE_CONTEXTUAL_RAG_SUMMARY_CACHE = (
+    os.environ.get("ENABLE_CONTEXTUAL_RAG_SUMMARY_CACHE", "true").lower() == "true"
+)
 # Average summary embeddings for contextual rag (not yet implemented)
 AVERAGE_SUMMARY_EMBEDDINGS = (
     os.environ.get("AVERAGE_SUMMARY_EMBEDDINGS", "false").lower() == "true"
@@ -795,6 +861,17 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 )
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
+# Limits of the long-lived client shared by Vespa queries, visits and updates in
+# each process. With HTTP/2 most requests share a single connection.
+VESPA_HTTP_POOL_MAX_CONNECTIONS = int(
+    os.environ.get("VESPA_HTTP_POOL_MAX_CONNECTIONS") or "100"
+)
+VESPA_HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("VESPA_HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS") or "20"
+)
+VESPA_HTTP_POOL_KEEPALIVE_EXPIRY = float(
+    os.environ.get("VESPA_HTTP_POOL_KEEPALIVE_EXPIRY") or "30"
+)
 
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
@@ -966,6 +1043,21 @@ IMAGE_SUMMARIZATION_USER_PROMPT = os.environ.get(
     DEFAULT_IMAGE_SUMMARIZATION_USER_PROMPT,
 )
 
+# Images whose width or height is below this many pixels (icons, bullets, spacers)
+# are not sent to the vision LLM
+IMAGE_SUMMARIZATION_MIN_DIMENSION_PX = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MIN_DIMENSION_PX") or 32
+)
+# Max number of concurrent vision LLM calls per indexing batch
+IMAGE_SUMMARIZATION_MAX_WORKERS = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_WORKERS") or 4
+)
+# Store image summaries in Postgres keyed by a hash of the image content, the vision
+# LLM and the prompts, so that images reused across documents are summarized once
+ENABLE_IMAGE_SUMMARY_CACHE = (
+    os.environ.get("ENABLE_IMAGE_SUMMARY_CACHE", "true").lower() == "true"
+)
+
 # Knowledge Graph Read Only User Configuration
 DB_READONLY_USER: str = os.environ.get("DB_READONLY_USER", "db_readonly_user")
 DB_READONLY_PASSWORD: str = urllib.parse.quote_plus(
@@ -57,3 +57,20 @@ USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH = (
     os.environ.get("USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH", "false").lower()
     == "true"
 )
+
+# Query embeddings are cached in-process (and optionally in Redis) since the same queries
+# are repeated a lot across tool calls, follow-up turns and Slack threads.
+# Set QUERY_EMBEDDING_CACHE_SIZE to 0 to disable the cache entirely
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE") or 2048)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60
+)
+QUERY_EMBEDDING_CACHE_REDIS_ENABLED = (
+    os.environ.get("QUERY_EMBEDDING_CACHE_REDIS_ENABLED", "").lower() == "true"
+)
+
+# Max number of worker threads running streamed chat turns in an API process. Turns
+# beyond this wait for a free thread before they start.
+CHAT_STREAM_MAX_WORKER_THREADS = int(
+    os.environ.get("CHAT_STREAM_MAX_WORKER_THREADS") or 128
+)
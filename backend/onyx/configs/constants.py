@@ -453,6 +453,8 @@ class OnyxRedisSignals:
 
 class OnyxRedisConstants:
     ACTIVE_FENCES = "active_fences"
+    # bumped whenever user group or external group membership changes
+    USER_ACL_VERSION = "user_acl_version"
 
 
 class OnyxCeleryPriority(int, Enum):
@@ -535,7 +537,9 @@ class OnyxCeleryTask:
 
     CONNECTOR_PRUNING_GENERATOR_TASK = "connector_pruning_generator_task"
     DOCUMENT_BY_CC_PAIR_CLEANUP_TASK = "document_by_cc_pair_cleanup_task"
+    DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK = "document_by_cc_pair_cleanup_batch_task"
     VESPA_METADATA_SYNC_TASK = "vespa_metadata_sync_task"
+    VESPA_METADATA_SYNC_BATCH_TASK = "vespa_metadata_sync_batch_task"
 
     # chat retention
     CHECK_TTL_MANAGEMENT_TASK = "check_ttl_management_task"
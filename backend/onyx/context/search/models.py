@@ -14,6 +14,7 @@ from onyx.indexing.models import BaseChunk
 from onyx.indexing.models import IndexingSetting
 from onyx.tools.tool_implementations.web_search.models import WEB_SEARCH_PREFIX
 from shared_configs.enums import RerankerProvider
+from shared_configs.model_server_models import Embedding
 
 
 class QueryExpansions(BaseModel):
@@ -151,6 +152,10 @@ class BasicChunkRequest(BaseModel):
     limit: int | None = None
     offset: int | None = None  # This one is not set currently
 
+    # Set when the caller already embedded the query, e.g. as part of a batch of queries
+    # for one turn, so the search doesn't need another round-trip to the embedding model
+    query_embedding: Embedding | None = None
+
 
 class ChunkSearchRequest(BasicChunkRequest):
     # Final filters are calculated from these
@@ -283,6 +283,7 @@ def search_pipeline(
         hybrid_alpha=chunk_search_request.hybrid_alpha,
         recency_bias_multiplier=chunk_search_request.recency_bias_multiplier,
         query_keywords=chunk_search_request.query_keywords,
+        query_embedding=chunk_search_request.query_embedding,
         filters=filters,
     )
 
@@ -0,0 +1,171 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import cast
+
+import numpy as np
+from prometheus_client import Counter
+
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_REDIS_ENABLED
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_SIZE
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.db.models import SearchSettings
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+from shared_configs.utils import embeddings_from_bytes
+from shared_configs.utils import embeddings_to_bytes
+
+logger = setup_logger()
+
+_REDIS_KEY_PREFIX = "query_embedding:"
+
+query_embedding_cache_requests = Counter(
+    "onyx_query_embedding_cache_requests_total",
+    "Query embedding cache lookups by tier and result",
+    ["tier", "result"],
+)
+
+
+def normalize_query(query: str) -> str:
+    """Collapses whitespace so trivially different queries share a cache entry. The
+    normalized text is also what gets embedded, so hits and misses are consistent."""
+    return " ".join(query.split())
+
+
+def build_query_embedding_cache_key(query: str, search_settings: SearchSettings) -> str:
+    """Everything that changes the resulting vector is part of the key. The tenant is
+    included so that cache hit timing can't leak queries across tenants."""
+    key_parts = [
+        get_current_tenant_id(),
+        search_settings.provider_type.value if search_settings.provider_type else "",
+        search_settings.model_name,
+        search_settings.query_prefix or "",
+        str(search_settings.normalize),
+        str(search_settings.final_embedding_dim),
+        normalize_query(query),
+    ]
+    return hashlib.sha256("\x00".join(key_parts).encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Thread-safe in-process LRU of query embeddings where entries expire after a
+    fixed TTL. Optionally backed by Redis so that all api server processes share hits.
+    """
+
+    def __init__(
+        self,
+        max_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        ttl_seconds: int = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        use_redis: bool = QUERY_EMBEDDING_CACHE_REDIS_ENABLED,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._use_redis = use_redis
+        # key -> (expiry as monotonic time, embedding)
+        self._entries: OrderedDict[str, tuple[float, Embedding]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        if not self.enabled:
+            return {}
+
+        found: dict[str, Embedding] = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, embedding = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = embedding
+
+        query_embedding_cache_requests.labels(tier="memory", result="hit").inc(
+            len(found)
+        )
+        query_embedding_cache_requests.labels(tier="memory", result="miss").inc(
+            len(keys) - len(found)
+        )
+
+        missing = [key for key in keys if key not in found]
+        if missing and self._use_redis:
+            from_redis = self._get_many_from_redis(missing)
+            self._put_many_in_memory(from_redis)
+            found.update(from_redis)
+
+        return found
+
+    def put_many(self, embeddings: dict[str, Embedding]) -> None:
+        if not self.enabled or not embeddings:
+            return
+
+        self._put_many_in_memory(embeddings)
+        if self._use_redis:
+            self._put_many_in_redis(embeddings)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _put_many_in_memory(self, embeddings: dict[str, Embedding]) -> None:
+        expires_at = time.monotonic() + self._ttl_seconds
+        with self._lock:
+            for key, embedding in embeddings.items():
+                self._entries[key] = (expires_at, embedding)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def _get_many_from_redis(self, keys: list[str]) -> dict[str, Embedding]:
+        found: dict[str, Embedding] = {}
+        try:
+            values = cast(
+                list[bytes | None],
+                get_redis_client().mget([_REDIS_KEY_PREFIX + key for key in keys]),
+            )
+            for key, value in zip(keys, values):
+                if isinstance(value, bytes):
+                    found[key] = embeddings_from_bytes(
+                        value, count=1, dim=len(value) // 4
+                    )[0].tolist()
+        except Exception:
+            # the cache is only an optimization, fall back to the model server
+            logger.exception("Failed to read query embeddings from Redis")
+
+        query_embedding_cache_requests.labels(tier="redis", result="hit").inc(
+            len(found)
+        )
+        query_embedding_cache_requests.labels(tier="redis", result="miss").inc(
+            len(keys) - len(found)
+        )
+        return found
+
+    def _put_many_in_redis(self, embeddings: dict[str, Embedding]) -> None:
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            for key, embedding in embeddings.items():
+                pipe.set(
+                    _REDIS_KEY_PREFIX + key,
+                    embeddings_to_bytes(np.asarray([embedding])),
+                    ex=self._ttl_seconds,
+                )
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to write query embeddings to Redis")
+
+
+_query_embedding_cache = QueryEmbeddingCache()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    return _query_embedding_cache
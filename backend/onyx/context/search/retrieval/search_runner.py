@@ -91,7 +91,9 @@ def _embed_and_search(
     document_index: DocumentIndex,
     db_session: Session,
 ) -> list[InferenceChunk]:
-    query_embedding = get_query_embedding(query_request.query, db_session)
+    query_embedding = query_request.query_embedding
+    if query_embedding is None:
+        query_embedding = get_query_embedding(query_request.query, db_session)
 
     hybrid_alpha = query_request.hybrid_alpha or HYBRID_ALPHA
 
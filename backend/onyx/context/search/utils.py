@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import TypeVar
 
 from sqlalchemy.orm import Session
@@ -7,12 +8,17 @@ from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SavedSearchDoc
 from onyx.context.search.models import SavedSearchDocWithContent
 from onyx.context.search.models import SearchDoc
+from onyx.context.search.query_embedding_cache import build_query_embedding_cache_key
+from onyx.context.search.query_embedding_cache import get_query_embedding_cache
+from onyx.context.search.query_embedding_cache import normalize_query
+from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 
@@ -64,18 +70,82 @@ def inference_section_from_single_chunk(
     )
 
 
-def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedding]:
-    search_settings = get_current_search_settings(db_session)
-
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
-        # The below are globally set, this flow always uses the indexing one
+@lru_cache(maxsize=64)
+def _get_cached_query_embedding_model(
+    search_settings_id: int,
+    model_name: str,
+    normalize: bool,
+    query_prefix: str | None,
+    passage_prefix: str | None,
+    api_key: str | None,
+    provider_type: EmbeddingProvider | None,
+    api_url: str | None,
+    api_version: str | None,
+    deployment_name: str | None,
+    reduced_dimension: int | None,
+) -> EmbeddingModel:
+    # search_settings_id is only part of the cache key, every field that goes into
+    # the model is too so that edits to the settings row invalidate the entry
+    return EmbeddingModel(
+        # The below are globally set, this flow always uses the inference one
         server_host=MODEL_SERVER_HOST,
         server_port=MODEL_SERVER_PORT,
+        model_name=model_name,
+        normalize=normalize,
+        query_prefix=query_prefix,
+        passage_prefix=passage_prefix,
+        api_key=api_key,
+        provider_type=provider_type,
+        api_url=api_url,
+        api_version=api_version,
+        deployment_name=deployment_name,
+        reduced_dimension=reduced_dimension,
+    )
+
+
+def get_query_embedding_model(search_settings: SearchSettings) -> EmbeddingModel:
+    """Returns a process-wide EmbeddingModel for the given search settings, building
+    one (and loading its tokenizer) only the first time the settings are seen."""
+    return _get_cached_query_embedding_model(
+        search_settings_id=search_settings.id,
+        model_name=search_settings.model_name,
+        normalize=search_settings.normalize,
+        query_prefix=search_settings.query_prefix,
+        passage_prefix=search_settings.passage_prefix,
+        api_key=search_settings.api_key,
+        provider_type=search_settings.provider_type,
+        api_url=search_settings.api_url,
+        api_version=search_settings.api_version,
+        deployment_name=search_settings.deployment_name,
+        reduced_dimension=search_settings.reduced_dimension,
     )
 
-    query_embedding = model.encode(queries, text_type=EmbedTextType.QUERY)
-    return query_embedding
+
+def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedding]:
+    search_settings = get_current_search_settings(db_session)
+
+    cache = get_query_embedding_cache()
+    cache_keys = [
+        build_query_embedding_cache_key(query, search_settings) for query in queries
+    ]
+    embeddings_by_key = cache.get_many(cache_keys)
+
+    # only embed each distinct uncached query once
+    texts_to_embed: dict[str, str] = {}
+    for query, cache_key in zip(queries, cache_keys):
+        if cache_key not in embeddings_by_key:
+            texts_to_embed.setdefault(cache_key, normalize_query(query) or query)
+
+    if texts_to_embed:
+        model = get_query_embedding_model(search_settings)
+        new_embeddings = model.encode(
+            list(texts_to_embed.values()), text_type=EmbedTextType.QUERY
+        )
+        fresh = dict(zip(texts_to_embed.keys(), new_embeddings))
+        cache.put_many(fresh)
+        embeddings_by_key.update(fresh)
+
+    return [embeddings_by_key[cache_key] for cache_key in cache_keys]
 
 
 @log_function_time(print_only=True, debug_only=True)
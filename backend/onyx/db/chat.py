@@ -10,6 +10,7 @@ from sqlalchemy import delete
 from sqlalchemy import desc
 from sqlalchemy import exists
 from sqlalchemy import func
+from sqlalchemy import Integer
 from sqlalchemy import nullsfirst
 from sqlalchemy import or_
 from sqlalchemy import Row
@@ -530,6 +531,87 @@ def get_chat_messages_by_session(
     return list(result)
 
 
+def get_chat_messages_by_ids(
+    chat_message_ids: list[int],
+    db_session: Session,
+    prefetch_top_two_level_tool_calls: bool = True,
+) -> list[ChatMessage]:
+    """Returns the messages in the order of `chat_message_ids`"""
+    stmt = select(ChatMessage).where(ChatMessage.id.in_(chat_message_ids))
+    if prefetch_top_two_level_tool_calls:
+        stmt = stmt.options(
+            selectinload(ChatMessage.tool_calls).selectinload(
+                ToolCall.tool_call_children
+            )
+        )
+
+    messages_by_id = {
+        chat_message.id: chat_message
+        for chat_message in db_session.scalars(stmt).unique().all()
+    }
+    return [messages_by_id[chat_message_id] for chat_message_id in chat_message_ids]
+
+
+def get_chat_message_history_token_counts(
+    chat_session_id: UUID,
+    tokenizer_key: str,
+    db_session: Session,
+) -> Sequence[Row[Tuple[int, int | None, int | None, MessageType, int]]]:
+    """
+    Fetch (id, parent_message_id, latest_child_message_id, message_type,
+    history_token_count) for every message of the session without loading message or
+    tool call contents.
+
+    The history token count is what the message and its top level tool calls add to
+    the chat history under `tokenizer_key`. Messages and tool responses saved before
+    counts were keyed by tokenizer fall back to the default tokenizer count and to
+    nothing respectively, so for those it is an estimate.
+    """
+    tool_call_token_counts = (
+        select(
+            ToolCall.parent_chat_message_id.label("chat_message_id"),
+            func.sum(
+                ToolCall.tool_call_tokens
+                + func.coalesce(
+                    ToolCall.tool_call_response_token_counts[tokenizer_key].astext.cast(
+                        Integer
+                    ),
+                    0,
+                )
+            ).label("token_count"),
+        )
+        .where(
+            ToolCall.chat_session_id == chat_session_id,
+            ToolCall.parent_chat_message_id.is_not(None),
+        )
+        .group_by(ToolCall.parent_chat_message_id)
+        .subquery()
+    )
+
+    stmt = (
+        select(
+            ChatMessage.id,
+            ChatMessage.parent_message_id,
+            ChatMessage.latest_child_message_id,
+            ChatMessage.message_type,
+            (
+                func.coalesce(
+                    ChatMessage.token_counts[tokenizer_key].astext.cast(Integer),
+                    ChatMessage.token_count,
+                )
+                + func.coalesce(tool_call_token_counts.c.token_count, 0)
+            ).label("history_token_count"),
+        )
+        .outerjoin(
+            tool_call_token_counts,
+            tool_call_token_counts.c.chat_message_id == ChatMessage.id,
+        )
+        .where(ChatMessage.chat_session_id == chat_session_id)
+        .order_by(nullsfirst(ChatMessage.parent_message_id))
+    )
+    return db_session.execute(stmt).all()
+
+
 def get_or_create_root_message(
     chat_session_id: UUID,
     db_session: Session,
@@ -610,6 +692,7 @@ def create_new_chat_message(
     commit: bool = True,
     reserved_message_id: int | None = None,
     reasoning_tokens: str | None = None,
+    token_counts: dict[str, int] | None = None,
 ) -> ChatMessage:
     if reserved_message_id is not None:
         # Edit existing message
@@ -621,6 +704,7 @@ def create_new_chat_message(
         existing_message.parent_message_id = parent_message.id
         existing_message.message = message
         existing_message.token_count = token_count
+        existing_message.token_counts = token_counts
         existing_message.message_type = message_type
         existing_message.files = files
         existing_message.error = error
@@ -634,6 +718,7 @@ def create_new_chat_message(
             latest_child_message_id=None,
             message=message,
             token_count=token_count,
+            token_counts=token_counts,
             message_type=message_type,
             files=files,
             error=error,
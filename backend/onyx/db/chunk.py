@@ -1,11 +1,20 @@
 from datetime import datetime
 from datetime import timezone
 
+import numpy as np
+from sqlalchemy import and_
 from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from onyx.db.models import ChunkEmbeddingCache
 from onyx.db.models import ChunkStats
+from onyx.db.models import ContextualRAGSummaryCache
+from onyx.db.models import ImageSummaryCache
 from onyx.indexing.models import UpdatableChunkData
+from shared_configs.model_server_models import Embedding
 
 
 def update_chunk_boost_components__no_commit(
@@ -61,3 +70,203 @@ def delete_chunk_stats_by_connector_credential_pair__no_commit(
     stmt = delete(ChunkStats).where(ChunkStats.document_id.in_(document_ids))
 
     db_session.execute(stmt)
+
+
+def fetch_cached_chunk_embeddings(
+    db_session: Session,
+    document_id_fingerprint_pairs: list[tuple[str, str]],
+) -> dict[tuple[str, str], list[Embedding]]:
+    """Returns the cached embeddings for the given (document_id, fingerprint) pairs.
+    Pairs with no cached embeddings are not included in the result."""
+    if not document_id_fingerprint_pairs:
+        return {}
+
+    stmt = select(
+        ChunkEmbeddingCache.document_id,
+        ChunkEmbeddingCache.fingerprint,
+        ChunkEmbeddingCache.embeddings,
+        ChunkEmbeddingCache.num_embeddings,
+    ).where(
+        tuple_(ChunkEmbeddingCache.document_id, ChunkEmbeddingCache.fingerprint).in_(
+            document_id_fingerprint_pairs
+        )
+    )
+
+    cached: dict[tuple[str, str], list[Embedding]] = {}
+    for document_id, fingerprint, embeddings, num_embeddings in db_session.execute(
+        stmt
+    ):
+        cached[(document_id, fingerprint)] = (
+            np.frombuffer(embeddings, dtype=np.float32)
+            .reshape(num_embeddings, -1)
+            .tolist()
+        )
+    return cached
+
+
+def upsert_cached_chunk_embeddings__no_commit(
+    db_session: Session,
+    model_key: str,
+    document_id_to_fingerprints: dict[str, list[str]],
+    new_embeddings: dict[tuple[str, str], list[Embedding]],
+) -> None:
+    """Stores the newly computed embeddings, keyed by (document_id, fingerprint), and
+    drops entries for the same documents + model that are no longer referenced (e.g.
+    edited or removed chunks). `document_id_to_fingerprints` must contain the
+    fingerprints of ALL current chunks of each document."""
+    if document_id_to_fingerprints:
+        current_pairs = [
+            (document_id, fingerprint)
+            for document_id, fingerprints in document_id_to_fingerprints.items()
+            for fingerprint in fingerprints
+        ]
+        db_session.execute(
+            delete(ChunkEmbeddingCache).where(
+                and_(
+                    ChunkEmbeddingCache.document_id.in_(
+                        list(document_id_to_fingerprints)
+                    ),
+                    ChunkEmbeddingCache.model_key == model_key,
+                    tuple_(
+                        ChunkEmbeddingCache.document_id,
+                        ChunkEmbeddingCache.fingerprint,
+                    ).not_in(current_pairs),
+                )
+            )
+        )
+
+    if not new_embeddings:
+        return
+
+    rows = [
+        {
+            "document_id": document_id,
+            "fingerprint": fingerprint,
+            "model_key": model_key,
+            "embeddings": np.asarray(embeddings, dtype=np.float32).tobytes(),
+            "num_embeddings": len(embeddings),
+        }
+        for (document_id, fingerprint), embeddings in new_embeddings.items()
+    ]
+    # the fingerprint covers everything that goes into the embedding, so an
+    # existing entry is always identical to the new one
+    insert_stmt = insert(ChunkEmbeddingCache).values(rows)
+    db_session.execute(
+        insert_stmt.on_conflict_do_nothing(
+            index_elements=[
+                ChunkEmbeddingCache.document_id,
+                ChunkEmbeddingCache.fingerprint,
+            ]
+        )
+    )
+
+
+def fetch_cached_contextual_rag_summaries(
+    db_session: Session,
+    document_ids: list[str],
+    model_key: str,
+) -> dict[tuple[str, str], str]:
+    """Returns all cached contextual RAG summaries of the given documents for the
+    model, keyed by (document_id, fingerprint)."""
+    if not document_ids:
+        return {}
+
+    stmt = select(
+        ContextualRAGSummaryCache.document_id,
+        ContextualRAGSummaryCache.fingerprint,
+        ContextualRAGSummaryCache.summary,
+    ).where(
+        ContextualRAGSummaryCache.document_id.in_(document_ids),
+        ContextualRAGSummaryCache.model_key == model_key,
+    )
+    return {
+        (document_id, fingerprint): summary
+        for document_id, fingerprint, summary in db_session.execute(stmt)
+    }
+
+
+def upsert_cached_contextual_rag_summaries__no_commit(
+    db_session: Session,
+    model_key: str,
+    document_id_to_fingerprints: dict[str, list[str]],
+    new_summaries: dict[tuple[str, str], str],
+) -> None:
+    """Stores the newly generated summaries, keyed by (document_id, fingerprint), and
+    drops entries for the same documents + model that are no longer referenced.
+    `document_id_to_fingerprints` must contain the fingerprints of ALL current
+    summaries of each document."""
+    for document_id, fingerprints in document_id_to_fingerprints.items():
+        db_session.execute(
+            delete(ContextualRAGSummaryCache).where(
+                and_(
+                    ContextualRAGSummaryCache.document_id == document_id,
+                    ContextualRAGSummaryCache.model_key == model_key,
+                    ContextualRAGSummaryCache.fingerprint.not_in(fingerprints),
+                )
+            )
+        )
+
+    if not new_summaries:
+        return
+
+    rows = [
+        {
+            "document_id": document_id,
+            "fingerprint": fingerprint,
+            "model_key": model_key,
+            "summary": summary,
+        }
+        for (document_id, fingerprint), summary in new_summaries.items()
+    ]
+    # an existing entry was generated from the same prompt, LLM and content
+    insert_stmt = insert(ContextualRAGSummaryCache).values(rows)
+    db_session.execute(
+        insert_stmt.on_conflict_do_nothing(
+            index_elements=[
+                ContextualRAGSummaryCache.document_id,
+                ContextualRAGSummaryCache.fingerprint,
+            ]
+        )
+    )
+
+
+def delete_cached_contextual_rag_summaries__no_commit(
+    db_session: Session, document_ids: list[str]
+) -> None:
+    db_session.execute(
+        delete(ContextualRAGSummaryCache).where(
+            ContextualRAGSummaryCache.document_id.in_(document_ids)
+        )
+    )
+
+
+def fetch_cached_image_summaries(
+    db_session: Session, fingerprints: list[str]
+) -> dict[str, str]:
+    """Returns the cached image summaries for the given fingerprints."""
+    if not fingerprints:
+        return {}
+
+    stmt = select(ImageSummaryCache.fingerprint, ImageSummaryCache.summary).where(
+        ImageSummaryCache.fingerprint.in_(fingerprints)
+    )
+    return {fingerprint: summary for fingerprint, summary in db_session.execute(stmt)}
+
+
+def upsert_cached_image_summaries__no_commit(
+    db_session: Session, new_summaries: dict[str, str]
+) -> None:
+    if not new_summaries:
+        return
+
+    rows = [
+        {"fingerprint": fingerprint, "summary": summary}
+        for fingerprint, summary in new_summaries.items()
+    ]
+    # an existing entry was generated from the same image, LLM and prompts
+    insert_stmt = insert(ImageSummaryCache).values(rows)
+    db_session.execute(
+        insert_stmt.on_conflict_do_nothing(
+            index_elements=[ImageSummaryCache.fingerprint]
+        )
+    )
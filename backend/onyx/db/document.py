@@ -8,23 +8,30 @@ from datetime import timedelta
 from datetime import timezone
 
 from sqlalchemy import and_
+from sqlalchemy import Column
 from sqlalchemy import delete
 from sqlalchemy import exists
 from sqlalchemy import func
+from sqlalchemy import MetaData
 from sqlalchemy import or_
 from sqlalchemy import Select
 from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy import Table
 from sqlalchemy import tuple_
 from sqlalchemy import update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine.util import TransactionalContext
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.schema import DropTable
 from sqlalchemy.sql.expression import null
 
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.configs.constants import DocumentSource
 from onyx.configs.kg_configs import KG_SIMPLE_ANSWER_MAX_DISPLAYED_SOURCES
+from onyx.db.chunk import delete_cached_contextual_rag_summaries__no_commit
 from onyx.db.chunk import delete_chunk_stats_by_connector_credential_pair__no_commit
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.entities import delete_from_kg_entities__no_commit
@@ -57,6 +64,8 @@ logger = setup_logger()
 
 ONE_HOUR_IN_SECONDS = 60 * 60
 
+SOURCE_DOCUMENT_ID_STAGING_TABLE_NAME = "source_document_id_staging"
+
 
 def check_docs_exist(db_session: Session) -> bool:
     stmt = select(exists(DbDocument))
@@ -216,6 +225,57 @@ def get_documents_for_connector_credential_pair(
     return db_session.scalars(stmt).all()
 
 
+def create_source_document_id_staging_table__no_commit(db_session: Session) -> Table:
+    """Creates a temporary table to stage the ids of the documents that currently
+    exist in a connector's source. Temporary tables can't be created in a tenant
+    schema, so the table lives in pg_temp. It only exists on the connection that
+    created it, so the session must keep that connection (see
+    get_connection_bound_session_with_current_tenant) until the table is dropped."""
+    staging_table = Table(
+        SOURCE_DOCUMENT_ID_STAGING_TABLE_NAME,
+        MetaData(),
+        Column("id", String, primary_key=True),
+        schema="pg_temp",
+        prefixes=["TEMPORARY"],
+    )
+    # a pooled connection may still hold the table of an interrupted earlier run
+    db_session.execute(DropTable(staging_table, if_exists=True))
+    db_session.execute(CreateTable(staging_table))
+    return staging_table
+
+
+def drop_source_document_id_staging_table__no_commit(
+    db_session: Session, staging_table: Table
+) -> None:
+    db_session.execute(DropTable(staging_table, if_exists=True))
+
+
+def stage_source_document_ids__no_commit(
+    db_session: Session, staging_table: Table, document_ids: Iterable[str]
+) -> None:
+    rows = [{"id": document_id} for document_id in document_ids]
+    if not rows:
+        return
+
+    db_session.execute(insert(staging_table).on_conflict_do_nothing(), rows)
+
+
+def get_document_ids_missing_from_source(
+    db_session: Session,
+    connector_id: int,
+    credential_id: int,
+    staging_table: Table,
+) -> list[str]:
+    """Returns the ids of the documents indexed for the cc pair that were not staged
+    in the staging table, i.e. documents that no longer exist in the source."""
+    stmt = select(DocumentByConnectorCredentialPair.id).where(
+        DocumentByConnectorCredentialPair.connector_id == connector_id,
+        DocumentByConnectorCredentialPair.credential_id == credential_id,
+        ~exists().where(staging_table.c.id == DocumentByConnectorCredentialPair.id),
+    )
+    return list(db_session.scalars(stmt).all())
+
+
 def get_documents_by_ids(
     db_session: Session,
     document_ids: list[str],
@@ -630,6 +690,29 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(
+    document_ids: list[str],
+    db_session: Session,
+    synced_at: datetime | None = None,
+) -> None:
+    """Sets last_synced for all of the given documents in a single UPDATE.
+    Missing documents are ignored.
+
+    Pass the time at which the synced state was read as synced_at, so that
+    documents modified while the sync was running still need a sync afterwards.
+    """
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=synced_at or datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -734,6 +817,11 @@ def delete_documents_complete__no_commit(
         db_session=db_session,
         document_ids=document_ids,
     )
+    # not cascaded since the summary cache has no foreign key to the documents
+    delete_cached_contextual_rag_summaries__no_commit(
+        db_session=db_session,
+        document_ids=document_ids,
+    )
 
     delete_documents_by_connector_credential_pair__no_commit(db_session, document_ids)
     delete_document_feedback_for_documents__no_commit(
@@ -351,6 +351,28 @@ def get_session_with_tenant(*, tenant_id: str) -> Generator[Session, None, None]
             yield session
 
 
+@contextmanager
+def get_connection_bound_session_with_current_tenant() -> (
+    Generator[Session, None, None]
+):
+    """
+    Like get_session_with_current_tenant, but the session keeps a single connection
+    across commits. Needed for connection state such as temporary tables.
+    """
+    tenant_id = get_current_tenant_id()
+    if not is_valid_schema_name(tenant_id):
+        raise HTTPException(status_code=400, detail="Invalid tenant ID")
+
+    schema_translate_map = {None: tenant_id}
+    with (
+        get_sqlalchemy_engine()
+        .connect()
+        .execution_options(schema_translate_map=schema_translate_map) as connection
+    ):
+        with Session(bind=connection, expire_on_commit=False) as session:
+            yield session
+
+
 def get_session() -> Generator[Session, None, None]:
     """For use w/ Depends for FastAPI endpoints.
 
@@ -24,12 +24,18 @@ class CoordinationStatus(BaseModel):
     found: bool
     total_batches: int | None
     completed_batches: int
+    queued_batches: int = 0
     total_failures: int
     total_docs: int
     total_chunks: int
     status: IndexingStatus | None = None
     cancellation_requested: bool = False
 
+    @property
+    def in_flight_batches(self) -> int:
+        """Batches queued by docfetching that docprocessing has not completed yet."""
+        return max(self.queued_batches - self.completed_batches, 0)
+
 
 class IndexingCoordination:
     """Database-based coordination for indexing tasks, replacing Redis fencing."""
@@ -148,6 +154,24 @@ class IndexingCoordination:
                 f"Set total batches: attempt={index_attempt_id} total={total_batches}"
             )
 
+    @staticmethod
+    def update_queued_batches(
+        db_session: Session,
+        index_attempt_id: int,
+        queued_batches: int,
+    ) -> int:
+        """
+        Record the number of batches docfetching has queued for docprocessing.
+        Returns the number of queued batches that docprocessing has not completed yet.
+        """
+        attempt = get_index_attempt(db_session, index_attempt_id)
+        if not attempt:
+            return 0
+
+        attempt.queued_batches = queued_batches
+        db_session.commit()
+        return max(queued_batches - attempt.completed_batches, 0)
+
     @staticmethod
     def update_batch_completion_and_docs(
         db_session: Session,
@@ -225,6 +249,7 @@ class IndexingCoordination:
             found=True,
             total_batches=attempt.total_batches,
             completed_batches=attempt.completed_batches,
+            queued_batches=attempt.queued_batches,
             total_failures=count_error_rows_for_index_attempt(
                 index_attempt_id, db_session
             ),
@@ -1394,6 +1394,87 @@ class ChunkStats(Base):
     )
 
 
+class ChunkEmbeddingCache(Base):
+    """Embeddings of previously indexed chunks, keyed by a fingerprint of everything
+    that goes into the embedding (chunk text, title prefix, metadata suffix, embedding
+    model, ...). Lets re-indexing skip the embedding model for unchanged chunks."""
+
+    __tablename__ = "chunk_embedding_cache"
+
+    document_id: Mapped[str] = mapped_column(
+        NullFilteredString,
+        ForeignKey("document.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    fingerprint: Mapped[str] = mapped_column(String, primary_key=True)
+    # identifies the embedding model settings used, so that stale entries
+    # for a model can be cleaned up when a document is re-indexed
+    model_key: Mapped[str] = mapped_column(String, nullable=False)
+
+    # float32 vectors, concatenated (the full chunk embedding followed by the
+    # mini chunk embeddings, if any)
+    embeddings: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    num_embeddings: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    time_updated: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_chunk_embedding_cache_doc_model", document_id, model_key),
+    )
+
+
+class ContextualRAGSummaryCache(Base):
+    """Contextual RAG document summaries and chunk contexts from previous indexing
+    runs, keyed by a fingerprint of the prompt, the LLM and the summarized content.
+    Lets re-indexing skip the LLM for unchanged documents and chunks.
+
+    Not a foreign key to the document table since user files are summarized too."""
+
+    __tablename__ = "contextual_rag_summary_cache"
+
+    document_id: Mapped[str] = mapped_column(NullFilteredString, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String, primary_key=True)
+    # identifies the contextual RAG LLM, so that stale entries for it can be
+    # cleaned up when a document is re-indexed
+    model_key: Mapped[str] = mapped_column(String, nullable=False)
+
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+
+    time_updated: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_contextual_rag_summary_cache_doc_model", document_id, model_key),
+    )
+
+
+class ImageSummaryCache(Base):
+    """Vision LLM summaries of images from previous indexing runs, keyed by a
+    fingerprint of the image content, the LLM and the prompts. The same logos and
+    diagrams show up in many documents, so entries are not tied to a document."""
+
+    __tablename__ = "image_summary_cache"
+
+    fingerprint: Mapped[str] = mapped_column(String, primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+
+    time_updated: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
 class Tag(Base):
     __tablename__ = "tag"
 
@@ -1813,6 +1894,8 @@ class IndexAttempt(Base):
     total_batches: Mapped[int | None] = mapped_column(Integer, nullable=True)
     # batches that are fully indexed (i.e. have completed docfetching and docprocessing)
     completed_batches: Mapped[int] = mapped_column(Integer, default=0)
+    # batches that docfetching has handed to docprocessing so far
+    queued_batches: Mapped[int] = mapped_column(Integer, default=0)
     # TODO: unused, remove this column
     total_failures_batch_level: Mapped[int] = mapped_column(Integer, default=0)
     total_chunks: Mapped[int] = mapped_column(Integer, default=0)
@@ -2137,6 +2220,11 @@ class ChatMessage(Base):
     reasoning_tokens: Mapped[str | None] = mapped_column(Text, nullable=True)
     message: Mapped[str] = mapped_column(Text)
     token_count: Mapped[int] = mapped_column(Integer)
+    # Token counts of the message keyed by LLM tokenizer (see `get_llm_tokenizer_key`)
+    # so that history can be budgeted without re-tokenizing it every turn
+    token_counts: Mapped[dict[str, int] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True
+    )
     message_type: Mapped[MessageType] = mapped_column(
         Enum(MessageType, native_enum=False)
     )
@@ -2248,6 +2336,10 @@ class ToolCall(Base):
     # Only the top level tools (the ones with a parent_chat_message_id) have token counts that are counted
     # towards the session total.
     tool_call_tokens: Mapped[int] = mapped_column(Integer())
+    # Token counts of the response keyed by LLM tokenizer, like ChatMessage.token_counts
+    tool_call_response_token_counts: Mapped[dict[str, int] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True
+    )
     # For image generation tool - stores GeneratedImage objects for replay
     generated_images: Mapped[list[dict] | None] = mapped_column(
         postgresql.JSONB(), nullable=True
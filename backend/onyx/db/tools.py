@@ -223,6 +223,7 @@ def create_tool_call_no_commit(
     generated_images: list[dict] | None = None,
     tab_index: int = 0,
     add_only: bool = True,
+    tool_call_response_token_counts: dict[str, int] | None = None,
 ) -> ToolCall:
     """
     Create a ToolCall entry in the database.
@@ -241,6 +242,7 @@ def create_tool_call_no_commit(
         reasoning_tokens: Optional reasoning tokens
         generated_images: Optional list of generated image metadata for replay
         tab_index: Index order of tool calls from the LLM for parallel tool calls
+        tool_call_response_token_counts: Response token counts keyed by LLM tokenizer
         commit: If True, commit the transaction; if False, flush only
 
     Returns:
@@ -258,6 +260,7 @@ def create_tool_call_no_commit(
         tool_call_arguments=tool_call_arguments,
         tool_call_response=tool_call_response,
         tool_call_tokens=tool_call_tokens,
+        tool_call_response_token_counts=tool_call_response_token_counts,
         generated_images=generated_images,
     )
 
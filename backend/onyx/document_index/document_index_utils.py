@@ -8,7 +8,9 @@ from onyx.configs.app_configs import ENABLE_MULTIPASS_INDEXING
 from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.db.search_settings import get_secondary_search_settings
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import EnrichedDocumentIndexingInfo
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.indexing.models import MultipassConfig
 from shared_configs.configs import MULTI_TENANT
@@ -76,6 +78,35 @@ def translate_boost_count_to_multiplier(boost: int) -> float:
     return 2 / (1 + math.exp(-1 * boost / 3))
 
 
+def to_metadata_update_request(update: DocumentFieldsUpdate) -> MetadataUpdateRequest:
+    """Converts a single document's field update to a MetadataUpdateRequest. Fields
+    that are None are left alone, an empty list of user projects clears them."""
+    fields = update.fields
+    user_fields = update.user_fields
+    if fields is None and user_fields is None:
+        raise ValueError(
+            f"Bug: Tried to update document {update.doc_id} with no updated fields or user fields."
+        )
+
+    return MetadataUpdateRequest(
+        document_ids=[update.doc_id],
+        doc_id_to_chunk_cnt={
+            update.doc_id: (
+                update.chunk_count if update.chunk_count is not None else -1
+            )
+        },  # NOTE: -1 represents an unknown chunk count.
+        access=fields.access if fields is not None else None,
+        document_sets=fields.document_sets if fields is not None else None,
+        boost=fields.boost if fields is not None else None,
+        hidden=fields.hidden if fields is not None else None,
+        project_ids=(
+            set(user_fields.user_projects)
+            if user_fields is not None and user_fields.user_projects is not None
+            else None
+        ),
+    )
+
+
 # Assembles a list of Vespa chunk IDs for a document
 # given the required context. This can be used to directly query
 # Vespa's Document API.
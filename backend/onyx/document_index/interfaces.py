@@ -119,6 +119,19 @@ class VespaDocumentUserFields:
     user_projects: list[int] | None = None
 
 
+@dataclass
+class DocumentFieldsUpdate:
+    """
+    The fields to update for all chunks of a single document, see
+    Updatable.update_single
+    """
+
+    doc_id: str
+    chunk_count: int | None
+    fields: VespaDocumentFields | None = None
+    user_fields: VespaDocumentUserFields | None = None
+
+
 @dataclass
 class UpdateRequest:
     """
@@ -255,6 +268,22 @@ class Deletable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def delete(self, doc_ids: list[str], *, tenant_id: str) -> int:
+        """
+        Given a list of document ids, hard delete all of their chunks from the document
+        index. The chunks are selected by document id, so this takes a few requests
+        regardless of the number of chunks, and the chunk counts are not needed.
+
+        Parameters:
+        - doc_ids: document ids as specified by the connector. Documents which do not
+                exist are ignored.
+
+        Return:
+            The number of chunks deleted
+        """
+        raise NotImplementedError
+
 
 class Updatable(abc.ABC):
     """
@@ -292,6 +321,22 @@ class Updatable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def update_batch(
+        self, updates: list[DocumentFieldsUpdate], *, tenant_id: str
+    ) -> dict[str, Exception]:
+        """
+        Same as update_single for many documents at once, each with its own fields. The
+        chunk updates of all the documents are sent together, but a failure for one
+        document does not stop the others so that error conditions can still be handled
+        per document.
+
+        Return:
+            The error for every document id that failed to update. Documents that are
+            not in the returned dict were updated.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
         """
@@ -269,6 +269,23 @@ class Deletable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def delete_batch(self, document_ids: list[str]) -> int:
+        """Hard deletes all of the chunks for all of the corresponding
+        documents in the document index, with a few requests for the whole
+        batch rather than requests per chunk.
+
+        Documents which do not exist are ignored.
+
+        Args:
+            document_ids: The unique identifiers for the documents as
+                represented in Onyx, not necessarily in the document index.
+
+        Returns:
+            The number of chunks deleted.
+        """
+        raise NotImplementedError
+
 
 class Updatable(abc.ABC):
     """
@@ -301,6 +318,24 @@ class Updatable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def update_batch(
+        self,
+        update_requests: list[MetadataUpdateRequest],
+    ) -> dict[str, Exception]:
+        """Same as update, but a failure for one document does not stop the
+        updates of the others.
+
+        Args:
+            update_requests: A list of update requests, each containing a list
+                of document IDs and the fields to update.
+
+        Returns:
+            The error for every document ID that failed to update. Documents
+            that are not in the returned dict were updated.
+        """
+        raise NotImplementedError
+
 
 class IdRetrievalCapable(abc.ABC):
     """
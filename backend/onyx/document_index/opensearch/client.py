@@ -1,4 +1,6 @@
+import json
 import logging
+import time
 from typing import Any
 from typing import Generic
 from typing import TypeVar
@@ -9,6 +11,8 @@ from pydantic import BaseModel
 
 from onyx.configs.app_configs import OPENSEARCH_ADMIN_PASSWORD
 from onyx.configs.app_configs import OPENSEARCH_ADMIN_USERNAME
+from onyx.configs.app_configs import OPENSEARCH_BULK_MAX_BYTES
+from onyx.configs.app_configs import OPENSEARCH_BULK_MAX_RETRIES
 from onyx.configs.app_configs import OPENSEARCH_HOST
 from onyx.configs.app_configs import OPENSEARCH_REST_API_PORT
 from onyx.document_index.opensearch.schema import DocumentChunk
@@ -30,6 +34,12 @@ opensearch_logger.setLevel(logging.WARNING)
 
 SchemaDocumentModel = TypeVar("SchemaDocumentModel")
 
+# Per-item statuses in a _bulk response which indicate the item was not applied
+# because the cluster was overloaded, and which are therefore safe to resend.
+_BULK_RETRYABLE_STATUSES = (429, 502, 503, 504)
+_BULK_RETRY_BASE_DELAY_SECONDS = 1.0
+_BULK_RETRY_MAX_DELAY_SECONDS = 30.0
+
 
 class SearchHit(BaseModel, Generic[SchemaDocumentModel]):
     """Represents a hit from OpenSearch in response to a query.
@@ -50,6 +60,38 @@ class SearchHit(BaseModel, Generic[SchemaDocumentModel]):
     match_highlights: dict[str, list[str]] = {}
 
 
+class BulkItemFailure(BaseModel):
+    """An item of a _bulk request which OpenSearch did not apply."""
+
+    model_config = {"frozen": True}
+
+    document_chunk_id: str
+    status: int
+    error_type: str
+    error_reason: str
+
+
+class BulkOperationError(RuntimeError):
+    """Raised when some items of a _bulk request failed with a non-retryable
+    status or kept failing after all retries."""
+
+    def __init__(self, failures: list[BulkItemFailure]):
+        self.failures = failures
+        super().__init__(
+            f"{len(failures)} bulk operation item(s) failed. First failure: "
+            f"{failures[0].document_chunk_id} returned {failures[0].status} "
+            f"({failures[0].error_type}: {failures[0].error_reason})."
+        )
+
+
+class _BulkOperation(BaseModel):
+    model_config = {"frozen": True}
+
+    document_chunk_id: str
+    # Serialized action and, if any, source lines of the NDJSON request body.
+    payload: bytes
+
+
 class OpenSearchClient:
     """Client for interacting with OpenSearch.
 
@@ -272,6 +314,144 @@ class OpenSearchClient:
                     f'Unknown OpenSearch indexing result: "{result_string}".'
                 )
 
+    def bulk_index_documents(
+        self,
+        documents: list[DocumentChunk],
+        max_batch_bytes: int = OPENSEARCH_BULK_MAX_BYTES,
+        max_retries: int = OPENSEARCH_BULK_MAX_RETRIES,
+    ) -> None:
+        """Indexes documents using the _bulk API.
+
+        Like index_document, indexing a document will fail if a document with
+        the same ID already exists. Documents are sent in requests of at most
+        max_batch_bytes, and only the items which were rejected with a
+        retryable status are resent.
+
+        Args:
+            documents: The documents to index.
+            max_batch_bytes: The maximum size of a single request body. A
+                document larger than this is sent in a request on its own.
+            max_retries: The number of times to resend items which failed with
+                a retryable status.
+
+        Raises:
+            BulkOperationError: Some documents failed to index. This includes
+                the case where a document with the same ID already exists, in
+                which case the failure status is 409.
+            Exception: There was an error sending a bulk request.
+        """
+        operations: list[_BulkOperation] = []
+        for document in documents:
+            document_chunk_id = get_opensearch_doc_chunk_id(
+                document_id=document.document_id,
+                chunk_index=document.chunk_index,
+                max_chunk_size=document.max_chunk_size,
+            )
+            action = {"create": {"_index": self._index_name, "_id": document_chunk_id}}
+            operations.append(
+                _BulkOperation(
+                    document_chunk_id=document_chunk_id,
+                    payload=(
+                        json.dumps(action).encode()
+                        + b"\n"
+                        + document.model_dump_json(exclude_none=True).encode()
+                        + b"\n"
+                    ),
+                )
+            )
+
+        failures = self._run_bulk_operations(operations, max_batch_bytes, max_retries)
+        if failures:
+            raise BulkOperationError(failures)
+
+    def bulk_delete_documents(
+        self,
+        document_chunk_ids: list[str],
+        max_batch_bytes: int = OPENSEARCH_BULK_MAX_BYTES,
+        max_retries: int = OPENSEARCH_BULK_MAX_RETRIES,
+    ) -> set[str]:
+        """Deletes documents by ID using the _bulk API.
+
+        Args:
+            document_chunk_ids: The OpenSearch IDs of the document chunks to
+                delete.
+            max_batch_bytes: The maximum size of a single request body.
+            max_retries: The number of times to resend items which failed with
+                a retryable status.
+
+        Raises:
+            BulkOperationError: Some documents failed to delete. Documents which
+                were not found are not failures.
+            Exception: There was an error sending a bulk request.
+
+        Returns:
+            The IDs of the document chunks which were deleted. IDs which were
+                not found are omitted.
+        """
+        operations = [
+            _BulkOperation(
+                document_chunk_id=document_chunk_id,
+                payload=json.dumps(
+                    {"delete": {"_index": self._index_name, "_id": document_chunk_id}}
+                ).encode()
+                + b"\n",
+            )
+            for document_chunk_id in document_chunk_ids
+        ]
+
+        failures = self._run_bulk_operations(operations, max_batch_bytes, max_retries)
+        not_found = {
+            failure.document_chunk_id for failure in failures if failure.status == 404
+        }
+        failures = [failure for failure in failures if failure.status != 404]
+        if failures:
+            raise BulkOperationError(failures)
+
+        return set(document_chunk_ids) - not_found
+
+    def bulk_update_documents(
+        self,
+        document_chunk_id_to_properties: dict[str, dict[str, Any]],
+        max_batch_bytes: int = OPENSEARCH_BULK_MAX_BYTES,
+        max_retries: int = OPENSEARCH_BULK_MAX_RETRIES,
+    ) -> None:
+        """Updates the properties of documents using the _bulk API.
+
+        Like update_document, updating a document which does not exist fails.
+
+        Args:
+            document_chunk_id_to_properties: The properties to update for the
+                OpenSearch ID of each document chunk. Each property should exist
+                in the schema.
+            max_batch_bytes: The maximum size of a single request body.
+            max_retries: The number of times to resend items which failed with
+                a retryable status.
+
+        Raises:
+            BulkOperationError: Some documents failed to update, including
+                documents which were not found, in which case the failure status
+                is 404.
+            Exception: There was an error sending a bulk request.
+        """
+        operations: list[_BulkOperation] = []
+        for document_chunk_id, properties in document_chunk_id_to_properties.items():
+            action = {"update": {"_index": self._index_name, "_id": document_chunk_id}}
+            operations.append(
+                _BulkOperation(
+                    document_chunk_id=document_chunk_id,
+                    payload=(
+                        json.dumps(action).encode()
+                        + b"\n"
+                        + json.dumps({"doc": properties}).encode()
+                        + b"\n"
+                    ),
+                )
+            )
+
+        failures = self._run_bulk_operations(operations, max_batch_bytes, max_retries)
+        if failures:
+            raise BulkOperationError(failures)
+
     def delete_document(self, document_chunk_id: str) -> bool:
         """Deletes a document.
 
@@ -574,6 +754,100 @@ class OpenSearchClient:
         """
         self._client.close()
 
+    def _run_bulk_operations(
+        self,
+        operations: list[_BulkOperation],
+        max_batch_bytes: int,
+        max_retries: int,
+    ) -> list[BulkItemFailure]:
+        """Sends operations in _bulk requests of at most max_batch_bytes,
+        resending only the items which failed with a retryable status.
+
+        Returns:
+            The items which failed with a non-retryable status, or which were
+                still failing after max_retries retries.
+        """
+        final_failures: list[BulkItemFailure] = []
+        pending = operations
+        for attempt in range(max_retries + 1):
+            retryable_operations: list[_BulkOperation] = []
+            retryable_failures: list[BulkItemFailure] = []
+            for batch in _batch_by_size(pending, max_batch_bytes):
+                failures = self._send_bulk_request(batch)
+                operation_by_id = {
+                    operation.document_chunk_id: operation for operation in batch
+                }
+                for failure in failures:
+                    if failure.status in _BULK_RETRYABLE_STATUSES:
+                        retryable_operations.append(
+                            operation_by_id[failure.document_chunk_id]
+                        )
+                        retryable_failures.append(failure)
+                    else:
+                        final_failures.append(failure)
+
+            if not retryable_operations:
+                return final_failures
+            if attempt == max_retries:
+                final_failures.extend(retryable_failures)
+                return final_failures
+
+            logger.warning(
+                f"{len(retryable_operations)} bulk operation item(s) for index {self._index_name} were rejected "
+                f"with a retryable status, retrying (attempt {attempt + 1}/{max_retries})."
+            )
+            time.sleep(
+                min(
+                    _BULK_RETRY_BASE_DELAY_SECONDS * (2**attempt),
+                    _BULK_RETRY_MAX_DELAY_SECONDS,
+                )
+            )
+            pending = retryable_operations
+
+        return final_failures
+
+    def _send_bulk_request(
+        self, operations: list[_BulkOperation]
+    ) -> list[BulkItemFailure]:
+        """Sends a single _bulk request.
+
+        Raises:
+            Exception: There was an error sending the request, or the response
+                does not match the request.
+
+        Returns:
+            The items in the request which failed.
+        """
+        body = b"".join(operation.payload for operation in operations)
+        result: dict[str, Any] = self._client.bulk(body=body, index=self._index_name)
+        if not result.get("errors", False):
+            return []
+
+        items: list[dict[str, Any]] = result.get("items", [])
+        # Sanity check. Items in the response are in the order of the request.
+        if len(items) != len(operations):
+            raise RuntimeError(
+                f"OpenSearch responded with {len(items)} items to a bulk request with {len(operations)} operations."
+            )
+
+        failures: list[BulkItemFailure] = []
+        for operation, item in zip(operations, items):
+            # Each item is keyed by its action type, e.g. {"create": {...}}.
+            item_result: dict[str, Any] = next(iter(item.values()))
+            status: int = item_result.get("status", 0)
+            if 200 <= status < 300:
+                continue
+            error: dict[str, Any] = item_result.get("error") or {}
+            failures.append(
+                BulkItemFailure(
+                    document_chunk_id=operation.document_chunk_id,
+                    status=status,
+                    error_type=error.get("type", ""),
+                    error_reason=error.get("reason", ""),
+                )
+            )
+        return failures
+
     def _get_hits_from_search_result(self, result: dict[str, Any]) -> list[Any]:
         """Extracts the hits from a search result.
 
@@ -596,3 +870,24 @@ class OpenSearchClient:
             )
         hits_second_layer: list[Any] = hits_first_layer.get("hits", [])
         return hits_second_layer
+
+
+def _batch_by_size(
+    operations: list[_BulkOperation], max_batch_bytes: int
+) -> list[list[_BulkOperation]]:
+    batches: list[list[_BulkOperation]] = []
+    current_batch: list[_BulkOperation] = []
+    current_batch_bytes = 0
+    for operation in operations:
+        if (
+            current_batch
+            and current_batch_bytes + len(operation.payload) > max_batch_bytes
+        ):
+            batches.append(current_batch)
+            current_batch = []
+            current_batch_bytes = 0
+        current_batch.append(operation)
+        current_batch_bytes += len(operation.payload)
+    if current_batch:
+        batches.append(current_batch)
+    return batches
@@ -19,6 +19,8 @@ from onyx.document_index.chunk_content_enrichment import cleanup_content_for_chu
 from onyx.document_index.chunk_content_enrichment import (
     generate_enriched_content_for_chunk,
 )
+from onyx.document_index.document_index_utils import to_metadata_update_request
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import DocumentIndex as OldDocumentIndex
 from onyx.document_index.interfaces import (
     DocumentInsertionRecord as OldDocumentInsertionRecord,
@@ -34,6 +36,7 @@ from onyx.document_index.interfaces_new import DocumentSectionRequest
 from onyx.document_index.interfaces_new import IndexingMetadata
 from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.opensearch.client import BulkOperationError
 from onyx.document_index.opensearch.client import OpenSearchClient
 from onyx.document_index.opensearch.client import SearchHit
 from onyx.document_index.opensearch.schema import ACCESS_CONTROL_LIST_FIELD_NAME
@@ -59,7 +62,6 @@ from onyx.document_index.opensearch.search import (
     ZSCORE_NORMALIZATION_PIPELINE_NAME,
 )
 from onyx.indexing.models import DocMetadataAwareIndexChunk
-from onyx.indexing.models import Document
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import MULTI_TENANT
 from shared_configs.model_server_models import Embedding
@@ -185,6 +187,32 @@ def _convert_onyx_chunk_to_opensearch_document(
     )
 
 
+def _get_properties_to_update(
+    update_request: MetadataUpdateRequest,
+) -> dict[str, Any]:
+    properties_to_update: dict[str, Any] = dict()
+    # TODO(andrei): Nit but consider if we can use DocumentChunk
+    # here so we don't have to think about passing in the
+    # appropriate types into this dict.
+    if update_request.access is not None:
+        properties_to_update[ACCESS_CONTROL_LIST_FIELD_NAME] = list(
+            update_request.access.to_acl()
+        )
+    if update_request.document_sets is not None:
+        properties_to_update[DOCUMENT_SETS_FIELD_NAME] = list(
+            update_request.document_sets
+        )
+    if update_request.boost is not None:
+        properties_to_update[GLOBAL_BOOST_FIELD_NAME] = int(update_request.boost)
+    if update_request.hidden is not None:
+        properties_to_update[HIDDEN_FIELD_NAME] = update_request.hidden
+    if update_request.project_ids is not None:
+        properties_to_update[USER_PROJECTS_FIELD_NAME] = list(
+            update_request.project_ids
+        )
+    return properties_to_update
+
+
 class OpenSearchOldDocumentIndex(OldDocumentIndex):
     """
     Wrapper for OpenSearch to adapt the new DocumentIndex interface with
@@ -282,6 +310,9 @@ class OpenSearchOldDocumentIndex(OldDocumentIndex):
     ) -> int:
         return self._real_index.delete(doc_id, chunk_count)
 
+    def delete(self, doc_ids: list[str], *, tenant_id: str) -> int:
+        return self._real_index.delete_batch(doc_ids)
+
     def update_single(
         self,
         doc_id: str,
@@ -291,29 +322,28 @@ class OpenSearchOldDocumentIndex(OldDocumentIndex):
         fields: VespaDocumentFields | None,
         user_fields: VespaDocumentUserFields | None,
     ) -> None:
-        if fields is None and user_fields is None:
-            raise ValueError(
-                f"Bug: Tried to update document {doc_id} with no updated fields or user fields."
-            )
-
-        # Convert VespaDocumentFields to MetadataUpdateRequest.
-        update_request = MetadataUpdateRequest(
-            document_ids=[doc_id],
-            doc_id_to_chunk_cnt={
-                doc_id: chunk_count if chunk_count is not None else -1
-            },
-            access=fields.access if fields else None,
-            document_sets=fields.document_sets if fields else None,
-            boost=fields.boost if fields else None,
-            hidden=fields.hidden if fields else None,
-            project_ids=(
-                set(user_fields.user_projects)
-                if user_fields and user_fields.user_projects
-                else None
-            ),
+        return self._real_index.update(
+            [
+                to_metadata_update_request(
+                    DocumentFieldsUpdate(
+                        doc_id=doc_id,
+                        chunk_count=chunk_count,
+                        fields=fields,
+                        user_fields=user_fields,
+                    )
+                )
+            ]
         )
 
-        return self._real_index.update([update_request])
+    def update_batch(
+        self,
+        updates: list[DocumentFieldsUpdate],
+        *,
+        tenant_id: str,
+    ) -> dict[str, Exception]:
+        return self._real_index.update_batch(
+            [to_metadata_update_request(update) for update in updates]
+        )
 
     def update(
         self,
@@ -450,46 +480,97 @@ class OpenSearchDocumentIndex(DocumentIndex):
         chunks: list[DocMetadataAwareIndexChunk],
         indexing_metadata: IndexingMetadata,
     ) -> list[DocumentInsertionRecord]:
-        # Set of doc IDs.
-        unique_docs_to_be_indexed: set[str] = set()
-        document_indexing_results: list[DocumentInsertionRecord] = []
-        for chunk in chunks:
-            document_insertion_record: DocumentInsertionRecord | None = None
-            onyx_document: Document = chunk.source_document
-            if onyx_document.id not in unique_docs_to_be_indexed:
-                # If this is the first time we see this doc in this indexing
-                # operation, first delete the doc's chunks from the index. This
-                # is so that there are no dangling chunks in the index, in the
-                # event that the new document's content contains fewer chunks
-                # than the previous content.
-                # TODO(andrei): This can possibly be made more efficient by
-                # checking if the chunk count has actually decreased. This
-                # assumes that overlapping chunks are perfectly overwritten. If
-                # we can't guarantee that then we need the code as-is.
-                unique_docs_to_be_indexed.add(onyx_document.id)
-                num_chunks_deleted = self.delete(
-                    onyx_document.id, onyx_document.chunk_count
-                )
-                # If we see that chunks were deleted we assume the doc already
-                # existed.
-                document_insertion_record = DocumentInsertionRecord(
-                    document_id=onyx_document.id,
-                    already_existed=num_chunks_deleted > 0,
-                )
+        # Doc IDs in the order they are first seen in chunks.
+        document_ids: list[str] = list(
+            dict.fromkeys(chunk.source_document.id for chunk in chunks)
+        )
+
+        # First delete the docs' chunks from the index. This is so that there
+        # are no dangling chunks in the index, in the event that the new
+        # document's content contains fewer chunks than the previous content.
+        # Chunk IDs are deterministic so when the previous chunk count is known
+        # all docs are deleted in bulk requests rather than a query per doc.
+        # TODO(andrei): This can possibly be made more efficient by checking if
+        # the chunk count has actually decreased. This assumes that overlapping
+        # chunks are perfectly overwritten. If we can't guarantee that then we
+        # need the code as-is.
+        doc_id_to_chunk_cnt_diff = indexing_metadata.doc_id_to_chunk_cnt_diff
+        chunk_id_to_doc_id: dict[str, str] = {}
+        already_existing_doc_ids: set[str] = set()
+        for document_id in document_ids:
+            chunk_cnt_diff = doc_id_to_chunk_cnt_diff.get(document_id)
+            if chunk_cnt_diff is None:
+                num_chunks_deleted = self.delete(document_id)
+                if num_chunks_deleted > 0:
+                    already_existing_doc_ids.add(document_id)
+                continue
+            for chunk_index in range(chunk_cnt_diff.old_chunk_cnt):
+                chunk_id_to_doc_id[
+                    get_opensearch_doc_chunk_id(
+                        document_id=document_id, chunk_index=chunk_index
+                    )
+                ] = document_id
 
-            opensearch_document_chunk = _convert_onyx_chunk_to_opensearch_document(
-                chunk
+        if chunk_id_to_doc_id:
+            deleted_chunk_ids = self._os_client.bulk_delete_documents(
+                list(chunk_id_to_doc_id.keys())
+            )
+            # If we see that chunks were deleted we assume the doc already
+            # existed.
+            already_existing_doc_ids.update(
+                chunk_id_to_doc_id[chunk_id] for chunk_id in deleted_chunk_ids
             )
-            # TODO(andrei): After our client supports batch indexing, use that
-            # here.
-            self._os_client.index_document(opensearch_document_chunk)
 
-            if document_insertion_record is not None:
-                # Only add records once per doc. This object is not None only if
-                # we've seen this doc for the first time in this for-loop.
-                document_indexing_results.append(document_insertion_record)
+        opensearch_document_chunks = [
+            _convert_onyx_chunk_to_opensearch_document(chunk) for chunk in chunks
+        ]
+        try:
+            self._os_client.bulk_index_documents(opensearch_document_chunks)
+        except BulkOperationError as e:
+            # A conflict means the index has chunks for a doc which the
+            # previous chunk count did not account for, e.g. from an earlier
+            # failed indexing attempt. Fall back to deleting every chunk of
+            # those docs and indexing them again. Anything else is unexpected.
+            if any(failure.status != 409 for failure in e.failures):
+                raise
+            conflicting_chunk_ids = {
+                failure.document_chunk_id for failure in e.failures
+            }
+            conflicting_doc_ids = {
+                chunk.document_id
+                for chunk in opensearch_document_chunks
+                if get_opensearch_doc_chunk_id(
+                    document_id=chunk.document_id,
+                    chunk_index=chunk.chunk_index,
+                    max_chunk_size=chunk.max_chunk_size,
+                )
+                in conflicting_chunk_ids
+            }
+            logger.warning(
+                f"Found untracked chunks for {len(conflicting_doc_ids)} document(s) while indexing, "
+                "deleting all of their chunks and retrying."
+            )
+            # Chunks created by the request above are only visible to delete by
+            # query after a refresh.
+            self._os_client.refresh_index()
+            for document_id in conflicting_doc_ids:
+                self.delete(document_id)
+            already_existing_doc_ids.update(conflicting_doc_ids)
+            self._os_client.bulk_index_documents(
+                [
+                    chunk
+                    for chunk in opensearch_document_chunks
+                    if chunk.document_id in conflicting_doc_ids
+                ]
+            )
 
-        return document_indexing_results
+        return [
+            DocumentInsertionRecord(
+                document_id=document_id,
+                already_existed=document_id in already_existing_doc_ids,
+            )
+            for document_id in document_ids
+        ]
 
     def delete(self, document_id: str, chunk_count: int | None = None) -> int:
         """Deletes all chunks for a given document.
@@ -517,6 +598,31 @@ class OpenSearchDocumentIndex(DocumentIndex):
 
         return self._os_client.delete_by_query(query_body)
 
+    def delete_batch(self, document_ids: list[str]) -> int:
+        """Deletes all chunks for the given documents with a single
+        delete_by_query.
+
+        Args:
+            document_ids: The unique identifiers for the documents as
+                represented in Onyx.
+
+        Raises:
+            RuntimeError: Failed to delete some or all of the chunks for the
+                documents.
+
+        Returns:
+            The number of chunks successfully deleted.
+        """
+        if not document_ids:
+            return 0
+
+        query_body = DocumentQuery.delete_from_document_ids_query(
+            document_ids=document_ids,
+            tenant_state=self._tenant_state,
+        )
+
+        return self._os_client.delete_by_query(query_body)
+
     def update(
         self,
         update_requests: list[MetadataUpdateRequest],
@@ -527,9 +633,6 @@ class OpenSearchDocumentIndex(DocumentIndex):
         NOTE: Each update request must have some field to update; if not it is
         assumed there is a bug in the caller and this will raise.
 
-        TODO(andrei): Consider exploring a batch API for OpenSearch for this
-        operation.
-
         Args:
             update_requests: A list of update requests, each containing a list
                 of document IDs and the fields to update. The field updates
@@ -539,55 +642,78 @@ class OpenSearchDocumentIndex(DocumentIndex):
             RuntimeError: Failed to update some or all of the chunks for the
                 specified documents.
         """
-        for update_request in update_requests:
-            properties_to_update: dict[str, Any] = dict()
-            # TODO(andrei): Nit but consider if we can use DocumentChunk
-            # here so we don't have to think about passing in the
-            # appropriate types into this dict.
-            if update_request.access is not None:
-                properties_to_update[ACCESS_CONTROL_LIST_FIELD_NAME] = list(
-                    update_request.access.to_acl()
-                )
-            if update_request.document_sets is not None:
-                properties_to_update[DOCUMENT_SETS_FIELD_NAME] = list(
-                    update_request.document_sets
-                )
-            if update_request.boost is not None:
-                properties_to_update[GLOBAL_BOOST_FIELD_NAME] = int(
-                    update_request.boost
-                )
-            if update_request.hidden is not None:
-                properties_to_update[HIDDEN_FIELD_NAME] = update_request.hidden
-            if update_request.project_ids is not None:
-                properties_to_update[USER_PROJECTS_FIELD_NAME] = list(
-                    update_request.project_ids
-                )
+        failures = self.update_batch(update_requests)
+        if failures:
+            raise next(iter(failures.values()))
+
+    def update_batch(
+        self,
+        update_requests: list[MetadataUpdateRequest],
+    ) -> dict[str, Exception]:
+        """Updates the chunks of all of the documents with a single set of _bulk
+        requests.
 
+        NOTE: Documents with an unknown chunk count or with no fields to update
+        fail with a ValueError, like in update, without stopping the others.
+
+        Args:
+            update_requests: A list of update requests, each containing a list
+                of document IDs and the fields to update.
+
+        Returns:
+            The error for every document ID that failed to update.
+        """
+        failures: dict[str, Exception] = {}
+        document_chunk_id_to_properties: dict[str, dict[str, Any]] = {}
+        document_chunk_id_to_document_id: dict[str, str] = {}
+        for update_request in update_requests:
+            properties_to_update = _get_properties_to_update(update_request)
             for doc_id in update_request.document_ids:
                 if not properties_to_update:
-                    raise ValueError(
+                    failures[doc_id] = ValueError(
                         f"Bug: Tried to update document {doc_id} with no updated fields or user fields."
                     )
+                    continue
 
                 doc_chunk_count = update_request.doc_id_to_chunk_cnt.get(doc_id, -1)
                 if doc_chunk_count < 0:
-                    raise ValueError(
+                    failures[doc_id] = ValueError(
                         f"Tried to update document {doc_id} but its chunk count is not known. Older versions of the "
                         "application used to permit this but is not a supported state for a document when using OpenSearch."
                     )
+                    continue
                 if doc_chunk_count == 0:
-                    raise ValueError(
+                    failures[doc_id] = ValueError(
                         f"Bug: Tried to update document {doc_id} but its chunk count was 0."
                     )
+                    continue
 
                 for chunk_index in range(doc_chunk_count):
                     document_chunk_id = get_opensearch_doc_chunk_id(
                         document_id=doc_id, chunk_index=chunk_index
                     )
-                    self._os_client.update_document(
-                        document_chunk_id=document_chunk_id,
-                        properties_to_update=properties_to_update,
+                    document_chunk_id_to_properties[document_chunk_id] = (
+                        properties_to_update
                     )
+                    document_chunk_id_to_document_id[document_chunk_id] = doc_id
+
+        if not document_chunk_id_to_properties:
+            return failures
+
+        try:
+            self._os_client.bulk_update_documents(document_chunk_id_to_properties)
+        except BulkOperationError as e:
+            for failure in e.failures:
+                doc_id = document_chunk_id_to_document_id[failure.document_chunk_id]
+                failures.setdefault(
+                    doc_id,
+                    RuntimeError(
+                        f"Failed to update chunk {failure.document_chunk_id} of document {doc_id}. "
+                        f"OpenSearch returned {failure.status} ({failure.error_type}: {failure.error_reason})."
+                    ),
+                )
+
+        return failures
 
     def id_based_retrieval(
         self,
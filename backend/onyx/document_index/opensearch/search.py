@@ -210,6 +210,40 @@ class DocumentQuery:
 
         return final_delete_query
 
+    @staticmethod
+    def delete_from_document_ids_query(
+        document_ids: list[str],
+        tenant_state: TenantState,
+    ) -> dict[str, Any]:
+        """
+        Returns a final search query which deletes all chunks from the given
+        document IDs.
+
+        Same as delete_from_document_id_query but for a batch of documents, so
+        that they are deleted with a single delete_by_query.
+
+        Args:
+            document_ids: Onyx document IDs.
+            tenant_state: Tenant state containing the tenant ID.
+
+        Returns:
+            A dictionary representing the final delete query.
+        """
+        filter_clauses: list[dict[str, Any]] = [
+            {"terms": {DOCUMENT_ID_FIELD_NAME: document_ids}}
+        ]
+
+        if tenant_state.multitenant:
+            filter_clauses.append(
+                {"term": {TENANT_ID_FIELD_NAME: {"value": tenant_state.tenant_id}}}
+            )
+
+        final_delete_query: dict[str, Any] = {
+            "query": {"bool": {"filter": filter_clauses}},
+        }
+
+        return final_delete_query
+
     @staticmethod
     def get_hybrid_search_query(
         query_text: str,
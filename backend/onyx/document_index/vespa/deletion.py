@@ -4,8 +4,14 @@ from uuid import UUID
 import httpx
 from retry import retry
 
+from onyx.configs.app_configs import DOCUMENT_INDEX_NAME
+from onyx.document_index.vespa.shared_utils.utils import to_vespa_selection_string
+from onyx.document_index.vespa_constants import DELETE_BY_SELECTION_BATCH_SIZE
+from onyx.document_index.vespa_constants import DOCUMENT_ID
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import NUM_THREADS
+from onyx.document_index.vespa_constants import TENANT_ID
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -67,3 +73,73 @@ def delete_vespa_chunks(
     finally:
         if not external_executor:
             executor.shutdown(wait=True)
+
+
+@retry(tries=10, delay=1, backoff=2)
+def _retryable_delete_by_selection(
+    http_client: httpx.Client, url: str, selection: str
+) -> int:
+    num_deleted = 0
+    continuation: str | None = None
+    # Vespa deletes the matching documents in slices, the continuation is where the
+    # next request has to pick up
+    while True:
+        params: dict[str, str] = {
+            "selection": selection,
+            "cluster": DOCUMENT_INDEX_NAME,
+        }
+        if continuation:
+            params["continuation"] = continuation
+
+        res = http_client.delete(url, params=params)
+        res.raise_for_status()
+        response_data = res.json()
+        num_deleted += response_data.get("documentCount", 0)
+
+        continuation = response_data.get("continuation")
+        if not continuation:
+            return num_deleted
+
+
+def delete_vespa_documents_by_selection(
+    document_ids: list[str],
+    index_name: str,
+    http_client: httpx.Client,
+    tenant_id: str | None = None,
+) -> int:
+    """Deletes all of the chunks of the documents with a document selection on
+    document_id, without knowing their chunk IDs. Each request removes the chunks of
+    DELETE_BY_SELECTION_BATCH_SIZE documents, including large chunks and chunks
+    written under older chunk ID schemes.
+
+    Args:
+        document_ids: IDs of the documents to delete, as stored in Vespa.
+        index_name: Name of the index to delete from.
+        http_client: HTTP client to use for the requests.
+        tenant_id: If set, only chunks of this tenant are deleted.
+
+    Returns:
+        The number of chunks deleted.
+    """
+    url = DOCUMENT_ID_ENDPOINT.format(index_name=index_name)
+    num_deleted = 0
+    for document_id_batch in batch_generator(
+        document_ids, DELETE_BY_SELECTION_BATCH_SIZE
+    ):
+        selection = " or ".join(
+            f"{index_name}.{DOCUMENT_ID}=={to_vespa_selection_string(document_id)}"
+            for document_id in document_id_batch
+        )
+        if tenant_id is not None:
+            selection = (
+                f"({selection}) and "
+                f"{index_name}.{TENANT_ID}=={to_vespa_selection_string(tenant_id)}"
+            )
+
+        try:
+            num_deleted += _retryable_delete_by_selection(http_client, url, selection)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to delete documents, details: {e.response.text}")
+            raise
+
+    return num_deleted
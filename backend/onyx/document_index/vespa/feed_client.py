@@ -0,0 +1,260 @@
+import asyncio
+import random
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+from pydantic import BaseModel
+
+from onyx.document_index.vespa.indexing_utils import build_vespa_chunk_fields
+from onyx.document_index.vespa.indexing_utils import get_vespa_chunk_url
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_async_http_client
+from onyx.document_index.vespa_constants import FEED_MAX_IN_FLIGHT
+from onyx.document_index.vespa_constants import FEED_MIN_IN_FLIGHT
+from onyx.document_index.vespa_constants import NUM_THREADS
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_async_sync_no_cancel
+
+logger = setup_logger()
+
+# Retry configuration constants
+INDEXING_MAX_RETRIES = 5
+INDEXING_BASE_DELAY = 1.0
+INDEXING_MAX_DELAY = 60.0
+
+# Vespa uses these to signal that it is overloaded and the client should slow down
+_THROTTLE_STATUS_CODES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+)
+_NON_RETRYABLE_STATUS_CODES = (
+    HTTPStatus.BAD_REQUEST,
+    HTTPStatus.UNAUTHORIZED,
+    HTTPStatus.FORBIDDEN,
+    HTTPStatus.NOT_FOUND,
+    HTTPStatus.INSUFFICIENT_STORAGE,
+)
+
+
+class VespaFeedOperation(BaseModel):
+    # Operations with the same key are sent one at a time in the order given
+    ordering_key: str
+    url: str
+    fields: dict[str, Any]
+    # Used for logging and to report failures per document
+    document_id: str
+    # Partial updates (e.g. `{"boost": {"assign": 2.0}}`) are PUT, full chunks are
+    # POSTed
+    partial_update: bool = False
+
+
+class AdaptiveInFlightLimit:
+    """AIMD limit on concurrent requests, similar to Vespa's own feed client: grows by
+    one after every `limit` successful requests and halves whenever Vespa throttles."""
+
+    def __init__(
+        self,
+        initial: int = NUM_THREADS,
+        minimum: int = FEED_MIN_IN_FLIGHT,
+        maximum: int = FEED_MAX_IN_FLIGHT,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self._in_flight = 0
+        self._successes_since_change = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, throttled: bool) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes_since_change = 0
+            else:
+                self._successes_since_change += 1
+                if (
+                    self._successes_since_change >= self.limit
+                    and self.limit < self.maximum
+                ):
+                    self.limit += 1
+                    self._successes_since_change = 0
+            self._condition.notify_all()
+
+
+class VespaFeedClient:
+    """Feeds documents to Vespa over a single async HTTP/2 client.
+
+    Concurrency is not bound to a thread pool: all requests are multiplexed on one
+    connection and the number in flight adapts to how much Vespa can take. Operations sharing an ordering key are never in flight at
+    the same time, so they are applied in the order they were given.
+    """
+
+    def __init__(
+        self,
+        initial_in_flight: int = NUM_THREADS,
+        min_in_flight: int = FEED_MIN_IN_FLIGHT,
+        max_in_flight: int = FEED_MAX_IN_FLIGHT,
+        max_retries: int = INDEXING_MAX_RETRIES,
+    ) -> None:
+        self._initial_in_flight = initial_in_flight
+        self._min_in_flight = min_in_flight
+        self._max_in_flight = max_in_flight
+        self._max_retries = max_retries
+
+    def feed(self, operations: list[VespaFeedOperation]) -> None:
+        """Blocks until every operation succeeded. Raises the first failure, in
+        which case the remaining operations are cancelled."""
+        if not operations:
+            return
+
+        run_async_sync_no_cancel(self._feed(operations, failures=None))
+
+    def feed_and_collect_failures(
+        self, operations: list[VespaFeedOperation]
+    ) -> dict[str, Exception]:
+        """Blocks until every operation succeeded or failed for good. A failed
+        operation does not stop the others.
+
+        Returns:
+            The first failure of each document (by `document_id`) with at least one
+            failed operation.
+        """
+        failures: dict[str, Exception] = {}
+        if operations:
+            run_async_sync_no_cancel(self._feed(operations, failures=failures))
+        return failures
+
+    async def _feed(
+        self,
+        operations: list[VespaFeedOperation],
+        failures: dict[str, Exception] | None,
+    ) -> None:
+        operations_by_key: dict[str, list[VespaFeedOperation]] = defaultdict(list)
+        for operation in operations:
+            operations_by_key[operation.ordering_key].append(operation)
+
+        limit = AdaptiveInFlightLimit(
+            initial=self._initial_in_flight,
+            minimum=self._min_in_flight,
+            maximum=self._max_in_flight,
+        )
+        async with get_vespa_async_http_client(self._max_in_flight) as client:
+            tasks = [
+                asyncio.create_task(self._feed_in_order(client, limit, ops, failures))
+                for ops in operations_by_key.values()
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        logger.debug(
+            f"Fed {len(operations)} operations to Vespa, "
+            f"final in-flight limit={limit.limit}"
+        )
+
+    async def _feed_in_order(
+        self,
+        client: httpx.AsyncClient,
+        limit: AdaptiveInFlightLimit,
+        operations: list[VespaFeedOperation],
+        failures: dict[str, Exception] | None,
+    ) -> None:
+        for operation in operations:
+            if failures is None:
+                await self._send(client, limit, operation)
+                continue
+
+            try:
+                await self._send(client, limit, operation)
+            except Exception as e:
+                failures.setdefault(operation.document_id, e)
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        limit: AdaptiveInFlightLimit,
+        operation: VespaFeedOperation,
+    ) -> None:
+        for attempt in range(self._max_retries):
+            await limit.acquire()
+            throttled = False
+            try:
+                send = client.put if operation.partial_update else client.post
+                response = await send(operation.url, json={"fields": operation.fields})
+                throttled = response.status_code in _THROTTLE_STATUS_CODES
+                response.raise_for_status()
+                return
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                if status_code in _NON_RETRYABLE_STATUS_CODES:
+                    logger.error(
+                        f"Failed to feed document: '{operation.document_id}'. "
+                        f"Got HTTP {status_code}: '{e.response.text}'"
+                    )
+                    if status_code == HTTPStatus.INSUFFICIENT_STORAGE:
+                        logger.error(
+                            "NOTE: HTTP Status 507 Insufficient Storage usually means "
+                            "you need to allocate more memory or disk space to the "
+                            "Vespa/index container."
+                        )
+                    raise
+                if attempt == self._max_retries - 1:
+                    raise RuntimeError(
+                        f"Failed to feed document '{operation.document_id}' after "
+                        f"{self._max_retries} attempts, last status={status_code}"
+                    ) from e
+                logger.warning(
+                    f"HTTP {status_code} while feeding document "
+                    f"'{operation.document_id}' "
+                    f"(attempt {attempt + 1}/{self._max_retries})"
+                )
+            except httpx.TransportError as e:
+                if attempt == self._max_retries - 1:
+                    logger.exception(
+                        f"Failed to feed document: '{operation.document_id}'"
+                    )
+                    raise
+                logger.warning(
+                    f"Error while feeding document '{operation.document_id}' "
+                    f"(attempt {attempt + 1}/{self._max_retries}): {e}"
+                )
+            finally:
+                await limit.release(throttled)
+
+            # Exponential backoff with jitter
+            delay = min(
+                INDEXING_BASE_DELAY * (2**attempt), INDEXING_MAX_DELAY
+            ) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(delay)
+
+
+def build_chunk_feed_operations(
+    chunks: list[DocMetadataAwareIndexChunk],
+    index_name: str,
+    multitenant: bool,
+) -> list[VespaFeedOperation]:
+    operations: list[VespaFeedOperation] = []
+    for chunk in chunks:
+        vespa_url = get_vespa_chunk_url(chunk, index_name)
+        operations.append(
+            VespaFeedOperation(
+                # each chunk is its own Vespa document
+                ordering_key=vespa_url,
+                url=vespa_url,
+                fields=build_vespa_chunk_fields(chunk, multitenant),
+                document_id=chunk.source_document.id,
+            )
+        )
+    return operations
@@ -6,7 +6,6 @@ import re
 import time
 import urllib
 import zipfile
-from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from typing import BinaryIO
@@ -17,7 +16,6 @@ import httpx
 import jinja2
 import requests
 from pydantic import BaseModel
-from retry import retry
 
 from onyx.configs.app_configs import BLURB_SIZE
 from onyx.configs.chat_configs import NUM_RETURNED_HITS
@@ -32,6 +30,8 @@ from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.context.search.models import QueryExpansionType
 from onyx.db.enums import EmbeddingPrecision
 from onyx.document_index.document_index_utils import get_uuid_from_chunk_info
+from onyx.document_index.document_index_utils import to_metadata_update_request
+from onyx.document_index.interfaces import DocumentFieldsUpdate
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import (
     DocumentInsertionRecord as OldDocumentInsertionRecord,
@@ -45,13 +45,15 @@ from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.document_index.interfaces import VespaDocumentUserFields
 from onyx.document_index.interfaces_new import DocumentSectionRequest
 from onyx.document_index.interfaces_new import IndexingMetadata
-from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.document_index.vespa.chunk_retrieval import query_vespa
+from onyx.document_index.vespa.feed_client import VespaFeedClient
+from onyx.document_index.vespa.feed_client import VespaFeedOperation
 from onyx.document_index.vespa.indexing_utils import BaseHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
-from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
-from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
+from onyx.document_index.vespa.shared_utils.utils import (
+    get_vespa_pooled_http_client,
+)
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
@@ -67,7 +69,6 @@ from onyx.document_index.vespa_constants import YQL_BASE
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.key_value_store.factory import get_shared_kv_store
 from onyx.kg.utils.formatting_utils import split_relationship_id
-from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import MULTI_TENANT
@@ -81,13 +82,6 @@ httpx_logger = logging.getLogger("httpx")
 httpx_logger.setLevel(logging.WARNING)
 
 
-@dataclass
-class _VespaUpdateRequest:
-    document_id: str
-    url: str
-    update_request: dict[str, dict]
-
-
 class KGVespaChunkUpdateRequest(BaseModel):
     document_id: str
     chunk_id: int
@@ -248,8 +242,9 @@ class VespaIndex(DocumentIndex):
         if httpx_client:
             self.httpx_client_context = GlobalHTTPXClientContext(httpx_client)
         else:
-            self.httpx_client_context = TemporaryHTTPXClientContext(
-                get_vespa_http_client
+            # Fall back to the process-wide pooled client, which is never closed.
+            self.httpx_client_context = GlobalHTTPXClientContext(
+                get_vespa_pooled_http_client()
             )
 
         self.index_to_large_chunks_enabled: dict[str, bool] = {}
@@ -517,93 +512,24 @@ class VespaIndex(DocumentIndex):
             ]
         )
 
-    @classmethod
-    def _apply_updates_batched(
-        cls,
-        updates: list[_VespaUpdateRequest],
-        httpx_client: httpx.Client,
-        batch_size: int = BATCH_SIZE,
-    ) -> None:
-        """Runs a batch of updates in parallel via the ThreadPoolExecutor."""
-
-        def _update_chunk(
-            update: _VespaUpdateRequest, http_client: httpx.Client
-        ) -> httpx.Response:
-            logger.debug(
-                f"Updating with request to {update.url} with body {update.update_request}"
-            )
-            return http_client.put(
-                update.url,
-                headers={"Content-Type": "application/json"},
-                json=update.update_request,
-            )
-
-        # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficient for
-        # indexing / updates / deletes since we have to make a large volume of requests.
-
-        with (
-            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
-            httpx_client as http_client,
-        ):
-            for update_batch in batch_generator(updates, batch_size):
-                future_to_document_id = {
-                    executor.submit(
-                        _update_chunk,
-                        update,
-                        http_client,
-                    ): update.document_id
-                    for update in update_batch
-                }
-                for future in concurrent.futures.as_completed(future_to_document_id):
-                    res = future.result()
-                    try:
-                        res.raise_for_status()
-                    except requests.HTTPError as e:
-                        failure_msg = f"Failed to update document: {future_to_document_id[future]}"
-                        raise requests.HTTPError(failure_msg) from e
-
     @classmethod
     def _apply_kg_chunk_updates_batched(
         cls,
         updates: list[KGVespaChunkUpdateRequest],
-        httpx_client: httpx.Client,
-        batch_size: int = BATCH_SIZE,
     ) -> None:
-        """Runs a batch of updates in parallel via the ThreadPoolExecutor."""
-
-        @retry(tries=3, delay=1, backoff=2, jitter=(0.0, 1.0))
-        def _kg_update_chunk(
-            update: KGVespaChunkUpdateRequest, http_client: httpx.Client
-        ) -> httpx.Response:
-            return http_client.put(
-                update.url,
-                headers={"Content-Type": "application/json"},
-                json=update.update_request,
-            )
-
-        # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficient for
-        # indexing / updates / deletes since we have to make a large volume of requests.
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-            for update_batch in batch_generator(updates, batch_size):
-                future_to_document_id = {
-                    executor.submit(
-                        _kg_update_chunk,
-                        update,
-                        httpx_client,
-                    ): update.document_id
-                    for update in update_batch
-                }
-                for future in concurrent.futures.as_completed(future_to_document_id):
-                    res = future.result()
-                    try:
-                        res.raise_for_status()
-                    except requests.HTTPError as e:
-                        failure_msg = (
-                            f"Failed to update document {future_to_document_id[future]}\n"
-                            f"Response: {res.text}"
-                        )
-                        raise requests.HTTPError(failure_msg) from e
+        """Streams the partial updates to Vespa via the feed client."""
+        VespaFeedClient().feed(
+            [
+                VespaFeedOperation(
+                    ordering_key=update.url,
+                    url=update.url,
+                    fields=update.update_request["fields"],
+                    document_id=update.document_id,
+                    partial_update=True,
+                )
+                for update in updates
+            ]
+        )
 
     def kg_chunk_updates(
         self, kg_update_requests: list[KGUChunkUpdateRequest], tenant_id: str
@@ -638,10 +564,7 @@ class VespaIndex(DocumentIndex):
                 )
             )
 
-        with self.httpx_client_context as httpx_client:
-            self._apply_kg_chunk_updates_batched(
-                processed_updates_requests, httpx_client
-            )
+        self._apply_kg_chunk_updates_batched(processed_updates_requests)
         logger.debug(
             "Updated %d vespa documents in %.2f seconds",
             len(processed_updates_requests),
@@ -664,11 +587,32 @@ class VespaIndex(DocumentIndex):
         function will complete with no errors or exceptions.
         Handle other exceptions if you wish to implement retry behavior
         """
-        if fields is None and user_fields is None:
-            raise ValueError(
-                f"Bug: Tried to update document {doc_id} with no updated fields or user fields."
-            )
+        self._get_vespa_document_index(tenant_id).update(
+            [
+                to_metadata_update_request(
+                    DocumentFieldsUpdate(
+                        doc_id=doc_id,
+                        chunk_count=chunk_count,
+                        fields=fields,
+                        user_fields=user_fields,
+                    )
+                )
+            ]
+        )
+
+    def update_batch(
+        self, updates: list[DocumentFieldsUpdate], *, tenant_id: str
+    ) -> dict[str, Exception]:
+        """Note: documents that do not exist are no-ops, the same as for
+        update_single."""
+        if not updates:
+            return {}
 
+        return self._get_vespa_document_index(tenant_id).update_batch(
+            [to_metadata_update_request(update) for update in updates]
+        )
+
+    def _get_vespa_document_index(self, tenant_id: str) -> VespaDocumentIndex:
         tenant_state = TenantState(
             tenant_id=get_current_tenant_id(),
             multitenant=MULTI_TENANT,
@@ -682,30 +626,13 @@ class VespaIndex(DocumentIndex):
                 f"Bug: Tenant ID mismatch. Expected {tenant_state.tenant_id}, got {tenant_id}."
             )
 
-        vespa_document_index = VespaDocumentIndex(
+        return VespaDocumentIndex(
             index_name=self.index_name,
             tenant_state=tenant_state,
             large_chunks_enabled=self.large_chunks_enabled,
             httpx_client=self.httpx_client,
         )
 
-        project_ids: set[int] | None = None
-        if user_fields is not None and user_fields.user_projects is not None:
-            project_ids = set(user_fields.user_projects)
-        update_request = MetadataUpdateRequest(
-            document_ids=[doc_id],
-            doc_id_to_chunk_cnt={
-                doc_id: chunk_count if chunk_count is not None else -1
-            },  # NOTE: -1 represents an unknown chunk count.
-            access=fields.access if fields is not None else None,
-            document_sets=fields.document_sets if fields is not None else None,
-            boost=fields.boost if fields is not None else None,
-            hidden=fields.hidden if fields is not None else None,
-            project_ids=project_ids,
-        )
-
-        vespa_document_index.update([update_request])
-
     def delete_single(
         self,
         doc_id: str,
@@ -713,25 +640,15 @@ class VespaIndex(DocumentIndex):
         tenant_id: str,
         chunk_count: int | None,
     ) -> int:
-        tenant_state = TenantState(
-            tenant_id=get_current_tenant_id(),
-            multitenant=MULTI_TENANT,
-        )
-        if tenant_state.multitenant != self.multitenant:
-            raise ValueError(
-                f"Bug: Multitenant mismatch. Expected {tenant_state.multitenant}, got {self.multitenant}."
-            )
-        if tenant_state.multitenant and tenant_state.tenant_id != tenant_id:
-            raise ValueError(
-                f"Bug: Tenant ID mismatch. Expected {tenant_state.tenant_id}, got {tenant_id}."
-            )
-        vespa_document_index = VespaDocumentIndex(
-            index_name=self.index_name,
-            tenant_state=tenant_state,
-            large_chunks_enabled=self.large_chunks_enabled,
-            httpx_client=self.httpx_client,
+        return self._get_vespa_document_index(tenant_id).delete(
+            document_id=doc_id, chunk_count=chunk_count
         )
-        return vespa_document_index.delete(document_id=doc_id, chunk_count=chunk_count)
+
+    def delete(self, doc_ids: list[str], *, tenant_id: str) -> int:
+        if not doc_ids:
+            return 0
+
+        return self._get_vespa_document_index(tenant_id).delete_batch(doc_ids)
 
     def id_based_retrieval(
         self,
@@ -961,22 +878,23 @@ class VespaIndex(DocumentIndex):
                 f"Querying for document IDs with tenant_id: {tenant_id}, offset: {offset}"
             )
 
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=query_params, timeout=None)
-                response.raise_for_status()
+            response = get_vespa_pooled_http_client().get(
+                url, params=query_params, timeout=None
+            )
+            response.raise_for_status()
 
-                search_result = response.json()
-                hits = search_result.get("root", {}).get("children", [])
+            search_result = response.json()
+            hits = search_result.get("root", {}).get("children", [])
 
-                if not hits:
-                    break
+            if not hits:
+                break
 
-                for hit in hits:
-                    doc_id = hit.get("id")
-                    if doc_id:
-                        document_ids.append(doc_id)
+            for hit in hits:
+                doc_id = hit.get("id")
+                if doc_id:
+                    document_ids.append(doc_id)
 
-                offset += limit  # Move to the next page
+            offset += limit  # Move to the next page
 
         logger.debug(
             f"Retrieved {len(document_ids)} document IDs for tenant_id: {tenant_id}"
@@ -994,8 +912,8 @@ class VespaIndex(DocumentIndex):
 
         Internal helper function for delete_entries_by_tenant_id.
 
-        This is a class method and does not use the httpx pool of the instance.
-        This is OK because we don't use this method often.
+        This is a class method and does not use the httpx client of the instance,
+        it uses the process-wide pooled Vespa client instead.
 
         Parameters:
             delete_requests (List[_VespaDeleteRequest]): The list of delete requests.
@@ -1016,29 +934,27 @@ class VespaIndex(DocumentIndex):
         logger.debug(f"Starting batch deletion for {len(delete_requests)} documents")
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-            with get_vespa_http_client() as http_client:
-                for batch_start in range(0, len(delete_requests), batch_size):
-                    batch = delete_requests[batch_start : batch_start + batch_size]
-
-                    future_to_document_id = {
-                        executor.submit(
-                            _delete_document,
-                            delete_request,
-                            http_client,
-                        ): delete_request.document_id
-                        for delete_request in batch
-                    }
-
-                    for future in concurrent.futures.as_completed(
-                        future_to_document_id
-                    ):
-                        doc_id = future_to_document_id[future]
-                        try:
-                            future.result()
-                            logger.debug(f"Successfully deleted document: {doc_id}")
-                        except httpx.HTTPError as e:
-                            logger.error(f"Failed to delete document {doc_id}: {e}")
-                            # Optionally, implement retry logic or error handling here
+            http_client = get_vespa_pooled_http_client()
+            for batch_start in range(0, len(delete_requests), batch_size):
+                batch = delete_requests[batch_start : batch_start + batch_size]
+
+                future_to_document_id = {
+                    executor.submit(
+                        _delete_document,
+                        delete_request,
+                        http_client,
+                    ): delete_request.document_id
+                    for delete_request in batch
+                }
+
+                for future in concurrent.futures.as_completed(future_to_document_id):
+                    doc_id = future_to_document_id[future]
+                    try:
+                        future.result()
+                        logger.debug(f"Successfully deleted document: {doc_id}")
+                    except httpx.HTTPError as e:
+                        logger.error(f"Failed to delete document {doc_id}: {e}")
+                        # Optionally, implement retry logic or error handling here
 
         logger.info("Batch deletion completed")
 
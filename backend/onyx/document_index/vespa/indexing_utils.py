@@ -1,14 +1,10 @@
-import concurrent.futures
 import json
-import random
-import time
-import uuid
 from abc import ABC
 from abc import abstractmethod
 from collections.abc import Callable
 from datetime import datetime
 from datetime import timezone
-from http import HTTPStatus
+from typing import Any
 
 import httpx
 from retry import retry
@@ -25,6 +21,7 @@ from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
 )
+from onyx.document_index.vespa.shared_utils.utils import to_vespa_selection_string
 from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
 from onyx.document_index.vespa_constants import AGGREGATED_CHUNK_BOOST_FACTOR
 from onyx.document_index.vespa_constants import BLURB
@@ -44,7 +41,6 @@ from onyx.document_index.vespa_constants import LARGE_CHUNK_REFERENCE_IDS
 from onyx.document_index.vespa_constants import METADATA
 from onyx.document_index.vespa_constants import METADATA_LIST
 from onyx.document_index.vespa_constants import METADATA_SUFFIX
-from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import PRIMARY_OWNERS
 from onyx.document_index.vespa_constants import SECONDARY_OWNERS
 from onyx.document_index.vespa_constants import SECTION_CONTINUATION
@@ -57,36 +53,15 @@ from onyx.document_index.vespa_constants import TITLE
 from onyx.document_index.vespa_constants import TITLE_EMBEDDING
 from onyx.document_index.vespa_constants import USER_PROJECT
 from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 from onyx.utils.text_processing import remove_invalid_unicode_chars
 
 
 logger = setup_logger()
 
-# Retry configuration constants
-INDEXING_MAX_RETRIES = 5
-INDEXING_BASE_DELAY = 1.0
-INDEXING_MAX_DELAY = 60.0
-
-
-@retry(tries=3, delay=1, backoff=2)
-def _does_doc_chunk_exist(
-    doc_chunk_id: uuid.UUID, index_name: str, http_client: httpx.Client
-) -> bool:
-    doc_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}"
-    doc_fetch_response = http_client.get(doc_url)
-    if doc_fetch_response.status_code == 404:
-        return False
-
-    if doc_fetch_response.status_code != 200:
-        logger.debug(f"Failed to check for document with URL {doc_url}")
-        raise RuntimeError(
-            f"Unexpected fetch document by ID value from Vespa: "
-            f"error={doc_fetch_response.status_code} "
-            f"index={index_name} "
-            f"doc_chunk_id={doc_chunk_id}"
-        )
-    return True
+# Number of documents whose chunk ids are fetched with a single visit
+OLD_VERSION_LOOKUP_BATCH_SIZE = 50
 
 
 def _vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
@@ -99,57 +74,15 @@ def _vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
     return int(t.timestamp())
 
 
-def get_existing_documents_from_chunks(
-    chunks: list[DocMetadataAwareIndexChunk],
-    index_name: str,
-    http_client: httpx.Client,
-    executor: concurrent.futures.ThreadPoolExecutor | None = None,
-) -> set[str]:
-    external_executor = True
-
-    if not executor:
-        external_executor = False
-        executor = concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS)
-
-    document_ids: set[str] = set()
-    try:
-        chunk_existence_future = {
-            executor.submit(
-                _does_doc_chunk_exist,
-                get_uuid_from_chunk(chunk),
-                index_name,
-                http_client,
-            ): chunk
-            for chunk in chunks
-        }
-        for future in concurrent.futures.as_completed(chunk_existence_future):
-            chunk = chunk_existence_future[future]
-            chunk_already_existed = future.result()
-            if chunk_already_existed:
-                document_ids.add(chunk.source_document.id)
-
-    finally:
-        if not external_executor:
-            executor.shutdown(wait=True)
-
-    return document_ids
-
-
-def _index_vespa_chunk(
+def build_vespa_chunk_fields(
     chunk: DocMetadataAwareIndexChunk,
-    index_name: str,
-    http_client: httpx.Client,
     multitenant: bool,
-) -> None:
-    json_header = {
-        "Content-Type": "application/json",
-    }
+) -> dict[str, Any]:
+    """Builds the Vespa document fields to feed for a chunk."""
     document = chunk.source_document
 
     # No minichunk documents in vespa, minichunk vectors are stored in the chunk itself
 
-    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
-
     embeddings = chunk.embeddings
 
     embeddings_name_vector_map = {"full_chunk": embeddings.full_embedding}
@@ -224,127 +157,13 @@ def _index_vespa_chunk(
     if multitenant:
         if chunk.tenant_id:
             vespa_document_fields[TENANT_ID] = chunk.tenant_id
-    vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
-    logger.debug(f'Indexing to URL "{vespa_url}"')
-
-    # Retry logic with exponential backoff for rate limiting
-    for attempt in range(INDEXING_MAX_RETRIES):
-        try:
-            res = http_client.post(
-                vespa_url, headers=json_header, json={"fields": vespa_document_fields}
-            )
-            res.raise_for_status()
-            return  # Success, exit the function
-        except httpx.HTTPStatusError as e:
-            # Handle 429 rate limiting specifically
-            if e.response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-                if attempt < INDEXING_MAX_RETRIES - 1:
-                    # Calculate exponential backoff with jitter
-                    delay = min(
-                        INDEXING_BASE_DELAY * (2**attempt), INDEXING_MAX_DELAY
-                    ) * random.uniform(0.5, 1.0)
-                    logger.warning(
-                        f"Rate limited while indexing document '{document.id}' "
-                        f"(attempt {attempt + 1}/{INDEXING_MAX_RETRIES}). "
-                        f"Vespa response: '{e.response.text}'. "
-                        f"Backing off for {delay:.2f} seconds."
-                    )
-                    time.sleep(delay)
-                    continue
-                else:
-                    raise RuntimeError(
-                        f"Failed to index document '{document.id}' after {INDEXING_MAX_RETRIES} attempts "
-                        f"due to rate limiting"
-                    ) from e
-            elif e.response.status_code == HTTPStatus.INSUFFICIENT_STORAGE:
-                logger.error(
-                    f"Failed to index document: '{document.id}'. Got response: '{e.response.text}'"
-                )
-                logger.error(
-                    "NOTE: HTTP Status 507 Insufficient Storage usually means "
-                    "you need to allocate more memory or disk space to the "
-                    "Vespa/index container."
-                )
-                raise
-            else:
-                # For other HTTP errors, check if retryable
-                if e.response.status_code in (
-                    HTTPStatus.BAD_REQUEST,
-                    HTTPStatus.UNAUTHORIZED,
-                    HTTPStatus.FORBIDDEN,
-                    HTTPStatus.NOT_FOUND,
-                ):
-                    # Non-retryable errors - fail immediately
-                    logger.error(
-                        f"Non-retryable HTTP {e.response.status_code} error for document '{document.id}'"
-                    )
-                    raise
-                # Retry other errors with shorter backoff
-                if attempt < INDEXING_MAX_RETRIES - 1:
-                    delay = INDEXING_BASE_DELAY * (1.5**attempt)
-                    logger.warning(
-                        f"HTTP error {e.response.status_code} while indexing document '{document.id}' "
-                        f"(attempt {attempt + 1}/{INDEXING_MAX_RETRIES}). Retrying in {delay:.2f} seconds."
-                    )
-                    time.sleep(delay)
-                    continue
-                else:
-                    logger.exception(
-                        f"Failed to index document: '{document.id}'. Got response: '{e.response.text}'"
-                    )
-                    raise
-        except Exception as e:
-            # For non-HTTP errors, use simple retry logic
-            if attempt < INDEXING_MAX_RETRIES - 1:
-                delay = INDEXING_BASE_DELAY * (1.5**attempt)
-                logger.warning(
-                    f"Error while indexing document '{document.id}' "
-                    f"(attempt {attempt + 1}/{INDEXING_MAX_RETRIES}): {str(e)}. "
-                    f"Retrying in {delay:.2f} seconds."
-                )
-                time.sleep(delay)
-                continue
-            else:
-                logger.exception(f"Failed to index document: '{document.id}'")
-                raise
-
-
-def batch_index_vespa_chunks(
-    chunks: list[DocMetadataAwareIndexChunk],
-    index_name: str,
-    http_client: httpx.Client,
-    multitenant: bool,
-    executor: concurrent.futures.ThreadPoolExecutor | None = None,
-) -> None:
-    """Indexes a list of chunks in a Vespa index in parallel.
-
-    Args:
-        chunks: List of chunks to index.
-        index_name: Name of the index to index into.
-        http_client: HTTP client to use for the request.
-        multitenant: Whether the index is multitenant.
-        executor: Executor to use for the request.
-    """
-    external_executor = True
-
-    if not executor:
-        external_executor = False
-        executor = concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS)
-
-    try:
-        chunk_index_future = {
-            executor.submit(
-                _index_vespa_chunk, chunk, index_name, http_client, multitenant
-            ): chunk
-            for chunk in chunks
-        }
-        for future in concurrent.futures.as_completed(chunk_index_future):
-            # Will raise exception if any indexing raised an exception
-            future.result()
 
-    finally:
-        if not external_executor:
-            executor.shutdown(wait=True)
+    return vespa_document_fields
+
+
+def get_vespa_chunk_url(chunk: DocMetadataAwareIndexChunk, index_name: str) -> str:
+    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
+    return f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
 
 
 def clean_chunk_id_copy(
@@ -362,22 +181,109 @@ def clean_chunk_id_copy(
     return clean_chunk
 
 
+@retry(tries=3, delay=1, backoff=2, exceptions=httpx.HTTPError)
+def _visit_old_version_chunk_ids(
+    document_ids: list[str],
+    index_name: str,
+    http_client: httpx.Client,
+) -> dict[str, set[int]]:
+    """Returns the ids of the regular chunks stored under the old (tenant-less) chunk
+    ID scheme for each document, using one visit per page rather than one GET per
+    chunk."""
+    # chunks are stored under the sanitized document id
+    sanitized_to_document_ids: dict[str, list[str]] = {}
+    for document_id in document_ids:
+        sanitized_to_document_ids.setdefault(
+            replace_invalid_doc_id_characters(document_id), []
+        ).append(document_id)
+
+    doc_id_conditions = " or ".join(
+        f"{index_name}.{DOCUMENT_ID}=={to_vespa_selection_string(sanitized_doc_id)}"
+        for sanitized_doc_id in sanitized_to_document_ids
+    )
+    params: dict[str, str | int] = {
+        "selection": (
+            f"({doc_id_conditions}) and {index_name}.large_chunk_reference_ids == null"
+        ),
+        "fieldSet": f"{index_name}:{DOCUMENT_ID},{CHUNK_ID}",
+        "wantedDocumentCount": 1_000,
+    }
+
+    chunk_ids: dict[str, set[int]] = {
+        sanitized_doc_id: set() for sanitized_doc_id in sanitized_to_document_ids
+    }
+    while True:
+        response = http_client.get(
+            DOCUMENT_ID_ENDPOINT.format(index_name=index_name), params=params
+        )
+        response.raise_for_status()
+        response_data = response.json()
+
+        for vespa_document in response_data.get("documents", []):
+            document_id = vespa_document["fields"][DOCUMENT_ID]
+            chunk_id = vespa_document["fields"][CHUNK_ID]
+            # chunks written under the new ID scheme don't count, only the old
+            # scheme's IDs will be targeted for deletion
+            old_version_uuid = get_uuid_from_chunk_info_old(
+                document_id=document_id, chunk_id=chunk_id
+            )
+            vespa_chunk_uuid = vespa_document["id"].split("::", 1)[-1]
+            if document_id in chunk_ids and vespa_chunk_uuid == str(old_version_uuid):
+                chunk_ids[document_id].add(chunk_id)
+
+        continuation = response_data.get("continuation")
+        if not continuation:
+            break
+        params["continuation"] = continuation
+
+    return {
+        document_id: chunk_ids[sanitized_doc_id]
+        for sanitized_doc_id, original_ids in sanitized_to_document_ids.items()
+        for document_id in original_ids
+    }
+
+
+def get_final_chunk_indices(
+    minimal_doc_infos: list[MinimalDocumentIndexingInfo],
+    index_name: str,
+    http_client: httpx.Client,
+) -> dict[str, int]:
+    """For documents on the old chunk ID system, which have no `chunk_count` in
+    Postgres, finds the first chunk index at or after `chunk_start_index` that is not
+    in Vespa. Looks up OLD_VERSION_LOOKUP_BATCH_SIZE documents per visit."""
+    final_chunk_indices: dict[str, int] = {}
+    for doc_info_batch in batch_generator(
+        minimal_doc_infos, OLD_VERSION_LOOKUP_BATCH_SIZE
+    ):
+        existing_chunk_ids = _visit_old_version_chunk_ids(
+            document_ids=[doc_info.doc_id for doc_info in doc_info_batch],
+            index_name=index_name,
+            http_client=http_client,
+        )
+        for doc_info in doc_info_batch:
+            index = doc_info.chunk_start_index
+            while index in existing_chunk_ids[doc_info.doc_id]:
+                index += 1
+            final_chunk_indices[doc_info.doc_id] = index
+
+    return final_chunk_indices
+
+
 def check_for_final_chunk_existence(
     minimal_doc_info: MinimalDocumentIndexingInfo,
     start_index: int,
     index_name: str,
     http_client: httpx.Client,
 ) -> int:
-    index = start_index
-    while True:
-        doc_chunk_id = get_uuid_from_chunk_info_old(
-            document_id=minimal_doc_info.doc_id,
-            chunk_id=index,
-            large_chunk_reference_ids=[],
-        )
-        if not _does_doc_chunk_exist(doc_chunk_id, index_name, http_client):
-            return index
-        index += 1
+    return get_final_chunk_indices(
+        minimal_doc_infos=[
+            MinimalDocumentIndexingInfo(
+                doc_id=minimal_doc_info.doc_id, chunk_start_index=start_index
+            )
+        ],
+        index_name=index_name,
+        http_client=http_client,
+    )[minimal_doc_info.doc_id]
 
 
 class BaseHTTPXClientContext(ABC):
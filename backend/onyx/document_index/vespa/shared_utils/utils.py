@@ -6,12 +6,18 @@ import httpx
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
+from onyx.configs.app_configs import VESPA_HTTP_POOL_KEEPALIVE_EXPIRY
+from onyx.configs.app_configs import VESPA_HTTP_POOL_MAX_CONNECTIONS
+from onyx.configs.app_configs import VESPA_HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
 from onyx.document_index.vespa_constants import VESPA_APP_CONTAINER_URL
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+VESPA_HTTPX_POOL_NAME = "vespa_query"
+
 # NOTE: This does not seem to be used in reality despite the Vespa Docs pointing to this code
 # See here for reference: https://docs.vespa.ai/en/documents.html
 # https://github.com/vespa-engine/vespa/blob/master/vespajlib/src/main/java/com/yahoo/text/Text.java
@@ -52,6 +58,12 @@ def replace_invalid_doc_id_characters(text: str) -> str:
     return text.replace("'", "_")
 
 
+def to_vespa_selection_string(value: str) -> str:
+    """Quotes the value as a string literal for a Vespa document selection."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
 def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx.Client:
     """
     Configures and returns an HTTP client for communicating with Vespa,
@@ -69,6 +81,51 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
     )
 
 
+def get_vespa_pooled_http_client() -> httpx.Client:
+    """
+    Returns the long-lived client shared by Vespa queries, visits and updates in
+    this process, so that they reuse connections instead of paying for TCP, TLS
+    and HTTP/2 setup on every request. Must not be closed by callers.
+    """
+    HttpxPool.init_client(
+        name=VESPA_HTTPX_POOL_NAME,
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=VESPA_HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=VESPA_HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=VESPA_HTTP_POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return HttpxPool.get(VESPA_HTTPX_POOL_NAME)
+
+
+def get_vespa_async_http_client(max_connections: int) -> httpx.AsyncClient:
+    """Async counterpart of `get_vespa_http_client`, used by the feed client.
+    `max_connections` only matters when HTTP/2 can't be negotiated, otherwise all
+    requests are multiplexed over a single connection."""
+    return httpx.AsyncClient(
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+
+
 def wait_for_vespa_with_timeout(wait_interval: int = 5, wait_limit: int = 60) -> bool:
     """Waits for Vespa to become ready subject to a timeout.
     Returns True if Vespa is ready, False otherwise."""
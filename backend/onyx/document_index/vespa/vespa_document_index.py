@@ -1,11 +1,11 @@
 import concurrent.futures
 import logging
 import random
-from uuid import UUID
+from collections.abc import Mapping
+from typing import Any
 
 import httpx
 from pydantic import BaseModel
-from retry import retry
 
 from onyx.configs.app_configs import RECENCY_BIAS_MULTIPLIER
 from onyx.configs.app_configs import RERANK_COUNT
@@ -33,13 +33,17 @@ from onyx.document_index.vespa.chunk_retrieval import (
 )
 from onyx.document_index.vespa.chunk_retrieval import query_vespa
 from onyx.document_index.vespa.deletion import delete_vespa_chunks
+from onyx.document_index.vespa.deletion import delete_vespa_documents_by_selection
+from onyx.document_index.vespa.feed_client import build_chunk_feed_operations
+from onyx.document_index.vespa.feed_client import VespaFeedClient
+from onyx.document_index.vespa.feed_client import VespaFeedOperation
 from onyx.document_index.vespa.indexing_utils import BaseHTTPXClientContext
-from onyx.document_index.vespa.indexing_utils import batch_index_vespa_chunks
-from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
+from onyx.document_index.vespa.indexing_utils import get_final_chunk_indices
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
-from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
-from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
+from onyx.document_index.vespa.shared_utils.utils import (
+    get_vespa_pooled_http_client,
+)
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
 )
@@ -98,61 +102,78 @@ def _enrich_basic_chunk_info(
         new_chunk_count (where deletion begins) and chunk_end_index set to
         previous_chunk_count (where deletion ends).
     """
-    # Technically last indexed chunk index +1.
-    last_indexed_chunk = previous_chunk_count
+    return _enrich_basic_chunk_infos(
+        index_name=index_name,
+        http_client=http_client,
+        doc_id_to_previous_chunk_cnt={document_id: previous_chunk_count},
+        doc_id_to_new_chunk_cnt={document_id: new_chunk_count},
+    )[0]
+
+
+def _enrich_basic_chunk_infos(
+    index_name: str,
+    http_client: httpx.Client,
+    doc_id_to_previous_chunk_cnt: Mapping[str, int | None],
+    doc_id_to_new_chunk_cnt: Mapping[str, int],
+) -> list[EnrichedDocumentIndexingInfo]:
+    """Batched version of _enrich_basic_chunk_info, in the order of
+    doc_id_to_previous_chunk_cnt. Documents on the old chunk ID system are looked up
+    in Vespa together rather than probed one chunk at a time."""
     # If the document has no `chunk_count` in the database, we know that it
     # has the old chunk ID system and we must check for the final chunk index.
-    is_old_version = False
-    if last_indexed_chunk is None:
-        is_old_version = True
-        minimal_doc_info = MinimalDocumentIndexingInfo(
-            doc_id=document_id, chunk_start_index=new_chunk_count
+    old_version_doc_infos = [
+        MinimalDocumentIndexingInfo(
+            doc_id=document_id, chunk_start_index=doc_id_to_new_chunk_cnt[document_id]
         )
-        last_indexed_chunk = check_for_final_chunk_existence(
-            minimal_doc_info=minimal_doc_info,
-            start_index=new_chunk_count,
+        for document_id, previous_chunk_count in doc_id_to_previous_chunk_cnt.items()
+        if previous_chunk_count is None
+    ]
+    old_version_final_chunk_indices = (
+        get_final_chunk_indices(
+            minimal_doc_infos=old_version_doc_infos,
             index_name=index_name,
             http_client=http_client,
         )
-
-    assert (
-        last_indexed_chunk is not None and last_indexed_chunk >= 0
-    ), f"Bug: Last indexed chunk index is None or less than 0 for document: {document_id}."
-
-    enriched_doc_info = EnrichedDocumentIndexingInfo(
-        doc_id=document_id,
-        chunk_start_index=new_chunk_count,
-        chunk_end_index=last_indexed_chunk,
-        old_version=is_old_version,
+        if old_version_doc_infos
+        else {}
     )
-    return enriched_doc_info
 
+    enriched_doc_infos: list[EnrichedDocumentIndexingInfo] = []
+    for document_id, previous_chunk_count in doc_id_to_previous_chunk_cnt.items():
+        is_old_version = previous_chunk_count is None
+        # Technically last indexed chunk index +1.
+        last_indexed_chunk = (
+            old_version_final_chunk_indices[document_id]
+            if previous_chunk_count is None
+            else previous_chunk_count
+        )
+
+        assert (
+            last_indexed_chunk >= 0
+        ), f"Bug: Last indexed chunk index is less than 0 for document: {document_id}."
+
+        enriched_doc_infos.append(
+            EnrichedDocumentIndexingInfo(
+                doc_id=document_id,
+                chunk_start_index=doc_id_to_new_chunk_cnt[document_id],
+                chunk_end_index=last_indexed_chunk,
+                old_version=is_old_version,
+            )
+        )
+    return enriched_doc_infos
 
-@retry(
-    tries=3,
-    delay=1,
-    backoff=2,
-    exceptions=httpx.HTTPError,
-)
-def _update_single_chunk(
-    doc_chunk_id: UUID,
-    index_name: str,
-    doc_id: str,
-    http_client: httpx.Client,
-    update_request: MetadataUpdateRequest,
-) -> None:
-    """Updates a single document chunk in Vespa.
 
-    TODO(andrei): Couldn't this be batched?
+def _build_update_fields(update_request: MetadataUpdateRequest) -> dict[str, Any]:
+    """Builds the fields of a Vespa partial update for the chunks of the documents in
+    update_request.
 
     Args:
-        doc_chunk_id: The ID of the chunk to update.
-        index_name: The index the chunk belongs to.
-        doc_id: The ID of the document the chunk belongs to. Used only for
-            logging.
-        http_client: The HTTP client to use to make the request.
         update_request: Metadata update request object received in the bulk
             update method containing fields to update.
+
+    Returns:
+        The `fields` of the partial update, without the fields that are not being
+        updated.
     """
 
     class _Boost(BaseModel):
@@ -186,10 +207,6 @@ def _update_single_chunk(
         hidden: _Hidden | None = None
         user_project: _UserProjects | None = None
 
-    class _VespaPutRequest(BaseModel):
-        model_config = {"frozen": True}
-        fields: _VespaPutFields
-
     boost_update: _Boost | None = (
         _Boost(assign=update_request.boost)
         if update_request.boost is not None
@@ -228,37 +245,8 @@ def _update_single_chunk(
         user_project=user_projects_update,
     )
 
-    vespa_put_request = _VespaPutRequest(
-        fields=vespa_put_fields,
-    )
-
-    vespa_url = (
-        f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}"
-        "?create=true"
-    )
-
-    try:
-        resp = http_client.put(
-            vespa_url,
-            headers={"Content-Type": "application/json"},
-            json=vespa_put_request.model_dump(
-                exclude_none=True
-            ),  # NOTE: Important to not produce null fields in the json.
-        )
-        resp.raise_for_status()
-    except httpx.HTTPStatusError as e:
-        logger.error(
-            f"Failed to update doc chunk {doc_chunk_id} (doc_id={doc_id}). "
-            f"Code: {e.response.status_code}. Details: {e.response.text}"
-        )
-        # Re-raise so the @retry decorator will catch and retry, unless the
-        # status code is < 5xx, in which case wrap the exception in something
-        # other than an HTTPError to skip retries.
-        if e.response.status_code >= 500:
-            raise
-        raise RuntimeError(
-            f"Non-retryable error updating chunk {doc_chunk_id}: {e}"
-        ) from e
+    # NOTE: Important to not produce null fields in the json.
+    return vespa_put_fields.model_dump(exclude_none=True)
 
 
 class VespaDocumentIndex(DocumentIndex):
@@ -288,10 +276,10 @@ class VespaDocumentIndex(DocumentIndex):
             # it does not close after exiting a context manager.
             self._httpx_client_context = GlobalHTTPXClientContext(httpx_client)
         else:
-            # We did not receive a client, so create one what will close after
-            # exiting a context manager.
-            self._httpx_client_context = TemporaryHTTPXClientContext(
-                get_vespa_http_client
+            # We did not receive a client, so use the process-wide pooled
+            # client. It is global as well and is never closed.
+            self._httpx_client_context = GlobalHTTPXClientContext(
+                get_vespa_pooled_http_client()
             )
         self._multitenant = tenant_state.multitenant
 
@@ -349,17 +337,13 @@ class VespaDocumentIndex(DocumentIndex):
             # know precisely which chunks to delete. This information exists for
             # documents that have `chunk_count` in the database, but not for
             # `old_version` documents.
-            enriched_doc_infos: list[EnrichedDocumentIndexingInfo] = [
-                _enrich_basic_chunk_info(
-                    index_name=self._index_name,
-                    http_client=http_client,
-                    document_id=doc_id,
-                    previous_chunk_count=doc_id_to_previous_chunk_cnt[doc_id],
-                    new_chunk_count=doc_id_to_new_chunk_cnt[doc_id],
-                )
-                for doc_id in doc_id_to_chunk_cnt_diff.keys()
-                # TODO(andrei), WARNING: Don't we need to sanitize these doc IDs?
-            ]
+            # TODO(andrei), WARNING: Don't we need to sanitize these doc IDs?
+            enriched_doc_infos = _enrich_basic_chunk_infos(
+                index_name=self._index_name,
+                http_client=http_client,
+                doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
+                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
+            )
 
             for enriched_doc_info in enriched_doc_infos:
                 # If the document has previously indexed chunks, we know it
@@ -394,14 +378,13 @@ class VespaDocumentIndex(DocumentIndex):
                 )
 
             # Insert new Vespa documents.
-            for chunk_batch in batch_generator(cleaned_chunks, BATCH_SIZE):
-                batch_index_vespa_chunks(
-                    chunks=chunk_batch,
+            VespaFeedClient().feed(
+                build_chunk_feed_operations(
+                    chunks=cleaned_chunks,
                     index_name=self._index_name,
-                    http_client=http_client,
                     multitenant=self._multitenant,
-                    executor=executor,
                 )
+            )
 
         all_cleaned_doc_ids: set[str] = {
             chunk.source_document.id for chunk in cleaned_chunks
@@ -448,55 +431,104 @@ class VespaDocumentIndex(DocumentIndex):
 
         return total_chunks_deleted
 
+    def delete_batch(self, document_ids: list[str]) -> int:
+        # The chunks are selected by document ID, so neither the chunk counts nor
+        # the chunk IDs of the documents are needed.
+        with self._httpx_client_context as http_client:
+            return delete_vespa_documents_by_selection(
+                document_ids=[
+                    replace_invalid_doc_id_characters(document_id)
+                    for document_id in document_ids
+                ],
+                index_name=self._index_name,
+                http_client=http_client,
+                tenant_id=self._tenant_id if self._multitenant else None,
+            )
+
     def update(
         self,
         update_requests: list[MetadataUpdateRequest],
     ) -> None:
+        failures = self.update_batch(update_requests)
+        if failures:
+            raise next(iter(failures.values()))
+
+    def update_batch(
+        self,
+        update_requests: list[MetadataUpdateRequest],
+    ) -> dict[str, Exception]:
         # WARNING: This method can be called by vespa_metadata_sync_task, which
         # is kicked off by check_for_vespa_sync_task, notably before a document
         # has finished indexing. In this way, chunk_count below could be unknown
         # even for chunks not on the "old" chunk ID system; i.e. there could be
-        # a race condition. Passing in None to _enrich_basic_chunk_info should
+        # a race condition. Passing in None to _enrich_basic_chunk_infos should
         # handle this, but a higher level TODO might be to not run update at all
         # on connectors that are still indexing, and therefore do not yet have a
         # chunk count because update_docs_chunk_count__no_commit has not been
         # run yet.
+        sanitized_doc_id_to_previous_chunk_cnt: dict[str, int | None] = {}
+        for update_request in update_requests:
+            for doc_id in update_request.document_ids:
+                # NOTE: -1 represents an unknown chunk count.
+                chunk_count = update_request.doc_id_to_chunk_cnt[doc_id]
+                sanitized_doc_id_to_previous_chunk_cnt[
+                    replace_invalid_doc_id_characters(doc_id)
+                ] = (chunk_count if chunk_count >= 0 else None)
+
+        if not sanitized_doc_id_to_previous_chunk_cnt:
+            return {}
+
         with self._httpx_client_context as httpx_client:
-            # Each invocation of this method can contain multiple update requests.
-            for update_request in update_requests:
-                # Each update request can correspond to multiple documents.
-                for doc_id in update_request.document_ids:
-                    # NOTE: -1 represents an unknown chunk count.
-                    chunk_count = update_request.doc_id_to_chunk_cnt[doc_id]
-                    sanitized_doc_id = replace_invalid_doc_id_characters(doc_id)
-                    enriched_doc_info = _enrich_basic_chunk_info(
-                        index_name=self._index_name,
-                        http_client=httpx_client,
-                        document_id=sanitized_doc_id,
-                        previous_chunk_count=chunk_count if chunk_count >= 0 else None,
-                        new_chunk_count=0,  # WARNING: This semantically makes no sense and is misusing this function.
-                    )
+            enriched_doc_infos = _enrich_basic_chunk_infos(
+                index_name=self._index_name,
+                http_client=httpx_client,
+                doc_id_to_previous_chunk_cnt=sanitized_doc_id_to_previous_chunk_cnt,
+                # WARNING: This semantically makes no sense and is misusing this
+                # function.
+                doc_id_to_new_chunk_cnt={
+                    doc_id: 0 for doc_id in sanitized_doc_id_to_previous_chunk_cnt
+                },
+            )
+        sanitized_doc_id_to_chunk_ids = {
+            enriched_doc_info.doc_id: get_document_chunk_ids(
+                enriched_document_info_list=[enriched_doc_info],
+                tenant_id=self._tenant_id,
+                large_chunks_enabled=self._large_chunks_enabled,
+            )
+            for enriched_doc_info in enriched_doc_infos
+        }
 
-                    doc_chunk_ids = get_document_chunk_ids(
-                        enriched_document_info_list=[enriched_doc_info],
-                        tenant_id=self._tenant_id,
-                        large_chunks_enabled=self._large_chunks_enabled,
+        # Every chunk is updated with its own partial update, all of which are
+        # streamed to Vespa together rather than sent one request at a time.
+        operations: list[VespaFeedOperation] = []
+        for update_request in update_requests:
+            fields = _build_update_fields(update_request)
+            for doc_id in update_request.document_ids:
+                for doc_chunk_id in sanitized_doc_id_to_chunk_ids[
+                    replace_invalid_doc_id_characters(doc_id)
+                ]:
+                    vespa_url = (
+                        f"{DOCUMENT_ID_ENDPOINT.format(index_name=self._index_name)}"
+                        f"/{doc_chunk_id}?create=true"
                     )
-
-                    for doc_chunk_id in doc_chunk_ids:
-                        _update_single_chunk(
-                            doc_chunk_id,
-                            self._index_name,
-                            # NOTE: Used only for logging, raw ID is ok here.
-                            doc_id,
-                            httpx_client,
-                            update_request,
+                    operations.append(
+                        VespaFeedOperation(
+                            ordering_key=vespa_url,
+                            url=vespa_url,
+                            fields=fields,
+                            document_id=doc_id,
+                            partial_update=True,
                         )
-
-                    logger.info(
-                        f"Updated {len(doc_chunk_ids)} chunks for document {doc_id}."
                     )
 
+        failures = VespaFeedClient().feed_and_collect_failures(operations)
+        logger.info(
+            f"Updated {len(operations)} chunks for "
+            f"{len(sanitized_doc_id_to_previous_chunk_cnt) - len(failures)} "
+            f"documents, {len(failures)} documents failed."
+        )
+        return failures
+
     def id_based_retrieval(
         self,
         chunk_requests: list[DocumentSectionRequest],
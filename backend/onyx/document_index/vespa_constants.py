@@ -40,6 +40,13 @@ VESPA_TIMEOUT = "10s"
 # The size of the batch to use for batched operations like inserts / updates.
 # The batch will likely be sent to a threadpool of size NUM_THREADS.
 BATCH_SIZE = 128
+# The number of documents whose chunks are deleted with a single document selection.
+# The selection is sent in the query string, which bounds its length.
+DELETE_BY_SELECTION_BATCH_SIZE = 100
+# Bounds on concurrent requests from the async feed client. The limit starts at
+# NUM_THREADS and adapts between these based on whether Vespa is pushing back.
+FEED_MIN_IN_FLIGHT = 4
+FEED_MAX_IN_FLIGHT = 256
 
 TENANT_ID = "tenant_id"
 DOCUMENT_ID = "document_id"
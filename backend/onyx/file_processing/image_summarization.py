@@ -35,6 +35,19 @@ def prepare_image_bytes(image_data: bytes) -> str:
     return encoded_image
 
 
+def is_image_too_small(image_data: bytes, min_dimension_px: int) -> bool:
+    """Whether the image is too small to be worth summarizing, e.g. an icon or a
+    spacer. Only the image header is decoded."""
+    try:
+        with Image.open(BytesIO(image_data)) as img:
+            width, height = img.size
+    except Exception:
+        # let the summarization decide what to do with unreadable images
+        return False
+
+    return width < min_dimension_px or height < min_dimension_px
+
+
 def summarize_image_pipeline(
     llm: LLM,
     image_data: bytes,
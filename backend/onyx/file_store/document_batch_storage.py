@@ -2,11 +2,14 @@ import json
 from abc import ABC
 from abc import abstractmethod
 from enum import Enum
-from io import StringIO
+from io import BytesIO
+from typing import IO
 from typing import List
 from typing import Optional
 from typing import TypeAlias
 
+import msgpack  # type: ignore[import-untyped]
+import zstandard
 from pydantic import BaseModel
 
 from onyx.configs.constants import FileOrigin
@@ -19,6 +22,17 @@ from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Batches are stored as this header followed by a zstd frame holding a stream of
+# msgpack encoded documents. Batches written before the header was introduced
+# are plain JSON arrays.
+BATCH_FORMAT_MAGIC = b"ONYXDOCB"
+BATCH_FORMAT_VERSION = 1
+BATCH_FORMAT_HEADER = BATCH_FORMAT_MAGIC + bytes([BATCH_FORMAT_VERSION])
+BATCH_COMPRESSION_LEVEL = 3
+
+BATCH_FILE_TYPE = "application/zstd"
+LEGACY_BATCH_FILE_TYPE = "application/json"
+
 
 class DocumentBatchStorageStateType(str, Enum):
     EXTRACTION = "extraction"
@@ -83,15 +97,37 @@ class DocumentBatchStorage(ABC):
     def extract_path_info(self, path: str) -> BatchStoragePathInfo | None:
         """Extract path info from a path."""
 
-    def _serialize_documents(self, documents: list[Document]) -> str:
-        """Serialize documents to JSON string."""
-        # Use mode='json' to properly serialize datetime and other complex types
-        return json.dumps([doc.model_dump(mode="json") for doc in documents], indent=2)
-
-    def _deserialize_documents(self, data: str) -> list[Document]:
-        """Deserialize documents from JSON string."""
-        doc_dicts = json.loads(data)
-        return [Document.model_validate(doc_dict) for doc_dict in doc_dicts]
+    def _serialize_documents(self, documents: list[Document]) -> bytes:
+        """Serialize documents to the compressed batch format."""
+        buffer = BytesIO()
+        buffer.write(BATCH_FORMAT_HEADER)
+        packer = msgpack.Packer()
+        compressor = zstandard.ZstdCompressor(level=BATCH_COMPRESSION_LEVEL)
+        with compressor.stream_writer(buffer, closefd=False) as writer:
+            for doc in documents:
+                # Use mode='json' to properly serialize datetime and other complex types
+                writer.write(packer.pack(doc.model_dump(mode="json")))
+        return buffer.getvalue()
+
+    def _deserialize_documents(self, content: IO[bytes]) -> list[Document]:
+        """Deserialize documents from either the compressed batch format or the
+        legacy JSON format. Compressed batches are decoded as a stream so the
+        decompressed batch is never held in memory all at once."""
+        header = content.read(len(BATCH_FORMAT_HEADER))
+        if not header.startswith(BATCH_FORMAT_MAGIC):
+            doc_dicts = json.loads(header + content.read())
+            return [Document.model_validate(doc_dict) for doc_dict in doc_dicts]
+
+        version = header[len(BATCH_FORMAT_MAGIC) :]
+        if version != bytes([BATCH_FORMAT_VERSION]):
+            raise ValueError(f"Unsupported document batch format version: {version!r}")
+
+        decompressor = zstandard.ZstdDecompressor()
+        with decompressor.stream_reader(content, closefd=False) as reader:
+            return [
+                Document.model_validate(doc_dict)
+                for doc_dict in msgpack.Unpacker(reader, raw=False)
+            ]
 
     def _per_cc_pair_base_path(self) -> str:
         """Get the base path for the cc pair."""
@@ -107,21 +143,21 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
 
     def _get_batch_file_name(self, batch_num: int) -> str:
         """Generate file name for a document batch."""
-        return f"{self.base_path}/{batch_num}.json"
+        return f"{self.base_path}/{batch_num}.msgpack.zst"
 
     def store_batch(self, batch_num: int, documents: list[Document]) -> None:
         """Store a batch of documents using FileStore."""
         file_name = self._get_batch_file_name(batch_num)
         try:
             data = self._serialize_documents(documents)
-            content = StringIO(data)
+            content = BytesIO(data)
 
             self.file_store.save_file(
                 file_id=file_name,
                 content=content,
                 display_name=f"Document Batch {batch_num}",
                 file_origin=FileOrigin.OTHER,
-                file_type="application/json",
+                file_type=BATCH_FILE_TYPE,
                 file_metadata={
                     "batch_num": batch_num,
                     "document_count": str(len(documents)),
@@ -139,21 +175,26 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
         """Retrieve a batch of documents from FileStore."""
         file_name = self._get_batch_file_name(batch_num)
         try:
-            # Check if file exists
-            if not self.file_store.has_file(
-                file_id=file_name,
-                file_origin=FileOrigin.OTHER,
-                file_type="application/json",
+            # Check if file exists. Batches carried over from an index attempt
+            # that predates the compressed format are still stored as JSON.
+            if not any(
+                self.file_store.has_file(
+                    file_id=file_name,
+                    file_origin=FileOrigin.OTHER,
+                    file_type=file_type,
+                )
+                for file_type in (BATCH_FILE_TYPE, LEGACY_BATCH_FILE_TYPE)
             ):
                 logger.warning(
                     f"Batch {batch_num} not found in FileStore with name {file_name}"
                 )
                 return None
 
-            content_io = self.file_store.read_file(file_name)
-            data = content_io.read().decode("utf-8")
-
-            documents = self._deserialize_documents(data)
+            content_io = self.file_store.read_file(file_name, use_tempfile=True)
+            try:
+                documents = self._deserialize_documents(content_io)
+            finally:
+                content_io.close()
             logger.debug(
                 f"Retrieved batch {batch_num} with {len(documents)} documents from FileStore"
             )
@@ -214,7 +255,7 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
             return BatchStoragePathInfo(
                 cc_pair_id=int(cc_pair_id),
                 index_attempt_id=int(index_attempt_id),
-                batch_num=int(batch_num.split(".")[0]),  # remove .json
+                batch_num=int(batch_num.split(".")[0]),  # remove the extension
             )
         except Exception as e:
             logger.error(f"Failed to extract path info from {path}: {e}")
@@ -1,7 +1,28 @@
+import os
 import threading
+from collections.abc import Callable
 from typing import Any
 
 import httpx
+from prometheus_client import Counter
+
+httpx_pool_requests = Counter(
+    "onyx_httpx_pool_requests_total",
+    "Requests sent through a pooled httpx client",
+    ["client"],
+)
+httpx_pool_new_connections = Counter(
+    "onyx_httpx_pool_new_connections_total",
+    "Connections opened by a pooled httpx client. Requests minus new connections "
+    "is the number of requests that reused a connection",
+    ["client"],
+)
+
+# httpcore trace events emitted once a new connection has been established
+_NEW_CONNECTION_TRACE_EVENTS = (
+    "connection.connect_tcp.complete",
+    "connection.connect_unix_socket.complete",
+)
 
 
 def make_default_kwargs() -> dict[str, Any]:
@@ -11,8 +32,26 @@ def make_default_kwargs() -> dict[str, Any]:
     }
 
 
+def _make_connection_tracer(name: str) -> Callable[[httpx.Request], None]:
+    requests_counter = httpx_pool_requests.labels(client=name)
+    new_connections_counter = httpx_pool_new_connections.labels(client=name)
+
+    def _trace(event_name: str, info: dict[str, Any]) -> None:
+        if event_name in _NEW_CONNECTION_TRACE_EVENTS:
+            new_connections_counter.inc()
+
+    def _on_request(request: httpx.Request) -> None:
+        requests_counter.inc()
+        request.extensions["trace"] = _trace
+
+    return _on_request
+
+
 class HttpxPool:
-    """Class to manage a global httpx Client instance"""
+    """Class to manage a global httpx Client instance.
+
+    Clients are not shared with forked children (e.g. celery prefork workers), a
+    child process lazily creates its own clients instead."""
 
     _clients: dict[str, httpx.Client] = {}
     _lock: threading.Lock = threading.Lock()
@@ -23,9 +62,17 @@ class HttpxPool:
         pass
 
     @classmethod
-    def _init_client(cls, **kwargs: Any) -> httpx.Client:
+    def _init_client(cls, name: str, **kwargs: Any) -> httpx.Client:
         """Private helper method to create and return an httpx.Client."""
         merged_kwargs = {**(make_default_kwargs()), **kwargs}
+        event_hooks = merged_kwargs.get("event_hooks") or {}
+        merged_kwargs["event_hooks"] = {
+            "request": [
+                _make_connection_tracer(name),
+                *event_hooks.get("request", []),
+            ],
+            "response": list(event_hooks.get("response", [])),
+        }
         return httpx.Client(**merged_kwargs)
 
     @classmethod
@@ -33,7 +80,7 @@ class HttpxPool:
         """Allow the caller to init the client with extra params."""
         with cls._lock:
             if name not in cls._clients:
-                cls._clients[name] = cls._init_client(**kwargs)
+                cls._clients[name] = cls._init_client(name, **kwargs)
 
     @classmethod
     def close_client(cls, name: str) -> None:
@@ -56,5 +103,16 @@ class HttpxPool:
         """Gets the httpx.Client. Will init to default settings if not init'd."""
         with cls._lock:
             if name not in cls._clients:
-                cls._clients[name] = cls._init_client()
+                cls._clients[name] = cls._init_client(name)
             return cls._clients[name]
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # The parent's connections must not be used or closed from the child, since
+        # both would then read and write the same sockets. The lock may also have
+        # been held by another thread at the time of the fork.
+        cls._clients = {}
+        cls._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=HttpxPool._reset_after_fork)
@@ -1,5 +1,10 @@
+from bisect import bisect_left
+from collections.abc import Iterator
+from itertools import accumulate
 from typing import cast
+from typing import NamedTuple
 
+from chonkie import SentenceChunk
 from chonkie import SentenceChunker
 
 from onyx.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
@@ -38,6 +43,37 @@ CHUNK_MIN_CONTENT = 256
 logger = setup_logger()
 
 
+class _Sentence(NamedTuple):
+    text: str
+    token_count: int
+
+
+class _SectionChunk(NamedTuple):
+    """A piece of a section as split by the chunk splitter."""
+
+    text: str
+    token_count: int
+    sentences: list[_Sentence]
+
+
+def _pack_sentences(sentences: list[_Sentence], chunk_size: int) -> Iterator[str]:
+    """
+    Greedily packs consecutive sentences into texts of less than `chunk_size` tokens
+    (at least one sentence each), the same way chonkie's SentenceChunker does. Lets
+    blurbs and mini-chunks reuse the sentences and token counts of their chunk.
+    """
+    token_sums = list(
+        accumulate((sentence.token_count for sentence in sentences), initial=0)
+    )
+    pos = 0
+    while pos < len(sentences):
+        split_idx = max(
+            bisect_left(token_sums, token_sums[pos] + chunk_size) - 1, pos + 1
+        )
+        yield "".join(sentence.text for sentence in sentences[pos:split_idx])
+        pos = split_idx
+
+
 def _get_metadata_suffix_for_document_index(
     metadata: dict[str, str | list[str]], include_separator: bool = False
 ) -> tuple[str, str]:
@@ -161,30 +197,18 @@ class Chunker:
         def token_counter(text: str) -> int:
             return len(tokenizer.encode(text))
 
-        self.blurb_splitter = SentenceChunker(
-            tokenizer_or_token_counter=token_counter,
-            chunk_size=blurb_size,
-            chunk_overlap=0,
-            return_type="texts",
-        )
-
+        # Sections are segmented into sentences and tokenized only once, by this
+        # splitter. Blurbs and mini-chunks are packed from the sentences of their chunk
+        # rather than re-splitting and re-tokenizing the chunk text.
         self.chunk_splitter = SentenceChunker(
             tokenizer_or_token_counter=token_counter,
             chunk_size=chunk_token_limit,
             chunk_overlap=chunk_overlap,
-            return_type="texts",
-        )
-
-        self.mini_chunk_splitter = (
-            SentenceChunker(
-                tokenizer_or_token_counter=token_counter,
-                chunk_size=mini_chunk_size,
-                chunk_overlap=0,
-                return_type="texts",
-            )
-            if enable_multipass
-            else None
+            return_type="chunks",
         )
+        self.blurb_size = blurb_size
+        self.mini_chunk_size = mini_chunk_size if enable_multipass else None
+        self.section_separator_tokens = len(tokenizer.encode(SECTION_SEPARATOR))
 
     def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
         """
@@ -203,23 +227,46 @@ class Chunker:
             start = end
         return chunks
 
-    def _extract_blurb(self, text: str) -> str:
+    def _split_section(self, text: str) -> list[_SectionChunk]:
+        """
+        Splits the text into sentences and packs them into pieces that fit the chunk
+        token limit. Each sentence and each piece is tokenized once.
+        """
+        # chunker is in `chunks` mode
+        sentence_chunks = cast(list[SentenceChunk], self.chunk_splitter.chunk(text))
+        return [
+            _SectionChunk(
+                text=sentence_chunk.text,
+                token_count=sentence_chunk.token_count,
+                sentences=[
+                    _Sentence(text=sentence.text, token_count=sentence.token_count)
+                    for sentence in sentence_chunk.sentences
+                ],
+            )
+            for sentence_chunk in sentence_chunks
+        ]
+
+    def _get_sentences(self, text: str) -> list[_Sentence]:
+        return [
+            sentence
+            for section_chunk in self._split_section(text)
+            for sentence in section_chunk.sentences
+        ]
+
+    def _extract_blurb(self, sentences: list[_Sentence]) -> str:
         """
-        Extract a short blurb from the text (first chunk of size `blurb_size`).
+        Extract a short blurb from the sentences (first chunk of size `blurb_size`).
         """
-        # chunker is in `text` mode
-        texts = cast(list[str], self.blurb_splitter.chunk(text))
-        if not texts:
-            return ""
-        return texts[0]
+        return next(_pack_sentences(sentences, self.blurb_size), "")
 
-    def _get_mini_chunk_texts(self, chunk_text: str) -> list[str] | None:
+    def _get_mini_chunk_texts(
+        self, chunk_text: str, sentences: list[_Sentence]
+    ) -> list[str] | None:
         """
         For "multipass" mode: additional sub-chunks (mini-chunks) for use in certain embeddings.
         """
-        if self.mini_chunk_splitter and chunk_text.strip():
-            # chunker is in `text` mode
-            return cast(list[str], self.mini_chunk_splitter.chunk(chunk_text))
+        if self.mini_chunk_size and chunk_text.strip():
+            return list(_pack_sentences(sentences, self.mini_chunk_size))
         return None
 
     # ADDED: extra param image_url to store in the chunk
@@ -234,14 +281,19 @@ class Chunker:
         metadata_suffix_semantic: str = "",
         metadata_suffix_keyword: str = "",
         image_file_id: str | None = None,
+        sentences: list[_Sentence] | None = None,
     ) -> None:
         """
         Helper to create a new DocAwareChunk, append it to chunks_list.
+        `sentences` are the sentences of `text` if they are already known.
         """
+        if sentences is None:
+            sentences = self._get_sentences(text)
+
         new_chunk = DocAwareChunk(
             source_document=document,
             chunk_id=len(chunks_list),
-            blurb=self._extract_blurb(text),
+            blurb=self._extract_blurb(sentences),
             content=text,
             source_links=links or {0: ""},
             image_file_id=image_file_id,
@@ -249,7 +301,7 @@ class Chunker:
             title_prefix=title_prefix,
             metadata_suffix_semantic=metadata_suffix_semantic,
             metadata_suffix_keyword=metadata_suffix_keyword,
-            mini_chunk_texts=self._get_mini_chunk_texts(text),
+            mini_chunk_texts=self._get_mini_chunk_texts(text, sentences),
             large_chunk_id=None,
             doc_summary="",
             chunk_context="",
@@ -273,6 +325,8 @@ class Chunker:
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        chunk_sentences: list[_Sentence] = []
+        chunk_token_count = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -301,8 +355,11 @@ class Chunker:
                         title_prefix=title_prefix,
                         metadata_suffix_semantic=metadata_suffix_semantic,
                         metadata_suffix_keyword=metadata_suffix_keyword,
+                        sentences=chunk_sentences,
                     )
                     chunk_text = ""
+                    chunk_sentences = []
+                    chunk_token_count = 0
                     link_offsets = {}
 
                 # Create a chunk specifically for this image section
@@ -321,7 +378,10 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_chunks = self._split_section(section_text)
+            section_token_count = sum(
+                section_chunk.token_count for section_chunk in section_chunks
+            )
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -335,17 +395,19 @@ class Chunker:
                         title_prefix,
                         metadata_suffix_semantic,
                         metadata_suffix_keyword,
+                        sentences=chunk_sentences,
                     )
                     chunk_text = ""
+                    chunk_sentences = []
+                    chunk_token_count = 0
                     link_offsets = {}
 
-                # chunker is in `text` mode
-                split_texts = cast(list[str], self.chunk_splitter.chunk(section_text))
-                for i, split_text in enumerate(split_texts):
+                for i, section_chunk in enumerate(section_chunks):
+                    split_text = section_chunk.text
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and section_chunk.token_count > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -371,20 +433,36 @@ class Chunker:
                             title_prefix=title_prefix,
                             metadata_suffix_semantic=metadata_suffix_semantic,
                             metadata_suffix_keyword=metadata_suffix_keyword,
+                            sentences=section_chunk.sentences,
                         )
                 continue
 
-            # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
+            section_sentences = [
+                sentence
+                for section_chunk in section_chunks
+                for sentence in section_chunk.sentences
+            ]
+
+            # If we can still fit this section into the current chunk, do so. The
+            # token count of the current chunk is the sum over its sections rather
+            # than re-tokenizing the growing chunk text for every section.
             current_offset = len(shared_precompare_cleanup(chunk_text))
-            next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
-            )
+            next_section_tokens = self.section_separator_tokens + section_token_count
 
-            if next_section_tokens + current_token_count <= content_token_limit:
+            if next_section_tokens + chunk_token_count <= content_token_limit:
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    chunk_token_count += self.section_separator_tokens
+                    if chunk_sentences:
+                        last_sentence = chunk_sentences[-1]
+                        chunk_sentences[-1] = _Sentence(
+                            text=last_sentence.text + SECTION_SEPARATOR,
+                            token_count=last_sentence.token_count
+                            + self.section_separator_tokens,
+                        )
                 chunk_text += section_text
+                chunk_sentences.extend(section_sentences)
+                chunk_token_count += section_token_count
                 link_offsets[current_offset] = section_link_text
             else:
                 # finalize the existing chunk
@@ -397,10 +475,13 @@ class Chunker:
                     title_prefix,
                     metadata_suffix_semantic,
                     metadata_suffix_keyword,
+                    sentences=chunk_sentences,
                 )
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                chunk_sentences = section_sentences
+                chunk_token_count = section_token_count
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -413,6 +494,7 @@ class Chunker:
                 title_prefix,
                 metadata_suffix_semantic,
                 metadata_suffix_keyword,
+                sentences=chunk_sentences,
             )
         return chunks
 
@@ -424,7 +506,9 @@ class Chunker:
             logger.debug(f"Chunking {document.semantic_identifier}")
 
         # Title prep
-        title = self._extract_blurb(document.get_title_for_document_index() or "")
+        title = self._extract_blurb(
+            self._get_sentences(document.get_title_for_document_index() or "")
+        )
         title_prefix = title + RETURN_SEPARATOR if title else ""
         title_tokens = len(self.tokenizer.encode(title_prefix))
 
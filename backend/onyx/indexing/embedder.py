@@ -1,3 +1,5 @@
+import hashlib
+import json
 import time
 from abc import ABC
 from abc import abstractmethod
@@ -6,6 +8,9 @@ from collections import defaultdict
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import ConnectorStopSignal
 from onyx.connectors.models import DocumentFailure
+from onyx.db.chunk import fetch_cached_chunk_embeddings
+from onyx.db.chunk import upsert_cached_chunk_embeddings__no_commit
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import SearchSettings
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
@@ -24,6 +29,158 @@ from shared_configs.model_server_models import Embedding
 logger = setup_logger()
 
 
+def build_embedding_model_key(
+    model_name: str,
+    provider_type: EmbeddingProvider | None,
+    normalize: bool,
+    passage_prefix: str | None,
+    reduced_dimension: int | None,
+    api_url: str | None,
+    deployment_name: str | None,
+) -> str:
+    """Identifies the embedding model + all settings that affect passage embeddings."""
+    return hashlib.sha256(
+        json.dumps(
+            [
+                model_name,
+                provider_type.value if provider_type else None,
+                normalize,
+                passage_prefix,
+                reduced_dimension,
+                api_url,
+                deployment_name,
+            ]
+        ).encode()
+    ).hexdigest()
+
+
+def compute_embedding_fingerprint(
+    model_key: str, texts: list[str], is_large_chunk: bool = False
+) -> str:
+    """Fingerprint of everything that goes into a chunk's embeddings. The texts are the
+    exact strings sent to the model (chunk text with title prefix, contextual RAG
+    summaries and metadata suffix, followed by the mini chunk texts)."""
+    return hashlib.sha256(
+        json.dumps([model_key, is_large_chunk, texts]).encode()
+    ).hexdigest()
+
+
+class _EmbeddingCacheContext:
+    """Looks up and stores chunk (and title) embeddings in the chunk embedding
+    cache for a single embed_chunks call."""
+
+    def __init__(
+        self,
+        model_key: str,
+        chunks: list[DocAwareChunk],
+        chunk_fingerprints: list[str],
+        doc_id_to_title: dict[str, str],
+        title_fingerprints: dict[str, str],
+        cached: dict[tuple[str, str], list[Embedding]],
+    ):
+        self.model_key = model_key
+        self.chunks = chunks
+        self.chunk_fingerprints = chunk_fingerprints
+        self.doc_id_to_title = doc_id_to_title
+        self.title_fingerprints = title_fingerprints
+        self.cached = cached
+
+    @classmethod
+    def load(
+        cls,
+        model_key: str,
+        chunks: list[DocAwareChunk],
+        texts_per_chunk: list[list[str]],
+        doc_id_to_title: dict[str, str],
+    ) -> "_EmbeddingCacheContext":
+        chunk_fingerprints = [
+            compute_embedding_fingerprint(
+                model_key=model_key,
+                texts=texts,
+                is_large_chunk=bool(chunk.large_chunk_reference_ids),
+            )
+            for chunk, texts in zip(chunks, texts_per_chunk)
+        ]
+        title_fingerprints = {
+            doc_id: compute_embedding_fingerprint(model_key=model_key, texts=[title])
+            for doc_id, title in doc_id_to_title.items()
+        }
+
+        with get_session_with_current_tenant() as db_session:
+            cached = fetch_cached_chunk_embeddings(
+                db_session=db_session,
+                document_id_fingerprint_pairs=list(
+                    {
+                        (chunk.source_document.id, fingerprint)
+                        for chunk, fingerprint in zip(chunks, chunk_fingerprints)
+                    }
+                    | set(title_fingerprints.items())
+                ),
+            )
+
+        return cls(
+            model_key=model_key,
+            chunks=chunks,
+            chunk_fingerprints=chunk_fingerprints,
+            doc_id_to_title=doc_id_to_title,
+            title_fingerprints=title_fingerprints,
+            cached=cached,
+        )
+
+    def cached_chunk_embeddings(self) -> list[list[Embedding] | None]:
+        return [
+            self.cached.get((chunk.source_document.id, fingerprint))
+            for chunk, fingerprint in zip(self.chunks, self.chunk_fingerprints)
+        ]
+
+    def cached_title_embeddings(self) -> dict[str, Embedding]:
+        return {
+            self.doc_id_to_title[doc_id]: self.cached[(doc_id, fingerprint)][0]
+            for doc_id, fingerprint in self.title_fingerprints.items()
+            if (doc_id, fingerprint) in self.cached
+        }
+
+    def store(
+        self,
+        embedded_chunks: list[IndexChunk],
+        title_embed_dict: dict[str, Embedding],
+    ) -> None:
+        document_id_to_fingerprints: dict[str, list[str]] = defaultdict(list)
+        new_embeddings: dict[tuple[str, str], list[Embedding]] = {}
+        num_reused_chunks = 0
+
+        for chunk, fingerprint in zip(embedded_chunks, self.chunk_fingerprints):
+            key = (chunk.source_document.id, fingerprint)
+            document_id_to_fingerprints[chunk.source_document.id].append(fingerprint)
+            if key in self.cached:
+                num_reused_chunks += 1
+                continue
+            new_embeddings[key] = [
+                chunk.embeddings.full_embedding,
+                *chunk.embeddings.mini_chunk_embeddings,
+            ]
+
+        for doc_id, fingerprint in self.title_fingerprints.items():
+            document_id_to_fingerprints[doc_id].append(fingerprint)
+            if (doc_id, fingerprint) not in self.cached:
+                new_embeddings[(doc_id, fingerprint)] = [
+                    title_embed_dict[self.doc_id_to_title[doc_id]]
+                ]
+
+        logger.debug(
+            f"Reused cached embeddings for {num_reused_chunks}/{len(embedded_chunks)} chunks"
+        )
+
+        with get_session_with_current_tenant() as db_session:
+            upsert_cached_chunk_embeddings__no_commit(
+                db_session=db_session,
+                model_key=self.model_key,
+                document_id_to_fingerprints=document_id_to_fingerprints,
+                new_embeddings=new_embeddings,
+            )
+            db_session.commit()
+
+
 class IndexingEmbedder(ABC):
     """Converts chunks into chunks with embeddings. Note that one chunk may have
     multiple embeddings associated with it."""
@@ -41,6 +198,7 @@ class IndexingEmbedder(ABC):
         deployment_name: str | None,
         reduced_dimension: int | None,
         callback: IndexingHeartbeatInterface | None,
+        reuse_cached_embeddings: bool = False,
     ):
         self.model_name = model_name
         self.normalize = normalize
@@ -51,6 +209,18 @@ class IndexingEmbedder(ABC):
         self.api_url = api_url
         self.api_version = api_version
         self.deployment_name = deployment_name
+        # NOTE: only safe to enable if every document passed to embed_chunks exists
+        # in the document table, and all of a document's chunks are embedded together
+        self.reuse_cached_embeddings = reuse_cached_embeddings
+        self.model_key = build_embedding_model_key(
+            model_name=model_name,
+            provider_type=provider_type,
+            normalize=normalize,
+            passage_prefix=passage_prefix,
+            reduced_dimension=reduced_dimension,
+            api_url=api_url,
+            deployment_name=deployment_name,
+        )
 
         self.embedding_model = EmbeddingModel(
             model_name=model_name,
@@ -94,6 +264,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
         callback: IndexingHeartbeatInterface | None = None,
+        reuse_cached_embeddings: bool = False,
     ):
         super().__init__(
             model_name,
@@ -107,8 +278,31 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name,
             reduced_dimension,
             callback,
+            reuse_cached_embeddings,
         )
 
+    @staticmethod
+    def _get_texts_to_embed(chunk: DocAwareChunk) -> list[str]:
+        """The chunk text followed by the chunk's mini chunk texts (if any)."""
+        chunk_text = (
+            f"{chunk.title_prefix}{chunk.doc_summary}{chunk.content}{chunk.chunk_context}{chunk.metadata_suffix_semantic}"
+        ) or chunk.source_document.get_title_for_document_index()
+
+        if not chunk_text:
+            # This should never happen, the document would have been dropped
+            # before getting to this point
+            raise ValueError(f"Chunk has no content: {chunk.to_short_descriptor()}")
+
+        if chunk.mini_chunk_texts:
+            if chunk.large_chunk_reference_ids:
+                # A large chunk does not contain mini chunks, if it matches the large chunk
+                # with a high score, then mini chunks would not be used anyway
+                # otherwise it should match the normal chunk
+                raise RuntimeError("Large chunk contains mini chunks")
+            return [chunk_text, *chunk.mini_chunk_texts]
+
+        return [chunk_text]
+
     @log_function_time()
     def embed_chunks(
         self,
@@ -118,51 +312,68 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
     ) -> list[IndexChunk]:
         """Adds embeddings to the chunks, the title and metadata suffixes are added to the chunk as well
         if they exist. If there is no space for it, it would have been thrown out at the chunking step.
+
+        If reuse_cached_embeddings is set, chunks (and titles) whose fingerprint matches a
+        previously stored embedding are not sent to the embedding model. In that mode all
+        chunks of a document must be passed in together.
         """
         # All chunks at this point must have some non-empty content
-        flat_chunk_texts: list[str] = []
-        large_chunks_present = False
-        for chunk in chunks:
-            if chunk.large_chunk_reference_ids:
-                large_chunks_present = True
-            chunk_text = (
-                f"{chunk.title_prefix}{chunk.doc_summary}{chunk.content}{chunk.chunk_context}{chunk.metadata_suffix_semantic}"
-            ) or chunk.source_document.get_title_for_document_index()
-
-            if not chunk_text:
-                # This should never happen, the document would have been dropped
-                # before getting to this point
-                raise ValueError(f"Chunk has no content: {chunk.to_short_descriptor()}")
-
-            flat_chunk_texts.append(chunk_text)
-
-            if chunk.mini_chunk_texts:
-                if chunk.large_chunk_reference_ids:
-                    # A large chunk does not contain mini chunks, if it matches the large chunk
-                    # with a high score, then mini chunks would not be used anyway
-                    # otherwise it should match the normal chunk
-                    raise RuntimeError("Large chunk contains mini chunks")
-                flat_chunk_texts.extend(chunk.mini_chunk_texts)
-
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
-            large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
-        )
-
-        chunk_titles = {
-            chunk.source_document.get_title_for_document_index() for chunk in chunks
-        }
+        texts_per_chunk = [self._get_texts_to_embed(chunk) for chunk in chunks]
 
         # Drop any None or empty strings
         # If there is no title or the title is empty, the title embedding field will be null
         # which is ok, it just won't contribute at all to the scoring.
-        chunk_titles_list = [title for title in chunk_titles if title]
+        doc_id_to_title = {
+            chunk.source_document.id: title
+            for chunk in chunks
+            if (title := chunk.source_document.get_title_for_document_index())
+        }
 
+        # None for every chunk that has to be embedded
+        cached_chunk_embeddings: list[list[Embedding] | None] = [None] * len(chunks)
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
+        embedding_cache: _EmbeddingCacheContext | None = None
+        if self.reuse_cached_embeddings:
+            embedding_cache = _EmbeddingCacheContext.load(
+                model_key=self.model_key,
+                chunks=chunks,
+                texts_per_chunk=texts_per_chunk,
+                doc_id_to_title=doc_id_to_title,
+            )
+            cached_chunk_embeddings = embedding_cache.cached_chunk_embeddings()
+            title_embed_dict.update(embedding_cache.cached_title_embeddings())
+
+        flat_chunk_texts: list[str] = []
+        large_chunks_present = False
+        for chunk, texts, cached in zip(
+            chunks, texts_per_chunk, cached_chunk_embeddings
+        ):
+            if cached is not None:
+                continue
+            if chunk.large_chunk_reference_ids:
+                large_chunks_present = True
+            flat_chunk_texts.extend(texts)
+
+        embeddings: list[Embedding] = (
+            self.embedding_model.encode(
+                texts=flat_chunk_texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+            if flat_chunk_texts
+            else []
+        )
+
+        chunk_titles_list = list(
+            {
+                title
+                for title in doc_id_to_title.values()
+                if title not in title_embed_dict
+            }
+        )
         if chunk_titles_list:
             title_embeddings = self.embedding_model.encode(
                 chunk_titles_list,
@@ -180,13 +391,16 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # Mapping embeddings to chunks
         embedded_chunks: list[IndexChunk] = []
         embedding_ind_start = 0
-        for chunk in chunks:
-            num_embeddings = 1 + (
-                len(chunk.mini_chunk_texts) if chunk.mini_chunk_texts else 0
-            )
-            chunk_embeddings = embeddings[
-                embedding_ind_start : embedding_ind_start + num_embeddings
-            ]
+        for chunk, texts, cached in zip(
+            chunks, texts_per_chunk, cached_chunk_embeddings
+        ):
+            if cached is not None:
+                chunk_embeddings = cached
+            else:
+                chunk_embeddings = embeddings[
+                    embedding_ind_start : embedding_ind_start + len(texts)
+                ]
+                embedding_ind_start += len(texts)
 
             title = chunk.source_document.get_title_for_document_index()
 
@@ -216,7 +430,11 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                 title_embedding=title_embedding,
             )
             embedded_chunks.append(new_embedded_chunk)
-            embedding_ind_start += num_embeddings
+
+        if embedding_cache is not None:
+            embedding_cache.store(
+                embedded_chunks=embedded_chunks, title_embed_dict=title_embed_dict
+            )
 
         return embedded_chunks
 
@@ -225,6 +443,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         cls,
         search_settings: SearchSettings,
         callback: IndexingHeartbeatInterface | None = None,
+        reuse_cached_embeddings: bool = False,
     ) -> "DefaultIndexingEmbedder":
         return cls(
             model_name=search_settings.model_name,
@@ -238,6 +457,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
             callback=callback,
+            reuse_cached_embeddings=reuse_cached_embeddings,
         )
 
 
@@ -1,5 +1,15 @@
+import contextvars
+import hashlib
+import json
+import threading
 from collections import defaultdict
 from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import closing
+from contextlib import ExitStack
 from typing import Protocol
 
 from pydantic import BaseModel
@@ -9,6 +19,17 @@ from sqlalchemy.orm import Session
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG_SUMMARY_CACHE
+from onyx.configs.app_configs import ENABLE_IMAGE_SUMMARY_CACHE
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_WORKERS
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MIN_DIMENSION_PX
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
+from onyx.configs.app_configs import INDEXING_PIPELINE_EMBED_WORKERS
+from onyx.configs.app_configs import INDEXING_PIPELINE_QUEUE_SIZE
+from onyx.configs.app_configs import INDEXING_PIPELINE_STREAMING_ENABLED
+from onyx.configs.app_configs import INDEXING_PIPELINE_SUB_BATCH_SIZE
+from onyx.configs.app_configs import INDEXING_PIPELINE_WRITE_WORKERS
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
@@ -26,9 +47,14 @@ from onyx.connectors.models import IndexAttemptMetadata
 from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import Section
 from onyx.connectors.models import TextSection
+from onyx.db.chunk import fetch_cached_contextual_rag_summaries
+from onyx.db.chunk import fetch_cached_image_summaries
+from onyx.db.chunk import upsert_cached_contextual_rag_summaries__no_commit
+from onyx.db.chunk import upsert_cached_image_summaries__no_commit
 from onyx.db.document import get_documents_by_ids
 from onyx.db.document import upsert_document_by_connector_credential_pair
 from onyx.db.document import upsert_documents
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import Document as DBDocument
 from onyx.db.models import IndexModelStatus
 from onyx.db.search_settings import get_active_search_settings
@@ -37,14 +63,19 @@ from onyx.document_index.document_index_utils import (
     get_multipass_config,
 )
 from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
+from onyx.file_processing.image_summarization import is_image_too_small
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
+from onyx.file_store.file_store import FileStore
 from onyx.file_store.file_store import get_default_file_store
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
+from onyx.indexing.models import BuildMetadataAwareChunksResult
 from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import IndexChunk
 from onyx.indexing.models import IndexingBatchAdapter
 from onyx.indexing.models import UpdatableChunkData
 from onyx.indexing.vector_db_insertion import write_chunks_to_vector_db_with_backoff
@@ -62,8 +93,11 @@ from onyx.prompts.contextual_retrieval import CONTEXTUAL_RAG_PROMPT1
 from onyx.prompts.contextual_retrieval import CONTEXTUAL_RAG_PROMPT2
 from onyx.prompts.contextual_retrieval import DOCUMENT_SUMMARY_PROMPT
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import PipelineStage
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from onyx.utils.threadpool_concurrency import run_pipelined_stages
 from onyx.utils.timing import log_function_time
+from shared_configs.utils import batch_list
 
 
 logger = setup_logger()
@@ -358,6 +392,171 @@ def filter_documents(document_batch: list[Document]) -> list[Document]:
     return documents
 
 
+_IMAGE_NOT_FOUND_TEXT = "[Image could not be processed]"
+_IMAGE_NOT_SUMMARIZED_TEXT = "[Image could not be summarized]"
+_IMAGE_ERROR_TEXT = "[Error processing image]"
+
+
+def _summarize_image(
+    llm: LLM, image_data: bytes, context_name: str
+) -> tuple[str, bool]:
+    """Returns the section text for the image and whether it is an actual summary."""
+    try:
+        summary = summarize_image_with_error_handling(
+            llm=llm,
+            image_data=image_data,
+            context_name=context_name,
+        )
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return _IMAGE_ERROR_TEXT, False
+
+    if not summary:
+        return _IMAGE_NOT_SUMMARIZED_TEXT, False
+    return summary, True
+
+
+def _image_summary_fingerprint(llm: LLM, image_data: bytes) -> str:
+    # the image name is part of the prompt but deliberately not of the fingerprint,
+    # the same logo or diagram gets the same summary wherever it is embedded
+    return hashlib.sha256(
+        json.dumps(
+            [
+                llm.config.model_provider,
+                llm.config.model_name,
+                IMAGE_SUMMARIZATION_SYSTEM_PROMPT,
+                IMAGE_SUMMARIZATION_USER_PROMPT,
+                hashlib.sha256(image_data).hexdigest(),
+            ]
+        ).encode()
+    ).hexdigest()
+
+
+def _fingerprint_image_file(
+    llm: LLM, file_store: FileStore, image_file_id: str
+) -> tuple[str | None, str]:
+    """Returns the summary fingerprint of the image file, or None and the section text
+    for images that are not summarized (missing, unreadable or too small). The image
+    is only held in memory for the duration of this call."""
+    try:
+        file_record = file_store.read_file_record(file_id=image_file_id)
+        if not file_record:
+            logger.warning(f"Image file {image_file_id} not found in FileStore")
+            return None, _IMAGE_NOT_FOUND_TEXT
+
+        image_data = file_store.read_file(file_id=image_file_id).read()
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return None, _IMAGE_ERROR_TEXT
+
+    if is_image_too_small(image_data, IMAGE_SUMMARIZATION_MIN_DIMENSION_PX):
+        return None, ""
+
+    return _image_summary_fingerprint(llm, image_data), ""
+
+
+def _summarize_image_file(
+    llm: LLM, file_store: FileStore, image_file_id: str
+) -> tuple[str, bool]:
+    """Returns the section text for the image file and whether it is an actual
+    summary. The image is only held in memory for the duration of this call."""
+    try:
+        file_record = file_store.read_file_record(file_id=image_file_id)
+        if not file_record:
+            logger.warning(f"Image file {image_file_id} not found in FileStore")
+            return _IMAGE_NOT_FOUND_TEXT, False
+
+        image_data = file_store.read_file(file_id=image_file_id).read()
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return _IMAGE_ERROR_TEXT, False
+
+    return _summarize_image(llm, image_data, file_record.display_name or "Image")
+
+
+def _summarize_images(llm: LLM, image_file_ids: list[str]) -> dict[str, str]:
+    """Returns the section text for each of the (unique) image file ids.
+
+    Images that are too small to carry information are not summarized, and each
+    distinct image content is summarized at most once: from the image summary cache
+    if possible, otherwise by the vision LLM, concurrently across the batch. Images
+    are read again for summarization rather than kept in memory for the batch."""
+    file_store = get_default_file_store()
+
+    fingerprint_results: list[tuple[str | None, str]] = (
+        run_functions_tuples_in_parallel(
+            [
+                (_fingerprint_image_file, (llm, file_store, image_file_id))
+                for image_file_id in image_file_ids
+            ],
+            max_workers=IMAGE_SUMMARIZATION_MAX_WORKERS,
+        )
+    )
+
+    image_file_id_to_text: dict[str, str] = {}
+    # the same content may be stored under several file ids, e.g. a logo attached
+    # to many pages
+    fingerprint_to_image_file_ids: dict[str, list[str]] = {}
+    for image_file_id, (fingerprint, text) in zip(image_file_ids, fingerprint_results):
+        if fingerprint is None:
+            image_file_id_to_text[image_file_id] = text
+        else:
+            fingerprint_to_image_file_ids.setdefault(fingerprint, []).append(
+                image_file_id
+            )
+
+    fingerprint_to_text: dict[str, str] = {}
+    if ENABLE_IMAGE_SUMMARY_CACHE and fingerprint_to_image_file_ids:
+        with get_session_with_current_tenant() as db_session:
+            fingerprint_to_text = fetch_cached_image_summaries(
+                db_session=db_session,
+                fingerprints=list(fingerprint_to_image_file_ids),
+            )
+
+    fingerprints_to_summarize = [
+        fingerprint
+        for fingerprint in fingerprint_to_image_file_ids
+        if fingerprint not in fingerprint_to_text
+    ]
+    summary_results: list[tuple[str, bool]] = run_functions_tuples_in_parallel(
+        [
+            (
+                _summarize_image_file,
+                (llm, file_store, fingerprint_to_image_file_ids[fingerprint][0]),
+            )
+            for fingerprint in fingerprints_to_summarize
+        ],
+        max_workers=IMAGE_SUMMARIZATION_MAX_WORKERS,
+    )
+
+    new_summaries: dict[str, str] = {}
+    for fingerprint, (text, is_summary) in zip(
+        fingerprints_to_summarize, summary_results
+    ):
+        fingerprint_to_text[fingerprint] = text
+        # failed summarizations are retried next time
+        if is_summary:
+            new_summaries[fingerprint] = text
+
+    for fingerprint, same_image_file_ids in fingerprint_to_image_file_ids.items():
+        for image_file_id in same_image_file_ids:
+            image_file_id_to_text[image_file_id] = fingerprint_to_text[fingerprint]
+
+    logger.debug(
+        f"Summarized {len(fingerprints_to_summarize)} distinct images for "
+        f"{len(image_file_ids)} image sections"
+    )
+
+    if ENABLE_IMAGE_SUMMARY_CACHE and new_summaries:
+        with get_session_with_current_tenant() as db_session:
+            upsert_cached_image_summaries__no_commit(
+                db_session=db_session, new_summaries=new_summaries
+            )
+            db_session.commit()
+
+    return image_file_id_to_text
+
+
 def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     """
     Process all sections in documents by:
@@ -378,100 +577,123 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
         # Only get the vision LLM if image processing is enabled
         llm = get_default_llm_with_vision()
 
-    if not llm:
-        # Even without LLM, we still convert to IndexingDocument with base Sections
-        return [
-            IndexingDocument(
-                **document.model_dump(),
-                processed_sections=[
-                    Section(
-                        text=section.text if isinstance(section, TextSection) else "",
-                        link=section.link,
-                        image_file_id=(
-                            section.image_file_id
-                            if isinstance(section, ImageSection)
-                            else None
-                        ),
-                    )
-                    for section in document.sections
-                ],
+    image_file_id_to_text: dict[str, str] = {}
+    if llm:
+        image_file_ids = list(
+            dict.fromkeys(
+                section.image_file_id
+                for document in documents
+                for section in document.sections
+                if isinstance(section, ImageSection)
             )
-            for document in documents
-        ]
+        )
+        if image_file_ids:
+            image_file_id_to_text = _summarize_images(llm, image_file_ids)
 
     indexed_documents: list[IndexingDocument] = []
-
     for document in documents:
         processed_sections: list[Section] = []
-
         for section in document.sections:
-            # For ImageSection, process and create base Section with both text and image_file_id
             if isinstance(section, ImageSection):
-                # Default section with image path preserved - ensure text is always a string
-                processed_section = Section(
-                    link=section.link,
-                    image_file_id=section.image_file_id,
-                    text="",  # Initialize with empty string
-                )
-
-                # Try to get image summary
-                try:
-                    file_store = get_default_file_store()
-
-                    file_record = file_store.read_file_record(
-                        file_id=section.image_file_id
+                # Even without LLM, the image path is preserved
+                processed_sections.append(
+                    Section(
+                        text=image_file_id_to_text.get(section.image_file_id, ""),
+                        link=section.link,
+                        image_file_id=section.image_file_id,
                     )
-                    if not file_record:
-                        logger.warning(
-                            f"Image file {section.image_file_id} not found in FileStore"
-                        )
-
-                        processed_section.text = "[Image could not be processed]"
-                    else:
-                        # Get the image data
-                        image_data_io = file_store.read_file(
-                            file_id=section.image_file_id
-                        )
-                        image_data = image_data_io.read()
-                        summary = summarize_image_with_error_handling(
-                            llm=llm,
-                            image_data=image_data,
-                            context_name=file_record.display_name or "Image",
-                        )
-
-                        if summary:
-                            processed_section.text = summary
-                        else:
-                            processed_section.text = "[Image could not be summarized]"
-                except Exception as e:
-                    logger.error(f"Error processing image section: {e}")
-                    processed_section.text = "[Error processing image]"
-
-                processed_sections.append(processed_section)
-
-            # For TextSection, create a base Section with text and link
+                )
             elif isinstance(section, TextSection):
-                processed_section = Section(
-                    text=section.text or "",  # Ensure text is always a string, not None
-                    link=section.link,
-                    image_file_id=None,
+                processed_sections.append(
+                    Section(
+                        text=section.text or "",  # Ensure text is always a string
+                        link=section.link,
+                        image_file_id=None,
+                    )
                 )
-                processed_sections.append(processed_section)
 
-        # Create IndexingDocument with original sections and processed_sections
-        indexed_document = IndexingDocument(
-            **document.model_dump(), processed_sections=processed_sections
+        # shallow copy, the original sections are shared rather than re-serialized
+        indexed_documents.append(
+            IndexingDocument(**dict(document), processed_sections=processed_sections)
         )
-        indexed_documents.append(indexed_document)
 
     return indexed_documents
 
 
+class _SummaryCacheContext:
+    """Looks up and stores contextual RAG summaries in the summary cache for the
+    documents of a single add_contextual_summaries call."""
+
+    def __init__(self, model_key: str, cached: dict[tuple[str, str], str]):
+        self.model_key = model_key
+        self.cached = cached
+        # every summary of the current content, cached or newly generated
+        self.current: dict[tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, llm: LLM, document_ids: list[str]) -> "_SummaryCacheContext":
+        model_key = hashlib.sha256(
+            json.dumps([llm.config.model_provider, llm.config.model_name]).encode()
+        ).hexdigest()
+        with get_session_with_current_tenant() as db_session:
+            cached = fetch_cached_contextual_rag_summaries(
+                db_session=db_session, document_ids=document_ids, model_key=model_key
+            )
+        return cls(model_key=model_key, cached=cached)
+
+    def get_or_generate(
+        self, document_id: str, prompt_parts: list[str], generate: Callable[[], str]
+    ) -> str:
+        """`prompt_parts` must be everything that goes into the prompt, i.e. the prompt
+        templates and the content they are formatted with."""
+        fingerprint = hashlib.sha256(
+            json.dumps([self.model_key, prompt_parts]).encode()
+        ).hexdigest()
+        key = (document_id, fingerprint)
+
+        summary = self.cached.get(key)
+        if summary is None:
+            summary = generate()
+        # empty summaries come from failed LLM calls, those are retried next time
+        if summary:
+            with self._lock:
+                self.current[key] = summary
+        return summary
+
+    def store(self, document_ids: list[str]) -> None:
+        document_id_to_fingerprints: dict[str, list[str]] = {
+            document_id: [] for document_id in document_ids
+        }
+        for document_id, fingerprint in self.current:
+            document_id_to_fingerprints[document_id].append(fingerprint)
+
+        new_summaries = {
+            key: summary
+            for key, summary in self.current.items()
+            if key not in self.cached
+        }
+        logger.debug(
+            f"Reused {len(self.current) - len(new_summaries)}/{len(self.current)} "
+            "cached contextual RAG summaries"
+        )
+
+        with get_session_with_current_tenant() as db_session:
+            upsert_cached_contextual_rag_summaries__no_commit(
+                db_session=db_session,
+                model_key=self.model_key,
+                document_id_to_fingerprints=document_id_to_fingerprints,
+                new_summaries=new_summaries,
+            )
+            db_session.commit()
+
+
 def add_document_summaries(
     chunks_by_doc: list[DocAwareChunk],
     llm: LLM,
     tokenizer: BaseTokenizer,
     trunc_doc_tokens: int,
+    summary_cache: _SummaryCacheContext | None = None,
 ) -> list[int] | None:
     """
     Adds a document summary to a list of chunks from the same document.
@@ -491,9 +713,22 @@ def add_document_summaries(
     # Apply prompt caching: cache the static prompt, document content is the suffix
     # Note: For document summarization, there's no cacheable prefix since the document changes
     # So we just pass the full prompt without caching
-    summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-    doc_summary = llm_response_to_string(
-        llm.invoke(UserMessage(content=summary_prompt), max_tokens=MAX_CONTEXT_TOKENS)
+    def generate_doc_summary() -> str:
+        summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
+        return llm_response_to_string(
+            llm.invoke(
+                UserMessage(content=summary_prompt), max_tokens=MAX_CONTEXT_TOKENS
+            )
+        )
+
+    doc_summary = (
+        summary_cache.get_or_generate(
+            chunks_by_doc[0].source_document.id,
+            [DOCUMENT_SUMMARY_PROMPT, doc_content],
+            generate_doc_summary,
+        )
+        if summary_cache
+        else generate_doc_summary()
     )
 
     for chunk in chunks_by_doc:
@@ -508,6 +743,7 @@ def add_chunk_summaries(
     tokenizer: BaseTokenizer,
     trunc_doc_chunk_tokens: int,
     doc_tokens: list[int] | None,
+    summary_cache: _SummaryCacheContext | None = None,
 ) -> None:
     """
     Adds chunk summaries to the chunks grouped by document id.
@@ -530,23 +766,35 @@ def add_chunk_summaries(
         if len(doc_tokens) <= MAX_TOKENS_FOR_FULL_INCLUSION
         else chunks_by_doc[0].doc_summary
     )
+    document_id = chunks_by_doc[0].source_document.id
     if not doc_info:
         # This happens if the document is too long AND document summaries are turned off
         # In this case we compute a doc summary using the LLM
-        doc_info = llm_response_to_string(
-            llm.invoke(
-                UserMessage(
-                    content=DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-                ),
-                max_tokens=MAX_CONTEXT_TOKENS,
+        def generate_doc_summary() -> str:
+            return llm_response_to_string(
+                llm.invoke(
+                    UserMessage(
+                        content=DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
+                    ),
+                    max_tokens=MAX_CONTEXT_TOKENS,
+                )
+            )
+
+        doc_info = (
+            summary_cache.get_or_generate(
+                document_id,
+                [DOCUMENT_SUMMARY_PROMPT, doc_content],
+                generate_doc_summary,
             )
+            if summary_cache
+            else generate_doc_summary()
         )
 
     from onyx.llm.prompt_cache.processor import process_with_prompt_cache
 
     context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
 
-    def assign_context(chunk: DocAwareChunk) -> None:
+    def generate_chunk_context(chunk: DocAwareChunk) -> str:
         context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
         try:
             # Apply prompt caching: cache the document context (prompt1), chunk content is the suffix
@@ -558,7 +806,7 @@ def add_chunk_summaries(
                 continuation=True,  # Append chunk to the document context
             )
 
-            chunk.chunk_context = llm_response_to_string(
+            return llm_response_to_string(
                 llm.invoke(
                     processed_prompt,
                     max_tokens=MAX_CONTEXT_TOKENS,
@@ -569,10 +817,21 @@ def add_chunk_summaries(
             # Erroring during chunker is undesirable, so we log the error and continue
             # TODO: for v2, add robust retry logic
             logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
+            return ""
         except Exception as e:
             logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
+            return ""
+
+    def assign_context(chunk: DocAwareChunk) -> None:
+        if summary_cache is None:
+            chunk.chunk_context = generate_chunk_context(chunk)
+            return
+
+        chunk.chunk_context = summary_cache.get_or_generate(
+            document_id,
+            [CONTEXTUAL_RAG_PROMPT1, CONTEXTUAL_RAG_PROMPT2, doc_info, chunk.content],
+            lambda: generate_chunk_context(chunk),
+        )
 
     run_functions_tuples_in_parallel(
         [(assign_context, (chunk,)) for chunk in chunks_by_doc]
@@ -584,15 +843,26 @@ def add_contextual_summaries(
     llm: LLM,
     tokenizer: BaseTokenizer,
     chunk_token_limit: int,
+    reuse_cached_summaries: bool = False,
 ) -> list[DocAwareChunk]:
     """
     Adds Document summary and chunk-within-document context to the chunks
     based on which environment variables are set.
+
+    If reuse_cached_summaries is set, summaries generated for the exact same prompt
+    in a previous indexing run are reused instead of calling the LLM again. In that
+    mode all chunks of a document must be passed in together.
     """
     doc2chunks = defaultdict(list)
     for chunk in chunks:
         doc2chunks[chunk.source_document.id].append(chunk)
 
+    summary_cache = (
+        _SummaryCacheContext.load(llm, list(doc2chunks.keys()))
+        if reuse_cached_summaries and doc2chunks
+        else None
+    )
+
     # The number of tokens allowed for the document when computing a document summary
     trunc_doc_summary_tokens = llm.config.max_input_tokens - len(
         tokenizer.encode(DOCUMENT_SUMMARY_PROMPT)
@@ -610,17 +880,295 @@ def add_contextual_summaries(
         doc_tokens = None
         if USE_DOCUMENT_SUMMARY:
             doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
+                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens, summary_cache
             )
 
         if USE_CHUNK_SUMMARY:
             add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
+                chunks_by_doc,
+                llm,
+                tokenizer,
+                trunc_doc_chunk_tokens,
+                doc_tokens,
+                summary_cache,
             )
 
+    if summary_cache:
+        summary_cache.store(list(doc2chunks.keys()))
+
+    return chunks
+
+
+def _chunk_documents(
+    indexable_docs: list[IndexingDocument],
+    chunker: Chunker,
+    llm: LLM | None,
+    llm_tokenizer: BaseTokenizer | None,
+) -> list[DocAwareChunk]:
+    """Chunks the documents and, if an LLM is provided, adds contextual RAG summaries."""
+    # NOTE: no special handling for failures here, since the chunker is not
+    # a common source of failure for the indexing pipeline
+    chunks: list[DocAwareChunk] = chunker.chunk(indexable_docs)
+
+    # contextual RAG
+    if llm is not None:
+        assert llm_tokenizer is not None, "must provide a tokenizer for contextual RAG"
+        # Because the chunker's tokens are different from the LLM's tokens,
+        # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
+        chunks = add_contextual_summaries(
+            chunks=chunks,
+            llm=llm,
+            tokenizer=llm_tokenizer,
+            chunk_token_limit=chunker.chunk_token_limit * 2,
+            reuse_cached_summaries=ENABLE_CONTEXTUAL_RAG_SUMMARY_CACHE,
+        )
+
     return chunks
 
 
+def _verify_all_docs_returned(
+    updatable_ids: list[str],
+    insertion_records: list[DocumentInsertionRecord],
+    failures: list[ConnectorFailure],
+) -> None:
+    all_returned_doc_ids = {record.document_id for record in insertion_records}.union(
+        {
+            record.failed_document.document_id
+            for record in failures
+            if record.failed_document
+        }
+    )
+    if all_returned_doc_ids != set(updatable_ids):
+        raise RuntimeError(
+            f"Some documents were not successfully indexed. "
+            f"Updatable IDs: {updatable_ids}, "
+            f"Returned IDs: {all_returned_doc_ids}. "
+            "This should never happen."
+        )
+
+
+class _ChunkedSubBatch(BaseModel):
+    indexable_docs: list[IndexingDocument]
+    chunks: list[DocAwareChunk]
+
+
+class _EmbeddedSubBatch(BaseModel):
+    indexable_docs: list[IndexingDocument]
+    chunks_with_embeddings: list[IndexChunk]
+    embedding_failures: list[ConnectorFailure]
+
+
+def _merge_metadata_aware_chunks_results(
+    results: list[BuildMetadataAwareChunksResult],
+) -> BuildMetadataAwareChunksResult:
+    merged = BuildMetadataAwareChunksResult(
+        chunks=[],
+        doc_id_to_previous_chunk_cnt={},
+        doc_id_to_new_chunk_cnt={},
+        user_file_id_to_raw_text={},
+        user_file_id_to_token_count={},
+    )
+    for result in results:
+        merged.chunks.extend(result.chunks)
+        merged.doc_id_to_previous_chunk_cnt.update(result.doc_id_to_previous_chunk_cnt)
+        merged.doc_id_to_new_chunk_cnt.update(result.doc_id_to_new_chunk_cnt)
+        merged.user_file_id_to_raw_text.update(result.user_file_id_to_raw_text)
+        merged.user_file_id_to_token_count.update(result.user_file_id_to_token_count)
+    return merged
+
+
+def _index_doc_batch_streaming(
+    *,
+    context: DocumentBatchPrepareContext,
+    filtered_documents: list[Document],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    document_index: DocumentIndex,
+    request_id: str | None,
+    tenant_id: str,
+    adapter: IndexingBatchAdapter,
+    llm: LLM | None,
+    llm_tokenizer: BaseTokenizer | None,
+) -> IndexingPipelineResult:
+    """Streaming variant of index_doc_batch.
+
+    The batch is split into sub-batches of whole documents which flow through
+    chunk -> embed -> write stages connected by bounded queues, so that e.g. sub-batch
+    N+1 is being embedded while sub-batch N is being written to the document index.
+    The chunk stage always has a single worker since the chunker (and its tokenizer)
+    are not thread-safe.
+
+    All DB work (metadata enrichment, locking, post_index) stays on the calling thread
+    since the adapter's session must not be shared across threads. Only the vector DB
+    writes are handed off to the write workers. The document lock is taken before the
+    first write and held until all sub-batches are written and finalized."""
+    sub_batches = batch_list(context.updatable_docs, INDEXING_PIPELINE_SUB_BATCH_SIZE)
+    logger.debug(
+        f"Starting streaming indexing: docs={len(context.updatable_docs)} "
+        f"sub_batches={len(sub_batches)} "
+        f"embed_workers={INDEXING_PIPELINE_EMBED_WORKERS} "
+        f"write_workers={INDEXING_PIPELINE_WRITE_WORKERS}"
+    )
+
+    def _chunk_stage(docs: list[Document]) -> _ChunkedSubBatch:
+        indexable_docs = process_image_sections(docs)
+        return _ChunkedSubBatch(
+            indexable_docs=indexable_docs,
+            chunks=_chunk_documents(
+                indexable_docs=indexable_docs,
+                chunker=chunker,
+                llm=llm,
+                llm_tokenizer=llm_tokenizer,
+            ),
+        )
+
+    def _embed_stage(sub_batch: _ChunkedSubBatch) -> _EmbeddedSubBatch:
+        chunks_with_embeddings, embedding_failures = (
+            embed_chunks_with_failure_handling(
+                chunks=sub_batch.chunks,
+                embedder=embedder,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+            if sub_batch.chunks
+            else ([], [])
+        )
+        return _EmbeddedSubBatch(
+            indexable_docs=sub_batch.indexable_docs,
+            chunks_with_embeddings=chunks_with_embeddings,
+            embedding_failures=embedding_failures,
+        )
+
+    def _write_stage(
+        result: BuildMetadataAwareChunksResult,
+    ) -> tuple[list[DocumentInsertionRecord], list[ConnectorFailure]]:
+        # A document is never spread across sub-batches, so the chunks in this
+        # result fully represent all of their documents
+        return write_chunks_to_vector_db_with_backoff(
+            document_index=document_index,
+            chunks=result.chunks,
+            index_batch_params=IndexBatchParams(
+                doc_id_to_previous_chunk_cnt=result.doc_id_to_previous_chunk_cnt,
+                doc_id_to_new_chunk_cnt=result.doc_id_to_new_chunk_cnt,
+                tenant_id=tenant_id,
+                large_chunks_enabled=chunker.enable_large_chunks,
+            ),
+        )
+
+    pipeline = run_pipelined_stages(
+        items=sub_batches,
+        stages=[
+            PipelineStage(name="chunk", func=_chunk_stage),
+            PipelineStage(
+                name="embed",
+                func=_embed_stage,
+                num_workers=INDEXING_PIPELINE_EMBED_WORKERS,
+            ),
+        ],
+        max_queue_size=INDEXING_PIPELINE_QUEUE_SIZE,
+    )
+
+    updatable_ids = [doc.id for doc in context.updatable_docs]
+    indexable_docs: list[IndexingDocument] = []
+    chunks_with_embeddings: list[IndexChunk] = []
+    embedding_failures: list[ConnectorFailure] = []
+    metadata_results: list[BuildMetadataAwareChunksResult] = []
+    insertion_records: list[DocumentInsertionRecord] = []
+    vector_db_write_failures: list[ConnectorFailure] = []
+
+    def _collect_write(
+        future: Future[tuple[list[DocumentInsertionRecord], list[ConnectorFailure]]],
+    ) -> None:
+        records, failures = future.result()
+        insertion_records.extend(records)
+        vector_db_write_failures.extend(failures)
+
+    # NOTE: explicitly close the pipeline so that its worker threads are stopped
+    # right away if anything below fails
+    with (
+        closing(pipeline) as embedded_sub_batches,
+        ExitStack() as lock_stack,
+        ThreadPoolExecutor(
+            max_workers=INDEXING_PIPELINE_WRITE_WORKERS
+        ) as write_executor,
+    ):
+        pending_writes: list[
+            Future[tuple[list[DocumentInsertionRecord], list[ConnectorFailure]]]
+        ] = []
+        locked = False
+        for embedded in embedded_sub_batches:
+            # Only acquire the lock once the first sub-batch is ready to be written,
+            # same as the non-streaming path
+            if not locked:
+                lock_stack.enter_context(adapter.lock_context(context.updatable_docs))
+                locked = True
+
+            indexable_docs.extend(embedded.indexable_docs)
+            chunks_with_embeddings.extend(embedded.chunks_with_embeddings)
+            embedding_failures.extend(embedded.embedding_failures)
+
+            sub_context = DocumentBatchPrepareContext(
+                updatable_docs=embedded.indexable_docs,
+                id_to_boost_map=context.id_to_boost_map,
+                indexable_docs=embedded.indexable_docs,
+            )
+            result = adapter.build_metadata_aware_chunks(
+                chunks_with_embeddings=embedded.chunks_with_embeddings,
+                chunk_content_scores=[1.0] * len(embedded.chunks_with_embeddings),
+                tenant_id=tenant_id,
+                context=sub_context,
+            )
+            metadata_results.append(result)
+
+            # backpressure: don't pull more embedded sub-batches off the queue
+            # while all write workers are busy
+            while len(pending_writes) >= INDEXING_PIPELINE_WRITE_WORKERS:
+                done, _ = wait(pending_writes, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending_writes.remove(future)
+                    _collect_write(future)
+
+            pending_writes.append(
+                write_executor.submit(
+                    contextvars.copy_context().run, _write_stage, result
+                )
+            )
+
+        for future in pending_writes:
+            _collect_write(future)
+
+        if not locked:
+            lock_stack.enter_context(adapter.lock_context(context.updatable_docs))
+
+        _verify_all_docs_returned(
+            updatable_ids=updatable_ids,
+            insertion_records=insertion_records,
+            failures=vector_db_write_failures + embedding_failures,
+        )
+
+        context.indexable_docs = indexable_docs
+        adapter.post_index(
+            context=context,
+            updatable_chunk_data=[
+                UpdatableChunkData(
+                    chunk_id=chunk.chunk_id,
+                    document_id=chunk.source_document.id,
+                    boost_score=1.0,
+                )
+                for chunk in chunks_with_embeddings
+            ],
+            filtered_documents=filtered_documents,
+            result=_merge_metadata_aware_chunks_results(metadata_results),
+        )
+
+    return IndexingPipelineResult(
+        new_docs=len([r for r in insertion_records if not r.already_existed]),
+        total_docs=len(filtered_documents),
+        total_chunks=len(chunks_with_embeddings),
+        failures=vector_db_write_failures + embedding_failures,
+    )
+
+
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -663,6 +1211,31 @@ def index_doc_batch(
             failures=[],
         )
 
+    llm_tokenizer: BaseTokenizer | None = None
+    if enable_contextual_rag:
+        assert llm is not None, "must provide an LLM for contextual RAG"
+        llm_tokenizer = get_tokenizer(
+            model_name=llm.config.model_name,
+            provider_type=llm.config.model_provider,
+        )
+
+    if (
+        INDEXING_PIPELINE_STREAMING_ENABLED
+        and len(context.updatable_docs) > INDEXING_PIPELINE_SUB_BATCH_SIZE
+    ):
+        return _index_doc_batch_streaming(
+            context=context,
+            filtered_documents=filtered_documents,
+            chunker=chunker,
+            embedder=embedder,
+            document_index=document_index,
+            request_id=request_id,
+            tenant_id=tenant_id,
+            adapter=adapter,
+            llm=llm if enable_contextual_rag else None,
+            llm_tokenizer=llm_tokenizer,
+        )
+
     # Convert documents to IndexingDocument objects with processed section
     # logger.debug("Processing image sections")
     context.indexable_docs = process_image_sections(context.updatable_docs)
@@ -677,27 +1250,12 @@ def index_doc_batch(
     logger.debug(f"Starting indexing process for documents: {doc_descriptors}")
 
     logger.debug("Starting chunking")
-    # NOTE: no special handling for failures here, since the chunker is not
-    # a common source of failure for the indexing pipeline
-    chunks: list[DocAwareChunk] = chunker.chunk(context.indexable_docs)
-    llm_tokenizer: BaseTokenizer | None = None
-
-    # contextual RAG
-    if enable_contextual_rag:
-        assert llm is not None, "must provide an LLM for contextual RAG"
-        llm_tokenizer = get_tokenizer(
-            model_name=llm.config.model_name,
-            provider_type=llm.config.model_provider,
-        )
-
-        # Because the chunker's tokens are different from the LLM's tokens,
-        # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
-        chunks = add_contextual_summaries(
-            chunks=chunks,
-            llm=llm,
-            tokenizer=llm_tokenizer,
-            chunk_token_limit=chunker.chunk_token_limit * 2,
-        )
+    chunks = _chunk_documents(
+        indexable_docs=context.indexable_docs,
+        chunker=chunker,
+        llm=llm if enable_contextual_rag else None,
+        llm_tokenizer=llm_tokenizer,
+    )
 
     logger.debug("Starting embedding")
     chunks_with_embeddings, embedding_failures = (
@@ -760,30 +1318,11 @@ def index_doc_batch(
             ),
         )
 
-        all_returned_doc_ids = (
-            {record.document_id for record in insertion_records}
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in vector_db_write_failures
-                    if record.failed_document
-                }
-            )
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in embedding_failures
-                    if record.failed_document
-                }
-            )
+        _verify_all_docs_returned(
+            updatable_ids=updatable_ids,
+            insertion_records=insertion_records,
+            failures=vector_db_write_failures + embedding_failures,
         )
-        if all_returned_doc_ids != set(updatable_ids):
-            raise RuntimeError(
-                f"Some documents were not successfully indexed. "
-                f"Updatable IDs: {updatable_ids}, "
-                f"Returned IDs: {all_returned_doc_ids}. "
-                "This should never happen."
-            )
 
         adapter.post_index(
             context=context,
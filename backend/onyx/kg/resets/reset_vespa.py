@@ -59,8 +59,7 @@ def _reset_vespa_for_doc(document_id: str, tenant_id: str, index_name: str) -> N
             )
         )
 
-    with vespa_index.httpx_client_context as httpx_client:
-        vespa_index._apply_kg_chunk_updates_batched(vespa_requests, httpx_client)
+    vespa_index._apply_kg_chunk_updates_batched(vespa_requests)
 
 
 def reset_vespa_kg_index(
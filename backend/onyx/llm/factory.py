@@ -379,6 +379,12 @@ def get_llm_tokenizer_encode_func(llm: LLM) -> Callable[[str], list[int]]:
     return llm_tokenizer.encode
 
 
+def get_llm_tokenizer_key(llm: LLM) -> str:
+    """Identifies the tokenizer used by `get_llm_token_counter`, used to key the token
+    counts that are persisted with chat messages."""
+    return f"{llm.config.model_provider}/{llm.config.model_name}"
+
+
 def get_llm_token_counter(llm: LLM) -> Callable[[str], int]:
     tokenizer_encode_func = get_llm_tokenizer_encode_func(llm)
     return lambda text: len(tokenizer_encode_func(text))
@@ -23,10 +23,12 @@ from httpx import HTTPError
 from requests import JSONDecodeError
 from requests import RequestException
 from requests import Response
+from requests.adapters import HTTPAdapter
 from retry import retry
 
 from onyx.configs.app_configs import INDEXING_EMBEDDING_MODEL_NUM_THREADS
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
+from onyx.configs.app_configs import MODEL_SERVER_HTTP_POOL_SIZE
 from onyx.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
 from onyx.configs.model_configs import (
     BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
@@ -59,6 +61,9 @@ from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
 from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import Embedding
+from shared_configs.model_server_models import EMBEDDINGS_BINARY_CONTENT_TYPE
+from shared_configs.model_server_models import EMBEDDINGS_COUNT_HEADER
+from shared_configs.model_server_models import EMBEDDINGS_DIM_HEADER
 from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
 from shared_configs.model_server_models import IntentRequest
@@ -66,6 +71,7 @@ from shared_configs.model_server_models import IntentResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
 from shared_configs.utils import batch_list
+from shared_configs.utils import embeddings_from_bytes
 
 logger = setup_logger()
 
@@ -172,6 +178,31 @@ def _cleanup_thread_local(func: Callable) -> Callable:
     return wrapper
 
 
+# Process-wide session so model server calls reuse keep-alive connections instead of
+# opening a new TCP connection per batch. Keyed by pid since celery workers fork
+_model_server_session: requests.Session | None = None
+_model_server_session_pid: int | None = None
+_model_server_session_lock = threading.Lock()
+
+
+def get_model_server_session() -> requests.Session:
+    """Returns the pooled session used for all calls to the model server."""
+    global _model_server_session, _model_server_session_pid
+
+    with _model_server_session_lock:
+        if _model_server_session is None or _model_server_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=MODEL_SERVER_HTTP_POOL_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _model_server_session = session
+            _model_server_session_pid = os.getpid()
+        return _model_server_session
+
+
 WARM_UP_STRINGS = [
     "Onyx is amazing!",
     "Check out our easy deployment guide at",
@@ -656,6 +687,20 @@ async def litellm_rerank(
         ]
 
 
+def _parse_model_server_embed_response(response: Response) -> EmbedResponse:
+    content_type = response.headers.get("Content-Type", "")
+    if not content_type.startswith(EMBEDDINGS_BINARY_CONTENT_TYPE):
+        return EmbedResponse(**response.json())
+
+    embeddings = embeddings_from_bytes(
+        response.content,
+        count=int(response.headers[EMBEDDINGS_COUNT_HEADER]),
+        dim=int(response.headers[EMBEDDINGS_DIM_HEADER]),
+    )
+    # the shape was validated while decoding, no need to re-validate every float
+    return EmbedResponse.model_construct(embeddings=embeddings.tolist())
+
+
 class EmbeddingModel:
     def __init__(
         self,
@@ -788,7 +833,12 @@ class EmbeddingModel:
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
-            response = requests.post(
+            # prefer the raw float32 format, older model servers will ignore this
+            headers["Accept"] = (
+                f"{EMBEDDINGS_BINARY_CONTENT_TYPE}, application/json;q=0.9"
+            )
+
+            response = get_model_server_session().post(
                 endpoint,
                 headers=headers,
                 json=embed_request.model_dump(),
@@ -819,7 +869,7 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
-            return EmbedResponse(**response.json())
+            return _parse_model_server_embed_response(response)
         except requests.HTTPError as e:
             if not response:
                 raise HTTPError("HTTP error occurred - response is None.") from e
@@ -1119,7 +1169,7 @@ class RerankingModel:
                 api_url=self.api_url,
             )
 
-            response = requests.post(
+            response = get_model_server_session().post(
                 self.rerank_server_endpoint, json=rerank_request.model_dump()
             )
             response.raise_for_status()
@@ -1152,7 +1202,7 @@ class QueryAnalysisModel:
             semantic_percent_threshold=self.semantic_percent_threshold,
         )
 
-        response = requests.post(
+        response = get_model_server_session().post(
             self.intent_server_endpoint, json=intent_request.model_dump()
         )
         response.raise_for_status()
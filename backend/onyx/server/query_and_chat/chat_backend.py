@@ -22,6 +22,7 @@ from onyx.auth.users import current_chat_accessible_user
 from onyx.auth.users import current_user
 from onyx.chat.chat_processing_checker import is_chat_session_processing
 from onyx.chat.chat_state import ChatStateContainer
+from onyx.chat.chat_state import stream_chat_async
 from onyx.chat.chat_utils import convert_chat_history_basic
 from onyx.chat.chat_utils import create_chat_history_chain
 from onyx.chat.chat_utils import create_chat_session_from_request
@@ -112,6 +113,10 @@ logger = setup_logger()
 router = APIRouter(prefix="/chat")
 
 
+def _packet_to_json_line(packet: Packet) -> str:
+    return get_json_line(packet.model_dump())
+
+
 def _get_available_tokens_for_persona(
     persona: Persona,
     db_session: Session,
@@ -527,7 +532,10 @@ def handle_new_chat_message(
         finally:
             logger.debug("Stream generator finished")
 
-    return StreamingResponse(stream_generator(), media_type="text/event-stream")
+    return StreamingResponse(
+        stream_chat_async(stream_generator, _packet_to_json_line),
+        media_type="text/event-stream",
+    )
 
 
 @router.post("/send-chat-message", response_model=None, tags=PUBLIC_API_TAGS)
@@ -630,7 +638,10 @@ def handle_send_chat_message(
         finally:
             logger.debug("Stream generator finished")
 
-    return StreamingResponse(stream_generator(), media_type="text/event-stream")
+    return StreamingResponse(
+        stream_chat_async(stream_generator, _packet_to_json_line),
+        media_type="text/event-stream",
+    )
 
 
 @router.put("/set-message-as-latest")
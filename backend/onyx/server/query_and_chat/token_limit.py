@@ -1,12 +1,15 @@
+from collections.abc import Callable
 from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 from functools import lru_cache
+from uuid import UUID
 
 from dateutil import tz
 from fastapi import Depends
 from fastapi import HTTPException
+from redis import Redis
 from sqlalchemy import func
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -18,8 +21,10 @@ from onyx.db.models import ChatSession
 from onyx.db.models import TokenRateLimit
 from onyx.db.models import User
 from onyx.db.token_limit import fetch_all_global_token_rate_limits
+from onyx.redis.redis_pool import get_redis_client
 from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_versioned_implementation
+from shared_configs.contextvars import get_current_tenant_id
 
 
 logger = setup_logger()
@@ -27,6 +32,18 @@ logger = setup_logger()
 
 TOKEN_BUDGET_UNIT = 1_000
 
+# Usage is counted in Redis hashes with one field per bucket, mirroring the per-minute
+# grouping that the SQL reconciliation queries use
+TOKEN_USAGE_BUCKET_SECONDS = 60
+GLOBAL_TOKEN_USAGE_SCOPE = "global"
+
+_TOKEN_USAGE_KEY_PREFIX = "token_usage"
+# hash field holding the bucket start from which the counters are known to be complete
+_TOKEN_USAGE_COVERED_FROM_FIELD = "covered_from"
+# only applies to counters that no rate limit check has looked at yet
+_TOKEN_USAGE_DEFAULT_TTL_SECONDS = 24 * 60 * 60
+_TOKEN_USAGE_RECONCILE_LOCK_TIMEOUT = 60
+
 
 def check_token_rate_limits(
     user: User | None = Depends(current_chat_accessible_user),
@@ -46,6 +63,36 @@ def _check_token_rate_limits(_: User | None) -> None:
     _user_is_rate_limited_by_global()
 
 
+def record_token_usage(
+    user_id: UUID | None, token_count: int, db_session: Session
+) -> None:
+    """Adds the tokens of a saved chat message to the Redis usage counters of every
+    scope (global, user, user group) the message counts against."""
+    if token_count <= 0 or not any_rate_limit_exists():
+        return
+
+    get_token_usage_scopes = fetch_versioned_implementation(
+        "onyx.server.query_and_chat.token_limit", _get_token_usage_scopes.__name__
+    )
+    scopes: list[str] = get_token_usage_scopes(user_id, db_session)
+    bucket = str(_get_bucket_start(datetime.now(tz=timezone.utc)))
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for scope in scopes:
+            key = _get_token_usage_key(scope)
+            pipe.hincrby(key, bucket, token_count)
+            pipe.expire(key, _TOKEN_USAGE_DEFAULT_TTL_SECONDS, nx=True)
+        pipe.execute()
+    except Exception:
+        # the message is saved either way, the counters catch up on reconciliation
+        logger.exception("Failed to record token usage in Redis")
+
+
+def _get_token_usage_scopes(_: UUID | None, __: Session) -> list[str]:
+    return [GLOBAL_TOKEN_USAGE_SCOPE]
+
+
 """
 Global rate limits
 """
@@ -58,8 +105,11 @@ def _user_is_rate_limited_by_global() -> None:
         )
 
         if global_rate_limits:
-            global_cutoff_time = _get_cutoff_time(global_rate_limits)
-            global_usage = _fetch_global_usage(global_cutoff_time, db_session)
+            global_usage = fetch_token_usage(
+                GLOBAL_TOKEN_USAGE_SCOPE,
+                global_rate_limits,
+                lambda cutoff_time: _fetch_global_usage(cutoff_time, db_session),
+            )
 
             if _is_rate_limited(global_rate_limits, global_usage):
                 raise HTTPException(
@@ -99,6 +149,108 @@ def _get_cutoff_time(rate_limits: Sequence[TokenRateLimit]) -> datetime:
     return datetime.now(tz=timezone.utc) - timedelta(hours=max_period_hours)
 
 
+def fetch_token_usage(
+    scope: str,
+    rate_limits: Sequence[TokenRateLimit],
+    fetch_usage_from_db: Callable[[datetime], Sequence[tuple[datetime, int]]],
+) -> Sequence[tuple[datetime, int]]:
+    """
+    Fetch the usage of a scope over the longest rate limit period from its Redis
+    counters, grouped by bucket. The counters are (re)built from Postgres through
+    `fetch_usage_from_db` when they are missing or don't reach back far enough, and
+    Postgres is used directly if Redis is unavailable.
+    """
+    cutoff_bucket = _get_bucket_start(_get_cutoff_time(rate_limits))
+    ttl_seconds = (
+        max(rate_limit.period_hours for rate_limit in rate_limits) * 60 * 60
+        + TOKEN_USAGE_BUCKET_SECONDS
+    )
+    key = _get_token_usage_key(scope)
+
+    try:
+        redis_client = get_redis_client()
+        buckets: dict[bytes, bytes] = redis_client.hgetall(key)  # type: ignore
+
+        covered_from = buckets.pop(_TOKEN_USAGE_COVERED_FROM_FIELD.encode(), None)
+        if covered_from is None or int(covered_from) > cutoff_bucket:
+            return _reconcile_token_usage(
+                redis_client, key, cutoff_bucket, ttl_seconds, fetch_usage_from_db
+            )
+
+        usage: list[tuple[datetime, int]] = []
+        expired_buckets: list[str] = []
+        for bucket, token_count in buckets.items():
+            if int(bucket) < cutoff_bucket:
+                expired_buckets.append(bucket.decode())
+            else:
+                bucket_start = datetime.fromtimestamp(int(bucket), tz=timezone.utc)
+                usage.append((bucket_start, int(token_count)))
+
+        pipe = redis_client.pipeline(transaction=False)
+        if expired_buckets:
+            pipe.hdel(key, *expired_buckets)
+            pipe.hset(key, _TOKEN_USAGE_COVERED_FROM_FIELD, str(cutoff_bucket))
+        pipe.expire(key, ttl_seconds)
+        pipe.execute()
+        return usage
+    except Exception:
+        logger.exception(f"Failed to fetch token usage for {scope} from Redis")
+        return fetch_usage_from_db(
+            datetime.fromtimestamp(cutoff_bucket, tz=timezone.utc)
+        )
+
+
+def _reconcile_token_usage(
+    redis_client: Redis,
+    key: str,
+    cutoff_bucket: int,
+    ttl_seconds: int,
+    fetch_usage_from_db: Callable[[datetime], Sequence[tuple[datetime, int]]],
+) -> Sequence[tuple[datetime, int]]:
+    """Replaces the counters of a scope with the usage stored in Postgres. Only runs
+    on a cold start, so the few messages saved concurrently are not worth locking
+    chat saving over."""
+    usage = fetch_usage_from_db(datetime.fromtimestamp(cutoff_bucket, tz=timezone.utc))
+
+    lock = redis_client.lock(
+        f"{key}:reconcile", timeout=_TOKEN_USAGE_RECONCILE_LOCK_TIMEOUT
+    )
+    # another request is already rebuilding the counters
+    if not lock.acquire(blocking=False):
+        return usage
+
+    try:
+        buckets: dict[str, int] = {}
+        for time_sent, token_count in usage:
+            bucket = str(_get_bucket_start(time_sent))
+            buckets[bucket] = buckets.get(bucket, 0) + int(token_count or 0)
+
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={**buckets, _TOKEN_USAGE_COVERED_FROM_FIELD: cutoff_bucket},
+        )
+        pipe.expire(key, ttl_seconds)
+        pipe.execute()
+    finally:
+        if lock.owned():
+            lock.release()
+
+    return usage
+
+
+def _get_token_usage_key(scope: str) -> str:
+    # pipelines bypass the tenant prefixing of the redis client, so the tenant is
+    # part of the key itself
+    return f"{_TOKEN_USAGE_KEY_PREFIX}:{get_current_tenant_id()}:{scope}"
+
+
+def _get_bucket_start(time: datetime) -> int:
+    timestamp = int(time.timestamp())
+    return timestamp - timestamp % TOKEN_USAGE_BUCKET_SECONDS
+
+
 def _is_rate_limited(
     rate_limits: Sequence[TokenRateLimit], usage: Sequence[tuple[datetime, int]]
 ) -> bool:
@@ -56,6 +56,7 @@ from onyx.context.search.models import SearchDocsResponse
 from onyx.context.search.pipeline import merge_individual_chunks
 from onyx.context.search.pipeline import search_pipeline
 from onyx.context.search.utils import convert_inference_sections_to_search_docs
+from onyx.context.search.utils import get_query_embeddings
 from onyx.db.connector import check_connectors_exist
 from onyx.db.connector import check_federated_connectors_exist
 from onyx.db.federated import (
@@ -114,6 +115,7 @@ from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
 from onyx.utils.url import extract_urls_from_text
 from shared_configs.configs import DOC_EMBEDDING_CONTEXT_SIZE
+from shared_configs.model_server_models import Embedding
 
 # Import for URL crawling functionality
 from onyx.tools.tool_implementations.web_search.providers import (
@@ -426,11 +428,32 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
         finally:
             db_session.close()
 
+    def _embed_queries(self, queries: list[str]) -> dict[str, Embedding]:
+        """Embed all of a turn's queries with a single call to the embedding model.
+
+        Args:
+            queries: The search query strings
+
+        Returns:
+            Mapping from each query to its embedding
+        """
+        if not queries:
+            return {}
+
+        embed_db_session = self._get_thread_safe_session()
+        try:
+            embeddings = get_query_embeddings(queries, embed_db_session)
+        finally:
+            embed_db_session.close()
+
+        return dict(zip(queries, embeddings))
+
     def _run_search_for_query(
         self,
         query: str,
         hybrid_alpha: float | None,
         num_hits: int,
+        query_embedding: Embedding | None = None,
     ) -> list[InferenceChunk]:
         """Run search pipeline for a single query.
 
@@ -438,6 +461,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
             query: The search query string
             hybrid_alpha: Hybrid search alpha parameter (None for default)
             num_hits: Maximum number of hits to return
+            query_embedding: Precomputed embedding of the query, if available
 
         Returns:
             List of InferenceChunk results
@@ -456,6 +480,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                     ),
                     bypass_acl=self.bypass_acl,
                     limit=num_hits,
+                    query_embedding=query_embedding,
                 ),
                 project_id=self.project_id,
                 document_index=self.document_index,
@@ -727,6 +752,18 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 )
             )
 
+            # Embed every query up front in one batch rather than having each of the
+            # parallel searches below make its own round-trip to the embedding model
+            query_embeddings = self._embed_queries(
+                list(
+                    dict.fromkeys(
+                        query
+                        for query, _ in deduplicated_semantic_queries
+                        + deduplicated_keyword_queries
+                    )
+                )
+            )
+
             # Run all searches in parallel with appropriate hybrid_alpha values
             # Keyword queries use hybrid_alpha=0.2 (favor keyword search)
             # Other queries use default hybrid_alpha (balanced semantic/keyword)
@@ -738,7 +775,12 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 search_functions.append(
                     (
                         self._run_search_for_query,
-                        (query, None, override_kwargs.num_hits),
+                        (
+                            query,
+                            None,
+                            override_kwargs.num_hits,
+                            query_embeddings[query],
+                        ),
                     )
                 )
                 search_weights.append(weight)
@@ -748,7 +790,12 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 search_functions.append(
                     (
                         self._run_search_for_query,
-                        (query, KEYWORD_QUERY_HYBRID_ALPHA, override_kwargs.num_hits),
+                        (
+                            query,
+                            KEYWORD_QUERY_HYBRID_ALPHA,
+                            override_kwargs.num_hits,
+                            query_embeddings[query],
+                        ),
                     )
                 )
                 search_weights.append(weight)
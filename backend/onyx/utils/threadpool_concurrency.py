@@ -3,10 +3,12 @@ import collections.abc
 import concurrent
 import contextvars
 import copy
+import queue
 import threading
 import uuid
 from collections.abc import Awaitable
 from collections.abc import Callable
+from collections.abc import Generator
 from collections.abc import Iterator
 from collections.abc import MutableMapping
 from collections.abc import Sequence
@@ -479,3 +481,149 @@ def parallel_yield_from_funcs(
     yield from parallel_yield(
         [func_wrapper(func) for func in funcs], max_workers=max_workers
     )
+
+
+class PipelineStage:
+    """
+    A single stage of run_pipelined_stages. `func` is applied to every item that
+    reaches this stage, using `num_workers` threads.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], num_workers: int = 1):
+        if num_workers < 1:
+            raise ValueError(f"Stage {name} must have at least one worker")
+        self.name = name
+        self.func = func
+        self.num_workers = num_workers
+
+
+_PIPELINE_SENTINEL = object()
+# how often blocked workers wake up to check whether the pipeline was aborted
+_PIPELINE_POLL_INTERVAL = 0.1
+
+
+def run_pipelined_stages(
+    items: Iterator[Any] | Sequence[Any],
+    stages: Sequence[PipelineStage],
+    max_queue_size: int = 1,
+) -> Generator[Any, None, None]:
+    """
+    Streams items through a series of stages connected by bounded queues, so that
+    different items can be in different stages at the same time (e.g. item N+1 is
+    being processed by stage 1 while item N is processed by stage 2). The outputs
+    of the final stage are yielded on the calling thread in completion order.
+
+    Backpressure: each queue holds at most `max_queue_size` items, so a slow stage
+    (or a slow consumer of the returned iterator) blocks the stages upstream of it
+    instead of letting work pile up in memory.
+
+    If any stage raises, the pipeline is aborted and the first exception is
+    re-raised in the calling thread. Contextvars (e.g. tenant id) are propagated
+    to every worker thread. Stopping the returned iterator early also aborts the
+    pipeline; it is then up to the caller to deal with partially processed items.
+    """
+    if not stages:
+        yield from items
+        return
+
+    queues: list[queue.Queue[Any]] = [
+        queue.Queue(maxsize=max(max_queue_size, 1)) for _ in range(len(stages) + 1)
+    ]
+    abort = threading.Event()
+    errors: list[BaseException] = []
+    errors_lock = threading.Lock()
+    # number of workers still running in each stage, used to decide which worker
+    # is responsible for telling the next stage that no more items are coming
+    remaining_workers = [stage.num_workers for stage in stages]
+
+    def _fail(e: BaseException) -> None:
+        with errors_lock:
+            errors.append(e)
+        abort.set()
+
+    def _put(q: queue.Queue[Any], item: Any) -> bool:
+        while not abort.is_set():
+            try:
+                q.put(item, timeout=_PIPELINE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(q: queue.Queue[Any]) -> Any:
+        while not abort.is_set():
+            try:
+                return q.get(timeout=_PIPELINE_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _PIPELINE_SENTINEL
+
+    def _feed() -> None:
+        try:
+            for item in items:
+                if not _put(queues[0], item):
+                    return
+        except BaseException as e:
+            _fail(e)
+            return
+        for _ in range(stages[0].num_workers):
+            _put(queues[0], _PIPELINE_SENTINEL)
+
+    def _work(stage_idx: int) -> None:
+        stage = stages[stage_idx]
+        in_queue = queues[stage_idx]
+        out_queue = queues[stage_idx + 1]
+        try:
+            while True:
+                item = _get(in_queue)
+                if item is _PIPELINE_SENTINEL:
+                    break
+                if not _put(out_queue, stage.func(item)):
+                    return
+        except BaseException as e:
+            logger.exception(f"Pipeline stage '{stage.name}' failed")
+            _fail(e)
+            return
+
+        with errors_lock:
+            remaining_workers[stage_idx] -= 1
+            is_last_worker = remaining_workers[stage_idx] == 0
+        if is_last_worker:
+            num_downstream = (
+                stages[stage_idx + 1].num_workers if stage_idx + 1 < len(stages) else 1
+            )
+            for _ in range(num_downstream):
+                _put(out_queue, _PIPELINE_SENTINEL)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(_feed,), daemon=True
+        )
+    ]
+    for stage_idx, stage in enumerate(stages):
+        for worker_idx in range(stage.num_workers):
+            threads.append(
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(_work, stage_idx),
+                    name=f"pipeline-{stage.name}-{worker_idx}",
+                    daemon=True,
+                )
+            )
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            result = _get(queues[-1])
+            if result is _PIPELINE_SENTINEL:
+                break
+            yield result
+    finally:
+        abort.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,175 @@
+"""
+CPU benchmark for Chunker.chunk.
+
+Chunks a large synthetic corpus (documents with a mix of long and short sections)
+with the default tokenizer and reports the chunking throughput together with how
+much text was passed to the tokenizer relative to the size of the corpus. Sections
+are tokenized once, so the tokenized / corpus ratio should stay around 2 (each
+sentence and each piece of a section) regardless of multipass.
+
+If the default tokenizer can't be loaded (e.g. without access to Hugging Face), a
+local whitespace tokenizer is used instead, pass --local-tokenizer to skip trying.
+
+Usage:
+    python -m scripts.chunker_benchmark --docs 500 --multipass
+"""
+
+import argparse
+import random
+import re
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import IndexingDocument
+from onyx.connectors.models import Section
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+
+WORDS = [
+    "the",
+    "index",
+    "returns",
+    "relevant",
+    "documents",
+    "for",
+    "each",
+    "query",
+    "connector",
+    "permissions",
+    "are",
+    "synced",
+    "every",
+    "hour",
+]
+
+
+class _LocalTokenizer(BaseTokenizer):
+    """Splits on whitespace, each token keeps its surrounding whitespace so that
+    decode is the inverse of encode."""
+
+    _TOKEN_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+    def __init__(self) -> None:
+        self._vocab: list[str] = []
+        self._token_ids: dict[str, int] = {}
+
+    def tokenize(self, string: str) -> list[str]:
+        return self._TOKEN_PATTERN.findall(string)
+
+    def encode(self, string: str) -> list[int]:
+        token_ids = []
+        for token in self.tokenize(string):
+            if token not in self._token_ids:
+                self._token_ids[token] = len(self._vocab)
+                self._vocab.append(token)
+            token_ids.append(self._token_ids[token])
+        return token_ids
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self._vocab[token] for token in tokens)
+
+
+def _load_tokenizer(local: bool) -> BaseTokenizer:
+    if not local:
+        try:
+            return get_tokenizer(model_name=None, provider_type=None)
+        except Exception as e:
+            print(f"Default tokenizer not available ({e}), using a local tokenizer")
+    return _LocalTokenizer()
+
+
+class _CountingTokenizer(BaseTokenizer):
+    def __init__(self, tokenizer: BaseTokenizer) -> None:
+        self.tokenizer = tokenizer
+        self.encoded_chars = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.encoded_chars += len(string)
+        return self.tokenizer.encode(string)
+
+    def tokenize(self, string: str) -> list[str]:
+        self.encoded_chars += len(string)
+        return self.tokenizer.tokenize(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+
+def _generate_section(rng: random.Random, num_sentences: int) -> str:
+    sentences = []
+    for _ in range(num_sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 25))]
+        sentences.append(" ".join(words).capitalize() + rng.choice([". ", "? ", "\n"]))
+    return "".join(sentences)
+
+
+def _generate_documents(num_docs: int, seed: int = 0) -> list[IndexingDocument]:
+    """Documents with a few short sections (e.g. page fragments) and the occasional
+    long one (e.g. a full page) that has to be split."""
+    rng = random.Random(seed)
+    documents = []
+    for doc_num in range(num_docs):
+        texts = [
+            _generate_section(rng, rng.choice([1, 2, 3, 5, 10, 40, 150]))
+            for _ in range(rng.randint(1, 12))
+        ]
+        document = Document(
+            id=f"doc_{doc_num}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Document {doc_num}",
+            metadata={"tags": ["tag1", "tag2"]},
+            sections=[
+                TextSection(text=text, link=f"link{i}") for i, text in enumerate(texts)
+            ],
+        )
+        documents.append(
+            IndexingDocument(
+                **dict(document),
+                processed_sections=[
+                    Section(text=text, link=f"link{i}") for i, text in enumerate(texts)
+                ],
+            )
+        )
+    return documents
+
+
+def run_benchmark(
+    num_docs: int, enable_multipass: bool, local_tokenizer: bool = False
+) -> None:
+    documents = _generate_documents(num_docs)
+    corpus_chars = sum(
+        len(section.text or "")
+        for document in documents
+        for section in document.processed_sections
+    )
+
+    tokenizer = _CountingTokenizer(_load_tokenizer(local_tokenizer))
+    chunker = Chunker(
+        tokenizer=tokenizer,
+        enable_multipass=enable_multipass,
+        enable_large_chunks=enable_multipass,
+    )
+
+    start = time.perf_counter()
+    chunks = chunker.chunk(documents)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"multipass={enable_multipass} docs={num_docs} chunks={len(chunks)} "
+        f"corpus={corpus_chars / 1_000_000:.1f}M chars "
+        f"time={elapsed:.2f}s docs/s={num_docs / elapsed:.0f} "
+        f"tokenized/corpus={tokenizer.encoded_chars / corpus_chars:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--multipass", action="store_true")
+    parser.add_argument("--local-tokenizer", action="store_true")
+    args = parser.parse_args()
+
+    run_benchmark(args.docs, args.multipass, args.local_tokenizer)
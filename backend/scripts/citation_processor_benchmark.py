@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for DynamicCitationProcessor.process_token.
+
+Streams synthetic answers with dense citations and a few code blocks through the
+processor and reports the time per token. With incremental processing the time per
+token should stay flat as answers get longer.
+
+Usage:
+    python -m scripts.citation_processor_benchmark --tokens 20000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from onyx.chat.citation_processor import CitationMode
+from onyx.chat.citation_processor import DynamicCitationProcessor
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import SearchDoc
+
+NUM_DOCS = 20
+WORDS = ["the", "result", "shows", "that", "search", "quality", "improved", "with"]
+
+
+def _make_search_doc(num: int) -> SearchDoc:
+    return SearchDoc(
+        document_id=f"doc_{num}",
+        chunk_ind=0,
+        semantic_identifier=f"Document {num}",
+        link=f"https://example.com/doc{num}",
+        blurb="blurb",
+        source_type=DocumentSource.WEB,
+        boost=1,
+        hidden=False,
+        metadata={},
+        score=None,
+        match_highlights=[],
+        updated_at=datetime.now(),
+    )
+
+
+def _generate_tokens(num_tokens: int, seed: int = 0) -> list[str]:
+    """Answer-like tokens with a citation roughly every 8 tokens (often split across
+    tokens like the LLM does) and a short code block every 500 tokens."""
+    rng = random.Random(seed)
+    tokens: list[str] = []
+    next_code_block = 500
+    while len(tokens) < num_tokens:
+        if len(tokens) >= next_code_block:
+            next_code_block += 500
+            tokens.extend(["```", "\nx = a[1]\n", "```", "\n"])
+        elif rng.random() < 0.125:
+            num = rng.randint(1, NUM_DOCS)
+            if rng.random() < 0.5:
+                tokens.extend([" [", str(num), "]"])
+            else:
+                tokens.append(f" [{num}]")
+        else:
+            tokens.append(" " + rng.choice(WORDS))
+    return tokens[:num_tokens]
+
+
+def run_benchmark(num_tokens: int, citation_mode: CitationMode) -> float:
+    """Returns the average time per token in microseconds."""
+    processor = DynamicCitationProcessor(citation_mode=citation_mode)
+    processor.update_citation_mapping(
+        {num: _make_search_doc(num) for num in range(1, NUM_DOCS + 1)}
+    )
+    tokens = _generate_tokens(num_tokens)
+
+    start = time.perf_counter()
+    for token in tokens:
+        for _ in processor.process_token(token):
+            pass
+    for _ in processor.process_token(None):
+        pass
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_tokens * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    for citation_mode in CitationMode:
+        for num_tokens in (args.tokens // 4, args.tokens // 2, args.tokens):
+            per_token_us = run_benchmark(num_tokens, citation_mode)
+            print(
+                f"mode={citation_mode.value} tokens={num_tokens} "
+                f"per_token={per_token_us:.2f}us"
+            )
@@ -61,6 +61,16 @@ DISABLE_RERANK_FOR_STREAMING = (
 # model. If torch finds more threads on its own, this value is not used.
 MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 
+# Concurrent bi-encoder requests for the same local model are coalesced into a single
+# encode call of up to this many texts. Requests wait at most the given number of
+# milliseconds for others to join the batch.
+MODEL_SERVER_EMBED_MAX_BATCH_SIZE = max(
+    int(os.environ.get("MODEL_SERVER_EMBED_MAX_BATCH_SIZE") or 64), 1
+)
+MODEL_SERVER_EMBED_MAX_BATCH_WAIT_MS = max(
+    float(os.environ.get("MODEL_SERVER_EMBED_MAX_BATCH_WAIT_MS") or 5), 0
+)
+
 # Model server that has indexing only set will throw exception if used for reranking
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
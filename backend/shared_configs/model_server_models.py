@@ -7,6 +7,14 @@ from shared_configs.enums import RerankerProvider
 
 Embedding = list[float]
 
+# Clients that send this content type in their Accept header get bi-encoder embeddings
+# back as a raw buffer of little-endian float32 values (row-major, one row per text)
+# instead of JSON. The shape is sent in the headers below. Servers that don't support
+# it ignore the Accept header and respond with JSON.
+EMBEDDINGS_BINARY_CONTENT_TYPE = "application/x-onyx-embeddings-f32"
+EMBEDDINGS_COUNT_HEADER = "X-Onyx-Embeddings-Count"
+EMBEDDINGS_DIM_HEADER = "X-Onyx-Embeddings-Dim"
+
 
 class EmbedRequest(BaseModel):
     texts: list[str]
@@ -1,5 +1,6 @@
 from typing import TypeVar
 
+import numpy as np
 
 T = TypeVar("T")
 
@@ -9,3 +10,18 @@ def batch_list(
     batch_size: int,
 ) -> list[list[T]]:
     return [lst[i : i + batch_size] for i in range(0, len(lst), batch_size)]
+
+
+def embeddings_to_bytes(embeddings: np.ndarray) -> bytes:
+    """Serializes a 2D array of embeddings to little-endian float32 bytes."""
+    return np.ascontiguousarray(embeddings, dtype="<f4").tobytes()
+
+
+def embeddings_from_bytes(payload: bytes, count: int, dim: int) -> np.ndarray:
+    """Inverse of `embeddings_to_bytes`, returns a read-only view over the payload."""
+    embeddings = np.frombuffer(payload, dtype="<f4")
+    if embeddings.size != count * dim:
+        raise ValueError(
+            f"Expected {count}x{dim} embeddings, got {embeddings.size} values"
+        )
+    return embeddings.reshape(count, dim)
@@ -49,6 +49,7 @@ def mock_nlp_embeddings_post() -> Iterator[None]:
         if "encoder/bi-encoder-embed" in url:
             num_texts = len(json.get("texts", [])) if json else 1
             resp.status_code = 200
+            resp.headers = {"Content-Type": "application/json"}
             resp.json.return_value = {"embeddings": [[0.0] * 768] * num_texts}
             resp.raise_for_status = MagicMock()
             return resp
@@ -58,8 +59,8 @@ def mock_nlp_embeddings_post() -> Iterator[None]:
         return resp
 
     with patch(
-        "onyx.natural_language_processing.search_nlp_models.requests.post",
-        side_effect=_mock_post,
+        "onyx.natural_language_processing.search_nlp_models.get_model_server_session",
+        return_value=MagicMock(post=MagicMock(side_effect=_mock_post)),
     ):
         yield
 
@@ -0,0 +1,136 @@
+"""
+Tests for the temp table that pruning stages connector document ids in.
+
+Runs under a tenant schema: sessions there translate unqualified tables to the
+tenant's schema, which Postgres does not allow temporary tables to be created in.
+"""
+
+from collections.abc import Generator
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import Column
+from sqlalchemy import insert
+from sqlalchemy import Integer
+from sqlalchemy import MetaData
+from sqlalchemy import String
+from sqlalchemy import Table
+from sqlalchemy import text
+from sqlalchemy.schema import CreateSchema
+from sqlalchemy.schema import DropSchema
+
+from onyx.db.document import create_source_document_id_staging_table__no_commit
+from onyx.db.document import drop_source_document_id_staging_table__no_commit
+from onyx.db.document import get_document_ids_missing_from_source
+from onyx.db.document import stage_source_document_ids__no_commit
+from onyx.db.engine.sql_engine import get_connection_bound_session_with_current_tenant
+from onyx.db.engine.sql_engine import get_sqlalchemy_engine
+from onyx.db.engine.sql_engine import SqlEngine
+from onyx.db.models import DocumentByConnectorCredentialPair
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+_CONNECTOR_ID = 1
+_CREDENTIAL_ID = 2
+
+
+@pytest.fixture
+def tenant_schema() -> Generator[str, None, None]:
+    SqlEngine.init_engine(pool_size=10, max_overflow=5)
+    tenant_id = f"tenant_{uuid4().hex[:8]}"
+
+    # only the table the anti-join reads, without the foreign keys to the rest of
+    # the tenant's tables
+    document_by_cc_pair = Table(
+        DocumentByConnectorCredentialPair.__tablename__,
+        MetaData(),
+        Column("id", String, primary_key=True),
+        Column("connector_id", Integer, primary_key=True),
+        Column("credential_id", Integer, primary_key=True),
+        schema=tenant_id,
+    )
+    with get_sqlalchemy_engine().begin() as connection:
+        connection.execute(CreateSchema(tenant_id))
+        document_by_cc_pair.create(connection)
+        connection.execute(
+            insert(document_by_cc_pair),
+            [
+                {
+                    "id": doc_id,
+                    "connector_id": connector_id,
+                    "credential_id": _CREDENTIAL_ID,
+                }
+                for doc_id, connector_id in [
+                    ("kept", _CONNECTOR_ID),
+                    ("it's gone", _CONNECTOR_ID),
+                    ("gone", _CONNECTOR_ID),
+                    ("other_cc_pair", _CONNECTOR_ID + 1),
+                ]
+            ],
+        )
+
+    token = CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+    try:
+        yield tenant_id
+    finally:
+        CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+        with get_sqlalchemy_engine().begin() as connection:
+            connection.execute(DropSchema(tenant_id, cascade=True))
+
+
+def test_missing_ids_are_found_from_batches_committed_under_a_tenant(
+    tenant_schema: str,
+) -> None:
+    with get_connection_bound_session_with_current_tenant() as db_session:
+        staging_table = create_source_document_id_staging_table__no_commit(db_session)
+        db_session.commit()
+
+        # the table and the staged ids survive the commit after every batch
+        for batch in [["kept", "new"], ["kept"], []]:
+            stage_source_document_ids__no_commit(db_session, staging_table, batch)
+            db_session.commit()
+
+        assert sorted(
+            get_document_ids_missing_from_source(
+                db_session=db_session,
+                connector_id=_CONNECTOR_ID,
+                credential_id=_CREDENTIAL_ID,
+                staging_table=staging_table,
+            )
+        ) == sorted(["it's gone", "gone"])
+
+        # created in the connection's temporary schema, not in the tenant's
+        for schema, expected in [("pg_temp", True), (tenant_schema, False)]:
+            assert (
+                db_session.scalar(
+                    text("SELECT to_regclass(:name) IS NOT NULL"),
+                    {"name": f"{schema}.{staging_table.name}"},
+                )
+                is expected
+            )
+
+        drop_source_document_id_staging_table__no_commit(db_session, staging_table)
+        db_session.commit()
+
+
+def test_staging_table_left_on_a_connection_is_recreated_empty(
+    tenant_schema: str,
+) -> None:
+    with get_connection_bound_session_with_current_tenant() as db_session:
+        staging_table = create_source_document_id_staging_table__no_commit(db_session)
+        stage_source_document_ids__no_commit(db_session, staging_table, ["kept"])
+        db_session.commit()
+
+        # e.g. a run that was interrupted before dropping the table
+        staging_table = create_source_document_id_staging_table__no_commit(db_session)
+
+        assert sorted(
+            get_document_ids_missing_from_source(
+                db_session=db_session,
+                connector_id=_CONNECTOR_ID,
+                credential_id=_CREDENTIAL_ID,
+                staging_table=staging_table,
+            )
+        ) == sorted(["kept", "it's gone", "gone"])
+
+        drop_source_document_id_staging_table__no_commit(db_session, staging_table)
+        db_session.commit()
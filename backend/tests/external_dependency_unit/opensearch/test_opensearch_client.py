@@ -13,6 +13,7 @@ from datetime import timezone
 import pytest
 
 from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.opensearch.client import BulkOperationError
 from onyx.document_index.opensearch.client import OpenSearchClient
 from onyx.document_index.opensearch.constants import DEFAULT_MAX_CHUNK_SIZE
 from onyx.document_index.opensearch.schema import CONTENT_FIELD_NAME
@@ -316,6 +317,92 @@ class TestOpenSearchClient:
         with pytest.raises(Exception, match="already exists"):
             test_client.index_document(document=doc)
 
+    def test_bulk_index_documents(
+        self, test_client: OpenSearchClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests indexing documents in bulk across several requests."""
+        # Precondition.
+        _patch_global_tenant_state(monkeypatch, False)
+        tenant_state = TenantState(tenant_id=POSTGRES_DEFAULT_SCHEMA, multitenant=False)
+        mappings = DocumentSchema.get_document_schema(
+            vector_dimension=128, multitenant=tenant_state.multitenant
+        )
+        settings = DocumentSchema.get_index_settings()
+        test_client.create_index(mappings=mappings, settings=settings)
+
+        docs = [
+            _create_test_document_chunk(
+                document_id="test-doc-bulk",
+                chunk_index=chunk_index,
+                content=f"Bulk content {chunk_index}",
+                tenant_state=tenant_state,
+            )
+            for chunk_index in range(5)
+        ]
+
+        # Under test.
+        # A small max size forces one request per document.
+        test_client.bulk_index_documents(documents=docs, max_batch_bytes=1)
+
+        # Postcondition.
+        for doc in docs:
+            retrieved_doc = test_client.get_document(
+                document_chunk_id=get_opensearch_doc_chunk_id(
+                    document_id=doc.document_id,
+                    chunk_index=doc.chunk_index,
+                    max_chunk_size=doc.max_chunk_size,
+                )
+            )
+            assert retrieved_doc == doc
+
+        # Indexing again should fail with a conflict for every document.
+        with pytest.raises(BulkOperationError) as exc_info:
+            test_client.bulk_index_documents(documents=docs)
+        assert [failure.status for failure in exc_info.value.failures] == [409] * 5
+
+    def test_bulk_delete_documents(
+        self, test_client: OpenSearchClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests deleting documents in bulk, ignoring nonexistent documents."""
+        # Precondition.
+        _patch_global_tenant_state(monkeypatch, False)
+        tenant_state = TenantState(tenant_id=POSTGRES_DEFAULT_SCHEMA, multitenant=False)
+        mappings = DocumentSchema.get_document_schema(
+            vector_dimension=128, multitenant=tenant_state.multitenant
+        )
+        settings = DocumentSchema.get_index_settings()
+        test_client.create_index(mappings=mappings, settings=settings)
+
+        docs = [
+            _create_test_document_chunk(
+                document_id="test-doc-bulk-delete",
+                chunk_index=chunk_index,
+                content=f"Content to delete {chunk_index}",
+                tenant_state=tenant_state,
+            )
+            for chunk_index in range(3)
+        ]
+        test_client.bulk_index_documents(documents=docs)
+        doc_chunk_ids = [
+            get_opensearch_doc_chunk_id(
+                document_id=doc.document_id,
+                chunk_index=doc.chunk_index,
+                max_chunk_size=doc.max_chunk_size,
+            )
+            for doc in docs
+        ]
+
+        # Under test.
+        deleted_chunk_ids = test_client.bulk_delete_documents(
+            document_chunk_ids=doc_chunk_ids + ["test_source__nonexistent__512__0"]
+        )
+
+        # Postcondition.
+        assert deleted_chunk_ids == set(doc_chunk_ids)
+        for doc_chunk_id in doc_chunk_ids:
+            with pytest.raises(Exception, match="404"):
+                test_client.get_document(document_chunk_id=doc_chunk_id)
+
     def test_get_document(
         self, test_client: OpenSearchClient, monkeypatch: pytest.MonkeyPatch
     ) -> None:
@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from typing import Any
+from unittest.mock import MagicMock
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.file_store.document_batch_storage import BATCH_FILE_TYPE
+from onyx.file_store.document_batch_storage import BATCH_FORMAT_HEADER
+from onyx.file_store.document_batch_storage import FileStoreDocumentBatchStorage
+from onyx.file_store.document_batch_storage import LEGACY_BATCH_FILE_TYPE
+
+
+def _make_document(doc_id: str) -> Document:
+    return Document(
+        id=doc_id,
+        source=DocumentSource.WEB,
+        semantic_identifier=f"Document {doc_id}",
+        metadata={"tags": ["tag1", "tag2"]},
+        doc_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        sections=[TextSection(text="some text " * 100, link="link")],
+    )
+
+
+def _make_storage(files: dict[str, tuple[bytes, str]]) -> FileStoreDocumentBatchStorage:
+    file_store = MagicMock()
+
+    def _save_file(
+        file_id: str, content: BytesIO, file_type: str, **kwargs: Any
+    ) -> str:
+        files[file_id] = (content.read(), file_type)
+        return file_id
+
+    file_store.save_file.side_effect = _save_file
+    file_store.has_file.side_effect = (
+        lambda file_id, file_origin, file_type: file_id in files
+        and files[file_id][1] == file_type
+    )
+    file_store.read_file.side_effect = lambda file_id, **kwargs: BytesIO(
+        files[file_id][0]
+    )
+    file_store.change_file_id.side_effect = lambda old_file_id, new_file_id: (
+        files.__setitem__(new_file_id, files.pop(old_file_id))
+    )
+    return FileStoreDocumentBatchStorage(1, 2, file_store)
+
+
+def test_batch_round_trips_through_compressed_format() -> None:
+    files: dict[str, tuple[bytes, str]] = {}
+    storage = _make_storage(files)
+    documents = [_make_document("a"), _make_document("b")]
+
+    storage.store_batch(0, documents)
+
+    (content, file_type), *_ = files.values()
+    assert file_type == BATCH_FILE_TYPE
+    assert content.startswith(BATCH_FORMAT_HEADER)
+    assert len(content) < len(
+        json.dumps([doc.model_dump(mode="json") for doc in documents])
+    )
+    assert storage.get_batch(0) == documents
+
+
+def test_legacy_json_batches_are_still_readable() -> None:
+    files: dict[str, tuple[bytes, str]] = {}
+    storage = _make_storage(files)
+    documents = [_make_document("a")]
+    legacy_content = json.dumps(
+        [doc.model_dump(mode="json") for doc in documents], indent=2
+    ).encode("utf-8")
+    files["iab/1/1/0.json"] = (legacy_content, LEGACY_BATCH_FILE_TYPE)
+
+    storage.update_old_batches_to_new_index_attempt(["iab/1/1/0.json"])
+
+    assert storage.get_batch(0) == documents
@@ -7,7 +7,7 @@ from unittest.mock import patch
 
 import pytest
 
-from model_server.encoders import embed_text
+from model_server.encoders import embed_text_as_array
 from model_server.encoders import process_embed_request
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import EmbedRequest
@@ -20,7 +20,7 @@ async def test_embed_text_no_model_name() -> None:
         ValueError,
         match="Model name must be provided to run embeddings",
     ):
-        await embed_text(
+        await embed_text_as_array(
             texts=["test1", "test2"],
             model_name=None,
             max_context_length=512,
@@ -36,7 +36,7 @@ async def test_embed_text_local_model() -> None:
         mock_model.encode.return_value = [[0.1, 0.2], [0.3, 0.4]]
         mock_get_model.return_value = mock_model
 
-        result = await embed_text(
+        result = await embed_text_as_array(
             texts=["test1", "test2"],
             model_name="fake-local-model",
             max_context_length=512,
@@ -44,15 +44,15 @@ async def test_embed_text_local_model() -> None:
             prefix=None,
         )
 
-        assert result == [[0.1, 0.2], [0.3, 0.4]]
+        assert result.tolist() == [[0.1, 0.2], [0.3, 0.4]]
         mock_model.encode.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_concurrent_embeddings() -> None:
-    def mock_encode(*args: Any, **kwargs: Any) -> List[List[float]]:
+    def mock_encode(texts: List[str], **kwargs: Any) -> List[List[float]]:
         time.sleep(5)
-        return [[0.1, 0.2, 0.3]]
+        return [[0.1, 0.2, 0.3] for _ in texts]
 
     test_req = EmbedRequest(
         texts=["test"],
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from model_server.embedding_batcher import EmbeddingBatcher
+
+
+class _RecordingEncoder:
+    """Fake encode function that records each call and fails on concurrent use."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list[tuple[list[str], int, bool]] = []
+        self._in_use = threading.Lock()
+
+    def __call__(
+        self, texts: list[str], max_context_length: int, normalize_embeddings: bool
+    ) -> np.ndarray:
+        if not self._in_use.acquire(blocking=False):
+            raise RuntimeError("Already borrowed")
+        try:
+            self.calls.append((texts, max_context_length, normalize_embeddings))
+            time.sleep(self.delay)
+            return np.array([[float(len(text))] for text in texts])
+        finally:
+            self._in_use.release()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced() -> None:
+    encoder = _RecordingEncoder()
+    batcher = EmbeddingBatcher(
+        encode_fn=encoder, max_batch_size=64, max_wait_seconds=0.05
+    )
+
+    results = [
+        result.tolist()
+        for result in await asyncio.gather(
+            batcher.embed(["a", "bb"], 512, True),
+            batcher.embed(["ccc"], 512, True),
+            batcher.embed(["dddd", "eeeee", "f"], 512, True),
+        )
+    ]
+
+    # results are scattered back to the right callers
+    assert results == [
+        [[1.0], [2.0]],
+        [[3.0]],
+        [[4.0], [5.0], [1.0]],
+    ]
+    assert encoder.calls == [(["a", "bb", "ccc", "dddd", "eeeee", "f"], 512, True)]
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_size_and_settings() -> None:
+    encoder = _RecordingEncoder(delay=0.01)
+    batcher = EmbeddingBatcher(encode_fn=encoder, max_batch_size=3, max_wait_seconds=1)
+
+    start = time.monotonic()
+    results = [
+        result.tolist()
+        for result in await asyncio.gather(
+            batcher.embed(["a", "b"], 512, True),
+            batcher.embed(["c", "d"], 512, True),
+            batcher.embed(["e"], 512, False),
+            batcher.embed(["f"], 512, True),
+            # larger than the max batch size, encoded on its own
+            batcher.embed(["g", "h", "i", "j"], 512, True),
+        )
+    ]
+    elapsed = time.monotonic() - start
+
+    assert results == [
+        [[1.0], [1.0]],
+        [[1.0], [1.0]],
+        [[1.0]],
+        [[1.0]],
+        [[1.0], [1.0], [1.0], [1.0]],
+    ]
+    assert [call[0] for call in encoder.calls] == [
+        ["a", "b", "f"],
+        ["c", "d"],
+        ["e"],
+        ["g", "h", "i", "j"],
+    ]
+    assert encoder.calls[2][2] is False
+    # a full batch is flushed immediately rather than waiting out max_wait_seconds
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_encode_errors_propagate_to_all_callers_in_batch() -> None:
+    def _failing_encode(
+        texts: list[str], max_context_length: int, normalize_embeddings: bool
+    ) -> np.ndarray:
+        raise RuntimeError("model exploded")
+
+    batcher = EmbeddingBatcher(
+        encode_fn=_failing_encode, max_batch_size=64, max_wait_seconds=0.01
+    )
+
+    results = await asyncio.gather(
+        batcher.embed(["a"], 512, True),
+        batcher.embed(["b"], 512, True),
+        return_exceptions=True,
+    )
+
+    assert all(
+        isinstance(result, RuntimeError) and str(result) == "model exploded"
+        for result in results
+    )
+
+    # the batcher keeps working after a failed batch
+    batcher._encode_fn = _RecordingEncoder()
+    assert (await batcher.embed(["ok"], 512, True)).tolist() == [[2.0]]
@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+from onyx.access.acl_cache import get_cached_acl_for_user
+
+
+def test_user_acl_is_cached_until_version_changes() -> None:
+    user = MagicMock()
+    user.id = uuid4()
+    compute_acl = MagicMock(return_value={"user_email:a@b.com", "PUBLIC"})
+
+    with patch(
+        "onyx.access.acl_cache.get_user_acl_version", return_value=1
+    ) as mock_version:
+        assert get_cached_acl_for_user(user, compute_acl) == compute_acl.return_value
+        assert get_cached_acl_for_user(user, compute_acl) == compute_acl.return_value
+        assert compute_acl.call_count == 1
+
+        # a group membership change bumps the version
+        mock_version.return_value = 2
+        get_cached_acl_for_user(user, compute_acl)
+        assert compute_acl.call_count == 2
+
+
+def test_user_acl_is_not_cached_when_redis_is_unavailable() -> None:
+    compute_acl = MagicMock(return_value={"PUBLIC"})
+
+    with patch("onyx.access.acl_cache.get_user_acl_version", return_value=None):
+        get_cached_acl_for_user(None, compute_acl)
+        get_cached_acl_for_user(None, compute_acl)
+
+    assert compute_acl.call_count == 2
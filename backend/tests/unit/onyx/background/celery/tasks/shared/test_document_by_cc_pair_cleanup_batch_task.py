@@ -0,0 +1,147 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.access.access import get_null_document_access
+from onyx.background.celery.tasks.shared.tasks import (
+    document_by_cc_pair_cleanup_batch_task,
+)
+
+_MODULE = "onyx.background.celery.tasks.shared.tasks"
+
+
+def _make_doc(doc_id: str) -> MagicMock:
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.chunk_count = 2
+    doc.boost = 0
+    doc.hidden = False
+    return doc
+
+
+def _run(document_ids: list[str]) -> bool:
+    return document_by_cc_pair_cleanup_batch_task.run(
+        document_ids, connector_id=1, credential_id=2, tenant_id="tenant"
+    )
+
+
+@pytest.fixture
+def db_mocks() -> Generator[dict[str, Any], None, None]:
+    # "only_*" docs are only referenced by the cc_pair being cleaned up
+    with (
+        patch(f"{_MODULE}.get_session_with_current_tenant"),
+        patch(f"{_MODULE}.get_active_search_settings"),
+        patch(f"{_MODULE}.get_default_document_index"),
+        patch(f"{_MODULE}.HttpxPool"),
+        patch(f"{_MODULE}.RetryDocumentIndex") as retry_index_cls,
+        patch(
+            f"{_MODULE}.get_document_connector_counts",
+            side_effect=lambda db_session, document_ids: [
+                (doc_id, 1 if doc_id.startswith("only") else 2)
+                for doc_id in document_ids
+                if doc_id != "missing"
+            ],
+        ),
+        patch(
+            f"{_MODULE}.get_documents_by_ids",
+            side_effect=lambda db_session, document_ids: [
+                _make_doc(doc_id) for doc_id in document_ids
+            ],
+        ),
+        patch(
+            f"{_MODULE}.fetch_document_sets_for_documents",
+            side_effect=lambda document_ids, db_session: [],
+        ),
+        patch(
+            f"{_MODULE}.get_access_for_documents",
+            side_effect=lambda document_ids, db_session: {
+                doc_id: MagicMock() for doc_id in document_ids
+            },
+        ) as get_access_for_documents,
+        patch(
+            f"{_MODULE}.delete_documents_complete__no_commit"
+        ) as delete_documents_complete,
+        patch(
+            f"{_MODULE}.delete_documents_by_connector_credential_pair__no_commit"
+        ) as delete_cc_pair_references,
+        patch(f"{_MODULE}.mark_documents_as_synced") as mark_documents_as_synced,
+    ):
+        retry_index = retry_index_cls.return_value
+        retry_index.update_batch.return_value = {}
+        yield {
+            "delete": retry_index.delete,
+            "update_batch": retry_index.update_batch,
+            "get_access_for_documents": get_access_for_documents,
+            "delete_documents_complete": delete_documents_complete,
+            "delete_cc_pair_references": delete_cc_pair_references,
+            "mark_documents_as_synced": mark_documents_as_synced,
+        }
+
+
+def test_batch_is_deleted_and_updated_with_one_call_each(
+    db_mocks: dict[str, Any],
+) -> None:
+    assert _run(["only_a", "shared_b", "only_c", "missing"])
+
+    db_mocks["delete"].assert_called_once_with(["only_a", "only_c"], tenant_id="tenant")
+    assert db_mocks["delete_documents_complete"].call_args.kwargs["document_ids"] == [
+        "only_a",
+        "only_c",
+    ]
+
+    db_mocks["update_batch"].assert_called_once()
+    updates = db_mocks["update_batch"].call_args.args[0]
+    assert [update.doc_id for update in updates] == ["shared_b"]
+    assert db_mocks["delete_cc_pair_references"].call_args.kwargs["document_ids"] == [
+        "shared_b"
+    ]
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == ["shared_b"]
+
+
+def test_document_without_access_is_updated_with_no_access(
+    db_mocks: dict[str, Any],
+) -> None:
+    # the EE access lookup omits documents that have no source
+    db_mocks["get_access_for_documents"].side_effect = (
+        lambda document_ids, db_session: {"shared_b": MagicMock()}
+    )
+
+    assert _run(["shared_b", "shared_c"])
+
+    updates = db_mocks["update_batch"].call_args.args[0]
+    assert [update.doc_id for update in updates] == ["shared_b", "shared_c"]
+    assert updates[1].fields.access == get_null_document_access()
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == [
+        "shared_b",
+        "shared_c",
+    ]
+
+
+def test_only_documents_with_retryable_failures_are_retried(
+    db_mocks: dict[str, Any],
+) -> None:
+    db_mocks["delete"].side_effect = httpx.ReadTimeout("timed out")
+    db_mocks["update_batch"].return_value = {
+        "shared_b": httpx.HTTPStatusError(
+            "bad request",
+            request=httpx.Request("PUT", "http://vespa"),
+            response=httpx.Response(400),
+        ),
+    }
+
+    with patch.object(
+        document_by_cc_pair_cleanup_batch_task,
+        "retry",
+        side_effect=RuntimeError("retry"),
+    ) as retry:
+        with pytest.raises(RuntimeError, match="retry"):
+            _run(["only_a", "shared_b", "shared_c"])
+
+    # the chunks of only_a may still be in the index, so it is kept in postgres
+    db_mocks["delete_documents_complete"].assert_not_called()
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == ["shared_c"]
+    assert retry.call_args.kwargs["kwargs"]["document_ids"] == ["only_a"]
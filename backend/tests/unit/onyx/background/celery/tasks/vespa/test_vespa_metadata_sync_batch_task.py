@@ -0,0 +1,114 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.access.access import get_null_document_access
+from onyx.background.celery.tasks.vespa.tasks import vespa_metadata_sync_batch_task
+
+_MODULE = "onyx.background.celery.tasks.vespa.tasks"
+
+
+def _make_doc(doc_id: str) -> MagicMock:
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.chunk_count = 2
+    doc.boost = 0
+    doc.hidden = False
+    return doc
+
+
+@pytest.fixture
+def db_mocks() -> Generator[dict[str, Any], None, None]:
+    with (
+        patch(f"{_MODULE}.get_session_with_current_tenant"),
+        patch(f"{_MODULE}.get_active_search_settings"),
+        patch(f"{_MODULE}.get_default_document_index"),
+        patch(f"{_MODULE}.HttpxPool"),
+        patch(f"{_MODULE}.RetryDocumentIndex") as retry_index_cls,
+        patch(
+            f"{_MODULE}.get_documents_by_ids",
+            side_effect=lambda db_session, document_ids: [
+                _make_doc(doc_id) for doc_id in document_ids if doc_id != "missing"
+            ],
+        ) as get_documents_by_ids,
+        patch(
+            f"{_MODULE}.fetch_document_sets_for_documents",
+            side_effect=lambda document_ids, db_session: [
+                (doc_id, ["set"]) for doc_id in document_ids
+            ],
+        ),
+        patch(
+            f"{_MODULE}.get_access_for_documents",
+            side_effect=lambda document_ids, db_session: {
+                doc_id: MagicMock() for doc_id in document_ids
+            },
+        ) as get_access_for_documents,
+        patch(f"{_MODULE}.mark_documents_as_synced") as mark_documents_as_synced,
+    ):
+        yield {
+            "update_batch": retry_index_cls.return_value.update_batch,
+            "get_documents_by_ids": get_documents_by_ids,
+            "get_access_for_documents": get_access_for_documents,
+            "mark_documents_as_synced": mark_documents_as_synced,
+        }
+
+
+def test_batch_is_fetched_and_updated_once_and_marked_synced_together(
+    db_mocks: dict[str, Any],
+) -> None:
+    db_mocks["update_batch"].return_value = {}
+
+    assert vespa_metadata_sync_batch_task.run(["a", "b", "missing"], tenant_id="tenant")
+
+    assert db_mocks["get_documents_by_ids"].call_count == 1
+    assert db_mocks["update_batch"].call_count == 1
+    updates = db_mocks["update_batch"].call_args.args[0]
+    assert [update.doc_id for update in updates] == ["a", "b"]
+    assert updates[0].fields.document_sets == {"set"}
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == ["a", "b"]
+
+
+def test_document_without_access_is_synced_with_no_access(
+    db_mocks: dict[str, Any],
+) -> None:
+    # the EE access lookup omits documents that have no source
+    db_mocks["get_access_for_documents"].side_effect = (
+        lambda document_ids, db_session: {"a": MagicMock()}
+    )
+    db_mocks["update_batch"].return_value = {}
+
+    assert vespa_metadata_sync_batch_task.run(["a", "b"], tenant_id="tenant")
+
+    updates = db_mocks["update_batch"].call_args.args[0]
+    assert [update.doc_id for update in updates] == ["a", "b"]
+    assert updates[1].fields.access == get_null_document_access()
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == ["a", "b"]
+
+
+def test_only_documents_with_retryable_failures_are_retried(
+    db_mocks: dict[str, Any],
+) -> None:
+    db_mocks["update_batch"].return_value = {
+        "b": httpx.HTTPStatusError(
+            "bad request",
+            request=httpx.Request("PUT", "http://vespa"),
+            response=httpx.Response(400),
+        ),
+        "c": RuntimeError("failed after retries"),
+    }
+
+    with patch.object(
+        vespa_metadata_sync_batch_task, "retry", side_effect=RuntimeError("retry")
+    ) as retry:
+        with pytest.raises(RuntimeError, match="retry"):
+            vespa_metadata_sync_batch_task.run(["a", "b", "c"], tenant_id="tenant")
+
+    assert db_mocks["mark_documents_as_synced"].call_args.args[0] == ["a"]
+    assert retry.call_args.kwargs["kwargs"] == {
+        "document_ids": ["c"],
+        "tenant_id": "tenant",
+    }
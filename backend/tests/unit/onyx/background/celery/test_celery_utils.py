@@ -0,0 +1,40 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.background.celery.celery_utils import iterate_ids_from_runnable_connector
+from onyx.connectors.interfaces import SlimConnector
+from onyx.connectors.models import SlimDocument
+
+
+def _make_slim_connector(batches: list[list[str]]) -> MagicMock:
+    connector = MagicMock(spec=SlimConnector)
+    connector.retrieve_all_slim_docs.return_value = iter(
+        [[SlimDocument(id=doc_id) for doc_id in batch] for batch in batches]
+    )
+    return connector
+
+
+def test_ids_are_yielded_one_batch_at_a_time() -> None:
+    callback = MagicMock()
+    callback.should_stop.return_value = False
+
+    batches = iterate_ids_from_runnable_connector(
+        _make_slim_connector([["a", "b"], ["c"]]), callback
+    )
+
+    assert next(batches) == {"a", "b"}
+    callback.progress.assert_not_called()
+    assert next(batches) == {"c"}
+    assert list(batches) == []
+    assert [call.args[1] for call in callback.progress.call_args_list] == [2, 1]
+
+
+def test_stop_signal_aborts_iteration() -> None:
+    callback = MagicMock()
+    callback.should_stop.return_value = True
+
+    with pytest.raises(RuntimeError, match="Stop signal detected"):
+        list(
+            iterate_ids_from_runnable_connector(_make_slim_connector([["a"]]), callback)
+        )
@@ -0,0 +1,62 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.background.indexing.run_docfetching import _wait_for_docprocessing_capacity
+from onyx.connectors.models import ConnectorStopSignal
+from onyx.db.enums import IndexModelStatus
+
+_MODULE = "onyx.background.indexing.run_docfetching"
+
+
+@pytest.fixture
+def coordination_mocks() -> Generator[dict[str, Any], None, None]:
+    with (
+        patch(f"{_MODULE}.get_session_with_current_tenant"),
+        patch(f"{_MODULE}.MAX_IN_FLIGHT_DOCPROCESSING_BATCHES", 2),
+        patch(f"{_MODULE}.IndexingCoordination") as coordination,
+        patch(f"{_MODULE}._check_connector_and_attempt_status") as check_status,
+        patch(f"{_MODULE}.time.sleep") as sleep,
+    ):
+        yield {
+            "update_queued_batches": coordination.update_queued_batches,
+            "check_status": check_status,
+            "sleep": sleep,
+        }
+
+
+def test_returns_immediately_below_limit(coordination_mocks: dict[str, Any]) -> None:
+    coordination_mocks["update_queued_batches"].return_value = 1
+
+    _wait_for_docprocessing_capacity(1, IndexModelStatus.PRESENT, 2, 5, None)
+
+    assert coordination_mocks["update_queued_batches"].call_args.args[1:] == (2, 5)
+    coordination_mocks["sleep"].assert_not_called()
+
+
+def test_waits_until_docprocessing_catches_up(
+    coordination_mocks: dict[str, Any],
+) -> None:
+    coordination_mocks["update_queued_batches"].side_effect = [3, 2, 1]
+    callback = MagicMock()
+    callback.should_stop.return_value = False
+
+    _wait_for_docprocessing_capacity(1, IndexModelStatus.PRESENT, 2, 5, callback)
+
+    assert coordination_mocks["sleep"].call_count == 2
+    assert coordination_mocks["check_status"].call_count == 2
+    assert callback.progress.call_count == 2
+
+
+def test_stop_signal_while_waiting(coordination_mocks: dict[str, Any]) -> None:
+    coordination_mocks["update_queued_batches"].return_value = 5
+    callback = MagicMock()
+    callback.should_stop.return_value = True
+
+    with pytest.raises(ConnectorStopSignal):
+        _wait_for_docprocessing_capacity(1, IndexModelStatus.PRESENT, 2, 5, callback)
+
+    coordination_mocks["sleep"].assert_not_called()
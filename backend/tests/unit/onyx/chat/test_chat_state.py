@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+from uuid import uuid4
+
+from onyx.chat.chat_state import ChatStateContainer
+from onyx.chat.chat_state import run_chat_loop_with_state_containers
+from onyx.chat.chat_state import stream_chat_async
+from onyx.chat.emitter import Emitter
+from onyx.chat.emitter import get_default_emitter
+from onyx.chat.stop_signal_checker import get_tenant_fence_key
+from onyx.server.query_and_chat.placement import Placement
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.streaming_models import ReasoningDelta
+from shared_configs.contextvars import get_current_tenant_id
+
+
+def _serialize(packet: Packet) -> str:
+    if isinstance(packet.obj, OverallStop):
+        return f"stop:{packet.obj.stop_reason}"
+    assert isinstance(packet.obj, ReasoningDelta)
+    return packet.obj.reasoning
+
+
+def _delta(text: str, turn_index: int = 0) -> Packet:
+    return Packet(
+        placement=Placement(turn_index=turn_index),
+        obj=ReasoningDelta(reasoning=text),
+    )
+
+
+def _collect(stream: Any) -> list[str]:
+    async def _run() -> list[str]:
+        return [item async for item in stream]
+
+    return asyncio.run(_run())
+
+
+def test_chat_loop_streams_on_the_producing_thread() -> None:
+    loop_threads: list[threading.Thread] = []
+    completed: list[ChatStateContainer] = []
+
+    def _chat_loop(emitter: Emitter, state_container: ChatStateContainer) -> None:
+        loop_threads.append(threading.current_thread())
+        emitter.emit(_delta("a"))
+        emitter.emit(_delta("b"))
+        emitter.emit(
+            Packet(placement=Placement(turn_index=1), obj=OverallStop(type="stop"))
+        )
+        emitter.emit(_delta("ignored after stop"))
+
+    def _create_stream() -> Generator[str, None, None]:
+        yield "setup"
+        stream_thread = threading.current_thread()
+        for packet in run_chat_loop_with_state_containers(
+            _chat_loop,
+            completed.append,
+            lambda: True,
+            get_default_emitter(),
+            ChatStateContainer(),
+        ):
+            yield _serialize(packet)
+        assert loop_threads == [stream_thread]
+        yield "done"
+
+    assert _collect(stream_chat_async(_create_stream, _serialize)) == [
+        "setup",
+        "a",
+        "b",
+        "stop:None",
+        "done",
+    ]
+    assert len(completed) == 1
+
+
+def test_stop_signal_ends_the_chat_loop() -> None:
+    completed = threading.Event()
+    stopped = threading.Event()
+
+    def _chat_loop(emitter: Emitter, state_container: ChatStateContainer) -> None:
+        emitter.emit(_delta("a", turn_index=2))
+        stopped.set()
+        # keeps producing until the consumer is gone
+        while True:
+            emitter.emit(_delta("more", turn_index=2))
+            time.sleep(0.01)
+
+    def _create_stream() -> Generator[str, None, None]:
+        for packet in run_chat_loop_with_state_containers(
+            _chat_loop,
+            lambda state_container: completed.set(),
+            lambda: not stopped.is_set(),
+            get_default_emitter(),
+            ChatStateContainer(),
+        ):
+            yield _serialize(packet)
+
+    output = _collect(stream_chat_async(_create_stream, _serialize))
+
+    assert output[0] == "a"
+    assert output[-1] == "stop:user_cancelled"
+    assert completed.wait(timeout=5)
+
+
+def test_disconnect_drains_the_chat_loop_to_completion() -> None:
+    completed = threading.Event()
+    emitted: list[str] = []
+
+    def _chat_loop(emitter: Emitter, state_container: ChatStateContainer) -> None:
+        for text in ["a", "b", "c"]:
+            emitter.emit(_delta(text))
+            emitted.append(text)
+            time.sleep(0.05)
+        state_container.set_answer_tokens("".join(emitted))
+
+    def _create_stream() -> Generator[str, None, None]:
+        for packet in run_chat_loop_with_state_containers(
+            _chat_loop,
+            lambda state_container: completed.set(),
+            lambda: True,
+            get_default_emitter(),
+            state_container,
+        ):
+            yield _serialize(packet)
+
+    async def _read_first_and_disconnect() -> str:
+        stream = stream_chat_async(_create_stream, _serialize)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    state_container = ChatStateContainer()
+
+    assert asyncio.run(_read_first_and_disconnect()) == "a"
+    assert completed.wait(timeout=5)
+    assert state_container.get_answer_tokens() == "abc"
+
+
+def test_stop_signals_of_concurrent_streams_are_polled_together() -> None:
+    chat_session_ids = [uuid4(), uuid4()]
+    fence_keys = [
+        get_tenant_fence_key(chat_session_id, get_current_tenant_id())
+        for chat_session_id in chat_session_ids
+    ]
+    started = threading.Barrier(len(chat_session_ids))
+    stop_signals: dict[str, bytes] = {}
+    is_connected_calls: list[int] = []
+
+    async def _mget(keys: list[str]) -> list[bytes | None]:
+        # both streams are running, stop the first one
+        stop_signals[fence_keys[0]] = b"0"
+        return [stop_signals.get(key) for key in keys]
+
+    redis_client = AsyncMock()
+    redis_client.mget.side_effect = _mget
+
+    def _is_connected() -> bool:
+        is_connected_calls.append(1)
+        return True
+
+    def _chat_loop(emitter: Emitter, state_container: ChatStateContainer) -> None:
+        started.wait(timeout=5)
+        for _ in range(20):
+            emitter.emit(_delta("more"))
+            time.sleep(0.1)
+
+    def _create_stream(chat_session_id: Any) -> Generator[str, None, None]:
+        for packet in run_chat_loop_with_state_containers(
+            _chat_loop,
+            lambda state_container: None,
+            _is_connected,
+            get_default_emitter(),
+            ChatStateContainer(),
+            stop_signal_chat_session_id=chat_session_id,
+        ):
+            yield _serialize(packet)
+
+    async def _run() -> list[list[str]]:
+        async def _collect_stream(chat_session_id: Any) -> list[str]:
+            return [
+                item
+                async for item in stream_chat_async(
+                    lambda: _create_stream(chat_session_id), _serialize
+                )
+            ]
+
+        return list(
+            await asyncio.gather(
+                *(
+                    _collect_stream(chat_session_id)
+                    for chat_session_id in chat_session_ids
+                )
+            )
+        )
+
+    with patch(
+        "onyx.chat.stop_signal_checker.get_async_redis_connection",
+        AsyncMock(return_value=redis_client),
+    ):
+        stopped_output, completed_output = asyncio.run(_run())
+
+    assert stopped_output[-1] == "stop:user_cancelled"
+    assert completed_output == ["more"] * 20
+    # one Redis round trip per interval covers every running stream
+    assert sorted(redis_client.mget.call_args_list[0].args[0]) == sorted(fence_keys)
+    assert all(
+        set(call.args[0]) <= set(fence_keys)
+        for call in redis_client.mget.call_args_list
+    )
+    # the streams never check their stop signal themselves
+    assert is_connected_calls == []
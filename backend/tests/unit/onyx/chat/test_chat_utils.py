@@ -0,0 +1,95 @@
+from typing import NamedTuple
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.chat.chat_utils import _get_history_suffix_message_ids
+from onyx.configs.constants import MessageType
+
+
+class _MessageRow(NamedTuple):
+    id: int
+    parent_message_id: int | None
+    latest_child_message_id: int | None
+    message_type: MessageType
+    history_token_count: int
+
+
+def _chain(*messages: tuple[MessageType, int]) -> list[_MessageRow]:
+    """Root message with id 0 followed by the given (type, token count) messages."""
+    rows = [_MessageRow(0, None, 1 if messages else None, MessageType.SYSTEM, 0)]
+    for idx, (message_type, token_count) in enumerate(messages, start=1):
+        rows.append(
+            _MessageRow(
+                idx,
+                idx - 1,
+                idx + 1 if idx < len(messages) else None,
+                message_type,
+                token_count,
+            )
+        )
+    return rows
+
+
+def _suffix_ids(
+    rows: list[_MessageRow], token_budget: int, stop_at_message_id: int | None = None
+) -> list[int]:
+    with patch(
+        "onyx.chat.chat_utils.get_chat_message_history_token_counts",
+        return_value=rows,
+    ):
+        return _get_history_suffix_message_ids(
+            chat_session_id=MagicMock(),
+            db_session=MagicMock(),
+            stop_at_message_id=stop_at_message_id,
+            token_budget=token_budget,
+            tokenizer_key="openai/gpt-4o",
+        )
+
+
+def test_loads_only_messages_that_can_fit() -> None:
+    rows = _chain(
+        (MessageType.USER, 100),
+        (MessageType.ASSISTANT, 400),
+        (MessageType.USER, 100),
+        (MessageType.ASSISTANT, 400),
+        (MessageType.USER, 100),
+    )
+
+    # the assistant message crossing the budget is kept since it may be partially used
+    assert _suffix_ids(rows, token_budget=300) == [4, 5]
+    assert _suffix_ids(rows, token_budget=600) == [2, 3, 4, 5]
+    assert _suffix_ids(rows, token_budget=10_000) == [1, 2, 3, 4, 5]
+
+
+def test_always_keeps_the_last_user_message_and_after() -> None:
+    rows = _chain(
+        (MessageType.USER, 100),
+        (MessageType.ASSISTANT, 400),
+        (MessageType.USER, 5_000),
+        (MessageType.ASSISTANT, 5_000),
+    )
+
+    assert _suffix_ids(rows, token_budget=1_000) == [3, 4]
+
+
+def test_stops_at_message() -> None:
+    rows = _chain(
+        (MessageType.USER, 100),
+        (MessageType.ASSISTANT, 100),
+        (MessageType.USER, 100),
+        (MessageType.ASSISTANT, 100),
+    )
+
+    assert _suffix_ids(rows, token_budget=10_000, stop_at_message_id=2) == [1, 2]
+
+
+def test_empty_and_invalid_chains() -> None:
+    assert _suffix_ids([], token_budget=100) == []
+
+    with pytest.raises(RuntimeError):
+        _suffix_ids(
+            _chain((MessageType.ASSISTANT, 1), (MessageType.ASSISTANT, 1)),
+            token_budget=100,
+        )
@@ -133,7 +133,6 @@ def test_default_initialization() -> None:
     processor = DynamicCitationProcessor()
 
     assert processor.citation_to_doc == {}
-    assert processor.llm_out == ""
     assert processor.curr_segment == ""
     assert processor.hold == ""
     assert processor.cited_documents_in_order == []
@@ -1920,6 +1919,37 @@ class TestCitationModesWithCodeBlocks:
         # No CitationInfo emitted for citation in code block
         assert len(citations) == 0
 
+    def test_code_fence_split_across_tokens(
+        self, mock_search_docs: CitationMapping
+    ) -> None:
+        """Test that a code fence split over several tokens is still detected."""
+        processor = DynamicCitationProcessor(citation_mode=CitationMode.HYPERLINK)
+        processor.update_citation_mapping({1: mock_search_docs[1]})
+
+        tokens: list[str | None] = [
+            "Code: `",
+            "`",
+            "`\nprint('[1]')\n``",
+            "`\nSee [1].",
+        ]
+        output, citations = process_tokens(processor, tokens)
+
+        assert "print('[1]')" in output
+        assert "See [[1]](https://example.com/doc1)." in output
+        assert len(citations) == 1
+
+    def test_longer_backtick_runs_count_like_the_full_text(
+        self, mock_search_docs: CitationMapping
+    ) -> None:
+        """Test that four backticks open a single code block, like ``` does."""
+        processor = DynamicCitationProcessor(citation_mode=CitationMode.HYPERLINK)
+        processor.update_citation_mapping({1: mock_search_docs[1]})
+
+        output, citations = process_tokens(processor, ["``", "``\n", "x = a[1]\n"])
+
+        assert "x = a[1]" in output
+        assert len(citations) == 0
+
 
 # ============================================================================
 # Edge Case Tests
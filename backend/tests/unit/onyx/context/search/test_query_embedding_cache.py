@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.query_embedding_cache import build_query_embedding_cache_key
+from onyx.context.search.query_embedding_cache import QueryEmbeddingCache
+from onyx.context.search.utils import get_query_embeddings
+
+
+def _make_search_settings(model_name: str = "intfloat/e5-base-v2") -> MagicMock:
+    search_settings = MagicMock()
+    search_settings.provider_type = None
+    search_settings.model_name = model_name
+    search_settings.query_prefix = "query: "
+    search_settings.normalize = True
+    search_settings.final_embedding_dim = 768
+    return search_settings
+
+
+def test_cache_key_normalizes_whitespace_and_depends_on_model() -> None:
+    search_settings = _make_search_settings()
+
+    key = build_query_embedding_cache_key("what is onyx", search_settings)
+    assert key == build_query_embedding_cache_key("  what   is\nonyx ", search_settings)
+    assert key != build_query_embedding_cache_key("What is onyx", search_settings)
+    assert key != build_query_embedding_cache_key(
+        "what is onyx", _make_search_settings("nomic-ai/nomic-embed-text-v1")
+    )
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = QueryEmbeddingCache(max_size=2, ttl_seconds=60, use_redis=False)
+    cache.put_many({"a": [1.0], "b": [2.0]})
+
+    # touch "a" so that "b" is the least recently used entry
+    assert cache.get_many(["a"]) == {"a": [1.0]}
+    cache.put_many({"c": [3.0]})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+
+
+def test_cache_entries_expire() -> None:
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60, use_redis=False)
+    with patch(
+        "onyx.context.search.query_embedding_cache.time.monotonic", return_value=0
+    ):
+        cache.put_many({"a": [1.0]})
+
+    with patch(
+        "onyx.context.search.query_embedding_cache.time.monotonic", return_value=59
+    ):
+        assert cache.get_many(["a"]) == {"a": [1.0]}
+
+    with patch(
+        "onyx.context.search.query_embedding_cache.time.monotonic", return_value=61
+    ):
+        assert cache.get_many(["a"]) == {}
+
+
+def test_get_query_embeddings_only_embeds_uncached_queries() -> None:
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60, use_redis=False)
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, text_type: [
+        [float(len(text))] for text in texts
+    ]
+
+    with (
+        patch(
+            "onyx.context.search.utils.get_current_search_settings",
+            return_value=_make_search_settings(),
+        ),
+        patch(
+            "onyx.context.search.utils.get_query_embedding_cache",
+            return_value=cache,
+        ),
+        patch(
+            "onyx.context.search.utils.get_query_embedding_model",
+            return_value=model,
+        ),
+    ):
+        assert get_query_embeddings(["ab", "abc", " ab "], MagicMock()) == [
+            [2.0],
+            [3.0],
+            [2.0],
+        ]
+        assert model.encode.call_args.args[0] == ["ab", "abc"]
+
+        assert get_query_embeddings(["abc", "abcd"], MagicMock()) == [
+            [3.0],
+            [4.0],
+        ]
+        assert model.encode.call_args.args[0] == ["abcd"]
+        assert model.encode.call_count == 2
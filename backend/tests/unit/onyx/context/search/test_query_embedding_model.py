@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.utils import get_query_embedding_model
+
+
+def _make_search_settings(search_settings_id: int, query_prefix: str) -> MagicMock:
+    search_settings = MagicMock()
+    search_settings.id = search_settings_id
+    search_settings.model_name = "nomic-ai/nomic-embed-text-v1"
+    search_settings.normalize = True
+    search_settings.query_prefix = query_prefix
+    search_settings.passage_prefix = "search_document: "
+    search_settings.api_key = None
+    search_settings.provider_type = None
+    search_settings.api_url = None
+    search_settings.api_version = None
+    search_settings.deployment_name = None
+    search_settings.reduced_dimension = None
+    return search_settings
+
+
+@patch("onyx.natural_language_processing.search_nlp_models.get_tokenizer")
+def test_query_embedding_model_is_cached_per_settings(
+    mock_get_tokenizer: MagicMock,
+) -> None:
+    model = get_query_embedding_model(_make_search_settings(1, "search_query: "))
+
+    # same settings, no new model or tokenizer load
+    assert get_query_embedding_model(_make_search_settings(1, "search_query: ")) is (
+        model
+    )
+    assert mock_get_tokenizer.call_count == 1
+
+    # editing the settings row invalidates the cached model
+    updated = get_query_embedding_model(_make_search_settings(1, "query: "))
+    assert updated is not model
+    assert updated.query_prefix == "query: "
+
+    # a different search settings row gets its own model
+    assert (
+        get_query_embedding_model(_make_search_settings(2, "search_query: "))
+        is not model
+    )
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.models import ChunkIndexRequest
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.retrieval.search_runner import _embed_and_search
+
+
+def test_precomputed_query_embedding_skips_embedding_call() -> None:
+    document_index = MagicMock()
+    document_index.hybrid_retrieval.return_value = []
+
+    with patch(
+        "onyx.context.search.retrieval.search_runner.get_query_embedding"
+    ) as mock_get_query_embedding:
+        _embed_and_search(
+            query_request=ChunkIndexRequest(
+                query="what is onyx",
+                query_embedding=[0.1, 0.2],
+                filters=IndexFilters(access_control_list=None),
+            ),
+            document_index=document_index,
+            db_session=MagicMock(),
+        )
+
+    mock_get_query_embedding.assert_not_called()
+    assert document_index.hybrid_retrieval.call_args.kwargs["query_embedding"] == [
+        0.1,
+        0.2,
+    ]
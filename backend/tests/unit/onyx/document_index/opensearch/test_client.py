@@ -0,0 +1,87 @@
+import json
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.document_index.opensearch.client import BulkOperationError
+from onyx.document_index.opensearch.client import OpenSearchClient
+
+
+def _bulk_response(statuses: list[int]) -> dict[str, Any]:
+    return {
+        "errors": any(status >= 300 for status in statuses),
+        "items": [
+            {
+                "delete": {
+                    "status": status,
+                    "error": (
+                        {"type": "some_exception", "reason": "some reason"}
+                        if status >= 300 and status != 404
+                        else None
+                    ),
+                }
+            }
+            for status in statuses
+        ],
+    }
+
+
+def _deleted_ids(bulk_call: Any) -> list[str]:
+    body: bytes = bulk_call.kwargs["body"]
+    return [json.loads(line)["delete"]["_id"] for line in body.decode().splitlines()]
+
+
+@pytest.fixture
+def opensearch() -> Generator[MagicMock, None, None]:
+    with (
+        patch("onyx.document_index.opensearch.client.OpenSearch") as opensearch_cls,
+        patch("onyx.document_index.opensearch.client.time.sleep"),
+    ):
+        yield opensearch_cls.return_value
+
+
+def test_bulk_requests_are_split_by_size(opensearch: MagicMock) -> None:
+    opensearch.bulk.side_effect = lambda body, index: _bulk_response(
+        [200] * len(body.splitlines())
+    )
+    client = OpenSearchClient(index_name="test_index")
+
+    single_item_bytes = len(
+        json.dumps({"delete": {"_index": "test_index", "_id": "a"}}) + "\n"
+    )
+    deleted = client.bulk_delete_documents(
+        ["a", "b", "c"], max_batch_bytes=2 * single_item_bytes
+    )
+
+    assert deleted == {"a", "b", "c"}
+    assert [_deleted_ids(call) for call in opensearch.bulk.call_args_list] == [
+        ["a", "b"],
+        ["c"],
+    ]
+
+
+def test_only_failed_items_are_retried(opensearch: MagicMock) -> None:
+    opensearch.bulk.side_effect = [
+        _bulk_response([200, 429, 404]),
+        _bulk_response([200]),
+    ]
+    client = OpenSearchClient(index_name="test_index")
+
+    deleted = client.bulk_delete_documents(["a", "b", "c"])
+
+    assert deleted == {"a", "b"}
+    assert _deleted_ids(opensearch.bulk.call_args_list[1]) == ["b"]
+
+
+def test_non_retryable_failures_raise(opensearch: MagicMock) -> None:
+    opensearch.bulk.return_value = _bulk_response([200, 400])
+    client = OpenSearchClient(index_name="test_index")
+
+    with pytest.raises(BulkOperationError) as exc_info:
+        client.bulk_delete_documents(["a", "b"])
+
+    assert opensearch.bulk.call_count == 1
+    assert [failure.document_chunk_id for failure in exc_info.value.failures] == ["b"]
@@ -0,0 +1,40 @@
+import pytest
+
+from onyx.document_index.document_index_utils import to_metadata_update_request
+from onyx.document_index.interfaces import DocumentFieldsUpdate
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.interfaces import VespaDocumentUserFields
+
+
+def test_empty_user_projects_clear_the_projects() -> None:
+    request = to_metadata_update_request(
+        DocumentFieldsUpdate(
+            doc_id="doc",
+            chunk_count=3,
+            user_fields=VespaDocumentUserFields(user_projects=[]),
+        )
+    )
+
+    assert request.project_ids == set()
+    assert request.doc_id_to_chunk_cnt == {"doc": 3}
+
+
+def test_fields_that_are_not_set_are_left_alone() -> None:
+    request = to_metadata_update_request(
+        DocumentFieldsUpdate(
+            doc_id="doc",
+            chunk_count=None,
+            fields=VespaDocumentFields(hidden=False),
+        )
+    )
+
+    assert request.hidden is False
+    assert request.boost is None
+    assert request.project_ids is None
+    # unknown chunk count
+    assert request.doc_id_to_chunk_cnt == {"doc": -1}
+
+
+def test_update_without_fields_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        to_metadata_update_request(DocumentFieldsUpdate(doc_id="doc", chunk_count=1))
@@ -0,0 +1,62 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.document_index.vespa.deletion import delete_vespa_documents_by_selection
+
+_INDEX_NAME = "danswer_chunk"
+
+
+def _make_http_client(pages: list[dict[str, Any]]) -> MagicMock:
+    http_client = MagicMock()
+    responses = []
+    for page in pages:
+        response = MagicMock()
+        response.json.return_value = page
+        responses.append(response)
+    http_client.delete.side_effect = responses
+    return http_client
+
+
+def test_documents_are_deleted_by_selection_until_done() -> None:
+    http_client = _make_http_client(
+        [
+            {"documentCount": 3, "continuation": "next"},
+            {"documentCount": 2},
+        ]
+    )
+
+    num_deleted = delete_vespa_documents_by_selection(
+        document_ids=["a", "b"], index_name=_INDEX_NAME, http_client=http_client
+    )
+
+    assert num_deleted == 5
+    first_params = http_client.delete.call_args_list[0].kwargs["params"]
+    assert first_params["selection"] == (
+        f"{_INDEX_NAME}.document_id=='a' or {_INDEX_NAME}.document_id=='b'"
+    )
+    assert "continuation" not in first_params
+    assert http_client.delete.call_args_list[1].kwargs["params"]["continuation"] == (
+        "next"
+    )
+
+
+def test_selection_is_batched_escaped_and_scoped_to_the_tenant() -> None:
+    http_client = _make_http_client([{"documentCount": 1}, {"documentCount": 1}])
+
+    with patch("onyx.document_index.vespa.deletion.DELETE_BY_SELECTION_BATCH_SIZE", 1):
+        delete_vespa_documents_by_selection(
+            document_ids=["C:\\docs\\a", "b"],
+            index_name=_INDEX_NAME,
+            http_client=http_client,
+            tenant_id="tenant",
+        )
+
+    selections = [
+        call.kwargs["params"]["selection"] for call in http_client.delete.call_args_list
+    ]
+    assert selections == [
+        f"({_INDEX_NAME}.document_id=='C:\\\\docs\\\\a') and "
+        f"{_INDEX_NAME}.tenant_id=='tenant'",
+        f"({_INDEX_NAME}.document_id=='b') and {_INDEX_NAME}.tenant_id=='tenant'",
+    ]
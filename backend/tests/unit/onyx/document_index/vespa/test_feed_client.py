@@ -0,0 +1,130 @@
+import asyncio
+import json
+from collections.abc import Callable
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.document_index.vespa.feed_client import AdaptiveInFlightLimit
+from onyx.document_index.vespa.feed_client import VespaFeedClient
+from onyx.document_index.vespa.feed_client import VespaFeedOperation
+
+
+def _make_operation(
+    ordering_key: str, value: int, partial_update: bool = False
+) -> VespaFeedOperation:
+    return VespaFeedOperation(
+        ordering_key=ordering_key,
+        url=f"http://vespa/document/v1/default/test/docid/{ordering_key}",
+        fields={"value": value},
+        document_id=ordering_key,
+        partial_update=partial_update,
+    )
+
+
+def _feed_with_handler(
+    operations: list[VespaFeedOperation],
+    handler: Callable[[httpx.Request], httpx.Response],
+    collect_failures: bool = False,
+) -> dict[str, Exception] | None:
+    def _make_client(max_connections: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    with (
+        patch(
+            "onyx.document_index.vespa.feed_client.get_vespa_async_http_client",
+            side_effect=_make_client,
+        ),
+        patch("onyx.document_index.vespa.feed_client.INDEXING_BASE_DELAY", 0),
+    ):
+        if collect_failures:
+            return VespaFeedClient().feed_and_collect_failures(operations)
+        VespaFeedClient().feed(operations)
+        return None
+
+
+def test_operations_with_the_same_key_are_sent_in_order() -> None:
+    sent: list[tuple[str, int]] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        key = request.url.path.rsplit("/", 1)[-1]
+        sent.append((key, json.loads(request.content)["fields"]["value"]))
+        return httpx.Response(200)
+
+    operations = [_make_operation(key, i) for i in range(5) for key in ("a", "b")]
+    _feed_with_handler(operations, _handler)
+
+    assert [value for key, value in sent if key == "a"] == list(range(5))
+    assert [value for key, value in sent if key == "b"] == list(range(5))
+
+
+def test_throttled_requests_are_retried() -> None:
+    attempts: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        # throttle the first attempt only
+        return httpx.Response(429 if len(attempts) == 1 else 200)
+
+    _feed_with_handler([_make_operation("a", 1)], _handler)
+
+    assert len(attempts) == 2
+
+
+def test_non_retryable_errors_fail_the_feed() -> None:
+    attempts: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        return httpx.Response(400, text="bad document")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _feed_with_handler([_make_operation("a", 1)], _handler)
+
+    assert len(attempts) == 1
+
+
+def test_partial_update_failures_are_collected_per_document() -> None:
+    methods: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        methods.append(request.method)
+        if request.url.path.endswith("/b"):
+            return httpx.Response(400, text="bad update")
+        return httpx.Response(200)
+
+    failures = _feed_with_handler(
+        [_make_operation(key, 1, partial_update=True) for key in ("a", "b", "c", "d")],
+        _handler,
+        collect_failures=True,
+    )
+
+    # the failed document does not stop the others
+    assert methods == ["PUT"] * 4
+    assert failures is not None
+    assert list(failures) == ["b"]
+    assert isinstance(failures["b"], httpx.HTTPStatusError)
+
+
+def test_in_flight_limit_backs_off_and_recovers() -> None:
+    async def _run() -> None:
+        limit = AdaptiveInFlightLimit(initial=8, minimum=2, maximum=9)
+
+        await limit.acquire()
+        await limit.release(throttled=True)
+        assert limit.limit == 4
+
+        await limit.acquire()
+        await limit.release(throttled=True)
+        await limit.acquire()
+        await limit.release(throttled=True)
+        assert limit.limit == 2
+
+        # grows by one after `limit` consecutive successes
+        for _ in range(2):
+            await limit.acquire()
+            await limit.release(throttled=False)
+        assert limit.limit == 3
+
+    asyncio.run(_run())
@@ -0,0 +1,115 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+from onyx.document_index.document_index_utils import get_uuid_from_chunk_info_old
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.vespa.indexing_utils import get_final_chunk_indices
+
+_INDEX_NAME = "danswer_chunk"
+
+
+def _vespa_document(
+    document_id: str, chunk_id: int, old_version: bool = True
+) -> dict[str, Any]:
+    vespa_uuid = (
+        get_uuid_from_chunk_info_old(document_id=document_id, chunk_id=chunk_id)
+        if old_version
+        else "00000000-0000-0000-0000-000000000000"
+    )
+    return {
+        "id": f"id:default:{_INDEX_NAME}::{vespa_uuid}",
+        "fields": {"document_id": document_id, "chunk_id": chunk_id},
+    }
+
+
+def _make_http_client(pages: list[dict[str, Any]]) -> MagicMock:
+    http_client = MagicMock()
+    responses = []
+    for page in pages:
+        response = MagicMock()
+        response.json.return_value = page
+        responses.append(response)
+    http_client.get.side_effect = responses
+    return http_client
+
+
+def test_final_chunk_indices_are_found_with_one_paginated_visit() -> None:
+    http_client = _make_http_client(
+        [
+            {
+                "documents": [
+                    _vespa_document("a", 0),
+                    _vespa_document("a", 1),
+                    _vespa_document("b", 0),
+                ],
+                "continuation": "next",
+            },
+            {
+                "documents": [
+                    _vespa_document("a", 2),
+                    # chunk ids are not contiguous, the probe stops at the first gap
+                    _vespa_document("b", 2),
+                ]
+            },
+        ]
+    )
+
+    final_chunk_indices = get_final_chunk_indices(
+        minimal_doc_infos=[
+            MinimalDocumentIndexingInfo(doc_id="a", chunk_start_index=1),
+            MinimalDocumentIndexingInfo(doc_id="b", chunk_start_index=0),
+            MinimalDocumentIndexingInfo(doc_id="c", chunk_start_index=0),
+        ],
+        index_name=_INDEX_NAME,
+        http_client=http_client,
+    )
+
+    assert final_chunk_indices == {"a": 3, "b": 1, "c": 0}
+    assert http_client.get.call_count == 2
+    assert http_client.get.call_args.kwargs["params"]["continuation"] == "next"
+
+
+def test_chunks_with_new_style_ids_are_ignored() -> None:
+    http_client = _make_http_client(
+        [
+            {
+                "documents": [
+                    _vespa_document("a", 0),
+                    _vespa_document("a", 1, old_version=False),
+                ]
+            }
+        ]
+    )
+
+    final_chunk_indices = get_final_chunk_indices(
+        minimal_doc_infos=[
+            MinimalDocumentIndexingInfo(doc_id="a", chunk_start_index=0)
+        ],
+        index_name=_INDEX_NAME,
+        http_client=http_client,
+    )
+
+    assert final_chunk_indices == {"a": 1}
+
+
+def test_document_ids_are_sanitized_and_escaped_in_the_selection() -> None:
+    # the chunks of "it's" are stored under the sanitized document id "it_s"
+    http_client = _make_http_client(
+        [{"documents": [_vespa_document("it_s", 0), _vespa_document("C:\\a", 0)]}]
+    )
+
+    final_chunk_indices = get_final_chunk_indices(
+        minimal_doc_infos=[
+            MinimalDocumentIndexingInfo(doc_id="it's", chunk_start_index=0),
+            MinimalDocumentIndexingInfo(doc_id="C:\\a", chunk_start_index=0),
+        ],
+        index_name=_INDEX_NAME,
+        http_client=http_client,
+    )
+
+    assert final_chunk_indices == {"it's": 1, "C:\\a": 1}
+    assert http_client.get.call_args.kwargs["params"]["selection"] == (
+        f"({_INDEX_NAME}.document_id=='it_s' or "
+        f"{_INDEX_NAME}.document_id=='C:\\\\a') and "
+        f"{_INDEX_NAME}.large_chunk_reference_ids == null"
+    )
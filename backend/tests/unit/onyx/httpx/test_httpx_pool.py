@@ -0,0 +1,51 @@
+import os
+from collections.abc import Generator
+
+import httpx
+import pytest
+
+from onyx.httpx.httpx_pool import httpx_pool_requests
+from onyx.httpx.httpx_pool import HttpxPool
+
+
+@pytest.fixture(autouse=True)
+def _close_clients() -> Generator[None, None, None]:
+    yield
+    HttpxPool.close_all()
+
+
+def test_requests_are_counted_per_client() -> None:
+    HttpxPool.init_client(
+        name="test_counted",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+    )
+    requests_before = httpx_pool_requests.labels(client="test_counted")._value.get()
+
+    client = HttpxPool.get("test_counted")
+    client.get("http://vespa/search/")
+    client.get("http://vespa/search/")
+
+    assert (
+        httpx_pool_requests.labels(client="test_counted")._value.get()
+        == requests_before + 2
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_forked_child_does_not_reuse_parent_clients() -> None:
+    parent_client = HttpxPool.get("test_fork")
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            reused = HttpxPool.get("test_fork") is parent_client
+            os.write(write_fd, b"1" if reused else b"0")
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd, "rb") as reader:
+        assert reader.read() == b"0"
+    assert HttpxPool.get("test_fork") is parent_client
@@ -1,17 +1,22 @@
+import re
 from typing import Any
 from unittest.mock import Mock
 
 import pytest
+from chonkie import SentenceChunker
 
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import RETURN_SEPARATOR
+from onyx.configs.constants import SECTION_SEPARATOR
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.natural_language_processing.utils import BaseTokenizer
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -105,3 +110,115 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+class _WordTokenizer(BaseTokenizer):
+    """One token per word (with the whitespace around it), records every string it
+    encodes."""
+
+    _TOKEN_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+        self._vocab: list[str] = []
+        self._token_ids: dict[str, int] = {}
+
+    def encode(self, string: str) -> list[int]:
+        self.encoded.append(string)
+        return [
+            self._token_ids.setdefault(token, len(self._token_ids))
+            for token in self.tokenize(string)
+        ]
+
+    def tokenize(self, string: str) -> list[str]:
+        tokens = self._TOKEN_PATTERN.findall(string)
+        for token in tokens:
+            if token not in self._token_ids:
+                self._token_ids[token] = len(self._vocab)
+                self._vocab.append(token)
+        return tokens
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self._vocab[token] for token in tokens)
+
+
+def test_word_tokenizer_decode_inverts_encode() -> None:
+    tokenizer = _WordTokenizer()
+    for text in ["  Two words. ", "\n\n", "", "a\tb\nc"]:
+        assert tokenizer.decode(tokenizer.encode(text)) == text
+
+
+def test_chunker_tokenizes_each_section_once() -> None:
+    title = "Test Document"
+    sections = [
+        "This sentence has exactly seven words. " * 200,
+        "A short section. " * 3,
+        "Another short section.",
+    ]
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier=title,
+        metadata={},
+        doc_updated_at=None,
+        sections=[
+            TextSection(text=text, link=f"link{i}") for i, text in enumerate(sections)
+        ],
+    )
+    indexing_documents = process_image_sections([document])
+
+    tokenizer = _WordTokenizer()
+    chunker = Chunker(
+        tokenizer=tokenizer,
+        enable_multipass=True,
+        include_metadata=False,
+        blurb_size=20,
+        chunk_token_limit=512,
+        mini_chunk_size=50,
+    )
+    chunks = chunker.chunk(indexing_documents)
+
+    def _splitter_encodes(text: str) -> list[str]:
+        """The strings a single sentence split of `text` encodes: every sentence,
+        then every piece that fits the chunk token limit."""
+        reference_tokenizer = _WordTokenizer()
+        SentenceChunker(
+            tokenizer_or_token_counter=lambda text: len(
+                reference_tokenizer.encode(text)
+            ),
+            chunk_size=512,
+            return_type="chunks",
+        ).chunk(text)
+        return reference_tokenizer.encoded
+
+    # the section separator once, the title split and its prefix, then a single
+    # split per section. Blurbs and mini-chunks reuse those token counts.
+    expected_encodes = [SECTION_SEPARATOR]
+    expected_encodes += _splitter_encodes(title) + [title + RETURN_SEPARATOR]
+    for text in sections:
+        section_encodes = _splitter_encodes(text)
+        assert len(section_encodes) > 1
+        expected_encodes += section_encodes
+    assert tokenizer.encoded == expected_encodes
+
+    def _split(text: str, chunk_size: int) -> list[str]:
+        return [
+            split
+            for split in SentenceChunker(
+                tokenizer_or_token_counter=lambda text: len(
+                    _WordTokenizer().encode(text)
+                ),
+                chunk_size=chunk_size,
+                return_type="texts",
+            ).chunk(text)
+            if isinstance(split, str)
+        ]
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert chunk.blurb
+        assert chunk.mini_chunk_texts
+        # the same texts as splitting the chunk content again
+        if SECTION_SEPARATOR not in chunk.content:
+            assert chunk.blurb == _split(chunk.content, 20)[0]
+            assert chunk.mini_chunk_texts == _split(chunk.content, 50)
@@ -7,6 +7,8 @@ import pytest
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
+from onyx.indexing.embedder import build_embedding_model_key
+from onyx.indexing.embedder import compute_embedding_fingerprint
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -103,3 +105,132 @@ def test_default_indexing_embedder_embed_chunks(
         tenant_id=None,
         request_id=None,
     )
+
+
+def _make_chunk(source_doc: Document, chunk_id: int, content: str) -> DocAwareChunk:
+    return DocAwareChunk(
+        chunk_id=chunk_id,
+        blurb=content,
+        content=content,
+        source_links={0: "link1"},
+        section_continuation=False,
+        source_document=source_doc,
+        title_prefix="Title: ",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        mini_chunk_texts=None,
+        large_chunk_reference_ids=[],
+        large_chunk_id=None,
+        image_file_id=None,
+        chunk_context="",
+        doc_summary="",
+        contextual_rag_reserved_tokens=0,
+    )
+
+
+def test_default_indexing_embedder_reuses_cached_embeddings(
+    mock_embedding_model: Mock,
+) -> None:
+    embedder = DefaultIndexingEmbedder(
+        model_name="test-model",
+        normalize=True,
+        query_prefix=None,
+        passage_prefix=None,
+        reuse_cached_embeddings=True,
+    )
+    source_doc = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        doc_updated_at=None,
+        sections=[TextSection(text="Unchanged chunk. Changed chunk.", link="link1")],
+    )
+    unchanged_chunk = _make_chunk(source_doc, 0, "Unchanged chunk")
+    changed_chunk = _make_chunk(source_doc, 1, "Changed chunk")
+
+    unchanged_fingerprint = compute_embedding_fingerprint(
+        model_key=embedder.model_key, texts=["Title: Unchanged chunk"]
+    )
+    changed_fingerprint = compute_embedding_fingerprint(
+        model_key=embedder.model_key, texts=["Title: Changed chunk"]
+    )
+    title_fingerprint = compute_embedding_fingerprint(
+        model_key=embedder.model_key, texts=["Test Document"]
+    )
+
+    mock_embedding_model.return_value.encode.return_value = [[4.0, 5.0, 6.0]]
+
+    with (
+        patch("onyx.indexing.embedder.get_session_with_current_tenant"),
+        patch(
+            "onyx.indexing.embedder.fetch_cached_chunk_embeddings",
+            return_value={
+                ("test_doc", unchanged_fingerprint): [[1.0, 2.0, 3.0]],
+                ("test_doc", title_fingerprint): [[7.0, 8.0, 9.0]],
+                # stale entry from a previous version of the document
+                ("test_doc", "stale"): [[0.0, 0.0, 0.0]],
+            },
+        ),
+        patch(
+            "onyx.indexing.embedder.upsert_cached_chunk_embeddings__no_commit"
+        ) as mock_upsert,
+    ):
+        result = embedder.embed_chunks([unchanged_chunk, changed_chunk])
+
+    assert [chunk.embeddings.full_embedding for chunk in result] == [
+        [1.0, 2.0, 3.0],
+        [4.0, 5.0, 6.0],
+    ]
+    assert all(chunk.title_embedding == [7.0, 8.0, 9.0] for chunk in result)
+
+    # only the changed chunk is sent to the model, the title is cached as well
+    mock_embedding_model.return_value.encode.assert_called_once_with(
+        texts=["Title: Changed chunk"],
+        text_type=EmbedTextType.PASSAGE,
+        large_chunks_present=False,
+        tenant_id=None,
+        request_id=None,
+    )
+
+    upsert_kwargs = mock_upsert.call_args.kwargs
+    assert upsert_kwargs["model_key"] == embedder.model_key
+    assert upsert_kwargs["new_embeddings"] == {
+        ("test_doc", changed_fingerprint): [[4.0, 5.0, 6.0]]
+    }
+    assert sorted(upsert_kwargs["document_id_to_fingerprints"]["test_doc"]) == sorted(
+        [unchanged_fingerprint, changed_fingerprint, title_fingerprint]
+    )
+
+
+def test_embedding_fingerprint_depends_on_model() -> None:
+    model_key = build_embedding_model_key(
+        model_name="model-a",
+        provider_type=None,
+        normalize=True,
+        passage_prefix=None,
+        reduced_dimension=None,
+        api_url=None,
+        deployment_name=None,
+    )
+    other_model_key = build_embedding_model_key(
+        model_name="model-b",
+        provider_type=None,
+        normalize=True,
+        passage_prefix=None,
+        reduced_dimension=None,
+        api_url=None,
+        deployment_name=None,
+    )
+
+    fingerprint = compute_embedding_fingerprint(model_key, ["Title: content"])
+    assert fingerprint == compute_embedding_fingerprint(model_key, ["Title: content"])
+    assert fingerprint != compute_embedding_fingerprint(
+        other_model_key, ["Title: content"]
+    )
+    assert fingerprint != compute_embedding_fingerprint(
+        model_key, ["Title: content", "mini chunk"]
+    )
+    assert fingerprint != compute_embedding_fingerprint(
+        model_key, ["Title: content"], is_large_chunk=True
+    )
@@ -1,27 +1,38 @@
+from io import BytesIO
 from typing import Any
 from typing import cast
 from typing import List
+from unittest.mock import MagicMock
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
+from PIL import Image
 
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import ImageSection
 from onyx.connectors.models import TextSection
+from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import add_contextual_summaries
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
 from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import index_doc_batch
 from onyx.indexing.indexing_pipeline import process_image_sections
+from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import IndexChunk
 from onyx.llm.constants import LlmProviderNames
 from onyx.llm.model_response import Choice
 from onyx.llm.model_response import Message
 from onyx.llm.model_response import ModelResponse
 from onyx.llm.utils import get_max_input_tokens
 
+_PIPELINE_MODULE = "onyx.indexing.indexing_pipeline"
+
 
 def create_test_document(
     doc_id: str = "test_id",
@@ -218,3 +229,300 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+def _make_doc_aware_chunk(document: Document, chunk_id: int) -> DocAwareChunk:
+    return DocAwareChunk(
+        chunk_id=chunk_id,
+        blurb="blurb",
+        content=f"content {chunk_id}",
+        source_links={0: "test_link"},
+        image_file_id=None,
+        section_continuation=False,
+        source_document=document,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=0,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+    )
+
+
+def test_index_doc_batch_streaming() -> None:
+    documents = [create_test_document(doc_id=f"doc_{i}") for i in range(10)]
+
+    chunker = Mock()
+    chunker.enable_large_chunks = False
+    chunker.chunk.side_effect = lambda docs: [
+        _make_doc_aware_chunk(doc, chunk_id) for doc in docs for chunk_id in range(2)
+    ]
+
+    def mock_embed(
+        chunks: list[DocAwareChunk], **kwargs: Any
+    ) -> tuple[list[IndexChunk], list]:
+        return [
+            IndexChunk(
+                **chunk.model_dump(),
+                embeddings=ChunkEmbedding(
+                    full_embedding=[0.0], mini_chunk_embeddings=[]
+                ),
+                title_embedding=None,
+            )
+            for chunk in chunks
+        ], []
+
+    written_batches: list[list[str]] = []
+
+    def mock_write(
+        document_index: Any, chunks: list[Any], index_batch_params: Any
+    ) -> tuple[list[DocumentInsertionRecord], list]:
+        doc_ids = sorted({chunk.source_document.id for chunk in chunks})
+        written_batches.append(doc_ids)
+        return [
+            DocumentInsertionRecord(document_id=doc_id, already_existed=False)
+            for doc_id in doc_ids
+        ], []
+
+    def mock_build_metadata_aware_chunks(
+        chunks_with_embeddings: list[IndexChunk],
+        chunk_content_scores: list[float],
+        tenant_id: str,
+        context: DocumentBatchPrepareContext,
+    ) -> Mock:
+        return Mock(
+            chunks=chunks_with_embeddings,
+            doc_id_to_previous_chunk_cnt={},
+            doc_id_to_new_chunk_cnt={
+                doc.id: len(
+                    [
+                        chunk
+                        for chunk in chunks_with_embeddings
+                        if chunk.source_document.id == doc.id
+                    ]
+                )
+                for doc in context.updatable_docs
+            },
+            user_file_id_to_raw_text={},
+            user_file_id_to_token_count={},
+        )
+
+    adapter = MagicMock()
+    adapter.prepare.side_effect = lambda docs, _: DocumentBatchPrepareContext(
+        updatable_docs=docs, id_to_boost_map={}
+    )
+    adapter.build_metadata_aware_chunks.side_effect = mock_build_metadata_aware_chunks
+
+    with (
+        patch(f"{_PIPELINE_MODULE}.INDEXING_PIPELINE_STREAMING_ENABLED", True),
+        patch(f"{_PIPELINE_MODULE}.INDEXING_PIPELINE_SUB_BATCH_SIZE", 3),
+        patch(f"{_PIPELINE_MODULE}.INDEXING_PIPELINE_EMBED_WORKERS", 2),
+        patch(f"{_PIPELINE_MODULE}.INDEXING_PIPELINE_WRITE_WORKERS", 2),
+        patch(
+            f"{_PIPELINE_MODULE}.get_image_extraction_and_analysis_enabled",
+            return_value=False,
+        ),
+        patch(
+            f"{_PIPELINE_MODULE}.embed_chunks_with_failure_handling",
+            side_effect=mock_embed,
+        ),
+        patch(
+            f"{_PIPELINE_MODULE}.write_chunks_to_vector_db_with_backoff",
+            side_effect=mock_write,
+        ),
+    ):
+        result = index_doc_batch(
+            document_batch=documents,
+            chunker=chunker,
+            embedder=Mock(),
+            document_index=Mock(),
+            request_id=None,
+            tenant_id="test_tenant",
+            adapter=adapter,
+        )
+
+    assert result.total_docs == 10
+    assert result.new_docs == 10
+    assert result.total_chunks == 20
+    assert result.failures == []
+
+    # every sub-batch is written separately and contains whole documents
+    assert len(written_batches) == 4
+    assert sorted(doc_id for batch in written_batches for doc_id in batch) == sorted(
+        doc.id for doc in documents
+    )
+
+    # the lock is only acquired once and finalization happens once for the whole batch
+    adapter.lock_context.assert_called_once()
+    adapter.post_index.assert_called_once()
+    post_index_kwargs = adapter.post_index.call_args.kwargs
+    assert len(post_index_kwargs["updatable_chunk_data"]) == 20
+    assert post_index_kwargs["result"].doc_id_to_new_chunk_cnt == {
+        doc.id: 2 for doc in documents
+    }
+
+
+@patch(f"{_PIPELINE_MODULE}.USE_DOCUMENT_SUMMARY", True)
+@patch(f"{_PIPELINE_MODULE}.USE_CHUNK_SUMMARY", True)
+def test_contextual_summaries_reuse_cached_summaries() -> None:
+    document = create_test_document(doc_id="doc")
+
+    def _make_chunks() -> list[DocAwareChunk]:
+        return [
+            _make_doc_aware_chunk(document, chunk_id).model_copy(
+                update={"contextual_rag_reserved_tokens": 100}
+            )
+            for chunk_id in range(2)
+        ]
+
+    llm_invoke_count = 0
+
+    def mock_llm_invoke(*args: Any, **kwargs: Any) -> ModelResponse:
+        nonlocal llm_invoke_count
+        llm_invoke_count += 1
+        return ModelResponse(
+            id=f"test-{llm_invoke_count}",
+            created="2024-01-01T00:00:00Z",
+            choice=Choice(message=Message(content=f"Summary{llm_invoke_count}")),
+        )
+
+    mock_llm = Mock()
+    mock_llm.config.max_input_tokens = 10_000
+    mock_llm.config.model_provider = "openai"
+    mock_llm.config.model_name = "gpt-4o-mini"
+    mock_llm.invoke = mock_llm_invoke
+
+    tokenizer = Mock()
+    tokenizer.encode.side_effect = lambda text: text.split()
+    tokenizer.decode.side_effect = " ".join
+
+    stored: dict[tuple[str, str], str] = {}
+
+    def mock_upsert(**kwargs: Any) -> None:
+        stored.update(kwargs["new_summaries"])
+
+    with (
+        patch(f"{_PIPELINE_MODULE}.get_session_with_current_tenant"),
+        patch(
+            f"{_PIPELINE_MODULE}.fetch_cached_contextual_rag_summaries",
+            side_effect=lambda **kwargs: dict(stored),
+        ),
+        patch(
+            f"{_PIPELINE_MODULE}.upsert_cached_contextual_rag_summaries__no_commit",
+            side_effect=mock_upsert,
+        ),
+        patch(
+            "onyx.llm.prompt_cache.processor.process_with_prompt_cache",
+            side_effect=lambda **kwargs: (kwargs["suffix"], None),
+        ),
+    ):
+        first_chunks = add_contextual_summaries(
+            chunks=_make_chunks(),
+            llm=mock_llm,
+            tokenizer=tokenizer,
+            chunk_token_limit=100,
+            reuse_cached_summaries=True,
+        )
+        # one document summary and one context per chunk
+        assert llm_invoke_count == 3
+        assert len(stored) == 3
+
+        second_chunks = add_contextual_summaries(
+            chunks=_make_chunks(),
+            llm=mock_llm,
+            tokenizer=tokenizer,
+            chunk_token_limit=100,
+            reuse_cached_summaries=True,
+        )
+
+    assert llm_invoke_count == 3
+    assert [(chunk.doc_summary, chunk.chunk_context) for chunk in second_chunks] == [
+        (chunk.doc_summary, chunk.chunk_context) for chunk in first_chunks
+    ]
+
+
+def _png(size: int, color: str) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", (size, size), color).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_process_image_sections_summarizes_each_image_content_once() -> None:
+    images = {
+        "logo_1": _png(64, "red"),
+        "logo_2": _png(64, "red"),
+        "diagram": _png(64, "blue"),
+        "icon": _png(8, "red"),
+    }
+    file_store = MagicMock()
+    file_store.read_file_record.side_effect = lambda file_id: MagicMock(
+        display_name=file_id
+    )
+    file_store.read_file.side_effect = lambda file_id: BytesIO(images[file_id])
+
+    def _document(doc_id: str, image_file_ids: list[str]) -> Document:
+        return Document(
+            id=doc_id,
+            semantic_identifier=doc_id,
+            sections=[TextSection(text="intro", link="link")]
+            + [
+                ImageSection(image_file_id=image_file_id, link="link")
+                for image_file_id in image_file_ids
+            ],
+            source=DocumentSource.FILE,
+            metadata={},
+        )
+
+    stored: dict[str, str] = {}
+    summarize = MagicMock(side_effect=lambda **kwargs: kwargs["context_name"])
+
+    with (
+        patch(
+            f"{_PIPELINE_MODULE}.get_image_extraction_and_analysis_enabled",
+            return_value=True,
+        ),
+        patch(f"{_PIPELINE_MODULE}.get_default_llm_with_vision") as get_llm,
+        patch(
+            f"{_PIPELINE_MODULE}.get_default_file_store", return_value=file_store
+        ) as get_file_store,
+        patch(f"{_PIPELINE_MODULE}.get_session_with_current_tenant"),
+        patch(
+            f"{_PIPELINE_MODULE}.fetch_cached_image_summaries",
+            side_effect=lambda **kwargs: dict(stored),
+        ) as fetch_cached_image_summaries,
+        patch(
+            f"{_PIPELINE_MODULE}.upsert_cached_image_summaries__no_commit",
+            side_effect=lambda **kwargs: stored.update(kwargs["new_summaries"]),
+        ),
+        patch(f"{_PIPELINE_MODULE}.summarize_image_with_error_handling", summarize),
+    ):
+        get_llm.return_value.config.model_provider = "openai"
+        get_llm.return_value.config.model_name = "gpt-4o"
+        documents = [
+            _document("doc_1", ["logo_1", "diagram", "icon"]),
+            _document("doc_2", ["logo_2", "logo_1"]),
+        ]
+        indexing_documents = process_image_sections(documents)
+
+        get_file_store.assert_called_once()
+        # the cache is looked up once for the whole batch
+        fetch_cached_image_summaries.assert_called_once()
+        # each image file is read to fingerprint it, then one file per distinct
+        # content is read again to summarize it, the icon is skipped
+        assert sorted(
+            call.kwargs["file_id"] for call in file_store.read_file.call_args_list
+        ) == ["diagram", "diagram", "icon", "logo_1", "logo_1", "logo_2"]
+        assert summarize.call_count == 2
+        # logo_2 has the same content as logo_1 under another file id
+        assert [
+            [section.text for section in document.processed_sections]
+            for document in indexing_documents
+        ] == [["intro", "logo_1", "diagram", ""], ["intro", "logo_1", "logo_1"]]
+        assert indexing_documents[0].sections == documents[0].sections
+
+        process_image_sections([_document("doc_3", ["logo_2", "diagram"])])
+
+    # served from the image summary cache
+    assert summarize.call_count == 2
@@ -4,14 +4,26 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
+from requests import Response
 
 from onyx.llm.constants import LlmProviderNames
+from onyx.natural_language_processing.search_nlp_models import (
+    _parse_model_server_embed_response,
+)
 from onyx.natural_language_processing.search_nlp_models import CloudEmbedding
+from onyx.natural_language_processing.search_nlp_models import (
+    get_model_server_session,
+)
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EMBEDDINGS_BINARY_CONTENT_TYPE
+from shared_configs.model_server_models import EMBEDDINGS_COUNT_HEADER
+from shared_configs.model_server_models import EMBEDDINGS_DIM_HEADER
+from shared_configs.utils import embeddings_to_bytes
 
 
 @pytest.fixture
@@ -84,3 +96,68 @@ async def test_rate_limit_handling() -> None:
                 model_name="fake-model",
                 text_type=EmbedTextType.QUERY,
             )
+
+
+def _make_response(content: bytes, headers: dict[str, str]) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = content
+    response.headers.update(headers)
+    return response
+
+
+def test_parse_binary_embed_response() -> None:
+    embeddings = np.array([[0.5, -1.0, 2.0], [0.25, 0.0, -0.125]], dtype=np.float32)
+    response = _make_response(
+        embeddings_to_bytes(embeddings),
+        {
+            "Content-Type": EMBEDDINGS_BINARY_CONTENT_TYPE,
+            EMBEDDINGS_COUNT_HEADER: "2",
+            EMBEDDINGS_DIM_HEADER: "3",
+        },
+    )
+
+    assert _parse_model_server_embed_response(response).embeddings == [
+        [0.5, -1.0, 2.0],
+        [0.25, 0.0, -0.125],
+    ]
+
+
+def test_parse_binary_embed_response_shape_mismatch() -> None:
+    response = _make_response(
+        embeddings_to_bytes(np.zeros((2, 3))),
+        {
+            "Content-Type": EMBEDDINGS_BINARY_CONTENT_TYPE,
+            EMBEDDINGS_COUNT_HEADER: "2",
+            EMBEDDINGS_DIM_HEADER: "4",
+        },
+    )
+
+    with pytest.raises(ValueError):
+        _parse_model_server_embed_response(response)
+
+
+def test_parse_json_embed_response_fallback(
+    sample_embeddings: List[List[float]],
+) -> None:
+    # older model servers ignore the Accept header and respond with JSON
+    response = _make_response(
+        b'{"embeddings": [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]}',
+        {"Content-Type": "application/json"},
+    )
+
+    assert _parse_model_server_embed_response(response).embeddings == (
+        sample_embeddings
+    )
+
+
+def test_model_server_session_is_shared_per_process() -> None:
+    session = get_model_server_session()
+    assert get_model_server_session() is session
+
+    # a forked child must not reuse the parent's pooled connections
+    with patch(
+        "onyx.natural_language_processing.search_nlp_models.os.getpid",
+        return_value=-1,
+    ):
+        assert get_model_server_session() is not session
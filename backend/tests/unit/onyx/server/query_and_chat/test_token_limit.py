@@ -0,0 +1,140 @@
+from collections.abc import Generator
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.server.query_and_chat.token_limit import _is_rate_limited
+from onyx.server.query_and_chat.token_limit import fetch_token_usage
+from onyx.server.query_and_chat.token_limit import record_token_usage
+
+_MODULE = "onyx.server.query_and_chat.token_limit"
+
+
+class _FakeRedis:
+    """Just enough of the Redis hash commands for the usage counters."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return dict(self.hashes.get(key, {}))
+
+    def hincrby(self, key: str, field: str, amount: int) -> None:
+        fields = self.hashes.setdefault(key, {})
+        current = int(fields.get(field.encode(), 0))
+        fields[field.encode()] = str(current + amount).encode()
+
+    def hset(
+        self,
+        key: str,
+        field: str | None = None,
+        value: Any = None,
+        mapping: dict[str, Any] | None = None,
+    ) -> None:
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        fields = self.hashes.setdefault(key, {})
+        for name, item in items.items():
+            fields[name.encode()] = str(item).encode()
+
+    def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self.hashes.get(key, {}).pop(field.encode(), None)
+
+    def delete(self, key: str) -> None:
+        self.hashes.pop(key, None)
+
+    def expire(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def execute(self) -> None:
+        pass
+
+    def pipeline(self, transaction: bool = True) -> "_FakeRedis":
+        return self
+
+    def lock(self, *args: Any, **kwargs: Any) -> MagicMock:
+        lock = MagicMock()
+        lock.acquire.return_value = True
+        return lock
+
+
+def _rate_limit(period_hours: int, token_budget: int) -> MagicMock:
+    rate_limit = MagicMock()
+    rate_limit.period_hours = period_hours
+    rate_limit.token_budget = token_budget
+    return rate_limit
+
+
+@pytest.fixture
+def redis_client() -> Generator[_FakeRedis, None, None]:
+    redis_client = _FakeRedis()
+    with (
+        patch(f"{_MODULE}.get_redis_client", return_value=redis_client),
+        patch(f"{_MODULE}.get_current_tenant_id", return_value="tenant"),
+        patch(f"{_MODULE}.any_rate_limit_exists", return_value=True),
+    ):
+        yield redis_client
+
+
+def test_cold_start_reconciles_from_db_once(redis_client: _FakeRedis) -> None:
+    rate_limits = [_rate_limit(period_hours=1, token_budget=1)]
+    recent = datetime.now(tz=timezone.utc) - timedelta(minutes=5)
+    fetch_usage_from_db = MagicMock(return_value=[(recent, 600)])
+
+    usage = fetch_token_usage("global", rate_limits, fetch_usage_from_db)
+    assert usage == [(recent, 600)]
+    assert not _is_rate_limited(rate_limits, usage)
+
+    record_token_usage(None, 500, MagicMock())
+    usage = fetch_token_usage("global", rate_limits, fetch_usage_from_db)
+
+    # the second check is served from the counters
+    fetch_usage_from_db.assert_called_once()
+    assert sum(token_count for _, token_count in usage) == 1100
+    assert _is_rate_limited(rate_limits, usage)
+
+
+def test_expired_buckets_are_dropped(redis_client: _FakeRedis) -> None:
+    old = datetime.now(tz=timezone.utc) - timedelta(hours=2)
+    fetch_token_usage(
+        "global", [_rate_limit(period_hours=3, token_budget=1)], lambda _: [(old, 100)]
+    )
+
+    usage = fetch_token_usage(
+        "global", [_rate_limit(period_hours=1, token_budget=1)], MagicMock()
+    )
+
+    assert usage == []
+    assert list(redis_client.hashes["token_usage:tenant:global"]) == [b"covered_from"]
+
+
+def test_longer_period_triggers_reconciliation(redis_client: _FakeRedis) -> None:
+    fetch_token_usage(
+        "global", [_rate_limit(period_hours=1, token_budget=1)], lambda _: []
+    )
+
+    fetch_usage_from_db = MagicMock(return_value=[])
+    fetch_token_usage(
+        "global", [_rate_limit(period_hours=24, token_budget=1)], fetch_usage_from_db
+    )
+
+    fetch_usage_from_db.assert_called_once()
+
+
+def test_falls_back_to_db_without_redis(redis_client: _FakeRedis) -> None:
+    recent = datetime.now(tz=timezone.utc)
+    with patch(f"{_MODULE}.get_redis_client", side_effect=ConnectionError):
+        usage = fetch_token_usage(
+            "global",
+            [_rate_limit(period_hours=1, token_budget=1)],
+            lambda _: [(recent, 10)],
+        )
+
+    assert usage == [(recent, 10)]
@@ -8,7 +8,9 @@ from concurrent.futures import ThreadPoolExecutor
 import pytest
 
 from onyx.utils.threadpool_concurrency import parallel_yield
+from onyx.utils.threadpool_concurrency import PipelineStage
 from onyx.utils.threadpool_concurrency import run_in_background
+from onyx.utils.threadpool_concurrency import run_pipelined_stages
 from onyx.utils.threadpool_concurrency import run_with_timeout
 from onyx.utils.threadpool_concurrency import ThreadSafeDict
 from onyx.utils.threadpool_concurrency import wait_on_background
@@ -389,3 +391,89 @@ def test_parallel_yield_non_blocking() -> None:
     # Verify no values are missing
     assert len(results) == 300  # Should have all values from 0 to 299
     assert sorted(results) == list(range(300))
+
+
+def test_run_pipelined_stages_basic() -> None:
+    """Test that every item goes through every stage exactly once."""
+    stages = [
+        PipelineStage(name="double", func=lambda x: x * 2),
+        PipelineStage(name="increment", func=lambda x: x + 1, num_workers=3),
+    ]
+
+    results = list(run_pipelined_stages(range(50), stages, max_queue_size=2))
+
+    assert sorted(results) == [x * 2 + 1 for x in range(50)]
+
+
+def test_run_pipelined_stages_overlaps_stages() -> None:
+    """Test that a later stage runs while an earlier stage is still working."""
+    first_stage_done = threading.Event()
+    overlapped = threading.Event()
+
+    def first(x: int) -> int:
+        if x == 2:
+            # the second stage should be able to pick up item 0 while we're here
+            overlapped.wait(timeout=2)
+            first_stage_done.set()
+        return x
+
+    def second(x: int) -> int:
+        if x == 0 and not first_stage_done.is_set():
+            overlapped.set()
+        return x
+
+    stages = [
+        PipelineStage(name="first", func=first),
+        PipelineStage(name="second", func=second),
+    ]
+
+    assert sorted(run_pipelined_stages([0, 1, 2], stages)) == [0, 1, 2]
+    assert overlapped.is_set()
+
+
+def test_run_pipelined_stages_backpressure() -> None:
+    """Test that a slow consumer bounds how far ahead the stages run."""
+    max_queue_size = 1
+    produced: list[int] = []
+
+    def produce(x: int) -> int:
+        produced.append(x)
+        return x
+
+    stages = [PipelineStage(name="produce", func=produce)]
+    pipeline = run_pipelined_stages(range(100), stages, max_queue_size=max_queue_size)
+
+    assert next(pipeline) == 0
+    time.sleep(0.3)
+    # one item in the output queue + one in flight in the stage
+    assert len(produced) <= 1 + max_queue_size + 1
+
+    assert list(pipeline) == list(range(1, 100))
+
+
+def test_run_pipelined_stages_propagates_exceptions() -> None:
+    """Test that a failing stage aborts the pipeline and re-raises in the caller."""
+
+    def fail_on_five(x: int) -> int:
+        if x == 5:
+            raise ValueError("stage failure")
+        return x
+
+    stages = [
+        PipelineStage(name="fail", func=fail_on_five, num_workers=2),
+        PipelineStage(name="identity", func=lambda x: x),
+    ]
+
+    with pytest.raises(ValueError, match="stage failure"):
+        list(run_pipelined_stages(range(100), stages))
+
+
+def test_run_pipelined_stages_preserves_contextvars() -> None:
+    """Test that contextvars are propagated to the stage workers."""
+    test_context_var.set("pipeline_value")
+
+    stages = [
+        PipelineStage(name="read_var", func=lambda _: test_context_var.get()),
+    ]
+
+    assert list(run_pipelined_stages([1, 2, 3], stages)) == ["pipeline_value"] * 3